@@ -191,3 +191,36 @@ def test_all_surveys_require_encryption_before_publishing(django_user_model):
     # Verify survey was NOT published
     survey.refresh_from_db()
     assert survey.status == Survey.Status.DRAFT
+
+
+@pytest.mark.django_db
+def test_metrics_bucketed_series(django_user_model):
+    owner = django_user_model.objects.create_user(username="owner5", password="x")
+    client = APIClient()
+    client.force_authenticate(owner)
+    survey = Survey.objects.create(owner=owner, name="S1", slug="s1")
+    SurveyResponse.objects.create(survey=survey, answers={})
+    r = SurveyResponse.objects.create(survey=survey, answers={})
+    r.submitted_at = timezone.now() - timezone.timedelta(days=3)
+    r.save(update_fields=["submitted_at"])
+
+    url = f"/api/surveys/{survey.id}/metrics/responses/"
+
+    resp = client.get(url, {"bucket": "day"})
+    assert resp.status_code == 200
+    points = resp.data["series"]["points"]
+    assert resp.data["series"]["bucket"] == "day"
+    assert len(points) == 14
+    assert points[-1]["start"] == timezone.now().date().isoformat()
+    assert [p["count"] for p in points][-4:] == [1, 0, 0, 1]
+
+    resp = client.get(url, {"bucket": "week"})
+    assert resp.status_code == 200
+    assert sum(p["count"] for p in resp.data["series"]["points"]) == 2
+
+    resp = client.get(url, {"bucket": "fortnight"})
+    assert resp.status_code == 400
+
+    # Without bucket the response is unchanged
+    resp = client.get(url)
+    assert "series" not in resp.data
@@ -0,0 +1,233 @@
+from datetime import timedelta
+import json
+import os
+
+from django.core import mail
+from django.utils import timezone
+import pytest
+from rest_framework.test import APIClient
+
+from checktick_app.surveys.models import (
+    AuditLog,
+    QuestionGroup,
+    Survey,
+    SurveyMembership,
+    SurveyResponse,
+)
+from checktick_app.surveys.services.response_listing import (
+    ResponseListQuery,
+    iter_ndjson,
+    list_page,
+)
+
+
+@pytest.fixture
+def owner(django_user_model):
+    return django_user_model.objects.create_user(
+        username="owner", email="owner@example.com", password="x"
+    )
+
+
+@pytest.fixture
+def survey(owner):
+    return Survey.objects.create(owner=owner, name="S1", slug="s1")
+
+
+@pytest.fixture
+def client(owner):
+    client = APIClient()
+    client.force_authenticate(owner)
+    return client
+
+
+def add_responses(survey, count, submitted_at=None):
+    """Responses answering q1 with their position; all at one time if given."""
+    responses = [
+        SurveyResponse.objects.create(survey=survey, answers={"q1": str(i)})
+        for i in range(count)
+    ]
+    if submitted_at:
+        SurveyResponse.objects.filter(id__in=[r.id for r in responses]).update(
+            submitted_at=submitted_at
+        )
+    return responses
+
+
+def url(survey):
+    return f"/api/surveys/{survey.id}/responses/"
+
+
+@pytest.mark.django_db
+def test_pages_follow_the_cursor_without_gaps_or_repeats(client, survey):
+    now = timezone.now()
+    # Ties on submitted_at are broken by id
+    add_responses(survey, 4, submitted_at=now - timedelta(hours=1))
+    add_responses(survey, 3)
+    expected = list(
+        survey.responses.order_by("submitted_at", "id").values_list("id", flat=True)
+    )
+
+    seen, cursor = [], None
+    for _ in range(10):
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        resp = client.get(url(survey), params)
+        assert resp.status_code == 200
+        seen += [item["id"] for item in resp.data["items"]]
+        cursor = resp.data["next_cursor"]
+        if not resp.data["has_more"]:
+            break
+
+    assert seen == expected
+    # Responses submitted later are picked up from the final cursor
+    (late,) = add_responses(survey, 1)
+    resp = client.get(url(survey), {"cursor": cursor})
+    assert [item["id"] for item in resp.data["items"]] == [late.id]
+
+
+@pytest.mark.django_db
+def test_since_and_field_projection(client, survey):
+    add_responses(survey, 2, submitted_at=timezone.now() - timedelta(days=10))
+    recent = add_responses(survey, 2)
+
+    since = (timezone.now() - timedelta(days=1)).date().isoformat()
+    resp = client.get(url(survey), {"since": since, "fields": "id,answers"})
+
+    assert resp.status_code == 200
+    assert resp.data["items"] == [
+        {"id": recent[0].id, "answers": {"q1": "0"}},
+        {"id": recent[1].id, "answers": {"q1": "1"}},
+    ]
+
+
+@pytest.mark.django_db
+def test_stream_returns_ndjson_lines_with_resumable_cursors(client, survey):
+    responses = add_responses(survey, 5)
+    frozen = responses[2]
+    SurveyResponse.objects.filter(id=frozen.id).update(is_frozen=True)
+
+    resp = client.get(url(survey), {"stream": "1", "fields": "id"})
+    assert resp["Content-Type"] == "application/x-ndjson"
+    lines = [
+        json.loads(line)
+        for line in b"".join(resp.streaming_content).decode().splitlines()
+    ]
+    assert [line["id"] for line in lines] == [
+        r.id for r in responses if r.id != frozen.id
+    ]
+
+    resumed = client.get(
+        url(survey), {"stream": "1", "fields": "id", "cursor": lines[1]["cursor"]}
+    )
+    resumed_ids = [
+        json.loads(line)["id"]
+        for line in b"".join(resumed.streaming_content).decode().splitlines()
+    ]
+    assert resumed_ids == [line["id"] for line in lines[2:]]
+
+
+@pytest.mark.django_db
+def test_invalid_parameters_are_rejected(client, survey):
+    assert client.get(url(survey), {"cursor": "not-a-cursor"}).status_code == 400
+    assert client.get(url(survey), {"fields": "id,secret"}).status_code == 400
+    assert client.get(url(survey), {"limit": "5000"}).status_code == 400
+
+
+@pytest.mark.django_db
+def test_listing_requires_export_permission(django_user_model, survey):
+    viewer = django_user_model.objects.create_user(username="viewer", password="x")
+    SurveyMembership.objects.create(
+        user=viewer, survey=survey, role=SurveyMembership.Role.VIEWER
+    )
+    client = APIClient()
+    client.force_authenticate(viewer)
+
+    assert client.get(url(survey)).status_code == 403
+
+
+@pytest.mark.django_db
+def test_encrypted_answers_need_an_unlocked_survey(client, owner, survey):
+    group = QuestionGroup.objects.create(
+        name="Patient Details",
+        owner=owner,
+        schema={"template": "patient_details_encrypted"},
+    )
+    survey.question_groups.add(group)
+    survey_key = os.urandom(32)
+    response = SurveyResponse(survey=survey)
+    response.store_complete_response(survey_key, {"q1": "yes"}, {"nhs": "1"})
+    response.save()
+
+    # Without a key in the session only unencrypted fields can be listed
+    assert client.get(url(survey)).status_code == 403
+    resp = client.get(url(survey), {"fields": "id,submitted_at"})
+    assert resp.status_code == 200
+    assert [item["id"] for item in resp.data["items"]] == [response.id]
+
+    # With the unlocked key, pages and streams are decrypted
+    query = ResponseListQuery()
+    (item,) = list_page(survey, query, survey_key)["items"]
+    assert item["answers"] == {"q1": "yes"}
+    assert item["demographics"] == {"nhs": "1"}
+    (line,) = b"".join(iter_ndjson(survey, query, survey_key)).splitlines()
+    assert json.loads(line)["answers"] == {"q1": "yes"}
+
+
+def listing_audit_entries(survey):
+    return list(
+        AuditLog.objects.filter(
+            action=AuditLog.Action.DATA_EXPORTED, metadata__survey_id=str(survey.id)
+        ).order_by("id")
+    )
+
+
+@pytest.mark.django_db
+def test_pages_and_streams_are_audit_logged(client, owner, survey):
+    add_responses(survey, 3)
+
+    first = client.get(url(survey), {"limit": 2, "fields": "id,answers"})
+    second = client.get(url(survey), {"cursor": first.data["next_cursor"]})
+    stream = client.get(url(survey), {"stream": "1", "fields": "id"})
+    lines = b"".join(stream.streaming_content).decode().splitlines()
+
+    page_one, page_two, streamed = listing_audit_entries(survey)
+    assert page_one.actor == owner
+    assert page_one.scope == AuditLog.Scope.DATA_GOVERNANCE
+    assert page_one.metadata["fields"] == ["id", "answers"]
+    assert page_one.metadata["response_count"] == 2
+    assert page_one.metadata["start_cursor"] is None
+    assert page_one.metadata["end_cursor"] == first.data["next_cursor"]
+    assert page_two.metadata["response_count"] == 1
+    assert page_two.metadata["start_cursor"] == first.data["next_cursor"]
+    assert page_two.metadata["end_cursor"] == second.data["next_cursor"]
+    assert streamed.metadata["stream"] is True
+    assert streamed.metadata["response_count"] == 3
+    assert streamed.metadata["end_cursor"] == json.loads(lines[-1])["cursor"]
+
+    # Owners hear about a user's first listing only, not every page or stream
+    assert len(mail.outbox) == 1
+    assert mail.outbox[0].to == ["owner@example.com"]
+
+
+@pytest.mark.django_db
+def test_incremental_syncs_notify_owners_once_per_user(client, survey):
+    add_responses(survey, 2)
+    since = timezone.now().isoformat()
+
+    for _ in range(3):
+        assert client.get(url(survey), {"since": since}).status_code == 200
+        stream = client.get(url(survey), {"stream": "1", "since": since})
+        b"".join(stream.streaming_content)
+    assert len(listing_audit_entries(survey)) == 6
+    assert len(mail.outbox) == 1
+
+
+@pytest.mark.django_db
+def test_deleted_surveys_cannot_be_listed(client, survey):
+    add_responses(survey, 1)
+    survey.soft_delete()
+
+    assert client.get(url(survey)).status_code == 403
+    assert client.get(url(survey), {"stream": "1"}).status_code == 403
+    assert listing_audit_entries(survey) == []
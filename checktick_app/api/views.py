@@ -5,6 +5,7 @@ from typing import Any
 from csp.decorators import csp_exempt
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.http import StreamingHttpResponse
 from django.shortcuts import render
 from django.utils import timezone
 from django.utils.dateparse import parse_datetime
@@ -33,7 +34,23 @@ from checktick_app.surveys.models import (
     SurveyMembership,
     SurveyQuestion,
 )
-from checktick_app.surveys.permissions import can_edit_survey, can_view_survey
+from checktick_app.surveys.permissions import (
+    can_edit_survey,
+    can_export_survey_data,
+    can_view_survey,
+)
+from checktick_app.surveys.services.accessible_surveys import accessible_surveys
+from checktick_app.surveys.services.crosstab import InsightsQuery, compute_insights
+from checktick_app.surveys.services.response_listing import (
+    ResponseListQuery,
+    iter_ndjson,
+    list_page,
+)
+from checktick_app.surveys.services.time_series import (
+    BUCKET_FUNCTIONS,
+    recent_series,
+    summary_counts,
+)
 
 User = get_user_model()
 
@@ -337,17 +354,14 @@ class SurveyViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated, OrgOwnerOrAdminPermission]
 
     def get_queryset(self):
-        user = self.request.user
-        # Owner's surveys
-        owned = Survey.objects.filter(owner=user)
-        # Org-admin surveys: any survey whose organization has the user as ADMIN
-        org_admin = Survey.objects.filter(
-            organization__memberships__user=user,
-            organization__memberships__role=OrganizationMembership.Role.ADMIN,
+        # Owned surveys, surveys in organisations where the user is ADMIN and
+        # surveys with an explicit membership, in one query without DISTINCT
+        return accessible_surveys(
+            self.request.user,
+            org_roles=[OrganizationMembership.Role.ADMIN],
+            include_teams=False,
+            originals_only=False,
         )
-        # Survey membership: surveys where user has explicit membership
-        survey_member = Survey.objects.filter(memberships__user=user)
-        return (owned | org_admin | survey_member).distinct()
 
     def get_object(self):
         """Fetch object without scoping to queryset, then run object permissions.
@@ -636,25 +650,168 @@ class SurveyViewSet(viewsets.ModelViewSet):
         """Return counts of completed responses for this survey.
 
         SAFE method follows can_view_survey rules via OrgOwnerOrAdminPermission.
+
+        Optional ``?bucket=hour|day|week`` adds a gap-filled ``series`` of
+        per-bucket counts (last 48 hours, 14 days or 12 weeks respectively).
         """
         survey = self.get_object()
+        bucket = request.query_params.get("bucket")
+        if bucket and bucket not in BUCKET_FUNCTIONS:
+            raise serializers.ValidationError(
+                {"bucket": f"Must be one of: {', '.join(BUCKET_FUNCTIONS)}"}
+            )
+
         now = timezone.now()
-        start_today = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        total = survey.responses.count()
-        today = survey.responses.filter(submitted_at__gte=start_today).count()
-        last7 = survey.responses.filter(
-            submitted_at__gte=now - timezone.timedelta(days=7)
-        ).count()
-        last14 = survey.responses.filter(
-            submitted_at__gte=now - timezone.timedelta(days=14)
-        ).count()
-        return Response(
-            {
-                "total": total,
-                "today": today,
-                "last7": last7,
-                "last14": last14,
-            }
+        data = summary_counts(survey.responses.all(), "submitted_at", now=now)
+        if bucket:
+            data["series"] = recent_series(
+                survey.responses.all(), "submitted_at", bucket=bucket, now=now
+            ).as_dict()
+        return Response(data)
+
+    @action(
+        detail=True,
+        methods=["get"],
+        permission_classes=[permissions.IsAuthenticated, OrgOwnerOrAdminPermission],
+    )
+    def insights(self, request, pk=None):
+        """Return answer distributions, optionally filtered and cross-tabulated.
+
+        Query parameters:
+        - ``since`` / ``until``: ISO date or datetime bounds on submitted_at
+        - ``filter``: repeatable ``question_id:operator[:value]`` expression using
+          the branching operators (eq, neq, contains, gt, exists, ...)
+        - ``row`` / ``column``: choice question ids for a contingency table
+        """
+        survey = self.get_object()
+        try:
+            query = InsightsQuery.from_params(request.query_params)
+            insights = compute_insights(survey, query)
+        except ValueError as e:
+            raise serializers.ValidationError({"detail": str(e)})
+        return Response(insights.as_dict())
+
+    @action(
+        detail=True,
+        methods=["get"],
+        permission_classes=[permissions.IsAuthenticated, OrgOwnerOrAdminPermission],
+    )
+    def responses(self, request, pk=None):
+        """List responses in submission order, a page or a stream at a time.
+
+        Requires export permission (can_export_survey_data). Frozen responses
+        are excluded.
+
+        Query parameters:
+        - ``cursor``: continue after the page's ``next_cursor`` (or a streamed
+          line's ``cursor``)
+        - ``since``: ISO date or datetime; only responses submitted from then
+        - ``fields``: comma-separated subset of id, submitted_at,
+          submitted_by, answers, demographics
+        - ``limit``: page size (default 100, at most 1000)
+        - ``stream=1``: stream every remaining response as NDJSON instead
+
+        Answers to surveys with whole-response encryption are only returned
+        once the survey is unlocked in the caller's session; without a key,
+        request fields without answers and demographics.
+
+        Listings are exports: every page and stream is written to the data
+        governance audit log, and the survey owners are emailed the first
+        time each user lists the survey's responses, so incremental syncs do
+        not email them on every run. Deleted surveys cannot be listed.
+        """
+        survey = self.get_object()
+        if not can_export_survey_data(request.user, survey):
+            raise PermissionDenied(
+                "You do not have permission to export this survey's responses"
+            )
+        if survey.deleted_at:
+            raise PermissionDenied("Cannot list responses of a deleted survey")
+        try:
+            query = ResponseListQuery.from_params(request.query_params)
+        except ValueError as e:
+            raise serializers.ValidationError({"detail": str(e)})
+
+        survey_key = None
+        if query.reads_encrypted_data:
+            from checktick_app.surveys.views import get_survey_key_from_session
+
+            survey_key = get_survey_key_from_session(request, survey.slug)
+            if survey_key is None and survey.requires_whole_response_encryption():
+                raise PermissionDenied(
+                    "Unlock the survey to list its answers, or request only "
+                    "fields=id,submitted_at,submitted_by"
+                )
+
+        from checktick_app.surveys.views_data_governance import (
+            send_response_listing_notifications,
+        )
+
+        start_cursor = request.query_params.get("cursor") or None
+        # Checked before this listing is logged
+        notify = not self._has_listed_responses(request.user, survey)
+        if query.stream:
+
+            def on_finish(count, last_cursor):
+                self._log_response_listing(
+                    request, survey, query, count, start_cursor, last_cursor
+                )
+                if notify:
+                    send_response_listing_notifications(
+                        survey, request.user, count, streamed=True
+                    )
+
+            return StreamingHttpResponse(
+                iter_ndjson(survey, query, survey_key, on_finish=on_finish),
+                content_type="application/x-ndjson",
+            )
+
+        page = list_page(survey, query, survey_key)
+        self._log_response_listing(
+            request,
+            survey,
+            query,
+            len(page["items"]),
+            start_cursor,
+            page["next_cursor"] if page["items"] else None,
+        )
+        if notify:
+            send_response_listing_notifications(
+                survey, request.user, len(page["items"]), streamed=False
+            )
+        return Response(page)
+
+    def _has_listed_responses(self, user, survey) -> bool:
+        """Whether ``user`` has listed this survey's responses before."""
+        return AuditLog.objects.filter(
+            actor=user,
+            action=AuditLog.Action.DATA_EXPORTED,
+            metadata__source="api_response_listing",
+            metadata__survey_id=str(survey.id),
+        ).exists()
+
+    def _log_response_listing(
+        self, request, survey, query, count, start_cursor, end_cursor
+    ):
+        """Audit log a listed page or stream as a data export."""
+        AuditLog.log_data_governance(
+            actor=request.user,
+            action=AuditLog.Action.DATA_EXPORTED,
+            survey=survey,
+            message=f"Survey responses listed via API: {count} responses"
+            f"{' (stream)' if query.stream else ''}",
+            request=request,
+            metadata={
+                "source": "api_response_listing",
+                "stream": query.stream,
+                "fields": list(query.fields),
+                "response_count": count,
+                "since": query.since.isoformat() if query.since else None,
+                # Responses after start_cursor up to and including end_cursor
+                "start_cursor": start_cursor,
+                "end_cursor": end_cursor,
+                "survey_encrypted": survey.requires_whole_response_encryption(),
+            },
         )
 
     @action(
@@ -0,0 +1,43 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    """Start each test with an empty cache.
+
+    Cached branding is invalidated by model signals, which do not fire when
+    a test's database changes are rolled back.
+    """
+    from django.core.cache import cache
+
+    cache.clear()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def _media_root(settings, tmp_path):
+    """Write uploads and compiled theme stylesheets to a temporary directory.
+
+    Rendering any page compiles the brand's theme CSS into default_storage,
+    which would otherwise fill the repository's MEDIA_ROOT.
+    """
+    settings.MEDIA_ROOT = str(tmp_path / "media")
+
+
+@pytest.fixture(autouse=True)
+def _export_root(settings, tmp_path):
+    """Write generated export files to a temporary directory.
+
+    Any test that creates an export stores its file in the "exports"
+    storage, which would otherwise fill the repository's exports directory.
+    """
+    settings.STORAGES = {
+        **settings.STORAGES,
+        "exports": {
+            **settings.STORAGES["exports"],
+            "OPTIONS": {
+                **settings.STORAGES["exports"]["OPTIONS"],
+                "location": str(tmp_path / "exports"),
+            },
+        },
+    }
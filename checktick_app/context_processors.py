@@ -6,13 +6,7 @@ import subprocess
 from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 
-from checktick_app.surveys.models import (
-    Organization,
-    OrganizationMembership,
-    SurveyMembership,
-    Team,
-    TeamMembership,
-)
+from checktick_app.core.branding import get_brand, get_user_flags
 
 logger = logging.getLogger(__name__)
 
@@ -20,15 +14,6 @@ try:
     from importlib import metadata as _importlib_metadata  # Python 3.8+
 except Exception:  # pragma: no cover
     _importlib_metadata = None
-try:
-    from checktick_app.core.models import SiteBranding
-except Exception:  # pragma: no cover - tolerate missing model during migrations
-    SiteBranding = None
-try:
-    from checktick_app.core.themes import generate_theme_css_for_brand
-except Exception:  # pragma: no cover - tolerate missing module during migrations
-    generate_theme_css_for_brand = None
-
 
 _GIT_CACHE = None
 
@@ -106,216 +91,22 @@ def branding(request):
 
     These can be overridden per-survey by passing variables with the same names in a view.
     """
-    # Compute a lightweight flag to show/hide the User management link
+    # Flags to show/hide the User management and dataset links
     user = getattr(request, "user", AnonymousUser())
     can_manage_any_users = False
     can_create_datasets_flag = False
+    organization_id = None
     if user and user.is_authenticated:
-        can_manage_any_users = (
-            # Organization ownership or admin membership
-            Organization.objects.filter(owner=user).exists()
-            or OrganizationMembership.objects.filter(
-                user=user, role=OrganizationMembership.Role.ADMIN
-            ).exists()
-            # Team ownership or admin membership
-            or Team.objects.filter(owner=user).exists()
-            or TeamMembership.objects.filter(
-                user=user, role=TeamMembership.Role.ADMIN
-            ).exists()
-            # Survey creator role
-            or SurveyMembership.objects.filter(
-                user=user, role=SurveyMembership.Role.CREATOR
-            ).exists()
-        )
+        flags = get_user_flags(request, user)
+        can_manage_any_users = flags["can_manage_any_users"]
+        # Organization-level theme cascade applies to the user's organization
+        organization_id = flags["organization_id"]
         # TODO: In future, restrict dataset creation to pro individual accounts
         # All authenticated users can create datasets (individual or organization-based)
         can_create_datasets_flag = True
 
-    # All defaults are defined in settings.py - this is the single source of truth
-    brand = {
-        "title": settings.BRAND_TITLE or "CheckTick",
-        "icon_url": settings.BRAND_ICON_URL,
-        "icon_url_dark": settings.BRAND_ICON_URL_DARK,
-        "icon_alt": settings.BRAND_ICON_ALT,
-        "icon_title": settings.BRAND_ICON_TITLE,
-        "icon_size_class": None,  # Computed below
-        "theme_name": settings.BRAND_THEME or "checktick-light",
-        "font_heading": settings.BRAND_FONT_HEADING,
-        "font_body": settings.BRAND_FONT_BODY,
-        "font_css_url": settings.BRAND_FONT_CSS_URL,
-        "theme_css_light": settings.BRAND_THEME_CSS_LIGHT or "",
-        "theme_css_dark": settings.BRAND_THEME_CSS_DARK or "",
-        "theme_preset_light": settings.BRAND_THEME_PRESET_LIGHT or "lofi",
-        "theme_preset_dark": settings.BRAND_THEME_PRESET_DARK or "dim",
-    }
-    # Compute icon_size_class from settings
-    try:
-        size_class = settings.BRAND_ICON_SIZE_CLASS
-        if not size_class:
-            raw_size = settings.BRAND_ICON_SIZE
-            if isinstance(raw_size, int) or (
-                isinstance(raw_size, str) and raw_size.isdigit()
-            ):
-                size_class = f"w-{raw_size} h-{raw_size}"
-            elif isinstance(raw_size, str) and ("w-" in raw_size or "h-" in raw_size):
-                size_class = raw_size
-        brand["icon_size_class"] = size_class or "w-6 h-6"
-    except Exception:
-        brand["icon_size_class"] = "w-6 h-6"
-    # Overlay with DB-stored SiteBranding if present
-    if SiteBranding is not None:
-        try:
-            sb = SiteBranding.objects.first()
-            if sb:
-                # Determine icon href: prefer uploaded file when present
-                # Only use file reference if the file actually exists in storage
-                icon_href = brand["icon_url"]
-                dark_icon_href = brand["icon_url_dark"]
-                try:
-                    if getattr(sb, "icon_file", None) and sb.icon_file.name:
-                        # Check if file actually exists in storage before using it
-                        try:
-                            if sb.icon_file.storage.exists(sb.icon_file.name):
-                                from django.conf import settings as _s
-
-                                icon_href = f"{_s.MEDIA_URL}{sb.icon_file.name}"
-                        except Exception:
-                            pass  # File doesn't exist, fall back to default
-                    if getattr(sb, "icon_file_dark", None) and sb.icon_file_dark.name:
-                        # Check if file actually exists in storage before using it
-                        try:
-                            if sb.icon_file_dark.storage.exists(sb.icon_file_dark.name):
-                                from django.conf import settings as _s2
-
-                                dark_icon_href = (
-                                    f"{_s2.MEDIA_URL}{sb.icon_file_dark.name}"
-                                )
-                        except Exception:
-                            pass  # File doesn't exist, fall back to default
-                except Exception:
-                    pass
-
-                # Get theme presets
-                preset_light = (
-                    getattr(sb, "theme_preset_light", "")
-                    or settings.BRAND_THEME_PRESET_LIGHT
-                )
-                preset_dark = (
-                    getattr(sb, "theme_preset_dark", "")
-                    or settings.BRAND_THEME_PRESET_DARK
-                )
-
-                # Generate theme CSS from presets or use custom CSS
-                theme_css_light = brand["theme_css_light"]
-                theme_css_dark = brand["theme_css_dark"]
-
-                if generate_theme_css_for_brand:
-                    try:
-                        custom_css_light = getattr(sb, "theme_light_css", "")
-                        custom_css_dark = getattr(sb, "theme_dark_css", "")
-
-                        generated_light, generated_dark = generate_theme_css_for_brand(
-                            preset_light, preset_dark, custom_css_light, custom_css_dark
-                        )
-                        theme_css_light = generated_light
-                        theme_css_dark = generated_dark
-                    except Exception:
-                        # Fall back to raw CSS if generation fails
-                        theme_css_light = sb.theme_light_css or brand["theme_css_light"]
-                        theme_css_dark = sb.theme_dark_css or brand["theme_css_dark"]
-                else:
-                    # Fallback if themes module not available
-                    theme_css_light = sb.theme_light_css or brand["theme_css_light"]
-                    theme_css_dark = sb.theme_dark_css or brand["theme_css_dark"]
-
-                brand.update(
-                    {
-                        "icon_url": (sb.icon_url or icon_href) or None,
-                        "icon_url_dark": (sb.icon_url_dark or dark_icon_href) or None,
-                        "theme_name": sb.default_theme or brand["theme_name"],
-                        "theme_preset_light": preset_light,  # Actual daisyUI preset name
-                        "theme_preset_dark": preset_dark,  # Actual daisyUI preset name
-                        "font_heading": sb.font_heading or brand["font_heading"],
-                        "font_body": sb.font_body or brand["font_body"],
-                        "font_css_url": sb.font_css_url or brand["font_css_url"],
-                        "theme_css_light": theme_css_light,
-                        "theme_css_dark": theme_css_dark,
-                    }
-                )
-        except Exception:
-            # During migrations or early setup, ignore DB failures
-            pass
-
-    # Organization-level theme cascade (overrides platform defaults)
-    # Only apply if user is part of an organization
-    user_org = None
-    if user and user.is_authenticated:
-        try:
-            # Get user's primary organization (prefer owned, then first membership)
-            user_org = Organization.objects.filter(owner=user).first()
-            if not user_org:
-                membership = (
-                    OrganizationMembership.objects.filter(user=user)
-                    .select_related("organization")
-                    .first()
-                )
-                if membership:
-                    user_org = membership.organization
-        except Exception:
-            pass
-
-    if user_org and (
-        user_org.default_theme
-        or user_org.theme_preset_light
-        or user_org.theme_preset_dark
-    ):
-        # Organization has custom theme settings - apply cascade
-        # Use org theme if set, otherwise fall back to platform default
-        preset_light = user_org.theme_preset_light or brand.get(
-            "theme_preset_light", settings.BRAND_THEME_PRESET_LIGHT
-        )
-        preset_dark = user_org.theme_preset_dark or brand.get(
-            "theme_preset_dark", settings.BRAND_THEME_PRESET_DARK
-        )
-
-        logger.debug(
-            f"Applying org theme cascade for org_id={user_org.id}: "
-            f"default_theme={user_org.default_theme}, "
-            f"preset_light={preset_light}, preset_dark={preset_dark}"
-        )
-
-        # Generate or use organization theme CSS
-        theme_css_light = brand["theme_css_light"]
-        theme_css_dark = brand["theme_css_dark"]
-
-        if generate_theme_css_for_brand:
-            try:
-                custom_css_light = user_org.theme_light_css or ""
-                custom_css_dark = user_org.theme_dark_css or ""
-
-                generated_light, generated_dark = generate_theme_css_for_brand(
-                    preset_light, preset_dark, custom_css_light, custom_css_dark
-                )
-                theme_css_light = generated_light
-                theme_css_dark = generated_dark
-            except Exception:
-                # Fall back to raw CSS if generation fails
-                theme_css_light = user_org.theme_light_css or brand["theme_css_light"]
-                theme_css_dark = user_org.theme_dark_css or brand["theme_css_dark"]
-        else:
-            # Fallback if themes module not available
-            theme_css_light = user_org.theme_light_css or brand["theme_css_light"]
-            theme_css_dark = user_org.theme_dark_css or brand["theme_css_dark"]
-
-        brand.update(
-            {
-                "theme_name": user_org.default_theme or brand["theme_name"],
-                "theme_preset_light": preset_light,
-                "theme_preset_dark": preset_dark,
-                "theme_css_light": theme_css_light,
-                "theme_css_dark": theme_css_dark,
-            }
-        )
+    # Platform brand, with the user's organization theme over it (cached)
+    brand = get_brand(organization_id)
 
     # Build/version metadata
     git = _get_git_info()
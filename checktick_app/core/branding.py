@@ -0,0 +1,354 @@
+"""
+Cached branding resolution for the ``branding`` context processor.
+
+Resolving a brand means reading SiteBranding, checking uploaded icons exist
+in storage and generating theme CSS, which pages link to as a content-hashed
+stylesheet (``theme_css_url``) rather than inline. The stylesheets are
+written by publish_theme_stylesheets when branding is saved and on startup
+(sync_branding), not while resolving a brand. The results are kept in the
+default cache:
+
+- the platform brand (settings overlaid with SiteBranding)
+- each organization's brand (the platform brand with its theme cascade)
+- per-user flags (``can_manage_any_users`` and the user's organization),
+  in the user's session
+
+Cache keys include a version stamp. Saving or deleting SiteBranding or an
+Organization bumps the branding stamp, and changes to organizations, teams
+and their memberships bump the access stamp that guards the per-user flags
+(see signals.py). The stamps only reach every process because CACHES is a
+shared backend (the database cache by default, see settings.py); with a
+per-process cache, other processes would pick changes up once their entries
+expire after ``CHECKTICK_BRANDING_CACHE_SECONDS``.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+BRANDING_VERSION_KEY = "branding:version"
+ACCESS_VERSION_KEY = "branding:access-version"
+# Session key holding the per-user flags
+SESSION_KEY = "_branding_user"
+
+
+def _version(key: str) -> int:
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock so a stamp lost from the cache never reuses
+        # the keys of entries cached under an earlier one
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key) or 0
+    return version
+
+
+def _bump(key: str) -> None:
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Not set yet: the next read starts a fresh stamp
+        pass
+
+
+def bump_branding_version() -> None:
+    """Invalidate cached platform and organization brands."""
+    _bump(BRANDING_VERSION_KEY)
+
+
+def bump_access_version() -> None:
+    """Invalidate the per-user branding flags cached in sessions."""
+    _bump(ACCESS_VERSION_KEY)
+
+
+def _timeout() -> int:
+    return getattr(settings, "CHECKTICK_BRANDING_CACHE_SECONDS", 3600)
+
+
+def _generate_theme_css(preset_light, preset_dark, custom_light, custom_dark):
+    try:
+        from checktick_app.core.themes import generate_theme_css_for_brand
+    except Exception:  # pragma: no cover - tolerate missing module
+        return None
+    return generate_theme_css_for_brand(
+        preset_light, preset_dark, custom_light, custom_dark
+    )
+
+
+def _icon_size_class() -> str:
+    try:
+        size_class = settings.BRAND_ICON_SIZE_CLASS
+        if not size_class:
+            raw_size = settings.BRAND_ICON_SIZE
+            if isinstance(raw_size, int) or (
+                isinstance(raw_size, str) and raw_size.isdigit()
+            ):
+                size_class = f"w-{raw_size} h-{raw_size}"
+            elif isinstance(raw_size, str) and ("w-" in raw_size or "h-" in raw_size):
+                size_class = raw_size
+        return size_class or "w-6 h-6"
+    except Exception:
+        return "w-6 h-6"
+
+
+def _stored_file_url(field) -> Optional[str]:
+    """MEDIA_URL href of an uploaded file, if it exists in storage."""
+    try:
+        if field and field.name and field.storage.exists(field.name):
+            return f"{settings.MEDIA_URL}{field.name}"
+    except Exception:
+        pass  # File doesn't exist, fall back to default
+    return None
+
+
+def theme_css_url(theme_css_light: str, theme_css_dark: str) -> Optional[str]:
+    """URL of the compiled stylesheet for this theme CSS (None to inline it).
+
+    Only the digest is computed here; the file itself is written by
+    publish_theme_stylesheets.
+    """
+    from django.urls import reverse
+
+    from checktick_app.core.themes import theme_css_digest
+
+    digest = theme_css_digest(theme_css_light, theme_css_dark)
+    return reverse("core:theme_css", args=[digest]) if digest else None
+
+
+def build_platform_brand() -> Dict[str, Any]:
+    """Resolve the platform brand: settings overlaid with SiteBranding."""
+    # All defaults are defined in settings.py - this is the single source of truth
+    brand = {
+        "title": settings.BRAND_TITLE or "CheckTick",
+        "icon_url": settings.BRAND_ICON_URL,
+        "icon_url_dark": settings.BRAND_ICON_URL_DARK,
+        "icon_alt": settings.BRAND_ICON_ALT,
+        "icon_title": settings.BRAND_ICON_TITLE,
+        "icon_size_class": _icon_size_class(),
+        "theme_name": settings.BRAND_THEME or "checktick-light",
+        "font_heading": settings.BRAND_FONT_HEADING,
+        "font_body": settings.BRAND_FONT_BODY,
+        "font_css_url": settings.BRAND_FONT_CSS_URL,
+        "theme_css_light": settings.BRAND_THEME_CSS_LIGHT or "",
+        "theme_css_dark": settings.BRAND_THEME_CSS_DARK or "",
+        "theme_preset_light": settings.BRAND_THEME_PRESET_LIGHT or "lofi",
+        "theme_preset_dark": settings.BRAND_THEME_PRESET_DARK or "dim",
+    }
+    brand["theme_css_url"] = theme_css_url(
+        brand["theme_css_light"], brand["theme_css_dark"]
+    )
+
+    # Overlay with DB-stored SiteBranding if present
+    try:
+        from checktick_app.core.models import SiteBranding
+
+        sb = SiteBranding.objects.first()
+    except Exception:
+        # During migrations or early setup, ignore DB failures
+        return brand
+    if not sb:
+        return brand
+
+    # Prefer uploaded icons, but only when the file exists in storage
+    icon_href = _stored_file_url(getattr(sb, "icon_file", None)) or brand["icon_url"]
+    dark_icon_href = (
+        _stored_file_url(getattr(sb, "icon_file_dark", None)) or brand["icon_url_dark"]
+    )
+
+    preset_light = (
+        getattr(sb, "theme_preset_light", "") or settings.BRAND_THEME_PRESET_LIGHT
+    )
+    preset_dark = (
+        getattr(sb, "theme_preset_dark", "") or settings.BRAND_THEME_PRESET_DARK
+    )
+
+    # Generate theme CSS from presets, falling back to the raw custom CSS
+    try:
+        generated = _generate_theme_css(
+            preset_light,
+            preset_dark,
+            getattr(sb, "theme_light_css", ""),
+            getattr(sb, "theme_dark_css", ""),
+        )
+    except Exception:
+        generated = None
+    if generated:
+        theme_css_light, theme_css_dark = generated
+    else:
+        theme_css_light = sb.theme_light_css or brand["theme_css_light"]
+        theme_css_dark = sb.theme_dark_css or brand["theme_css_dark"]
+
+    brand.update(
+        {
+            "icon_url": (sb.icon_url or icon_href) or None,
+            "icon_url_dark": (sb.icon_url_dark or dark_icon_href) or None,
+            "theme_name": sb.default_theme or brand["theme_name"],
+            "theme_preset_light": preset_light,  # Actual daisyUI preset name
+            "theme_preset_dark": preset_dark,  # Actual daisyUI preset name
+            "font_heading": sb.font_heading or brand["font_heading"],
+            "font_body": sb.font_body or brand["font_body"],
+            "font_css_url": sb.font_css_url or brand["font_css_url"],
+            "theme_css_light": theme_css_light,
+            "theme_css_dark": theme_css_dark,
+            "theme_css_url": theme_css_url(theme_css_light, theme_css_dark),
+        }
+    )
+    return brand
+
+
+def build_organization_overrides(org, brand: Dict[str, Any]) -> Dict[str, Any]:
+    """Brand keys an organization's theme overrides (empty if it has none)."""
+    if not (org.default_theme or org.theme_preset_light or org.theme_preset_dark):
+        return {}
+
+    # Use org theme if set, otherwise fall back to platform default
+    preset_light = org.theme_preset_light or brand.get(
+        "theme_preset_light", settings.BRAND_THEME_PRESET_LIGHT
+    )
+    preset_dark = org.theme_preset_dark or brand.get(
+        "theme_preset_dark", settings.BRAND_THEME_PRESET_DARK
+    )
+
+    logger.debug(
+        f"Applying org theme cascade for org_id={org.id}: "
+        f"default_theme={org.default_theme}, "
+        f"preset_light={preset_light}, preset_dark={preset_dark}"
+    )
+
+    try:
+        generated = _generate_theme_css(
+            preset_light,
+            preset_dark,
+            org.theme_light_css or "",
+            org.theme_dark_css or "",
+        )
+    except Exception:
+        generated = None
+    if generated:
+        theme_css_light, theme_css_dark = generated
+    else:
+        theme_css_light = org.theme_light_css or brand["theme_css_light"]
+        theme_css_dark = org.theme_dark_css or brand["theme_css_dark"]
+
+    return {
+        "theme_name": org.default_theme or brand["theme_name"],
+        "theme_preset_light": preset_light,
+        "theme_preset_dark": preset_dark,
+        "theme_css_light": theme_css_light,
+        "theme_css_dark": theme_css_dark,
+        "theme_css_url": theme_css_url(theme_css_light, theme_css_dark),
+    }
+
+
+def publish_theme_stylesheets() -> set[str]:
+    """Compile the platform and organization theme stylesheets.
+
+    Stylesheets no brand uses any more are deleted. Returns the digests of
+    the stylesheets in use.
+    """
+    from checktick_app.core.themes import compile_theme_css, remove_stale_theme_css
+    from checktick_app.surveys.models import Organization
+
+    platform = build_platform_brand()
+    brands = [platform]
+    for org in Organization.objects.exclude(
+        default_theme="", theme_preset_light="", theme_preset_dark=""
+    ):
+        brands.append(build_organization_overrides(org, platform))
+
+    digests = set()
+    for brand in brands:
+        if brand.get("theme_css_url"):
+            digests.add(
+                compile_theme_css(brand["theme_css_light"], brand["theme_css_dark"])
+            )
+    remove_stale_theme_css(digests)
+    return digests
+
+
+def get_platform_brand() -> Dict[str, Any]:
+    """The platform brand, from the cache when possible."""
+    key = f"branding:{_version(BRANDING_VERSION_KEY)}:platform"
+    brand = cache.get(key)
+    if brand is None:
+        brand = build_platform_brand()
+        cache.set(key, brand, _timeout())
+    return dict(brand)
+
+
+def get_brand(organization_id: Optional[int] = None) -> Dict[str, Any]:
+    """The brand for an organization's members (or the platform brand)."""
+    brand = get_platform_brand()
+    if organization_id is None:
+        return brand
+
+    key = f"branding:{_version(BRANDING_VERSION_KEY)}:org:{organization_id}"
+    overrides = cache.get(key)
+    if overrides is None:
+        from checktick_app.surveys.models import Organization
+
+        org = Organization.objects.filter(id=organization_id).first()
+        overrides = build_organization_overrides(org, brand) if org else {}
+        cache.set(key, overrides, _timeout())
+    brand.update(overrides)
+    return brand
+
+
+def _resolve_user_flags(user) -> Dict[str, Any]:
+    from checktick_app.surveys.models import (
+        OrganizationMembership,
+        SurveyMembership,
+        Team,
+        TeamMembership,
+    )
+    from checktick_app.surveys.permissions import get_permission_context
+
+    # Roles come from the request's permission context, so the role tables
+    # are not queried again here
+    roles = get_permission_context(user)
+
+    can_manage_any_users = (
+        # Organization ownership or admin membership
+        bool(roles.owned_org_ids)
+        or OrganizationMembership.Role.ADMIN in roles.org_roles.values()
+        # Team ownership or admin membership
+        or Team.objects.filter(owner=user).exists()
+        or TeamMembership.Role.ADMIN in roles.team_roles.values()
+        # Survey creator role
+        or SurveyMembership.Role.CREATOR in roles.survey_roles.values()
+    )
+
+    # User's primary organization (prefer owned, then first membership)
+    organization_id = min(roles.owned_org_ids, default=None)
+    if organization_id is None:
+        organization_id = next(iter(roles.org_roles), None)
+
+    return {
+        "can_manage_any_users": can_manage_any_users,
+        "organization_id": organization_id,
+    }
+
+
+def get_user_flags(request, user) -> Dict[str, Any]:
+    """Per-user branding flags, cached in the session until access changes."""
+    session = getattr(request, "session", None)
+    version = _version(ACCESS_VERSION_KEY)
+    if session is not None:
+        cached = session.get(SESSION_KEY)
+        if (
+            cached
+            and cached.get("user_id") == user.pk
+            and cached.get("version") == version
+        ):
+            return cached
+
+    flags = _resolve_user_flags(user)
+    if session is not None:
+        session[SESSION_KEY] = {"user_id": user.pk, "version": version, **flags}
+    return flags
@@ -6,14 +6,15 @@ theming (for survey-specific emails).
 
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.template import TemplateDoesNotExist
 from django.template.loader import render_to_string
-from django.utils.html import strip_tags
+from django.utils.html import escape, strip_tags
 import markdown
 
 logger = logging.getLogger(__name__)
@@ -106,30 +107,25 @@ def markdown_to_html(markdown_text: str) -> str:
     )
 
 
-def send_branded_email(
-    to_email: str,
+def render_branded_email(
     subject: str,
     markdown_content: str,
-    branding: Optional[Dict[str, Any]] = None,
+    branding: Dict[str, Any],
     context: Optional[Dict[str, Any]] = None,
-    from_email: Optional[str] = None,
-) -> bool:
-    """Send a branded email with markdown content.
+    to_email: Optional[str] = None,
+) -> Tuple[str, str]:
+    """Render a branded email to its HTML and plain text bodies.
 
     Args:
-        to_email: Recipient email address
         subject: Email subject line
         markdown_content: Email body in markdown format
         branding: Brand configuration (platform or survey-level)
         context: Additional template context variables
-        from_email: Sender email (defaults to DEFAULT_FROM_EMAIL)
+        to_email: Recipient, used only when logging render failures
 
     Returns:
-        True if email sent successfully, False otherwise
+        Tuple of (html_message, plain_message)
     """
-    if not branding:
-        branding = get_platform_branding()
-
     if not context:
         context = {}
 
@@ -178,6 +174,37 @@ def send_branded_email(
     # Generate plain text version
     plain_message = strip_tags(html_content)
 
+    return html_message, plain_message
+
+
+def send_branded_email(
+    to_email: str,
+    subject: str,
+    markdown_content: str,
+    branding: Optional[Dict[str, Any]] = None,
+    context: Optional[Dict[str, Any]] = None,
+    from_email: Optional[str] = None,
+) -> bool:
+    """Send a branded email with markdown content.
+
+    Args:
+        to_email: Recipient email address
+        subject: Email subject line
+        markdown_content: Email body in markdown format
+        branding: Brand configuration (platform or survey-level)
+        context: Additional template context variables
+        from_email: Sender email (defaults to DEFAULT_FROM_EMAIL)
+
+    Returns:
+        True if email sent successfully, False otherwise
+    """
+    if not branding:
+        branding = get_platform_branding()
+
+    html_message, plain_message = render_branded_email(
+        subject, markdown_content, branding, context, to_email=to_email
+    )
+
     # Send email
     try:
         email = EmailMultiAlternatives(
@@ -644,6 +671,220 @@ def send_authenticated_survey_invite_new_user(
     )
 
 
+# Invitation templates for SurveyInviteSender: kind -> (template, subject)
+SURVEY_INVITE_TEMPLATES = {
+    "token": ("emails/survey_invite.md", "You're invited to complete: {name}"),
+    "existing_user": (
+        "emails/survey_invite_authenticated.md",
+        "You're invited to complete: {name}",
+    ),
+    "new_user": (
+        "emails/survey_invite_authenticated_new.md",
+        "You're invited to join CheckTick and complete: {name}",
+    ),
+}
+
+# Stand-ins for per-recipient values in pre-rendered invitations. Plain
+# words survive markdown and HTML escaping unchanged.
+_RECIPIENT_PLACEHOLDERS = {
+    "survey_link": "CHECKTICKRECIPIENTSURVEYLINK",
+    "signup_link": "CHECKTICKRECIPIENTSIGNUPLINK",
+    "qr_code_data_uri": "CHECKTICKRECIPIENTQRCODE",
+}
+
+
+class SurveyInviteSender:
+    """Send many invitations for one survey over a single mail connection.
+
+    The same messages as send_survey_invite_email and the
+    send_authenticated_survey_invite_* functions, built in bulk: branding,
+    organization and deadline are resolved once, each invite template is
+    rendered once with placeholders, and recipients only substitute their
+    own links and QR code. Messages are built on a thread pool and sent
+    through one reused connection.
+
+    Use as a context manager so the connection and pool are closed::
+
+        with SurveyInviteSender(survey, contact_email=...) as sender:
+            failed = sender.send([(email, "token", token), ...])
+    """
+
+    def __init__(
+        self,
+        survey,
+        contact_email: Optional[str] = None,
+        include_qr_code: bool = True,
+        max_workers: Optional[int] = None,
+        connection=None,
+    ):
+        from django.utils.formats import date_format
+
+        self.survey = survey
+        self.contact_email = contact_email
+        self.include_qr_code = include_qr_code
+        self.branding = get_survey_branding(survey)
+        self.site_url = getattr(settings, "SITE_URL", "http://localhost:8000")
+        self.organization_name = (
+            survey.organization.name if survey.organization else None
+        )
+        self.end_date = (
+            date_format(survey.end_at, "DATETIME_FORMAT") if survey.end_at else None
+        )
+        self.connection = connection or get_connection()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers
+            or getattr(settings, "CHECKTICK_INVITE_RENDER_WORKERS", 4)
+        )
+        self._templates: Dict[str, Tuple[str, str, str]] = {}
+        self._survey_qr_code: Optional[str] = None
+
+    def __enter__(self) -> "SurveyInviteSender":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._executor.shutdown()
+        self.connection.close()
+
+    def _open_connection(self) -> None:
+        """Open the mail session, leaving send_messages() to report failures."""
+        try:
+            self.connection.open()
+        except Exception as e:
+            logger.warning(f"Could not open mail connection: {e}")
+
+    def _template(self, kind: str) -> Tuple[str, str, str]:
+        """Return (subject, html, plain) for an invite kind, with placeholders."""
+        if kind not in self._templates:
+            template_name, subject = SURVEY_INVITE_TEMPLATES[kind]
+            subject = subject.format(name=self.survey.name)
+            context = {
+                "survey_name": self.survey.name,
+                "survey_link": _RECIPIENT_PLACEHOLDERS["survey_link"],
+                "signup_link": _RECIPIENT_PLACEHOLDERS["signup_link"],
+                "organization_name": self.organization_name,
+                "end_date": self.end_date,
+                "contact_email": self.contact_email,
+                "qr_code_data_uri": (
+                    _RECIPIENT_PLACEHOLDERS["qr_code_data_uri"]
+                    if self.include_qr_code
+                    else None
+                ),
+            }
+            markdown_content = render_to_string(
+                template_name, {**context, "brand_title": self.branding["title"]}
+            )
+            self._templates[kind] = (
+                subject,
+                *render_branded_email(
+                    subject, markdown_content, self.branding, context
+                ),
+            )
+        return self._templates[kind]
+
+    def _survey_link(self, token: Optional[str] = None) -> str:
+        if token:
+            return f"{self.site_url}/surveys/{self.survey.slug}/take/token/{token}/"
+        return f"{self.site_url}/surveys/{self.survey.slug}/take/"
+
+    def _qr_code(self, token: Optional[str]) -> Optional[str]:
+        from .qr_utils import generate_qr_code_data_uri
+
+        if not self.include_qr_code:
+            return None
+        if token:
+            return generate_qr_code_data_uri(self._survey_link(token), size=200)
+        # Authenticated invites all share the survey link
+        if self._survey_qr_code is None:
+            self._survey_qr_code = generate_qr_code_data_uri(
+                self._survey_link(), size=200
+            )
+        return self._survey_qr_code
+
+    def build_message(
+        self, to_email: str, kind: str, token: Optional[str] = None
+    ) -> EmailMultiAlternatives:
+        """Build the invitation of the given kind for one recipient."""
+        subject, html_message, plain_message = self._template(kind)
+        if kind != "token":
+            token = None
+        values = {
+            "survey_link": self._survey_link(token),
+            "signup_link": (
+                f"{self.site_url}/signup/?next=/surveys/{self.survey.slug}/take/"
+                f"&email={to_email}"
+            ),
+            "qr_code_data_uri": self._qr_code(token) or "",
+        }
+        for field, placeholder in _RECIPIENT_PLACEHOLDERS.items():
+            # Escaped as the template engine escapes them
+            value = escape(values[field])
+            html_message = html_message.replace(placeholder, value)
+            plain_message = plain_message.replace(placeholder, value)
+
+        email = EmailMultiAlternatives(
+            subject=subject,
+            body=plain_message,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[to_email],
+            connection=self.connection,
+        )
+        email.attach_alternative(html_message, "text/html")
+        return email
+
+    def send(self, invites) -> list:
+        """Send a batch of invitations.
+
+        Args:
+            invites: Iterable of (to_email, kind, token) tuples, where kind is
+                a key of SURVEY_INVITE_TEMPLATES and token is only used for
+                "token" invites
+
+        Returns:
+            The email addresses that could not be sent to
+        """
+        invites = list(invites)
+        # Render every kind (and the shared QR code) up front so the pool
+        # threads only substitute per-recipient values
+        for kind in {kind for _, kind, _ in invites}:
+            self._template(kind)
+            if kind != "token":
+                self._qr_code(None)
+        messages = self._executor.map(
+            lambda invite: self.build_message(*invite), invites
+        )
+
+        failed = []
+        # Backends only keep a session across send_messages() calls once it
+        # has been opened explicitly; close() ends it
+        self._open_connection()
+        for (to_email, _, _), email in zip(invites, messages):
+            try:
+                self.connection.send_messages([email])
+            except Exception as e:
+                logger.error(
+                    f"Failed to send survey invite to {to_email}: {email.subject}",
+                    exc_info=True,
+                    extra={
+                        "recipient": to_email,
+                        "survey_slug": self.survey.slug,
+                        "error_type": type(e).__name__,
+                        "email_backend": settings.EMAIL_BACKEND,
+                    },
+                )
+                failed.append(to_email)
+                # Reconnect for the next message in case the server hung up
+                self.connection.close()
+                self._open_connection()
+        logger.info(
+            f"Sent {len(invites) - len(failed)} of {len(invites)} survey invites "
+            f"for survey: {self.survey.name} ({self.survey.slug})"
+        )
+        return failed
+
+
 def send_subscription_created_email(
     user, tier: str, billing_cycle: str = "Monthly"
 ) -> bool:
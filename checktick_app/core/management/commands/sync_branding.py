@@ -5,7 +5,8 @@ This ensures that deployment configuration always takes precedence over stale da
 Run this command on each deployment/startup.
 
 The sync_branding command updates SiteBranding (platform-level settings) only.
-Organization-level themes are stored in the Organization model and are NOT affected.
+Organization-level themes are stored in the Organization model and are NOT affected,
+but every brand's theme stylesheet is recompiled and unused ones are deleted.
 
 Precedence:
 - Platform: env vars → SiteBranding database → built-in defaults
@@ -16,6 +17,7 @@ Precedence:
 from django.conf import settings
 from django.core.management.base import BaseCommand
 
+from checktick_app.core.branding import publish_theme_stylesheets
 from checktick_app.core.models import SiteBranding
 
 
@@ -91,3 +93,7 @@ class Command(BaseCommand):
             )
         else:
             self.stdout.write("No branding changes needed")
+
+        # Theme CSS may also come from settings or change between releases
+        digests = publish_theme_stylesheets()
+        self.stdout.write(f"Published {len(digests)} theme stylesheet(s)")
@@ -17,6 +17,7 @@ TWO_FACTOR_EXEMPT_URLS = [
     "/oidc/",  # OIDC auth flow
     "/static/",  # Static files
     "/media/",  # Media files
+    "/theme/",  # Compiled brand theme CSS
 ]
 
 
@@ -122,3 +123,23 @@ class UserLanguageMiddleware:
 
         response = self.get_response(request)
         return response
+
+
+class PermissionContextMiddleware:
+    """Middleware to share one permission context between a request's checks.
+
+    Attaches a PermissionContext to request.user (and request.permissions),
+    so the user's organisation, team and survey roles are loaded at most once
+    per request however many permission checks the view and its templates
+    make. Must be placed after AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Import here to avoid circular imports
+        from checktick_app.surveys.permissions import attach_permission_context
+
+        request.permissions = attach_permission_context(request.user)
+        return self.get_response(request)
@@ -11,10 +11,15 @@ from django.contrib.auth.signals import (
     user_logged_out,
     user_login_failed,
 )
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from .models import UserProfile
+from .branding import (
+    bump_access_version,
+    bump_branding_version,
+    publish_theme_stylesheets,
+)
+from .models import SiteBranding, UserProfile
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -92,6 +97,43 @@ def process_pending_invitations(sender, instance, created, **kwargs):
                 )
 
 
+@receiver(post_save, sender=SiteBranding)
+@receiver(post_delete, sender=SiteBranding)
+@receiver(post_save, sender="surveys.Organization")
+@receiver(post_delete, sender="surveys.Organization")
+def invalidate_cached_branding(sender, **kwargs):
+    """Drop cached platform/organization brands when their settings change.
+
+    Their theme stylesheets are recompiled here too, so resolving a brand
+    never writes files and replaced stylesheets are deleted.
+    """
+    bump_branding_version()
+    try:
+        publish_theme_stylesheets()
+    except Exception:
+        logger.warning("Failed to publish theme stylesheets", exc_info=True)
+
+
+# Models that decide a user's organization and can_manage_any_users flag
+_BRANDING_ACCESS_MODELS = [
+    "surveys.Organization",
+    "surveys.OrganizationMembership",
+    "surveys.Team",
+    "surveys.TeamMembership",
+    "surveys.SurveyMembership",
+]
+
+
+def invalidate_cached_branding_access(sender, **kwargs):
+    """Drop per-user branding flags cached in sessions when access changes."""
+    bump_access_version()
+
+
+for _model in _BRANDING_ACCESS_MODELS:
+    post_save.connect(invalidate_cached_branding_access, sender=_model)
+    post_delete.connect(invalidate_cached_branding_access, sender=_model)
+
+
 @receiver(user_locked_out)
 def send_lockout_notification(sender, request, username, credentials, **kwargs):
     """Send email notification when a user account is locked out.
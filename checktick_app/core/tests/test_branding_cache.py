@@ -0,0 +1,158 @@
+"""Tests for the cached branding context processor."""
+
+from io import StringIO
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from checktick_app.context_processors import branding
+from checktick_app.core.models import SiteBranding
+from checktick_app.core.themes import THEME_CSS_DIR, theme_css_path
+from checktick_app.surveys.models import Organization
+
+User = get_user_model()
+
+TEST_PASSWORD = "x"
+
+
+class BrandingCacheTestCase(TestCase):
+    """The branding processor is served from the cache and session."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="orgowner", email="owner@test.com", password=TEST_PASSWORD
+        )
+        self.org = Organization.objects.create(
+            name="Org", owner=self.user, theme_preset_light="cupcake"
+        )
+        self.session = SessionStore()
+
+    def _context(self, user=None):
+        request = RequestFactory().get("/")
+        request.user = user or self.user
+        request.session = self.session
+        return branding(request)
+
+    def test_warm_cache_makes_no_queries(self):
+        self._context()
+
+        with self.assertNumQueries(0):
+            context = self._context()
+
+        self.assertTrue(context["can_manage_any_users"])
+        self.assertEqual(context["brand"]["theme_preset_light"], "cupcake")
+
+    def test_site_branding_save_invalidates_platform_brand(self):
+        self._context()
+        SiteBranding.objects.create(font_heading="Test Heading Font")
+
+        context = self._context()
+
+        self.assertEqual(context["brand"]["font_heading"], "Test Heading Font")
+        # The organization theme still applies on top
+        self.assertEqual(context["brand"]["theme_preset_light"], "cupcake")
+
+    def test_organization_save_invalidates_organization_brand(self):
+        self._context()
+        self.org.theme_preset_light = "nord"
+        self.org.save()
+
+        self.assertEqual(self._context()["brand"]["theme_preset_light"], "nord")
+
+    def test_access_change_invalidates_session_flags(self):
+        member = User.objects.create_user(
+            username="member", email="member@test.com", password=TEST_PASSWORD
+        )
+        self.assertFalse(self._context(member)["can_manage_any_users"])
+
+        Organization.objects.create(name="Own Org", owner=member)
+
+        self.assertTrue(self._context(member)["can_manage_any_users"])
+
+
+class ThemeStylesheetTestCase(TestCase):
+    """Brand theme CSS is compiled to a cacheable stylesheet."""
+
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        SiteBranding.objects.create(
+            theme_light_css="--color-primary: #123456;",
+            theme_dark_css="--color-primary: #654321;",
+        )
+
+    def test_theme_css_is_linked_not_inlined(self):
+        response = self.client.get(reverse("core:home"))
+        theme_url = response.context["brand"]["theme_css_url"]
+
+        self.assertContains(response, f'<link rel="stylesheet" href="{theme_url}">')
+        self.assertNotContains(response, "#123456")
+
+        css = self.client.get(theme_url)
+        self.assertEqual(css["Cache-Control"], "public, max-age=31536000, immutable")
+        self.assertContains(css, '[data-theme="checktick-light"]')
+        self.assertContains(css, "--color-primary: #654321;")
+
+    def test_theme_change_gets_new_url(self):
+        first = self.client.get(reverse("core:home")).context["brand"]["theme_css_url"]
+        branding_row = SiteBranding.objects.get()
+        branding_row.theme_light_css = "--color-primary: #abcdef;"
+        branding_row.save()
+
+        second = self.client.get(reverse("core:home")).context["brand"]["theme_css_url"]
+
+        self.assertNotEqual(first, second)
+        # The replaced stylesheet is deleted
+        self.assertEqual(self.client.get(first).status_code, 404)
+        self.assertEqual(self.client.get(second).status_code, 200)
+
+    def test_resolving_brand_does_not_write_stylesheets(self):
+        shutil.rmtree(os.path.join(settings.MEDIA_ROOT, THEME_CSS_DIR))
+        cache.clear()
+
+        self.client.get(reverse("core:home"))
+
+        self.assertFalse(default_storage.exists(THEME_CSS_DIR))
+
+    def test_organization_theme_is_compiled_on_save(self):
+        user = User.objects.create_user(
+            username="orgowner", email="owner@test.com", password=TEST_PASSWORD
+        )
+        org = Organization.objects.create(
+            name="Org", owner=user, theme_light_css="--color-primary: #00ff00;"
+        )
+        org.theme_preset_light = "nord"
+        org.save()
+
+        _dirs, files = default_storage.listdir(THEME_CSS_DIR)
+        self.assertEqual(len(files), 2)
+        org.delete()
+        _dirs, files = default_storage.listdir(THEME_CSS_DIR)
+        self.assertEqual(len(files), 1)
+
+    def test_sync_branding_republishes_missing_stylesheets(self):
+        shutil.rmtree(os.path.join(settings.MEDIA_ROOT, THEME_CSS_DIR))
+        url = self.client.get(reverse("core:home")).context["brand"]["theme_css_url"]
+
+        call_command("sync_branding", stdout=StringIO())
+
+        digest = url.rsplit("/", 1)[-1].removesuffix(".css")
+        self.assertTrue(default_storage.exists(theme_css_path(digest)))
+
+    def test_unknown_theme_is_not_found(self):
+        response = self.client.get(reverse("core:theme_css", args=["0" * 16]))
+        self.assertEqual(response.status_code, 404)
@@ -5,12 +5,20 @@ This module provides functions to:
 - Get CSS variables from daisyUI preset themes
 - Parse custom theme configuration objects
 - Convert theme data to injectable CSS
+- Compile brand theme CSS to content-hashed files in storage
 """
 
 from __future__ import annotations
 
+import hashlib
 import re
-from typing import Dict, Optional
+from typing import Dict, Iterable, Optional
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+# Storage directory for compiled theme stylesheets
+THEME_CSS_DIR = "themes"
 
 # DaisyUI theme presets categorized by color scheme
 LIGHT_THEMES = [
@@ -213,3 +221,83 @@ def generate_theme_css_for_brand(
         dark_css = get_preset_theme_reference(preset_dark)
 
     return light_css, dark_css
+
+
+def theme_css_document(light_css: str, dark_css: str) -> str:
+    """
+    Build the stylesheet for the checktick-light and checktick-dark themes.
+
+    Args:
+        light_css: CSS declarations for the light theme
+        dark_css: CSS declarations for the dark theme
+
+    Returns:
+        CSS text, or an empty string if neither theme has declarations
+    """
+    rules = []
+    if light_css and light_css.strip():
+        rules.append(f'[data-theme="checktick-light"] {{\n  {light_css.strip()}\n}}\n')
+    if dark_css and dark_css.strip():
+        rules.append(f'[data-theme="checktick-dark"] {{\n  {dark_css.strip()}\n}}\n')
+    return "".join(rules)
+
+
+def theme_css_path(digest: str) -> str:
+    """Storage path of the compiled theme stylesheet with this digest."""
+    return f"{THEME_CSS_DIR}/theme.{digest}.css"
+
+
+def theme_css_digest(light_css: str, dark_css: str) -> Optional[str]:
+    """Content digest of the stylesheet for this theme CSS (None if empty)."""
+    css = theme_css_document(light_css, dark_css)
+    if not css:
+        return None
+    return hashlib.sha256(css.encode("utf-8")).hexdigest()[:16]
+
+
+def compile_theme_css(light_css: str, dark_css: str) -> Optional[str]:
+    """
+    Write brand theme CSS to a content-hashed file in default storage.
+
+    The file name is derived from its content, so a file is written once per
+    distinct theme and can be cached by browsers indefinitely.
+
+    Args:
+        light_css: CSS declarations for the light theme
+        dark_css: CSS declarations for the dark theme
+
+    Returns:
+        The content digest identifying the file, or None if there is no CSS
+    """
+    digest = theme_css_digest(light_css, dark_css)
+    if not digest:
+        return None
+    path = theme_css_path(digest)
+    if not default_storage.exists(path):
+        css = theme_css_document(light_css, dark_css)
+        default_storage.save(path, ContentFile(css.encode("utf-8")))
+    return digest
+
+
+def remove_stale_theme_css(keep: Iterable[str]) -> int:
+    """
+    Delete compiled theme stylesheets whose digest is not in ``keep``.
+
+    Args:
+        keep: Digests of the stylesheets still in use
+
+    Returns:
+        Number of files deleted
+    """
+    keep = set(keep)
+    try:
+        _dirs, files = default_storage.listdir(THEME_CSS_DIR)
+    except OSError:
+        return 0
+    removed = 0
+    for name in files:
+        match = re.fullmatch(r"theme\.(\w+)\.css", name)
+        if match and match.group(1) not in keep:
+            default_storage.delete(theme_css_path(match.group(1)))
+            removed += 1
+    return removed
@@ -9,6 +9,7 @@ urlpatterns = [
     path("hosting", views.hosting, name="hosting"),
     path("pricing", views.pricing, name="pricing"),
     path("healthz", views.healthz, name="healthz"),
+    path("theme/<slug:digest>.css", views.theme_css, name="theme_css"),
     path("profile", views.profile, name="profile"),
     path("my-surveys/", views.my_surveys, name="my_surveys"),
     path("signup/", views.signup, name="signup"),
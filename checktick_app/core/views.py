@@ -5,7 +5,7 @@ from django.contrib import messages
 from django.contrib.auth import login, views as auth_views
 from django.contrib.auth.decorators import login_required
 from django.db import transaction
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse
 from django.shortcuts import redirect, render
 from django.utils import translation
 from django.utils.translation import gettext as _
@@ -102,6 +102,38 @@ def healthz(request):
     return HttpResponse("ok", content_type="text/plain")
 
 
+def theme_css(request, digest):
+    """Serve a compiled brand theme stylesheet (see themes.compile_theme_css).
+
+    The URL is content-addressed, so the response never changes and browsers
+    may cache it for good. Stylesheets are written when branding is saved; if
+    one is missing (e.g. storage was emptied), they are republished at most
+    once a minute.
+    """
+    from django.core.cache import cache
+    from django.core.files.storage import default_storage
+
+    from .branding import publish_theme_stylesheets
+    from .themes import theme_css_path
+
+    path = theme_css_path(digest)
+    if not default_storage.exists(path) and cache.add(
+        "branding:theme-republish", True, 60
+    ):
+        try:
+            publish_theme_stylesheets()
+        except Exception:
+            logger.warning("Failed to publish theme stylesheets", exc_info=True)
+    try:
+        with default_storage.open(path) as f:
+            css = f.read()
+    except OSError:
+        raise Http404("Theme not found")
+    response = HttpResponse(css, content_type="text/css; charset=utf-8")
+    response["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
+
 @login_required
 def profile(request):
     sb = None
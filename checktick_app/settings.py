@@ -82,6 +82,17 @@ DATABASES = {
     "default": env.db("DATABASE_URL"),
 }
 
+# Branding, form plans and insights are cached under version stamps that saves
+# bump, so every app process (gunicorn worker) must share one cache. By default
+# that is a database table (created by migrate); set CACHE_URL to use Redis
+# instead, e.g. redis://redis:6379/1. Tests keep an in-process cache.
+CACHES = {
+    "default": env.cache(
+        "CACHE_URL",
+        default="locmemcache://" if TESTING else "dbcache://checktick_cache",
+    )
+}
+
 # Branding and theming settings
 BRAND_TITLE = env("BRAND_TITLE")
 BRAND_ICON_URL = env("BRAND_ICON_URL") or None
@@ -259,6 +270,7 @@ MIDDLEWARE = [
     "django_otp.middleware.OTPMiddleware",
     "checktick_app.core.middleware.Require2FAMiddleware",
     "checktick_app.core.middleware.UserLanguageMiddleware",
+    "checktick_app.core.middleware.PermissionContextMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "axes.middleware.AxesMiddleware",
@@ -363,6 +375,17 @@ STORAGES = {
     "staticfiles": {
         "BACKEND": "whitenoise.storage.CompressedStaticFilesStorage",
     },
+    # Generated data exports. Kept outside MEDIA_ROOT, which nginx serves
+    # publicly; exports are only ever served through the token-checked view.
+    "exports": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+        "OPTIONS": {
+            "location": os.environ.get(
+                "CHECKTICK_EXPORT_ROOT", str(BASE_DIR / "exports")
+            ),
+            "base_url": None,
+        },
+    },
 }
 
 # Media uploads (used for admin-uploaded icons if configured)
@@ -486,8 +509,9 @@ AXES_IP_WHITELIST = ["127.0.0.1", "localhost"]
 # Use custom lockout template
 AXES_LOCKOUT_TEMPLATE = "403_lockout.html"
 
-# Ratelimit example (used in views)
-RATELIMIT_ENABLE = True
+# Ratelimit example (used in views). Only disable for local load testing
+# (see the loadtest_submissions management command)
+RATELIMIT_ENABLE = env.bool("RATELIMIT_ENABLE", default=True)
 
 # Auth redirects
 LOGIN_REDIRECT_URL = "/surveys/"  # Changed to surveys for healthcare workflow
@@ -587,6 +611,11 @@ IMD_API_URL = os.environ.get(
     "https://api.rcpch.ac.uk/deprivation/v1/index_of_multiple_deprivation_quantile",
 )
 IMD_API_KEY = os.environ.get("IMD_API_KEY", "")
+# "local" reads deciles from the offline dataset (manage.py load_imd_dataset)
+# instead of calling the API
+IMD_PROVIDER = os.environ.get("IMD_PROVIDER", "api")
+# Days a postcode's IMD lookup is cached before it is looked up again
+IMD_CACHE_TTL_DAYS = int(os.environ.get("IMD_CACHE_TTL_DAYS", "30"))
 
 # Hosting Provider API Configuration (for platform admin log viewing)
 # Used to fetch infrastructure logs from your hosting provider (Northflank, Railway, etc.)
@@ -609,6 +638,55 @@ CHECKTICK_MAX_RETENTION_MONTHS = int(
 CHECKTICK_DOWNLOAD_LINK_EXPIRY_DAYS = int(
     os.environ.get("CHECKTICK_DOWNLOAD_LINK_EXPIRY_DAYS", "7")
 )
+# In-process cache of per-survey response data keys (derived from the survey KEK)
+CHECKTICK_RESPONSE_KEY_CACHE_SIZE = int(
+    os.environ.get("CHECKTICK_RESPONSE_KEY_CACHE_SIZE", "256")
+)
+CHECKTICK_RESPONSE_KEY_CACHE_TTL_SECONDS = int(
+    os.environ.get("CHECKTICK_RESPONSE_KEY_CACHE_TTL_SECONDS", "300")
+)
+# Compiled participant form plans (invalidated when survey content changes;
+# this bounds staleness should CACHES be set to a per-process cache)
+CHECKTICK_FORM_PLAN_CACHE_SECONDS = int(
+    os.environ.get("CHECKTICK_FORM_PLAN_CACHE_SECONDS", "300")
+)
+# Cached platform/organization branding (invalidated on save; this bounds
+# staleness should CACHES be set to a per-process cache)
+CHECKTICK_BRANDING_CACHE_SECONDS = int(
+    os.environ.get("CHECKTICK_BRANDING_CACHE_SECONDS", "3600")
+)
+# Cached filtered insights / crosstabs (keyed on the latest response as well)
+CHECKTICK_INSIGHTS_CACHE_SECONDS = int(
+    os.environ.get("CHECKTICK_INSIGHTS_CACHE_SECONDS", "300")
+)
+# Exports are spooled in memory up to this size, then to a temporary file
+CHECKTICK_EXPORT_SPOOL_MAX_BYTES = int(
+    os.environ.get("CHECKTICK_EXPORT_SPOOL_MAX_BYTES", str(8 * 1024 * 1024))
+)
+# Export jobs save a resumable checkpoint every N responses
+CHECKTICK_EXPORT_CHECKPOINT_EVERY = int(
+    os.environ.get("CHECKTICK_EXPORT_CHECKPOINT_EVERY", "1000")
+)
+# Attempts of a queued export's task before the export is failed
+CHECKTICK_EXPORT_MAX_ATTEMPTS = int(
+    os.environ.get("CHECKTICK_EXPORT_MAX_ATTEMPTS", "3")
+)
+# Background tasks (invites, translations, exports) run by manage.py run_worker:
+# running tasks without a heartbeat for this long are retried by another
+# worker, and failed attempts back off exponentially from this delay
+CHECKTICK_TASK_STALE_SECONDS = int(
+    os.environ.get("CHECKTICK_TASK_STALE_SECONDS", "600")
+)
+CHECKTICK_TASK_RETRY_BACKOFF_SECONDS = int(
+    os.environ.get("CHECKTICK_TASK_RETRY_BACKOFF_SECONDS", "30")
+)
+# Survey invitations are sent in batches of this size over one mail
+# connection (progress is saved after each batch), with messages built on
+# this many threads
+CHECKTICK_INVITE_BATCH_SIZE = int(os.environ.get("CHECKTICK_INVITE_BATCH_SIZE", "100"))
+CHECKTICK_INVITE_RENDER_WORKERS = int(
+    os.environ.get("CHECKTICK_INVITE_RENDER_WORKERS", "4")
+)
 # Parse comma-separated list of warning days
 CHECKTICK_WARN_BEFORE_DELETION_DAYS = [
     int(d.strip())
@@ -19,7 +19,9 @@ from .models import (
     SurveyProgress,
     SurveyQuestion,
     SurveyResponse,
+    Task,
 )
+from .services.answer_aggregates import delete_responses
 
 
 @admin.register(DataSet)
@@ -611,6 +613,10 @@ class SurveyAdmin(admin.ModelAdmin):
 class SurveyResponseAdmin(admin.ModelAdmin):
     list_display = ("survey", "submitted_at")
 
+    def delete_queryset(self, request, queryset):
+        # Rebuild each survey's aggregates once rather than per response
+        delete_responses(queryset)
+
 
 @admin.register(SurveyProgress)
 class SurveyProgressAdmin(admin.ModelAdmin):
@@ -628,6 +634,26 @@ class SurveyProgressAdmin(admin.ModelAdmin):
     readonly_fields = ("created_at", "updated_at", "last_question_answered_at")
 
 
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    """Background tasks run by ``manage.py run_worker``."""
+
+    list_display = (
+        "name",
+        "survey",
+        "status",
+        "progress",
+        "attempts",
+        "run_after",
+        "created_at",
+        "completed_at",
+    )
+    list_filter = ("name", "status", "created_at")
+    search_fields = ("id", "survey__slug", "created_by__username")
+    readonly_fields = ("id", "created_at", "updated_at", "locked_at", "completed_at")
+    ordering = ("-created_at",)
+
+
 class CollectionItemInline(admin.TabularInline):
     model = CollectionItem
     # CollectionItem has two FKs to CollectionDefinition (collection, child_collection)
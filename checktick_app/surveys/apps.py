@@ -5,3 +5,8 @@ class SurveysConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "checktick_app.surveys"
     verbose_name = "Surveys"
+
+    def ready(self):
+        """Import signal and background task handlers when app is ready."""
+        import checktick_app.surveys.signals  # noqa: F401
+        import checktick_app.surveys.tasks  # noqa: F401
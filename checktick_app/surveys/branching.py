@@ -1,9 +1,267 @@
-"""Survey branching logic evaluation."""
+"""
+Survey branching logic evaluation.
 
-from typing import Any
+Branching is compiled into a BranchingProgram: the question order with an
+index map, each question's outgoing conditions sorted by ``order`` and the
+incoming SHOW conditions of each question, with comparison values parsed
+once. The program evaluates every question's visibility in linear time and
+produces the configuration used by static/js/branching.js, so the server
+and the browser apply the same rules. The participant form plan caches it
+per survey content version (see services/form_plan.py).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import re
+from typing import Any, Iterable
 
 from .models import SurveyQuestion, SurveyQuestionCondition
 
+Operator = SurveyQuestionCondition.Operator
+Action = SurveyQuestionCondition.Action
+
+
+# The longest numeric prefix JavaScript's parseFloat() accepts
+_JS_FLOAT_PREFIX = re.compile(
+    r"\s*([+-]?(?:Infinity|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?))"
+)
+
+
+def _has_answer(answer: Any) -> bool:
+    return not (answer is None or answer == "" or answer == [])
+
+
+def parse_js_float(text: str) -> float | None:
+    """
+    Parse a number the way JavaScript's parseFloat() does.
+
+    Leading whitespace is skipped and the longest numeric prefix is read, so
+    "20 years" is 20, matching static/js/branching.js.
+
+    Returns:
+        The number, or None where parseFloat() returns NaN
+    """
+    match = _JS_FLOAT_PREFIX.match(text)
+    if match is None:
+        return None
+    return float(match.group(1).replace("Infinity", "inf"))
+
+
+@dataclass(frozen=True)
+class CompiledCondition:
+    """A branching condition with its comparison value parsed once."""
+
+    source_id: str
+    operator: str
+    value: str
+    action: str
+    target_id: str | None
+    # value.lower().strip(), for string comparisons
+    value_key: str
+    # parse_js_float(value), or None if the value is not numeric
+    value_num: float | None
+
+    @classmethod
+    def compile(cls, condition: SurveyQuestionCondition) -> CompiledCondition:
+        value = condition.value or ""
+        return cls(
+            source_id=str(condition.question_id),
+            operator=condition.operator,
+            value=value,
+            action=condition.action,
+            target_id=(
+                str(condition.target_question_id)
+                if condition.target_question_id
+                else None
+            ),
+            value_key=value.lower().strip(),
+            value_num=parse_js_float(value),
+        )
+
+    def matches(self, answer: Any) -> bool:
+        """
+        Whether the answer meets the condition.
+
+        Mirrors evaluateCondition in static/js/branching.js, so the server
+        never hides a question the browser showed.
+        """
+        has_answer = _has_answer(answer)
+
+        # Operators that don't require a value
+        if self.operator == Operator.EXISTS:
+            return has_answer
+        elif self.operator == Operator.NOT_EXISTS:
+            return not has_answer
+
+        # All other operators require an answer to compare against
+        if not has_answer:
+            return False
+
+        # Handle multiple choice (list) by joining
+        if isinstance(answer, list):
+            answer_str = ",".join(str(a) for a in answer)
+        else:
+            answer_str = str(answer)
+
+        # String comparisons (case-insensitive, trimmed)
+        answer_key = answer_str.lower().strip()
+        if self.operator == Operator.EQUALS:
+            return answer_key == self.value_key
+        elif self.operator == Operator.NOT_EQUALS:
+            return answer_key != self.value_key
+        elif self.operator == Operator.CONTAINS:
+            return self.value_key in answer_key
+        elif self.operator == Operator.NOT_CONTAINS:
+            return self.value_key not in answer_key
+
+        # Numeric comparisons
+        answer_num = parse_js_float(answer_str)
+        if self.value_num is None or answer_num is None:
+            return False
+        if self.operator == Operator.GREATER_THAN:
+            return answer_num > self.value_num
+        elif self.operator == Operator.GREATER_EQUAL:
+            return answer_num >= self.value_num
+        elif self.operator == Operator.LESS_THAN:
+            return answer_num < self.value_num
+        elif self.operator == Operator.LESS_EQUAL:
+            return answer_num <= self.value_num
+        return False
+
+
+@dataclass
+class BranchingProgram:
+    """A survey's branching conditions compiled for evaluation."""
+
+    # Question IDs in survey order
+    question_ids: list[str]
+    # Position of each question in question_ids
+    index: dict[str, int]
+    # Outgoing conditions of each question, in evaluation order
+    conditions: dict[str, list[CompiledCondition]] = field(default_factory=dict)
+    # Incoming SHOW conditions of each question
+    show_conditions: dict[str, list[CompiledCondition]] = field(default_factory=dict)
+
+    def evaluate(self, answers: dict[str, Any]) -> tuple[list[str], bool]:
+        """
+        Determine which questions are visible for a set of answers.
+
+        The first matching condition of each question applies: SKIP hides its
+        target, JUMP_TO hides the questions between the question and its
+        target, and END_SURVEY hides every later question. A question with
+        SHOW conditions is hidden until one of them is met.
+
+        Returns:
+            Tuple of (visible question IDs in order, survey_ended)
+        """
+        hidden: set[str] = set()
+        ended_at: set[int] = set()
+
+        for idx, question_id in enumerate(self.question_ids):
+            answer = answers.get(question_id)
+            for condition in self.conditions.get(question_id, ()):
+                if not condition.matches(answer):
+                    continue
+                if condition.action == Action.END_SURVEY:
+                    ended_at.add(idx)
+                elif condition.action == Action.SKIP and condition.target_id:
+                    hidden.add(condition.target_id)
+                elif condition.action == Action.JUMP_TO and condition.target_id:
+                    target_idx = self.index.get(condition.target_id)
+                    if target_idx is not None:
+                        hidden.update(self.question_ids[idx + 1 : target_idx])
+                # First matching condition wins
+                break
+
+        first_end = min(ended_at) if ended_at else None
+        visible = []
+        for idx, question_id in enumerate(self.question_ids):
+            if first_end is not None and idx > first_end and idx not in ended_at:
+                continue
+            if question_id in hidden:
+                continue
+            show_conditions = self.show_conditions.get(question_id)
+            if show_conditions and not any(
+                c.matches(answers.get(c.source_id)) for c in show_conditions
+            ):
+                continue
+            visible.append(question_id)
+        return visible, first_end is not None
+
+    def is_shown(self, question_id: str, answers: dict[str, Any]) -> bool:
+        """Whether a question's SHOW conditions (if any) are met."""
+        show_conditions = self.show_conditions.get(question_id)
+        return not show_conditions or any(
+            c.matches(answers.get(c.source_id)) for c in show_conditions
+        )
+
+    def to_config(self) -> dict[str, Any]:
+        """
+        JavaScript-friendly configuration for client-side branching logic:
+        {
+            "questions": [question_ids in order],
+            "conditions": {question_id: [conditions]},
+            "show_conditions": {question_id: [incoming SHOW conditions]}
+        }
+        """
+        return {
+            "questions": list(self.question_ids),
+            "conditions": {
+                q_id: [
+                    {
+                        "operator": c.operator,
+                        "value": c.value,
+                        "action": c.action,
+                        "target_question": c.target_id,
+                    }
+                    for c in conditions
+                ]
+                for q_id, conditions in self.conditions.items()
+            },
+            "show_conditions": {
+                q_id: [
+                    {
+                        "source_question": c.source_id,
+                        "operator": c.operator,
+                        "value": c.value,
+                    }
+                    for c in conditions
+                ]
+                for q_id, conditions in self.show_conditions.items()
+            },
+        }
+
+
+def compile_branching(questions: Iterable[SurveyQuestion]) -> BranchingProgram:
+    """
+    Compile the branching conditions of a survey's questions (in order).
+
+    Conditions are read with ``question.conditions.all()`` and sorted here,
+    so prefetch them (``prefetch_related("conditions")``) to compile with a
+    single query.
+    """
+    questions = list(questions)
+    question_ids = [str(q.id) for q in questions]
+    program = BranchingProgram(
+        question_ids=question_ids,
+        index={q_id: i for i, q_id in enumerate(question_ids)},
+    )
+    for q_id, question in zip(question_ids, questions):
+        conditions = sorted(question.conditions.all(), key=lambda c: (c.order, c.id))
+        if not conditions:
+            continue
+        compiled = [CompiledCondition.compile(c) for c in conditions]
+        program.conditions[q_id] = compiled
+        for condition in compiled:
+            if condition.action == Action.SHOW and condition.target_id in (
+                program.index
+            ):
+                program.show_conditions.setdefault(condition.target_id, []).append(
+                    condition
+                )
+    return program
+
 
 def evaluate_condition(condition: SurveyQuestionCondition, answer: Any) -> bool:
     """
@@ -16,59 +274,7 @@ def evaluate_condition(condition: SurveyQuestionCondition, answer: Any) -> bool:
     Returns:
         True if the condition is met, False otherwise
     """
-    # Handle empty/missing answers
-    if answer is None or answer == "" or answer == []:
-        has_answer = False
-    else:
-        has_answer = True
-
-    # Operators that don't require a value
-    if condition.operator == SurveyQuestionCondition.Operator.EXISTS:
-        return has_answer
-    elif condition.operator == SurveyQuestionCondition.Operator.NOT_EXISTS:
-        return not has_answer
-
-    # All other operators require an answer to compare against
-    if not has_answer:
-        return False
-
-    # Convert answer to string for comparison
-    # Handle multiple choice (list) by joining
-    if isinstance(answer, list):
-        answer_str = ",".join(str(a) for a in answer)
-    else:
-        answer_str = str(answer)
-
-    value = condition.value or ""
-
-    # String comparisons (case-insensitive)
-    if condition.operator == SurveyQuestionCondition.Operator.EQUALS:
-        return answer_str.lower().strip() == value.lower().strip()
-    elif condition.operator == SurveyQuestionCondition.Operator.NOT_EQUALS:
-        return answer_str.lower().strip() != value.lower().strip()
-    elif condition.operator == SurveyQuestionCondition.Operator.CONTAINS:
-        return value.lower() in answer_str.lower()
-    elif condition.operator == SurveyQuestionCondition.Operator.NOT_CONTAINS:
-        return value.lower() not in answer_str.lower()
-
-    # Numeric comparisons
-    try:
-        answer_num = float(answer_str)
-        value_num = float(value)
-
-        if condition.operator == SurveyQuestionCondition.Operator.GREATER_THAN:
-            return answer_num > value_num
-        elif condition.operator == SurveyQuestionCondition.Operator.GREATER_EQUAL:
-            return answer_num >= value_num
-        elif condition.operator == SurveyQuestionCondition.Operator.LESS_THAN:
-            return answer_num < value_num
-        elif condition.operator == SurveyQuestionCondition.Operator.LESS_EQUAL:
-            return answer_num <= value_num
-    except (ValueError, TypeError):
-        # If conversion fails, comparison fails
-        return False
-
-    return False
+    return CompiledCondition.compile(condition).matches(answer)
 
 
 def get_visible_questions(
@@ -78,7 +284,8 @@ def get_visible_questions(
     Determine which questions should be visible based on branching logic.
 
     Args:
-        all_questions: All questions in the survey (in order)
+        all_questions: All questions in the survey (in order), ideally with
+            their conditions prefetched
         answers: Dictionary mapping question IDs to answers
 
     Returns:
@@ -86,76 +293,9 @@ def get_visible_questions(
         - visible_questions: List of questions that should be shown
         - survey_ended: True if END_SURVEY condition was triggered
     """
-    visible = []
-    survey_ended = False
-    skip_until_idx = None  # Used for JUMP_TO logic
-
-    for idx, question in enumerate(all_questions):
-        question_id = str(question.id)
-
-        # If we're in a skip mode (from JUMP_TO), check if we've reached the target
-        if skip_until_idx is not None:
-            if idx < skip_until_idx:
-                continue  # Skip this question
-            else:
-                skip_until_idx = None  # Reached target, resume normal flow
-
-        # Check if this question has been answered
-        answer = answers.get(question_id)
-
-        # Load conditions for this question (should be prefetched)
-        try:
-            conditions = list(question.conditions.all().order_by("order"))
-        except Exception:
-            conditions = []
-
-        # Evaluate conditions
-        triggered_action = None
-        triggered_target = None
-
-        for condition in conditions:
-            if evaluate_condition(condition, answer):
-                triggered_action = condition.action
-                triggered_target = condition.target_question
-
-                if condition.action == SurveyQuestionCondition.Action.END_SURVEY:
-                    survey_ended = True
-                    break  # Stop processing this question's conditions
-                elif condition.action == SurveyQuestionCondition.Action.JUMP_TO:
-                    # Find the index of the target question
-                    if condition.target_question:
-                        try:
-                            target_idx = next(
-                                i
-                                for i, q in enumerate(all_questions)
-                                if q.id == condition.target_question.id
-                            )
-                            skip_until_idx = target_idx
-                        except StopIteration:
-                            pass
-                    break  # First matching condition wins
-                elif condition.action == SurveyQuestionCondition.Action.SKIP:
-                    # Skip the target question (don't show it)
-                    # This is handled by not adding the target to visible
-                    break
-                elif condition.action == SurveyQuestionCondition.Action.SHOW:
-                    # Show the target question
-                    # This will be handled when we reach that question
-                    break
-
-        # If survey ended, don't show any more questions
-        if survey_ended:
-            break
-
-        # Add this question to visible list
-        visible.append(question)
-
-        # If SKIP was triggered, find and skip the target question
-        if triggered_action == SurveyQuestionCondition.Action.SKIP and triggered_target:
-            # Mark the target question to be skipped
-            # We'll filter it out by not adding it when we reach it
-            pass
-
+    visible_ids, survey_ended = compile_branching(all_questions).evaluate(answers)
+    visible_set = set(visible_ids)
+    visible = [q for q in all_questions if str(q.id) in visible_set]
     return visible, survey_ended
 
 
@@ -178,25 +318,4 @@ def should_show_question(
     Returns:
         True if the question should be shown
     """
-    # Check if there are any incoming SHOW conditions
-    try:
-        show_conditions = SurveyQuestionCondition.objects.filter(
-            target_question=question, action=SurveyQuestionCondition.Action.SHOW
-        )
-
-        if not show_conditions.exists():
-            # No SHOW conditions, question is always visible
-            return True
-
-        # Check if any SHOW condition is met
-        for condition in show_conditions:
-            source_question_id = str(condition.question.id)
-            answer = answers.get(source_question_id)
-            if evaluate_condition(condition, answer):
-                return True
-
-        # No SHOW conditions were met
-        return False
-    except Exception:
-        # If there's an error, default to showing the question
-        return True
+    return compile_branching(all_questions).is_shown(str(question.id), answers)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Django management command to benchmark response analytics end to end.
+
+By default a throwaway survey with a mix of chartable question types and
+synthetic responses is written to the database inside a transaction that is
+rolled back afterwards. Two paths are timed, each including the render of the
+insights partial:
+
+- scan: filtered insights, which load the answers column with values_list and
+  count every question in one pass (compute_response_analytics with a
+  queryset)
+- dashboard: the unfiltered dashboard, which reads the materialised
+  ResponseAnswerCount aggregates
+
+``--source memory`` times only build_answer_matrix and the option counts on
+answers generated in memory, without database access or rendering.
+
+Usage:
+    python manage.py benchmark_response_analytics
+    python manage.py benchmark_response_analytics --questions 50 --responses 100000
+    python manage.py benchmark_response_analytics --budget 1.0 --scan-budget 6.0
+    python manage.py benchmark_response_analytics --source memory --budget 3.0
+"""
+
+import random
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.template.loader import render_to_string
+
+from checktick_app.surveys.services.analytics_engine import build_answer_matrix
+
+QUESTION_TYPES = ["mc_single", "mc_multi", "yesno", "likert", "dropdown"]
+CHOICES = ["Strongly disagree", "Disagree", "Neutral", "Agree", "Strongly agree"]
+INSERT_BATCH_SIZE = 5000
+
+
+class Command(BaseCommand):
+    help = "Benchmark response analytics, from the database load to the render"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--source",
+            choices=["database", "memory"],
+            default="database",
+            help="Time the database paths including rendering, or only the "
+            "in-memory engine (default: database)",
+        )
+        parser.add_argument(
+            "--questions",
+            type=int,
+            default=50,
+            help="Number of chartable questions (default: 50)",
+        )
+        parser.add_argument(
+            "--responses",
+            type=int,
+            default=100_000,
+            help="Number of synthetic responses (default: 100000)",
+        )
+        parser.add_argument(
+            "--repeat",
+            type=int,
+            default=1,
+            help="Number of timed runs; the fastest is reported (default: 1)",
+        )
+        parser.add_argument(
+            "--budget",
+            type=float,
+            help="Fail if the dashboard (or, with --source memory, the engine) "
+            "takes longer than this many seconds",
+        )
+        parser.add_argument(
+            "--scan-budget",
+            type=float,
+            help="Fail if the scan path takes longer than this many seconds",
+        )
+        parser.add_argument(
+            "--seed",
+            type=int,
+            default=0,
+            help="Random seed for the synthetic answers (default: 0)",
+        )
+
+    def handle(self, *args, **options):
+        if options["questions"] < 1 or options["responses"] < 1:
+            raise CommandError("--questions and --responses must be at least 1")
+
+        self.stdout.write(
+            f"Generating {options['responses']} responses x "
+            f"{options['questions']} questions..."
+        )
+        if options["source"] == "memory":
+            timings = self._benchmark_memory(options)
+            budgets = {"engine": options["budget"]}
+        else:
+            with transaction.atomic():
+                timings = self._benchmark_database(options)
+                transaction.set_rollback(True)
+            budgets = {"dashboard": options["budget"], "scan": options["scan_budget"]}
+
+        failures = []
+        for name, best in timings.items():
+            self.stdout.write(
+                f"{name}: {best:.3f}s "
+                f"({options['responses'] / best:,.0f} responses/s)"
+            )
+            budget = budgets.get(name)
+            if budget is not None and best > budget:
+                failures.append(f"{name} took {best:.3f}s (budget {budget:.3f}s)")
+        if failures:
+            raise CommandError("; ".join(failures))
+        self.stdout.write(self.style.SUCCESS("Benchmark complete"))
+
+    def _benchmark_memory(self, options) -> dict[str, float]:
+        """Fastest engine run over answers generated in memory."""
+        question_types = {
+            question_id: QUESTION_TYPES[question_id % len(QUESTION_TYPES)]
+            for question_id in range(1, options["questions"] + 1)
+        }
+        rows = list(
+            self._synthetic_answers(
+                question_types, options["responses"], random.Random(options["seed"])
+            )
+        )
+
+        def run():
+            matrix = build_answer_matrix(rows, question_types)
+            for column in matrix.columns.values():
+                column.option_counts()
+
+        return {"engine": self._fastest(run, options["repeat"])}
+
+    def _benchmark_database(self, options) -> dict[str, float]:
+        """Fastest scan and dashboard runs over a throwaway survey."""
+        from checktick_app.surveys.models import Survey, SurveyQuestion, SurveyResponse
+        from checktick_app.surveys.services.answer_aggregates import (
+            rebuild_survey_aggregates,
+        )
+        from checktick_app.surveys.services.response_analytics import (
+            compute_response_analytics,
+        )
+
+        name = f"benchmark-{uuid.uuid4().hex[:12]}"
+        owner = get_user_model().objects.create_user(username=name)
+        survey = Survey.objects.create(owner=owner, name=name, slug=name)
+        questions = SurveyQuestion.objects.bulk_create(
+            SurveyQuestion(
+                survey=survey,
+                text=f"Question {position}",
+                type=QUESTION_TYPES[position % len(QUESTION_TYPES)],
+                options=[] if position % len(QUESTION_TYPES) == 2 else CHOICES,
+                order=position,
+            )
+            for position in range(1, options["questions"] + 1)
+        )
+        question_types = {str(q.id): q.type for q in questions}
+
+        started = time.perf_counter()
+        answers = self._synthetic_answers(
+            question_types, options["responses"], random.Random(options["seed"])
+        )
+        while batch := [
+            SurveyResponse(survey=survey, answers=row)
+            for _, row in zip(range(INSERT_BATCH_SIZE), answers)
+        ]:
+            SurveyResponse.objects.bulk_create(batch)
+        rebuild_survey_aggregates(survey)
+        self.stdout.write(f"Loaded in {time.perf_counter() - started:.1f}s")
+
+        def render(analytics):
+            return render_to_string(
+                "surveys/partials/response_insights.html",
+                {"analytics": analytics, "survey": survey},
+            )
+
+        # Compile the template first, as a running server already has
+        render(compute_response_analytics(survey, survey.responses.none()))
+        return {
+            "scan": self._fastest(
+                lambda: render(
+                    compute_response_analytics(
+                        survey, survey.responses.filter(is_frozen=False)
+                    )
+                ),
+                options["repeat"],
+            ),
+            "dashboard": self._fastest(
+                lambda: render(compute_response_analytics(survey)),
+                options["repeat"],
+            ),
+        }
+
+    def _fastest(self, run, repeat: int) -> float:
+        timings = []
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            run()
+            timings.append(time.perf_counter() - started)
+        return min(timings)
+
+    def _synthetic_answers(self, question_types: dict, count: int, rng: random.Random):
+        """Yield answer dicts shaped like SurveyResponse.answers."""
+        for _ in range(count):
+            answers = {}
+            for question_id, question_type in question_types.items():
+                if rng.random() < 0.1:
+                    continue  # unanswered
+                if question_type == "mc_multi":
+                    value = rng.sample(CHOICES, rng.randint(1, 3))
+                elif question_type == "yesno":
+                    value = rng.choice(["yes", "no"])
+                else:
+                    value = rng.choice(CHOICES)
+                answers[str(question_id)] = value
+            yield answers
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Django management command to decrypt a password-protected data export.
+
+Password-protected exports are downloaded as ``.csv.enc`` files in the framed
+export stream format (see utils.encrypt_stream). This command decrypts one
+frame at a time, so files of any size can be decrypted in constant memory.
+It only needs the export password, not database access.
+
+Usage:
+    python manage.py decrypt_export survey_my-survey_export.csv.enc
+    python manage.py decrypt_export export.csv.enc --output export.csv
+    python manage.py decrypt_export export.csv.enc --password-env EXPORT_PASSWORD
+"""
+
+from getpass import getpass
+import os
+from pathlib import Path
+
+from cryptography.exceptions import InvalidTag
+from django.core.management.base import BaseCommand, CommandError
+
+from checktick_app.surveys.utils import decrypt_stream
+
+
+class Command(BaseCommand):
+    help = "Decrypt a password-protected survey data export"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path of the downloaded .enc file")
+        parser.add_argument(
+            "--output",
+            help="Where to write the CSV (default: the input path without .enc)",
+        )
+        parser.add_argument(
+            "--password-env",
+            help="Environment variable holding the export password",
+        )
+
+    def handle(self, *args, **options):
+        source = Path(options["path"])
+        if not source.is_file():
+            raise CommandError(f"File not found: {source}")
+
+        output = Path(options["output"] or source.with_suffix(""))
+        if output == source:
+            output = source.with_name(source.name + ".csv")
+
+        if options["password_env"]:
+            password = os.environ.get(options["password_env"])
+            if not password:
+                raise CommandError(
+                    f"Environment variable {options['password_env']} is not set"
+                )
+        else:
+            password = getpass("Export password: ")
+
+        partial = output.with_name(output.name + ".part")
+        try:
+            with source.open("rb") as encrypted, partial.open("wb") as decrypted:
+                for chunk in decrypt_stream(password.encode("utf-8"), encrypted):
+                    decrypted.write(chunk)
+        except InvalidTag:
+            partial.unlink(missing_ok=True)
+            raise CommandError("Incorrect password, or the file has been modified")
+        except ValueError as e:
+            partial.unlink(missing_ok=True)
+            raise CommandError(str(e))
+        partial.replace(output)
+
+        self.stdout.write(self.style.SUCCESS(f"Decrypted export written to {output}"))
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Django management command to load the offline IMD dataset.
+
+Joins the ONS Postcode Directory (ONSPD) to the English Indices of
+Deprivation by LSOA and replaces the PostcodeDeprivation table with the
+result, so IMD deciles can be looked up without calling the RCPCH API
+(set ``IMD_PROVIDER=local``). Postcodes whose LSOA has no IMD data, i.e.
+those outside England, are skipped.
+
+Inputs are the CSV files as published:
+
+- ``--postcodes``: the ONSPD data CSV, e.g. ``Data/ONSPD_FEB_2025_UK.csv``
+- ``--imd``: File 1 of the English Indices of Deprivation, with the LSOA code,
+  IMD rank and IMD decile columns
+
+The IMD and ONSPD LSOA boundaries must match: IMD 2019 uses 2011 LSOAs
+(ONSPD column ``lsoa11``), IMD 2025 uses 2021 LSOAs (``lsoa21``).
+
+Usage:
+    python manage.py load_imd_dataset --postcodes ONSPD.csv --imd imd2019.csv
+    python manage.py load_imd_dataset --postcodes ONSPD.csv --imd imd2025.csv --lsoa-column lsoa21
+    python manage.py load_imd_dataset --postcodes ONSPD.csv --imd imd2019.csv --dry-run
+"""
+
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from checktick_app.surveys.models import PostcodeDeprivation
+from checktick_app.surveys.services.imd_service import IMDService
+
+
+def find_column(fieldnames: list[str], *fragments: str) -> str:
+    """First column whose name contains every fragment (case-insensitive)."""
+    for name in fieldnames:
+        if all(f.lower() in name.lower() for f in fragments):
+            return name
+    raise CommandError(
+        f"IMD file has no column matching {' '.join(fragments)!r}; "
+        f"columns are: {', '.join(fieldnames)}"
+    )
+
+
+class Command(BaseCommand):
+    help = "Load the offline postcode to IMD decile dataset from ONSPD and IMD files"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--postcodes",
+            required=True,
+            help="Path to the ONS Postcode Directory data CSV",
+        )
+        parser.add_argument(
+            "--imd",
+            required=True,
+            help="Path to the English Indices of Deprivation File 1 CSV",
+        )
+        parser.add_argument(
+            "--postcode-column",
+            default="pcds",
+            help="ONSPD postcode column (default: pcds)",
+        )
+        parser.add_argument(
+            "--lsoa-column",
+            default="lsoa11",
+            help="ONSPD LSOA column matching the IMD release (default: lsoa11)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows per insert (default: 5000)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Read and join the files without changing the database",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Starting IMD dataset load at {timezone.now()}")
+        )
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING("DRY RUN MODE - No changes will be made")
+            )
+
+        deprivation = self._read_imd(options["imd"])
+        self.stdout.write(f"Read IMD data for {len(deprivation)} LSOAs")
+
+        rows = self._join_postcodes(
+            options["postcodes"],
+            options["postcode_column"],
+            options["lsoa_column"],
+            deprivation,
+        )
+        if dry_run:
+            loaded = sum(1 for _ in rows)
+        else:
+            loaded = self._replace_dataset(rows, options["batch_size"])
+
+        verb = "Would load" if dry_run else "Loaded"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} IMD deciles for {loaded} postcodes "
+                f"({self.skipped} without IMD data skipped) at {timezone.now()}"
+            )
+        )
+
+    def _read_imd(self, path: str) -> dict[str, tuple[int, int]]:
+        """IMD (rank, decile) by LSOA code."""
+        try:
+            with open(path, newline="", encoding="utf-8-sig") as f:
+                reader = csv.DictReader(f)
+                fieldnames = reader.fieldnames or []
+                lsoa_col = find_column(fieldnames, "LSOA code")
+                rank_col = find_column(fieldnames, "(IMD)", "Rank")
+                decile_col = find_column(fieldnames, "(IMD)", "Decile")
+                deprivation = {}
+                for line, row in enumerate(reader, start=2):
+                    try:
+                        rank = int(row[rank_col].replace(",", ""))
+                        decile = int(row[decile_col])
+                    except ValueError:
+                        raise CommandError(f"{path}:{line}: invalid IMD rank or decile")
+                    if not 1 <= decile <= 10:
+                        raise CommandError(f"{path}:{line}: IMD decile must be 1-10")
+                    deprivation[row[lsoa_col].strip()] = (rank, decile)
+        except OSError as e:
+            raise CommandError(f"Cannot read IMD file: {e}")
+        if not deprivation:
+            raise CommandError(f"No IMD data in {path}")
+        return deprivation
+
+    def _join_postcodes(self, path, postcode_col, lsoa_col, deprivation):
+        """Yield a PostcodeDeprivation for each ONSPD postcode with IMD data."""
+        self.skipped = 0
+        try:
+            with open(path, newline="", encoding="utf-8-sig") as f:
+                reader = csv.DictReader(f)
+                missing = {postcode_col, lsoa_col} - set(reader.fieldnames or [])
+                if missing:
+                    raise CommandError(
+                        f"Postcode file has no {', '.join(sorted(missing))} column"
+                    )
+                for row in reader:
+                    lsoa = row[lsoa_col].strip()
+                    postcode = IMDService.normalize_postcode(row[postcode_col])
+                    if lsoa not in deprivation or not postcode:
+                        self.skipped += 1
+                        continue
+                    rank, decile = deprivation[lsoa]
+                    yield PostcodeDeprivation(
+                        postcode=postcode,
+                        lsoa_code=lsoa,
+                        imd_decile=decile,
+                        imd_rank=rank,
+                    )
+        except OSError as e:
+            raise CommandError(f"Cannot read postcode file: {e}")
+
+    @transaction.atomic
+    def _replace_dataset(self, rows, batch_size: int) -> int:
+        """Replace the whole dataset, so lookups never see a partial load."""
+        PostcodeDeprivation.objects.all().delete()
+        loaded = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                PostcodeDeprivation.objects.bulk_create(batch)
+                loaded += len(batch)
+                batch = []
+        PostcodeDeprivation.objects.bulk_create(batch)
+        return loaded + len(batch)
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Django management command to load test participant submissions.
+
+Fires many parallel submissions at a running CheckTick server, each from its
+own session (fetching the form for a CSRF token, then posting it), and then
+checks the database the server writes to:
+
+- the survey never accepted more than ``max_responses`` responses
+- every accepted submission was saved, and ``response_count`` matches
+- for token surveys, each invite token was used by at most one response
+
+Token surveys are hit through their unused tokens in turn, so with more
+requests than tokens every token is submitted concurrently several times.
+
+The participant views are rate limited per IP, so start the server with
+rate limiting disabled, and use a survey without CAPTCHA:
+
+    RATELIMIT_ENABLE=False python manage.py runserver
+
+Usage:
+    python manage.py loadtest_submissions --survey my-survey
+    python manage.py loadtest_submissions --survey my-survey --requests 5000 --concurrency 100
+    python manage.py loadtest_submissions --survey my-survey --url http://localhost:8000
+"""
+
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+import requests
+
+from checktick_app.surveys.models import Survey
+
+
+def classify(response) -> str:
+    """Outcome of a participant request, from its status and redirect."""
+    if response.status_code != 302:
+        return f"HTTP {response.status_code}"
+    location = urlparse(response.headers.get("Location", ""))
+    if location.path.endswith("/thank-you/"):
+        return "submitted"
+    reason = parse_qs(location.query).get("reason")
+    if reason:
+        return reason[0]
+    return f"redirect {location.path}"
+
+
+def submit(base_url: str, path: str, timeout: float) -> str:
+    """Open the form in a fresh session and submit it once."""
+    with requests.Session() as session:
+        try:
+            form = session.get(base_url + path, timeout=timeout, allow_redirects=False)
+            if form.status_code != 200:
+                return classify(form)
+            response = session.post(
+                base_url + path,
+                data={"csrfmiddlewaretoken": session.cookies.get("csrftoken", "")},
+                headers={"Referer": base_url + path},
+                timeout=timeout,
+                allow_redirects=False,
+            )
+        except requests.RequestException as e:
+            return f"error {type(e).__name__}"
+    return classify(response)
+
+
+class Command(BaseCommand):
+    help = "Fire parallel submissions at a running server and check admission"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--survey",
+            required=True,
+            help="Slug of the published survey to submit to",
+        )
+        parser.add_argument(
+            "--url",
+            default="http://localhost:8000",
+            help="Base URL of the running server (default: http://localhost:8000)",
+        )
+        parser.add_argument(
+            "--requests",
+            type=int,
+            default=1000,
+            help="Number of submissions to fire (default: 1000)",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=50,
+            help="Number of submissions in flight at once (default: 50)",
+        )
+        parser.add_argument(
+            "--timeout",
+            type=float,
+            default=30.0,
+            help="Seconds to wait for each HTTP request (default: 30)",
+        )
+
+    def handle(self, *args, **options):
+        survey = Survey.objects.filter(slug=options["survey"]).first()
+        if survey is None:
+            raise CommandError(f"Survey '{options['survey']}' not found")
+
+        paths, tokens = self._paths(survey)
+        base_url = options["url"].rstrip("/")
+        before = survey.responses.count()
+
+        self.stdout.write(
+            f"Firing {options['requests']} submissions at {base_url} "
+            f"({options['concurrency']} at a time)"
+        )
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            outcomes = Counter(
+                pool.map(
+                    lambda i: submit(
+                        base_url, paths[i % len(paths)], options["timeout"]
+                    ),
+                    range(options["requests"]),
+                )
+            )
+        for outcome, count in outcomes.most_common():
+            self.stdout.write(f"  - {outcome}: {count}")
+
+        problems = self._check(survey, tokens, before, outcomes["submitted"])
+        for problem in problems:
+            self.stdout.write(self.style.ERROR(problem))
+        if problems:
+            raise CommandError("Admission control failed under load")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Accepted {outcomes['submitted']} submissions; "
+                f"survey has {survey.response_count} responses"
+            )
+        )
+
+    def _paths(self, survey):
+        """Participant URLs to submit to, and the tokens they use."""
+        if survey.visibility == Survey.Visibility.TOKEN:
+            tokens = list(
+                survey.access_tokens.filter(used_at__isnull=True).values_list(
+                    "token", flat=True
+                )
+            )
+            if not tokens:
+                raise CommandError("Survey has no unused invite tokens")
+            paths = [
+                reverse(
+                    "surveys:take_token", kwargs={"slug": survey.slug, "token": token}
+                )
+                for token in tokens
+            ]
+            return paths, tokens
+        if survey.visibility == Survey.Visibility.UNLISTED:
+            path = reverse(
+                "surveys:take_unlisted",
+                kwargs={"slug": survey.slug, "key": survey.unlisted_key},
+            )
+            return [path], []
+        if survey.visibility == Survey.Visibility.PUBLIC:
+            return [reverse("surveys:take", kwargs={"slug": survey.slug})], []
+        raise CommandError("Only public, unlisted and token surveys can be load tested")
+
+    def _check(self, survey, tokens, before, submitted) -> list[str]:
+        survey.refresh_from_db()
+        responses = survey.responses.count()
+        problems = []
+        if survey.max_responses is not None and responses > survey.max_responses:
+            problems.append(
+                f"Survey has {responses} responses, over max_responses "
+                f"({survey.max_responses})"
+            )
+        if responses - before != submitted:
+            problems.append(
+                f"{submitted} submissions were accepted but "
+                f"{responses - before} responses were saved"
+            )
+        if survey.response_count != responses:
+            problems.append(
+                f"response_count is {survey.response_count} but the survey has "
+                f"{responses} responses"
+            )
+        if tokens:
+            used = survey.access_tokens.filter(
+                token__in=tokens, used_at__isnull=False
+            ).count()
+            with_response = survey.responses.filter(
+                access_token__token__in=tokens
+            ).count()
+            if used != with_response:
+                problems.append(
+                    f"{used} tokens were marked used but {with_response} "
+                    "responses used them"
+                )
+        return problems
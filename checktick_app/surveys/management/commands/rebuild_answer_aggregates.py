@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Django management command to rebuild materialised answer aggregates.
+
+ResponseAnswerCount rows are maintained incrementally as responses are saved,
+frozen or deleted. This command recomputes them from scratch, for example
+after responses were changed with queryset.update() (which bypasses the
+signal handlers) or after restoring a database dump.
+
+Usage:
+    python manage.py rebuild_answer_aggregates
+    python manage.py rebuild_answer_aggregates --survey my-survey
+    python manage.py rebuild_answer_aggregates --dry-run --verbose
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from checktick_app.surveys.models import Survey
+from checktick_app.surveys.services.answer_aggregates import (
+    aggregates_suspended,
+    rebuild_survey_aggregates,
+)
+
+
+class Command(BaseCommand):
+    help = "Recompute materialised answer-distribution aggregates from responses"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--survey",
+            help="Slug of a single survey to rebuild (default: all surveys)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Show what would be done without actually doing it",
+        )
+        parser.add_argument(
+            "--verbose",
+            action="store_true",
+            help="Show detailed output",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        verbose = options["verbose"]
+
+        surveys = Survey.objects.order_by("id")
+        if options["survey"]:
+            surveys = surveys.filter(slug=options["survey"])
+            if not surveys.exists():
+                raise CommandError(f"Survey '{options['survey']}' not found")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Starting aggregate rebuild at {timezone.now()}")
+        )
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING("DRY RUN MODE - No changes will be made")
+            )
+
+        rebuilt = 0
+        counted = 0
+        for survey in surveys.iterator():
+            if dry_run:
+                responses = survey.responses.filter(is_frozen=False).count()
+            else:
+                with aggregates_suspended():
+                    responses = rebuild_survey_aggregates(survey)
+            rebuilt += 1
+            counted += responses
+            if verbose:
+                self.stdout.write(f"  - {survey.slug}: {responses} responses")
+
+        verb = "Would rebuild" if dry_run else "Rebuilt"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} aggregates for {rebuilt} surveys "
+                f"({counted} responses) at {timezone.now()}"
+            )
+        )
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Django management command to reconcile denormalised survey response counts.
+
+Survey.response_count is maintained with F() updates as responses are
+submitted and deleted. This command recounts responses and corrects surveys
+whose stored count has drifted, for example after responses were created with
+bulk_create() or loaded from fixtures (neither of which sends the signals the
+counter relies on) or after restoring a database dump.
+
+Usage:
+    python manage.py reconcile_response_counts
+    python manage.py reconcile_response_counts --survey my-survey
+    python manage.py reconcile_response_counts --dry-run --verbose
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from checktick_app.surveys.models import Survey
+from checktick_app.surveys.services.response_counts import reconcile_response_counts
+
+
+class Command(BaseCommand):
+    help = "Recount survey responses and correct stored response counts"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--survey",
+            help="Slug of a single survey to reconcile (default: all surveys)",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Show what would be done without actually doing it",
+        )
+        parser.add_argument(
+            "--verbose",
+            action="store_true",
+            help="Show detailed output",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        verbose = options["verbose"]
+
+        surveys = Survey.objects.order_by("id")
+        if options["survey"]:
+            surveys = surveys.filter(slug=options["survey"])
+            if not surveys.exists():
+                raise CommandError(f"Survey '{options['survey']}' not found")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Starting response count check at {timezone.now()}")
+        )
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING("DRY RUN MODE - No changes will be made")
+            )
+
+        wrong = reconcile_response_counts(surveys.iterator(), dry_run=dry_run)
+        if verbose:
+            for survey, counted in wrong:
+                self.stdout.write(
+                    f"  - {survey.slug}: stored {survey.response_count}, "
+                    f"counted {counted}"
+                )
+
+        verb = "Would correct" if dry_run else "Corrected"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} response counts for {len(wrong)} surveys at {timezone.now()}"
+            )
+        )
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Django management command to re-wrap encrypted survey responses.
+
+Responses written before the v2 response blob format each carry their own
+Scrypt salt, so decrypting them costs one Scrypt derivation per response.
+This command decrypts those legacy blobs with the survey KEK and re-encrypts
+them in the v2 format (HKDF data key + per-response nonce). It works through
+the survey in small batches so it can run in the background against a live
+database.
+
+The survey KEK is never stored server-side, so it must be unlocked here with
+the survey password, the recovery phrase or the organisation master key.
+
+Usage:
+    python manage.py rewrap_response_encryption --survey my-survey
+    python manage.py rewrap_response_encryption --survey my-survey --use-org-key
+    python manage.py rewrap_response_encryption --survey my-survey \\
+        --password-env SURVEY_PASSWORD --batch-size 200 --sleep 0.5
+    python manage.py rewrap_response_encryption --survey my-survey --dry-run
+"""
+
+from getpass import getpass
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from checktick_app.surveys.models import Survey, SurveyResponse
+
+
+class Command(BaseCommand):
+    help = "Re-encrypt legacy survey response blobs in the v2 response format"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--survey",
+            required=True,
+            help="Slug of the survey whose responses should be re-wrapped",
+        )
+        parser.add_argument(
+            "--password-env",
+            help="Environment variable holding the survey password",
+        )
+        parser.add_argument(
+            "--recovery-env",
+            help="Environment variable holding the survey recovery phrase",
+        )
+        parser.add_argument(
+            "--use-org-key",
+            action="store_true",
+            help="Unlock the survey with its organisation master key",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Number of responses re-wrapped per transaction (default: 500)",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=0.0,
+            help="Seconds to pause between batches to limit database load",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Show what would be done without actually doing it",
+        )
+        parser.add_argument(
+            "--verbose",
+            action="store_true",
+            help="Show detailed output",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        verbose = options["verbose"]
+        batch_size = options["batch_size"]
+
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        try:
+            survey = Survey.objects.select_related("organization").get(
+                slug=options["survey"]
+            )
+        except Survey.DoesNotExist:
+            raise CommandError(f"Survey '{options['survey']}' not found")
+
+        survey_key = self._unlock_survey(survey, options)
+        if not survey_key:
+            raise CommandError(f"Could not unlock survey '{survey.slug}'")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Starting response re-wrap for {survey.slug} at {timezone.now()}"
+            )
+        )
+        if dry_run:
+            self.stdout.write(
+                self.style.WARNING("DRY RUN MODE - No changes will be made")
+            )
+
+        encrypted = SurveyResponse.objects.filter(survey=survey).filter(
+            Q(enc_answers__isnull=False) | Q(enc_demographics__isnull=False)
+        )
+
+        rewrapped = 0
+        skipped = 0
+        failed = 0
+        last_id = 0
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    encrypted.filter(id__gt=last_id)
+                    .order_by("id")
+                    .select_for_update()
+                    .only("id", "survey_id", "enc_answers", "enc_demographics")[
+                        :batch_size
+                    ]
+                )
+                if not batch:
+                    break
+                last_id = batch[-1].id
+
+                to_update = []
+                for response in batch:
+                    if not response.needs_rewrap:
+                        skipped += 1
+                        continue
+                    try:
+                        response.rewrap_encryption(survey_key)
+                    except Exception as e:
+                        failed += 1
+                        self.stdout.write(
+                            self.style.ERROR(
+                                f"  - Response {response.id}: could not decrypt ({e})"
+                            )
+                        )
+                        continue
+                    to_update.append(response)
+
+                if to_update and not dry_run:
+                    SurveyResponse.objects.bulk_update(
+                        to_update, ["enc_answers", "enc_demographics"]
+                    )
+                rewrapped += len(to_update)
+
+            if verbose:
+                self.stdout.write(
+                    f"Processed up to response {last_id}: "
+                    f"{rewrapped} re-wrapped, {skipped} already current"
+                )
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        verb = "Would re-wrap" if dry_run else "Re-wrapped"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {rewrapped} responses ({skipped} already in v2 format, "
+                f"{failed} failed) at {timezone.now()}"
+            )
+        )
+
+    def _unlock_survey(self, survey: Survey, options) -> bytes | None:
+        """Unlock the survey KEK from the requested key source."""
+        if options["use_org_key"]:
+            if not survey.organization:
+                raise CommandError(f"Survey '{survey.slug}' has no organisation")
+            return survey.unlock_with_org_key(survey.organization)
+
+        if options["recovery_env"]:
+            phrase = os.environ.get(options["recovery_env"])
+            if not phrase:
+                raise CommandError(f"${options['recovery_env']} is not set")
+            return survey.unlock_with_recovery(phrase)
+
+        if options["password_env"]:
+            password = os.environ.get(options["password_env"])
+            if not password:
+                raise CommandError(f"${options['password_env']} is not set")
+        else:
+            password = getpass(f"Password for survey '{survey.slug}': ")
+        return survey.unlock_with_password(password)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Django management command to run background tasks.
+
+Survey invitations, translations, data exports and IMD lookups are queued
+as Task rows (see services/task_queue.py) and run here, outside the web
+server. Run as many workers as you need: tasks are claimed with SELECT ...
+FOR UPDATE SKIP LOCKED, so throughput grows with the number of worker
+processes. Workers that generate exports must share the web service's
+SECRET_KEY and "exports" storage (CHECKTICK_EXPORT_ROOT).
+
+When a worker starts and hourly after that, finished tasks older than
+``--purge-after-days`` are purged, export files left behind by a stopped
+worker or request are removed, and exports whose request stopped part-way
+are failed.
+
+Usage:
+    python manage.py run_worker
+    python manage.py run_worker --once
+    python manage.py run_worker --poll-interval 0.5
+"""
+
+from datetime import timedelta
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from checktick_app.surveys.services import ExportService
+from checktick_app.surveys.services.task_queue import (
+    claim_next_task,
+    purge_finished_tasks,
+    run_task,
+)
+
+# Seconds between purges of finished tasks and sweeps for export files
+PURGE_INTERVAL = 3600
+
+
+class Command(BaseCommand):
+    help = "Run queued background tasks (invitations, translations, exports)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Exit when no runnable tasks are left instead of polling",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to wait between checks for new tasks (default: 1)",
+        )
+        parser.add_argument(
+            "--purge-after-days",
+            type=int,
+            default=7,
+            help="Delete finished tasks older than this many days (default: 7)",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            self.style.SUCCESS(f"Starting task worker at {timezone.now()}")
+        )
+
+        purge_after = timedelta(days=options["purge_after_days"])
+        last_purge = 0.0
+        processed = 0
+        while True:
+            if time.monotonic() - last_purge > PURGE_INTERVAL:
+                purged = purge_finished_tasks(purge_after)
+                if purged:
+                    self.stdout.write(f"Purged {purged} finished task(s)")
+                abandoned = ExportService.fail_abandoned_exports()
+                if abandoned:
+                    self.stdout.write(f"Failed {abandoned} abandoned export(s)")
+                swept = ExportService.sweep_orphaned_files()
+                if swept:
+                    self.stdout.write(f"Removed {swept} orphaned export file(s)")
+                last_purge = time.monotonic()
+
+            task = claim_next_task()
+            if task is None:
+                if options["once"]:
+                    break
+                time.sleep(options["poll_interval"])
+                continue
+
+            self.stdout.write(
+                f"Running task {task.name} {task.id} (attempt {task.attempts})"
+            )
+            run_task(task)
+            processed += 1
+            style = self.style.SUCCESS if task.is_finished else self.style.WARNING
+            self.stdout.write(style(f"Task {task.name} {task.id}: {task.status}"))
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Task worker finished: {processed} task(s) run")
+        )
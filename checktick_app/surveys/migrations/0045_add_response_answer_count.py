@@ -0,0 +1,133 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:58
+
+from collections import Counter
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Frozen copies of services.answer_aggregates as of this migration, so later
+# changes to the live service cannot change what the backfill produces.
+CHARTABLE_TYPES = {"mc_single", "mc_multi", "yesno", "likert", "dropdown"}
+MAX_OPTION_LENGTH = 255
+
+
+def normalize_answer_options(question_type, answer):
+    """Option labels an answer counts towards, or None if unanswered."""
+    if answer is None or answer == "":
+        return None
+    if question_type == "mc_multi":
+        if isinstance(answer, list):
+            return [str(item) for item in answer]
+        return [str(answer)]
+    if question_type == "yesno":
+        if str(answer).lower() in ("yes", "true", "1"):
+            return ["Yes"]
+        return ["No"]
+    return [str(answer)]
+
+
+def backfill_answer_counts(apps, schema_editor):
+    """
+    Populate ResponseAnswerCount from existing non-frozen responses.
+
+    Uses the same normalisation as the live aggregates so counts match what
+    rebuild_answer_aggregates would produce.
+    """
+    SurveyQuestion = apps.get_model("surveys", "SurveyQuestion")
+    SurveyResponse = apps.get_model("surveys", "SurveyResponse")
+    ResponseAnswerCount = apps.get_model("surveys", "ResponseAnswerCount")
+
+    questions_by_survey: dict[int, dict[int, str]] = {}
+    for question_id, survey_id, question_type in SurveyQuestion.objects.filter(
+        type__in=CHARTABLE_TYPES
+    ).values_list("id", "survey_id", "type"):
+        questions_by_survey.setdefault(survey_id, {})[question_id] = question_type
+
+    for survey_id, question_types in questions_by_survey.items():
+        totals: Counter = Counter()
+        answers_iter = (
+            SurveyResponse.objects.filter(survey_id=survey_id, is_frozen=False)
+            .values_list("answers", flat=True)
+            .iterator(chunk_size=2000)
+        )
+        for answers in answers_iter:
+            for question_id, question_type in question_types.items():
+                options = normalize_answer_options(
+                    question_type, (answers or {}).get(str(question_id))
+                )
+                if options is None:
+                    continue
+                totals[(question_id, "")] += 1
+                for option in options:
+                    if option:
+                        totals[(question_id, option[:MAX_OPTION_LENGTH])] += 1
+
+        ResponseAnswerCount.objects.bulk_create(
+            [
+                ResponseAnswerCount(
+                    survey_id=survey_id,
+                    question_id=question_id,
+                    option=option,
+                    count=count,
+                )
+                for (question_id, option), count in totals.items()
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("surveys", "0044_initialize_platform_key_v1"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ResponseAnswerCount",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("option", models.CharField(blank=True, max_length=255)),
+                ("count", models.IntegerField(default=0)),
+                (
+                    "question",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="answer_counts",
+                        to="surveys.surveyquestion",
+                    ),
+                ),
+                (
+                    "survey",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="answer_counts",
+                        to="surveys.survey",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["survey", "question"],
+                        name="surveys_res_survey__978b46_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("question", "option"),
+                        name="unique_answer_count_per_question_option",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_answer_counts, migrations.RunPython.noop),
+    ]
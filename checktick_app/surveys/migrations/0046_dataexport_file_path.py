@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-16 22:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("surveys", "0045_add_response_answer_count"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dataexport",
+            name="file_path",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+    ]
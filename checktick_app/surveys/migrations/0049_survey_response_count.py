@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 09:12
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_response_counts(apps, schema_editor):
+    """Populate Survey.response_count from the existing responses."""
+    Survey = apps.get_model("surveys", "Survey")
+    SurveyResponse = apps.get_model("surveys", "SurveyResponse")
+
+    Survey.objects.update(
+        response_count=Coalesce(
+            Subquery(
+                SurveyResponse.objects.filter(survey=OuterRef("pk"))
+                .order_by()
+                .values("survey")
+                .annotate(n=Count("id"))
+                .values("n")
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("surveys", "0048_task"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="survey",
+            name="response_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_response_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-17 11:05
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("surveys", "0049_survey_response_count"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PostcodeIMD",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("postcode", models.CharField(max_length=10, unique=True)),
+                (
+                    "imd_decile",
+                    models.PositiveSmallIntegerField(blank=True, null=True),
+                ),
+                ("imd_rank", models.PositiveIntegerField(blank=True, null=True)),
+                (
+                    "fetched_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("surveys", "0050_postcodeimd"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PostcodeDeprivation",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("postcode", models.CharField(max_length=10, unique=True)),
+                ("lsoa_code", models.CharField(max_length=9)),
+                ("imd_decile", models.PositiveSmallIntegerField()),
+                ("imd_rank", models.PositiveIntegerField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.18 on 2026-10-17 16:05
+
+from django.db import migrations, models
+
+
+def backfill_invitations(apps, schema_editor):
+    """
+    Populate invite_kind and invited_email from invitation notes.
+
+    The invite workflow recorded invitations only in the token note, as
+    "Invited: email@domain". Every token whose note mentions "Invited" was
+    treated as an invitation, so the same tokens are converted here.
+    """
+    SurveyAccessToken = apps.get_model("surveys", "SurveyAccessToken")
+
+    batch = []
+    tokens = SurveyAccessToken.objects.filter(note__icontains="Invited").only(
+        "id", "note", "for_authenticated"
+    )
+    for token in tokens.iterator(chunk_size=2000):
+        token.invite_kind = "authenticated" if token.for_authenticated else "email"
+        if ":" in token.note:
+            email = token.note.split(":", 1)[1].strip().lower()
+            token.invited_email = email[:254]
+        batch.append(token)
+        if len(batch) >= 2000:
+            SurveyAccessToken.objects.bulk_update(
+                batch, ["invite_kind", "invited_email"]
+            )
+            batch = []
+    SurveyAccessToken.objects.bulk_update(batch, ["invite_kind", "invited_email"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("surveys", "0051_postcodedeprivation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="surveyaccesstoken",
+            name="invite_kind",
+            field=models.CharField(
+                blank=True,
+                choices=[
+                    ("email", "Email invitation"),
+                    ("authenticated", "Authenticated invitation"),
+                ],
+                help_text="How the invitation was sent (blank if the token is not an invitation)",
+                max_length=20,
+            ),
+        ),
+        migrations.AddField(
+            model_name="surveyaccesstoken",
+            name="invited_email",
+            field=models.EmailField(
+                blank=True,
+                help_text="Invited email address, normalised with normalize_email()",
+                max_length=254,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="surveyaccesstoken",
+            index=models.Index(
+                fields=["survey", "invite_kind", "created_at"],
+                name="surveys_sur_survey__18cbb1_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="surveyaccesstoken",
+            index=models.Index(
+                fields=["survey", "invited_email"],
+                name="surveys_sur_survey__8469c0_idx",
+            ),
+        ),
+        migrations.RunPython(backfill_invitations, migrations.RunPython.noop),
+    ]
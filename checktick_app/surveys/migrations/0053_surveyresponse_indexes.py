@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("surveys", "0052_surveyaccesstoken_invitations"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="surveyresponse",
+            name="surveys_sur_receipt_a5cf9b_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="surveyresponse",
+            name="surveys_sur_is_froz_e3f1f0_idx",
+        ),
+        migrations.AlterField(
+            model_name="surveyresponse",
+            name="receipt_token",
+            field=models.UUIDField(
+                blank=True,
+                help_text="Receipt token for data subject requests (pseudonymous surveys only)",
+                null=True,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="surveyresponse",
+            index=models.Index(
+                fields=["survey", "submitted_at"],
+                name="surveys_sur_survey__f85c10_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="surveyresponse",
+            index=models.Index(
+                condition=models.Q(("is_frozen", True)),
+                fields=["survey"],
+                name="response_frozen_survey_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="surveyresponse",
+            index=models.Index(
+                condition=models.Q(("receipt_token__isnull", False)),
+                fields=["receipt_token"],
+                name="response_receipt_token_idx",
+            ),
+        ),
+    ]
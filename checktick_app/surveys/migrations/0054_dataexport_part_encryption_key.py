@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("surveys", "0053_surveyresponse_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dataexport",
+            name="part_encryption_key",
+            field=models.BinaryField(blank=True, editable=False, null=True),
+        ),
+    ]
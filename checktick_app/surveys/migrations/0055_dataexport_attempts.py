@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("surveys", "0054_dataexport_part_encryption_key"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dataexport",
+            name="attempts",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-17 14:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def queue_pending_exports(apps, schema_editor):
+    """
+    Hand exports left to the old export worker to the task queue.
+
+    Exports of encrypted surveys that were generated in a request which then
+    stopped are queued too: the task fails them, as the worker used to.
+    """
+    DataExport = apps.get_model("surveys", "DataExport")
+    Task = apps.get_model("surveys", "Task")
+
+    for export in DataExport.objects.filter(status__in=["queued", "running"]):
+        export.task = Task.objects.create(
+            name="generate_export",
+            payload={"export_id": str(export.id)},
+            survey_id=export.survey_id,
+            created_by_id=export.created_by_id,
+            max_attempts=settings.CHECKTICK_EXPORT_MAX_ATTEMPTS,
+        )
+        export.save(update_fields=["task"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("surveys", "0055_dataexport_attempts"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="dataexport",
+            name="attempts",
+        ),
+        migrations.RemoveField(
+            model_name="dataexport",
+            name="heartbeat_at",
+        ),
+        migrations.AddField(
+            model_name="dataexport",
+            name="task",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="exports",
+                to="surveys.task",
+            ),
+        ),
+        migrations.RunPython(queue_pending_exports, migrations.RunPython.noop),
+    ]
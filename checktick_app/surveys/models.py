@@ -11,7 +11,12 @@ from django.db import models
 from django.db.models import Q
 from django.utils import timezone
 
-from .utils import decrypt_sensitive, encrypt_sensitive, make_key_hash
+from .utils import (
+    decrypt_response_data,
+    encrypt_response_data,
+    is_legacy_response_blob,
+    make_key_hash,
+)
 
 User = get_user_model()
 
@@ -817,6 +822,9 @@ class Survey(models.Model):
     published_at = models.DateTimeField(null=True, blank=True)
     unlisted_key = models.CharField(max_length=64, null=True, blank=True, unique=True)
     max_responses = models.PositiveIntegerField(null=True, blank=True)
+    # Number of SurveyResponse rows, maintained with F() updates (see
+    # services/response_counts.py) so is_live() never counts responses
+    response_count = models.PositiveIntegerField(default=0, editable=False)
     captcha_required = models.BooleanField(default=False)
     no_patient_data_ack = models.BooleanField(
         default=False,
@@ -987,6 +995,30 @@ class Survey(models.Model):
         help_text="Reason for suspension (e.g., 'Non-compliance with DSR')",
     )
 
+    def save(self, *args, **kwargs):
+        # response_count is only ever changed with F() updates; never write
+        # back a stale in-memory value over concurrent submissions
+        if (
+            not self._state.adding
+            and self.pk is not None
+            and kwargs.get("update_fields") is None
+            and not kwargs.get("force_insert")
+        ):
+            skipped = self.get_deferred_fields() | {"response_count"}
+            kwargs["update_fields"] = [
+                f.attname
+                for f in self._meta.concrete_fields
+                if not f.primary_key and f.attname not in skipped
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def is_full(self) -> bool:
+        """Check if the survey has reached max_responses."""
+        return (
+            self.max_responses is not None and self.response_count >= self.max_responses
+        )
+
     def is_live(self) -> bool:
         now = timezone.now()
         time_ok = (self.start_at is None or self.start_at <= now) and (
@@ -997,13 +1029,8 @@ class Survey(models.Model):
         if self.status == self.Status.SUSPENDED:
             return False
         # Respect max responses if set
-        if self.max_responses is not None and hasattr(self, "responses"):
-            try:
-                count = self.responses.count()
-            except Exception:
-                count = 0
-            if count >= self.max_responses:
-                return False
+        if self.is_full:
+            return False
         return status_ok and time_ok
 
     @property
@@ -2115,8 +2142,12 @@ Return the translation as JSON following the exact structure specified in the sy
         # Step 2: Count and delete all responses (encrypted data)
         response_count = 0
         if hasattr(self, "responses"):
-            response_count = self.responses.count()
-            self.responses.all().delete()
+            from .services.answer_aggregates import delete_responses
+
+            # Leaves the survey's aggregates empty in one rebuild
+            response_count = delete_responses(self.responses.all())
+            Survey.objects.filter(pk=self.pk).update(response_count=0)
+            self.response_count = 0
             logger.info(f"Deleted {response_count} responses for survey {self.slug}")
 
         # Step 3: Delete data exports
@@ -2495,7 +2526,6 @@ class SurveyResponse(models.Model):
     receipt_token = models.UUIDField(
         null=True,
         blank=True,
-        db_index=True,
         help_text="Receipt token for data subject requests (pseudonymous surveys only)",
     )
 
@@ -2541,12 +2571,16 @@ class SurveyResponse(models.Model):
         return bytes(data)
 
     def store_demographics(self, survey_key: bytes, demographics: dict):
-        self.enc_demographics = encrypt_sensitive(survey_key, demographics)
+        self.enc_demographics = encrypt_response_data(
+            survey_key, demographics, self.survey_id
+        )
 
     def load_demographics(self, survey_key: bytes) -> dict:
         if not self.enc_demographics:
             return {}
-        return decrypt_sensitive(survey_key, self._to_bytes(self.enc_demographics))
+        return decrypt_response_data(
+            survey_key, self._to_bytes(self.enc_demographics), self.survey_id
+        )
 
     def store_answers(self, survey_key: bytes, answers: dict):
         """
@@ -2559,7 +2593,7 @@ class SurveyResponse(models.Model):
         This encrypts the entire answers dictionary, providing complete
         protection for surveys collecting patient data.
         """
-        self.enc_answers = encrypt_sensitive(survey_key, answers)
+        self.enc_answers = encrypt_response_data(survey_key, answers, self.survey_id)
         # Clear plaintext answers when encrypting
         self.answers = {}
 
@@ -2576,7 +2610,9 @@ class SurveyResponse(models.Model):
         If answers are not encrypted, returns the plaintext answers field.
         """
         if self.enc_answers:
-            return decrypt_sensitive(survey_key, self._to_bytes(self.enc_answers))
+            return decrypt_response_data(
+                survey_key, self._to_bytes(self.enc_answers), self.survey_id
+            )
         return self.answers
 
     def store_complete_response(
@@ -2598,7 +2634,9 @@ class SurveyResponse(models.Model):
         if demographics:
             full_response["demographics"] = demographics
 
-        self.enc_answers = encrypt_sensitive(survey_key, full_response)
+        self.enc_answers = encrypt_response_data(
+            survey_key, full_response, self.survey_id
+        )
         # Clear plaintext fields
         self.answers = {}
         self.enc_demographics = None
@@ -2613,10 +2651,13 @@ class SurveyResponse(models.Model):
         Returns:
             Dictionary with 'answers' and optionally 'demographics' keys
 
-        Falls back to legacy format if enc_answers not present.
+        Falls back to legacy format if enc_answers not present. v2 blobs share
+        a cached per-survey data key, so loading many responses costs one KDF.
         """
         if self.enc_answers:
-            return decrypt_sensitive(survey_key, self._to_bytes(self.enc_answers))
+            return decrypt_response_data(
+                survey_key, self._to_bytes(self.enc_answers), self.survey_id
+            )
 
         # Legacy format: separate fields
         result = {"answers": self.answers}
@@ -2629,6 +2670,38 @@ class SurveyResponse(models.Model):
         """Check if this response has encrypted data."""
         return bool(self.enc_answers or self.enc_demographics)
 
+    @property
+    def needs_rewrap(self) -> bool:
+        """Check if any encrypted field still uses the legacy Scrypt blob format."""
+        return any(
+            blob and is_legacy_response_blob(self._to_bytes(blob))
+            for blob in (self.enc_answers, self.enc_demographics)
+        )
+
+    def rewrap_encryption(self, survey_key: bytes) -> list[str]:
+        """
+        Re-encrypt legacy blobs in the v2 response format.
+
+        Args:
+            survey_key: Survey's KEK (32-byte key)
+
+        Returns:
+            Names of the fields that were re-encrypted (caller saves them)
+        """
+        updated = []
+        for field in ("enc_answers", "enc_demographics"):
+            blob = getattr(self, field)
+            if not blob or not is_legacy_response_blob(self._to_bytes(blob)):
+                continue
+            data = decrypt_response_data(
+                survey_key, self._to_bytes(blob), self.survey_id
+            )
+            setattr(
+                self, field, encrypt_response_data(survey_key, data, self.survey_id)
+            )
+            updated.append(field)
+        return updated
+
     @property
     def is_pseudonymous(self) -> bool:
         """
@@ -2801,9 +2874,23 @@ class SurveyResponse(models.Model):
                 name="one_response_per_user_per_survey",
             )
         ]
+        # Checked against a seeded dataset by
+        # checktick_app/surveys/tests/test_query_plans.py
         indexes = [
-            models.Index(fields=["receipt_token"]),
-            models.Index(fields=["is_frozen"]),
+            # Dashboard counts and time series, exports in submission order
+            models.Index(fields=["survey", "submitted_at"]),
+            # Frozen responses are rare, so index only those
+            models.Index(
+                fields=["survey"],
+                condition=Q(is_frozen=True),
+                name="response_frozen_survey_idx",
+            ),
+            # Receipt tokens are only set for pseudonymous surveys
+            models.Index(
+                fields=["receipt_token"],
+                condition=Q(receipt_token__isnull=False),
+                name="response_receipt_token_idx",
+            ),
         ]
 
 
@@ -3143,7 +3230,48 @@ class ResponseFreezeLog(models.Model):
         return f"{self.get_action_display()} response {self.response_id} by {self.performed_by}"
 
 
+class ResponseAnswerCount(models.Model):
+    """
+    Materialised answer counts per (survey, question, option).
+
+    Maintained incrementally by the signal handlers in surveys/signals.py when a
+    SurveyResponse is saved, frozen, unfrozen or deleted, so response insights
+    can be read without scanning responses. Frozen responses are not counted.
+    The row whose option is ANSWERED holds the number of responses that
+    answered the question. Rebuild with ``manage.py rebuild_answer_aggregates``.
+    """
+
+    ANSWERED = ""
+
+    survey = models.ForeignKey(
+        Survey, on_delete=models.CASCADE, related_name="answer_counts"
+    )
+    question = models.ForeignKey(
+        SurveyQuestion, on_delete=models.CASCADE, related_name="answer_counts"
+    )
+    option = models.CharField(max_length=255, blank=True)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["question", "option"],
+                name="unique_answer_count_per_question_option",
+            )
+        ]
+        indexes = [
+            models.Index(fields=["survey", "question"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"Q{self.question_id} {self.option or '(answered)'}: {self.count}"
+
+
 class SurveyAccessToken(models.Model):
+    class InviteKind(models.TextChoices):
+        EMAIL = "email", "Email invitation"
+        AUTHENTICATED = "authenticated", "Authenticated invitation"
+
     survey = models.ForeignKey(
         Survey, on_delete=models.CASCADE, related_name="access_tokens"
     )
@@ -3166,12 +3294,32 @@ class SurveyAccessToken(models.Model):
         default=False,
         help_text="True if this token is for authenticated user invitation (not anonymous token)",
     )
+    # Set for tokens created by the invite workflow; blank for plain tokens
+    invite_kind = models.CharField(
+        max_length=20,
+        choices=InviteKind.choices,
+        blank=True,
+        help_text="How the invitation was sent (blank if the token is not an invitation)",
+    )
+    invited_email = models.EmailField(
+        blank=True,
+        help_text="Invited email address, normalised with normalize_email()",
+    )
 
     class Meta:
         indexes = [
             models.Index(fields=["survey", "expires_at"]),
+            # Invitation lists and counts per survey
+            models.Index(fields=["survey", "invite_kind", "created_at"]),
+            # Invitation checks for authenticated surveys
+            models.Index(fields=["survey", "invited_email"]),
         ]
 
+    @staticmethod
+    def normalize_email(email: str) -> str:
+        """Invited emails are matched case-insensitively."""
+        return (email or "").strip().lower()
+
     def is_valid(self) -> bool:  # pragma: no cover
         if self.used_at:
             return False
@@ -3562,6 +3710,118 @@ class LLMConversationSession(models.Model):
         ]
 
 
+class Task(models.Model):
+    """
+    Durable background task, run by the ``run_worker`` management command.
+
+    Tasks are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so any number
+    of workers can share the queue. Handlers report progress on the row,
+    which status endpoints read from any web process. Failed attempts are
+    retried with exponential backoff up to ``max_attempts``.
+    See services/task_queue.py.
+    """
+
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        SUCCEEDED = "succeeded", "Succeeded"
+        FAILED = "failed", "Failed"
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    # Registered handler name, e.g. "send_invites"
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    survey = models.ForeignKey(
+        Survey,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="tasks",
+    )
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="tasks",
+    )
+
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.QUEUED
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=3)
+    # Not claimed before this time (set for retries)
+    run_after = models.DateTimeField(default=timezone.now)
+    # Heartbeat of the worker running the task
+    locked_at = models.DateTimeField(null=True, blank=True)
+
+    # Progress and outcome, polled by status endpoints
+    progress = models.PositiveSmallIntegerField(default=0)
+    message = models.CharField(max_length=255, blank=True, default="")
+    # Handler state: partial results while running (so retries can resume),
+    # final results once succeeded
+    result = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True, default="")
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["status", "run_after"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"Task {self.name} {self.id} ({self.status})"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.Status.SUCCEEDED, self.Status.FAILED)
+
+
+class PostcodeIMD(models.Model):
+    """
+    Cached IMD (Index of Multiple Deprivation) lookup for a postcode.
+
+    Postcodes with no IMD data (e.g. outside England) are cached too, with a
+    null decile, so they are not looked up again. Rows older than
+    ``IMD_CACHE_TTL_DAYS`` are refreshed on the next lookup.
+    See services/imd_service.py.
+    """
+
+    # Normalised postcode: uppercase, no spaces
+    postcode = models.CharField(max_length=10, unique=True)
+    imd_decile = models.PositiveSmallIntegerField(null=True, blank=True)
+    imd_rank = models.PositiveIntegerField(null=True, blank=True)
+    fetched_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self) -> str:
+        return f"{self.postcode}: IMD decile {self.imd_decile}"
+
+
+class PostcodeDeprivation(models.Model):
+    """
+    Offline IMD decile for a postcode, from the ONS Postcode Directory joined
+    to the English Indices of Deprivation by LSOA.
+
+    Loaded with ``manage.py load_imd_dataset`` and read instead of the API
+    when ``IMD_PROVIDER`` is "local". Only postcodes in an LSOA with IMD data
+    (i.e. in England) are stored.
+    """
+
+    # Normalised postcode: uppercase, no spaces
+    postcode = models.CharField(max_length=10, unique=True)
+    lsoa_code = models.CharField(max_length=9)
+    imd_decile = models.PositiveSmallIntegerField()
+    imd_rank = models.PositiveIntegerField()
+
+    def __str__(self) -> str:
+        return f"{self.postcode} ({self.lsoa_code}): IMD decile {self.imd_decile}"
+
+
 # -------------------- Collections (definitions) --------------------
 
 
@@ -3722,8 +3982,17 @@ class DataExport(models.Model):
     - Download tokens prevent unauthorized access after export creation
     - Audit trail tracks who exported what and when
     - Downloaded_at tracks actual downloads for compliance reporting
+    - Exports are generated by a ``generate_export`` task (see tasks.py),
+      which checkpoints its progress so interrupted jobs resume where they
+      stopped
     """
 
+    class Status(models.TextChoices):
+        QUEUED = "queued", "Queued"
+        RUNNING = "running", "Running"
+        READY = "ready", "Ready"
+        FAILED = "failed", "Failed"
+
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     survey = models.ForeignKey(Survey, on_delete=models.CASCADE, related_name="exports")
     created_by = models.ForeignKey(
@@ -3740,17 +4009,48 @@ class DataExport(models.Model):
     # Export metadata
     file_size_bytes = models.BigIntegerField(null=True, blank=True)
     response_count = models.PositiveIntegerField()
-    export_format = models.CharField(max_length=10, default="csv")  # Future: json, xlsx
+    # csv, ndjson, arrow or parquet (see services/export_writers.py)
+    export_format = models.CharField(max_length=10, default="csv")
+    # Generated file, relative to the "exports" storage. Empty for exports
+    # created before files were stored, which are regenerated on download.
+    file_path = models.CharField(max_length=255, blank=True, default="")
 
     # Encryption (stored exports are encrypted at rest)
     is_encrypted = models.BooleanField(default=True)
     encryption_key_id = models.CharField(max_length=255, null=True, blank=True)
+    # Sealed file encryption key of a queued password-protected export, so
+    # the worker never sees the password. Cleared when the job finishes.
+    pending_encryption_key = models.BinaryField(null=True, blank=True, editable=False)
+    # Sealed key encrypting the job's intermediate part files. Cleared when
+    # the job finishes or fails.
+    part_encryption_key = models.BinaryField(null=True, blank=True, editable=False)
+
+    # Background job state. Queued exports are claimed, retried and resumed
+    # by their task; exports generated in the request have none.
+    task = models.ForeignKey(
+        Task,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="exports",
+    )
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.QUEUED
+    )
+    processed_count = models.PositiveIntegerField(default=0)
+    # Resume point: keyset cursor of the last processed response and the
+    # intermediate part files written so far
+    checkpoint = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True, default="")
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["survey", "-created_at"]),
             models.Index(fields=["download_token"]),
+            models.Index(fields=["status", "created_at"]),
         ]
 
     def __str__(self) -> str:
@@ -3763,6 +4063,25 @@ class DataExport(models.Model):
 
         return timezone.now() > self.download_url_expires_at
 
+    @property
+    def is_ready(self) -> bool:
+        """Whether the export file has been generated."""
+        return self.status == self.Status.READY
+
+    @property
+    def is_pending(self) -> bool:
+        """Whether the export is still waiting for or being generated."""
+        return self.status in (self.Status.QUEUED, self.Status.RUNNING)
+
+    @property
+    def progress_percent(self) -> int:
+        """Share of responses processed so far, for progress bars."""
+        if self.is_ready:
+            return 100
+        if not self.response_count:
+            return 0
+        return min(99, self.processed_count * 100 // self.response_count)
+
     def mark_downloaded(self) -> None:
         """Record that this export was downloaded."""
         from django.utils import timezone
@@ -1,16 +1,131 @@
+"""
+Permission checks for surveys, organisations, teams and datasets.
+
+Checks read the user's roles from a PermissionContext, which loads each kind
+of role (organisation memberships and ownership, team memberships, survey
+memberships and data custodianships) with one query the first time it is
+needed. PermissionContextMiddleware attaches a context to ``request.user``,
+so every check made while handling a request shares it. Outside a request
+each check builds its own context. Saving or deleting any membership
+invalidates contexts already loaded (see signals.py).
+"""
+
 from __future__ import annotations
 
+from functools import cached_property
+
 from django.core.exceptions import PermissionDenied
 
 from .models import Organization, OrganizationMembership, Survey, SurveyMembership
 
+# Bumped whenever roles change, so loaded contexts reload them
+_roles_generation = 0
+
+
+def invalidate_permission_contexts() -> None:
+    """Make every loaded PermissionContext reload the user's roles."""
+    global _roles_generation
+    _roles_generation += 1
+
+
+class PermissionContext:
+    """A user's roles, each loaded with a single query on first use."""
+
+    def __init__(self, user):
+        self.user_id = getattr(user, "id", None) if user.is_authenticated else None
+        self.generation = _roles_generation
+
+    @cached_property
+    def org_roles(self) -> dict[int, str]:
+        """Role by organization ID, in the order the user joined them."""
+        if self.user_id is None:
+            return {}
+        return dict(
+            OrganizationMembership.objects.filter(user_id=self.user_id)
+            .order_by("id")
+            .values_list("organization_id", "role")
+        )
+
+    @cached_property
+    def owned_org_ids(self) -> set[int]:
+        if self.user_id is None:
+            return set()
+        return set(
+            Organization.objects.filter(owner_id=self.user_id).values_list(
+                "id", flat=True
+            )
+        )
+
+    @cached_property
+    def survey_roles(self) -> dict[int, str]:
+        """Survey membership role by survey ID."""
+        if self.user_id is None:
+            return {}
+        return dict(
+            SurveyMembership.objects.filter(user_id=self.user_id).values_list(
+                "survey_id", "role"
+            )
+        )
+
+    @cached_property
+    def team_roles(self) -> dict[int, str]:
+        """Team membership role by team ID."""
+        from .models import TeamMembership
+
+        if self.user_id is None:
+            return {}
+        return dict(
+            TeamMembership.objects.filter(user_id=self.user_id).values_list(
+                "team_id", "role"
+            )
+        )
+
+    @cached_property
+    def custodian_survey_ids(self) -> set[int]:
+        """Surveys the user is an active data custodian for."""
+        from .models import DataCustodian
+
+        if self.user_id is None:
+            return set()
+        return {
+            custodian.survey_id
+            for custodian in DataCustodian.objects.filter(
+                user_id=self.user_id, revoked_at__isnull=True
+            )
+            if custodian.is_active
+        }
+
+    def owns_org(self, org_id: int | None) -> bool:
+        return org_id is not None and org_id in self.owned_org_ids
+
+    def is_org_admin(self, org_id: int | None) -> bool:
+        return (
+            org_id is not None
+            and self.org_roles.get(org_id) == OrganizationMembership.Role.ADMIN
+        )
+
+
+def get_permission_context(user) -> PermissionContext:
+    """The context attached to ``user`` for this request, or a new one."""
+    context = getattr(user, "_permission_context", None)
+    if not isinstance(context, PermissionContext):
+        return PermissionContext(user)
+    if context.generation != _roles_generation:
+        context = attach_permission_context(user)
+    return context
+
+
+def attach_permission_context(user) -> PermissionContext:
+    """Attach a fresh context to ``user`` for checks made with it."""
+    context = PermissionContext(user)
+    user._permission_context = context
+    return context
+
 
 def is_org_admin(user, org: Organization | None) -> bool:
     if not user.is_authenticated or org is None:
         return False
-    return OrganizationMembership.objects.filter(
-        user=user, organization=org, role=OrganizationMembership.Role.ADMIN
-    ).exists()
+    return get_permission_context(user).is_org_admin(org.id)
 
 
 def can_view_survey(user, survey: Survey) -> bool:
@@ -18,17 +133,14 @@ def can_view_survey(user, survey: Survey) -> bool:
         return False
     if survey.owner_id == getattr(user, "id", None):
         return True
+    roles = get_permission_context(user)
     # Organization owner can view all surveys in their organization
-    if survey.organization_id and survey.organization.owner_id == getattr(
-        user, "id", None
-    ):
+    if roles.owns_org(survey.organization_id):
         return True
-    if survey.organization_id and is_org_admin(user, survey.organization):
+    if roles.is_org_admin(survey.organization_id):
         return True
     # creators and viewers of the specific survey can view it
-    if SurveyMembership.objects.filter(user=user, survey=survey).exists():
-        return True
-    return False
+    return survey.id in roles.survey_roles
 
 
 def can_edit_survey(user, survey: Survey) -> bool:
@@ -37,18 +149,16 @@ def can_edit_survey(user, survey: Survey) -> bool:
         return False
     if survey.owner_id == getattr(user, "id", None):
         return True
+    roles = get_permission_context(user)
     # Organization owner can edit all surveys in their organization
-    if survey.organization_id and survey.organization.owner_id == getattr(
-        user, "id", None
-    ):
+    if roles.owns_org(survey.organization_id):
         return True
-    if survey.organization_id and is_org_admin(user, survey.organization):
+    if roles.is_org_admin(survey.organization_id):
         return True
-    return SurveyMembership.objects.filter(
-        user=user,
-        survey=survey,
-        role__in=[SurveyMembership.Role.CREATOR, SurveyMembership.Role.EDITOR],
-    ).exists()
+    return roles.survey_roles.get(survey.id) in (
+        SurveyMembership.Role.CREATOR,
+        SurveyMembership.Role.EDITOR,
+    )
 
 
 def can_manage_org_users(user, org: Organization) -> bool:
@@ -59,15 +169,14 @@ def can_manage_survey_users(user, survey: Survey) -> bool:
     # Individual users (surveys without organization) cannot share surveys
     if not survey.organization_id:
         return False
+    roles = get_permission_context(user)
     # Only survey creators (not editors), org admins, or owner can manage users on a survey
-    if survey.organization_id and is_org_admin(user, survey.organization):
+    if roles.is_org_admin(survey.organization_id):
         return True
     if survey.owner_id == getattr(user, "id", None):
         return True
     # Only CREATOR role can manage users, EDITOR cannot
-    return SurveyMembership.objects.filter(
-        user=user, survey=survey, role=SurveyMembership.Role.CREATOR
-    ).exists()
+    return roles.survey_roles.get(survey.id) == SurveyMembership.Role.CREATOR
 
 
 def require_can_view(user, survey: Survey) -> None:
@@ -83,7 +192,7 @@ def require_can_edit(user, survey: Survey) -> None:
 def user_has_org_membership(user) -> bool:
     if not user.is_authenticated:
         return False
-    return OrganizationMembership.objects.filter(user=user).exists()
+    return bool(get_permission_context(user).org_roles)
 
 
 def can_create_datasets(user) -> bool:
@@ -102,22 +211,18 @@ def can_create_datasets(user) -> bool:
     if not user.is_authenticated:
         return False
 
-    from .models import OrganizationMembership
-
     # Check user's organization memberships
-    memberships = OrganizationMembership.objects.filter(user=user)
+    org_roles = get_permission_context(user).org_roles
 
     # If user has no org memberships, they're an individual user - allow
-    if not memberships.exists():
+    if not org_roles:
         return True
 
     # If user has ADMIN or CREATOR role in any org, allow
-    if memberships.filter(
-        role__in=[
-            OrganizationMembership.Role.ADMIN,
-            OrganizationMembership.Role.CREATOR,
-        ]
-    ).exists():
+    if any(
+        role in (OrganizationMembership.Role.ADMIN, OrganizationMembership.Role.CREATOR)
+        for role in org_roles.values()
+    ):
         return True
 
     # User only has VIEWER or EDITOR roles - deny
@@ -138,18 +243,14 @@ def can_edit_dataset(user, dataset) -> bool:
         return False
 
     # Individual user datasets - check if user is the creator
-    if dataset.organization is None:
-        return dataset.created_by == user
+    if dataset.organization_id is None:
+        return dataset.created_by_id == user.id
 
     # Organization datasets - user must be ADMIN or CREATOR in the dataset's organization
-    return OrganizationMembership.objects.filter(
-        user=user,
-        organization=dataset.organization,
-        role__in=[
-            OrganizationMembership.Role.ADMIN,
-            OrganizationMembership.Role.CREATOR,
-        ],
-    ).exists()
+    return get_permission_context(user).org_roles.get(dataset.organization_id) in (
+        OrganizationMembership.Role.ADMIN,
+        OrganizationMembership.Role.CREATOR,
+    )
 
 
 def require_can_create_datasets(user) -> None:
@@ -177,9 +278,7 @@ def can_close_survey(user, survey: Survey) -> bool:
         return False
     if survey.owner_id == getattr(user, "id", None):
         return True
-    if survey.organization_id and survey.organization.owner_id == getattr(
-        user, "id", None
-    ):
+    if get_permission_context(user).owns_org(survey.organization_id):
         return True
     return False
 
@@ -197,29 +296,15 @@ def can_export_survey_data(user, survey: Survey) -> bool:
         return True
 
     # Organization owner can export all surveys in their org
-    if survey.organization_id and survey.organization.owner_id == getattr(
-        user, "id", None
-    ):
+    if get_permission_context(user).owns_org(survey.organization_id):
         return True
 
     # Organization admins can export
-    if survey.organization_id and is_org_admin(user, survey.organization):
+    if get_permission_context(user).is_org_admin(survey.organization_id):
         return True
 
-    # Check if user is an active data custodian for this survey
-    from .models import DataCustodian
-
-    if DataCustodian.objects.filter(
-        user=user, survey=survey, revoked_at__isnull=True
-    ).exists():
-        # Verify custodianship is still active (not expired)
-        custodian = DataCustodian.objects.filter(
-            user=user, survey=survey, revoked_at__isnull=True
-        ).first()
-        if custodian and custodian.is_active:
-            return True
-
-    return False
+    # Check if user is an active (not revoked or expired) data custodian
+    return survey.id in get_permission_context(user).custodian_survey_ids
 
 
 def can_extend_retention(user, survey: Survey) -> bool:
@@ -231,9 +316,7 @@ def can_extend_retention(user, survey: Survey) -> bool:
         return False
 
     # Organization owner only (not even survey owner)
-    if survey.organization_id and survey.organization.owner_id == getattr(
-        user, "id", None
-    ):
+    if get_permission_context(user).owns_org(survey.organization_id):
         return True
 
     # If no organization, survey owner can extend
@@ -252,9 +335,7 @@ def can_manage_legal_hold(user, survey: Survey) -> bool:
         return False
 
     # Organization owner only
-    if survey.organization_id and survey.organization.owner_id == getattr(
-        user, "id", None
-    ):
+    if get_permission_context(user).owns_org(survey.organization_id):
         return True
 
     # If no organization, survey owner can manage holds
@@ -273,9 +354,7 @@ def can_manage_data_custodians(user, survey: Survey) -> bool:
         return False
 
     # Organization owner only (not survey owner for security)
-    if survey.organization_id and survey.organization.owner_id == getattr(
-        user, "id", None
-    ):
+    if get_permission_context(user).owns_org(survey.organization_id):
         return True
 
     # If no organization, survey owner can manage custodians
@@ -294,9 +373,7 @@ def can_soft_delete_survey(user, survey: Survey) -> bool:
         return False
     if survey.owner_id == getattr(user, "id", None):
         return True
-    if survey.organization_id and survey.organization.owner_id == getattr(
-        user, "id", None
-    ):
+    if get_permission_context(user).owns_org(survey.organization_id):
         return True
     return False
 
@@ -310,9 +387,7 @@ def can_hard_delete_survey(user, survey: Survey) -> bool:
         return False
 
     # Organization owner only
-    if survey.organization_id and survey.organization.owner_id == getattr(
-        user, "id", None
-    ):
+    if get_permission_context(user).owns_org(survey.organization_id):
         return True
 
     # If no organization, survey owner can hard delete (with caution)
@@ -373,8 +448,6 @@ def require_can_hard_delete_survey(user, survey: Survey) -> None:
 
 def can_publish_question_group(user, group, level: str, survey=None) -> bool:
     """Check if user can publish a question group at given level."""
-    from .models import OrganizationMembership
-
     if not user.is_authenticated:
         return False
 
@@ -385,34 +458,30 @@ def can_publish_question_group(user, group, level: str, survey=None) -> bool:
     if level == "global":
         # Anyone (except org VIEWERs) can publish globally
         # Check if user is an org VIEWER
-        if OrganizationMembership.objects.filter(
-            user=user, role=OrganizationMembership.Role.VIEWER
-        ).exists():
+        if (
+            OrganizationMembership.Role.VIEWER
+            in get_permission_context(user).org_roles.values()
+        ):
             # If they're a VIEWER in any org, they can't publish
             return False
         return True
 
     if level == "organization":
         # Must have an organization associated with the survey
-        if not survey or not survey.organization:
+        if not survey or not survey.organization_id:
             return False
         # Must be CREATOR or ADMIN in that organization
-        membership = OrganizationMembership.objects.filter(
-            user=user,
-            organization=survey.organization,
-            role__in=[
-                OrganizationMembership.Role.ADMIN,
-                OrganizationMembership.Role.CREATOR,
-            ],
-        ).exists()
-        return membership
+        return get_permission_context(user).org_roles.get(survey.organization_id) in (
+            OrganizationMembership.Role.ADMIN,
+            OrganizationMembership.Role.CREATOR,
+        )
 
     return False
 
 
 def can_import_published_template(user, template) -> bool:
     """Check if user can import a published template."""
-    from .models import OrganizationMembership, PublishedQuestionGroup
+    from .models import PublishedQuestionGroup
 
     if not user.is_authenticated:
         return False
@@ -430,10 +499,8 @@ def can_import_published_template(user, template) -> bool:
         template.publication_level
         == PublishedQuestionGroup.PublicationLevel.ORGANIZATION
     ):
-        if template.organization:
-            return OrganizationMembership.objects.filter(
-                user=user, organization=template.organization
-            ).exists()
+        if template.organization_id:
+            return template.organization_id in get_permission_context(user).org_roles
 
     return False
 
@@ -491,12 +558,10 @@ def can_view_team_survey(user, survey: Survey) -> bool:
     Returns:
         bool: True if user can view the survey, False otherwise
     """
-    from .models import TeamMembership
-
     if not user.is_authenticated:
         return False
 
-    if not survey.team:
+    if not survey.team_id:
         # Not a team survey, use existing can_view_survey logic
         return can_view_survey(user, survey)
 
@@ -504,20 +569,17 @@ def can_view_team_survey(user, survey: Survey) -> bool:
     if survey.owner_id == getattr(user, "id", None):
         return True
 
+    roles = get_permission_context(user)
     # Check if user is organization admin (if team is hosted by org)
-    if survey.team.organization:
-        if is_org_admin(user, survey.team.organization):
-            return True
+    if roles.is_org_admin(survey.team.organization_id):
+        return True
 
     # Check team membership - all team members can view surveys
-    if TeamMembership.objects.filter(team=survey.team, user=user).exists():
+    if survey.team_id in roles.team_roles:
         return True
 
     # Check survey membership (explicit share)
-    if SurveyMembership.objects.filter(user=user, survey=survey).exists():
-        return True
-
-    return False
+    return survey.id in roles.survey_roles
 
 
 def can_edit_team_survey(user, survey: Survey) -> bool:
@@ -538,12 +600,10 @@ def can_edit_team_survey(user, survey: Survey) -> bool:
     Returns:
         bool: True if user can edit the survey, False otherwise
     """
-    from .models import TeamMembership
-
     if not user.is_authenticated:
         return False
 
-    if not survey.team:
+    if not survey.team_id:
         # Not a team survey, use existing can_edit_survey logic
         return can_edit_survey(user, survey)
 
@@ -551,26 +611,20 @@ def can_edit_team_survey(user, survey: Survey) -> bool:
     if survey.owner_id == getattr(user, "id", None):
         return True
 
+    roles = get_permission_context(user)
     # Check if user is organization admin (if team is hosted by org)
-    if survey.team.organization:
-        if is_org_admin(user, survey.team.organization):
-            return True
+    if roles.is_org_admin(survey.team.organization_id):
+        return True
 
     # Check team membership - admin and creator can edit
-    if TeamMembership.objects.filter(
-        team=survey.team, user=user, role__in=["admin", "creator"]
-    ).exists():
+    if roles.team_roles.get(survey.team_id) in ("admin", "creator"):
         return True
 
     # Check survey membership for explicit edit permissions
-    if SurveyMembership.objects.filter(
-        user=user,
-        survey=survey,
-        role__in=[SurveyMembership.Role.CREATOR, SurveyMembership.Role.EDITOR],
-    ).exists():
-        return True
-
-    return False
+    return roles.survey_roles.get(survey.id) in (
+        SurveyMembership.Role.CREATOR,
+        SurveyMembership.Role.EDITOR,
+    )
 
 
 def can_manage_team(user, team) -> bool:
@@ -589,8 +643,6 @@ def can_manage_team(user, team) -> bool:
     Returns:
         bool: True if user can manage the team, False otherwise
     """
-    from .models import TeamMembership
-
     if not user.is_authenticated:
         return False
 
@@ -598,13 +650,13 @@ def can_manage_team(user, team) -> bool:
     if team.owner_id == getattr(user, "id", None):
         return True
 
+    roles = get_permission_context(user)
     # Check if user is organization admin (if team is hosted by org)
-    if team.organization:
-        if is_org_admin(user, team.organization):
-            return True
+    if roles.is_org_admin(team.organization_id):
+        return True
 
     # Check if user is team admin
-    return TeamMembership.objects.filter(team=team, user=user, role="admin").exists()
+    return roles.team_roles.get(team.id) == "admin"
 
 
 def can_add_team_member(user, team) -> bool:
@@ -644,8 +696,6 @@ def can_create_survey_in_team(user, team) -> bool:
     Returns:
         bool: True if user can create surveys, False otherwise
     """
-    from .models import TeamMembership
-
     if not user.is_authenticated:
         return False
 
@@ -657,15 +707,13 @@ def can_create_survey_in_team(user, team) -> bool:
     if team.owner_id == getattr(user, "id", None):
         return True
 
+    roles = get_permission_context(user)
     # Organization admins can create surveys in their org's teams
-    if team.organization:
-        if is_org_admin(user, team.organization):
-            return True
+    if roles.is_org_admin(team.organization_id):
+        return True
 
     # Team members with creator or admin role can create surveys
-    return TeamMembership.objects.filter(
-        team=team, user=user, role__in=["admin", "creator"]
-    ).exists()
+    return roles.team_roles.get(team.id) in ("admin", "creator")
 
 
 def get_user_team_role(user, team):
@@ -679,17 +727,13 @@ def get_user_team_role(user, team):
     Returns:
         str: The role ('admin', 'creator', 'viewer') or None if not a member
     """
-    from .models import TeamMembership
-
     if not user.is_authenticated:
         return None
 
     if team.owner_id == getattr(user, "id", None):
         return "admin"
 
-    membership = TeamMembership.objects.filter(team=team, user=user).first()
-
-    return membership.role if membership else None
+    return get_permission_context(user).team_roles.get(team.id)
 
 
 # Require functions for teams (raise PermissionDenied)
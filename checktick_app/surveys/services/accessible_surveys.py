@@ -0,0 +1,146 @@
+"""
+Surveys a user can access, resolved in a single query.
+
+A user reaches a survey by owning it, through a team or organisation they
+belong to, or through an explicit SurveyMembership. ``accessible_surveys``
+returns every such survey from one SELECT, annotated with the way the user
+reaches it:
+
+- ``access_source``: "owned", "team", "organisation" or "shared", in that
+  order of precedence
+- ``access_role``: "owner", or the user's team, organisation or survey
+  membership role for that source
+- ``team_role``, ``org_role`` and ``shared_role``: each membership role
+  (or None)
+
+Each role is a correlated subquery on the user's membership tables, so a
+survey reached several ways appears once, without joins or DISTINCT, and the
+query count does not grow with the number of surveys, teams or
+organisations.
+
+``translations_by_survey`` then loads the translations of a page of surveys
+with one more query.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Iterable
+
+from django.db.models import (
+    Case,
+    CharField,
+    F,
+    IntegerField,
+    OuterRef,
+    Q,
+    QuerySet,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Lower
+
+from ..models import OrganizationMembership, Survey, SurveyMembership, TeamMembership
+
+
+def accessible_surveys(
+    user,
+    *,
+    org_roles: Iterable[str] | None = None,
+    include_teams: bool = True,
+    originals_only: bool = True,
+) -> QuerySet[Survey]:
+    """
+    Surveys the user can access, annotated with how they reach each one.
+
+    Args:
+        user: An authenticated user
+        org_roles: Organisation roles that grant access to all of the
+            organisation's surveys (default: any role)
+        include_teams: Whether team membership grants access
+        originals_only: Exclude translations, which are listed with their
+            original survey
+
+    Returns:
+        Surveys ordered by source, then team or organisation name, then name
+    """
+    org_memberships = OrganizationMembership.objects.filter(
+        user=user, organization=OuterRef("organization_id")
+    )
+    if org_roles is not None:
+        org_memberships = org_memberships.filter(role__in=list(org_roles))
+
+    surveys = Survey.objects.select_related("team", "organization").annotate(
+        org_role=Subquery(org_memberships.values("role")[:1]),
+        shared_role=Subquery(
+            SurveyMembership.objects.filter(user=user, survey=OuterRef("pk")).values(
+                "role"
+            )[:1]
+        ),
+        team_role=(
+            Subquery(
+                TeamMembership.objects.filter(
+                    user=user, team=OuterRef("team_id")
+                ).values("role")[:1]
+            )
+            if include_teams
+            else Value(None, output_field=CharField())
+        ),
+    )
+    access = (
+        Q(owner=user)
+        | Q(org_role__isnull=False)
+        | Q(shared_role__isnull=False)
+        | Q(team_role__isnull=False)
+    )
+    surveys = surveys.filter(access)
+    if originals_only:
+        surveys = surveys.filter(is_original=True)
+
+    owned = Q(owner=user)
+    team = Q(team_role__isnull=False)
+    organisation = Q(org_role__isnull=False)
+    return surveys.annotate(
+        access_rank=Case(
+            When(owned, then=Value(0)),
+            When(team, then=Value(1)),
+            When(organisation, then=Value(2)),
+            default=Value(3),
+            output_field=IntegerField(),
+        ),
+        access_source=Case(
+            When(owned, then=Value("owned")),
+            When(team, then=Value("team")),
+            When(organisation, then=Value("organisation")),
+            default=Value("shared"),
+        ),
+        access_role=Case(
+            When(owned, then=Value("owner")),
+            When(team, then=F("team_role")),
+            When(organisation, then=F("org_role")),
+            default=F("shared_role"),
+        ),
+        access_group=Case(
+            When(team, then=F("team__name")),
+            When(organisation, then=F("organization__name")),
+            default=Value(""),
+        ),
+    ).order_by("access_rank", "access_group", Lower("name"), "id")
+
+
+def translations_by_survey(surveys: Iterable[Survey]) -> dict[int, list[Survey]]:
+    """
+    The translations of each survey (as get_available_translations), loaded
+    with a single query.
+    """
+    surveys = list(surveys)
+    groups = {s.translation_group for s in surveys if s.translation_group}
+    by_group: dict[str, list[Survey]] = defaultdict(list)
+    if groups:
+        for translation in Survey.objects.filter(translation_group__in=groups):
+            by_group[translation.translation_group].append(translation)
+    return {
+        s.id: [t for t in by_group.get(s.translation_group, []) if t.id != s.id]
+        for s in surveys
+    }
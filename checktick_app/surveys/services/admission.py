@@ -0,0 +1,78 @@
+"""
+Admission control for participant submissions.
+
+A submission is admitted by claiming everything it consumes with conditional
+UPDATEs inside the transaction that saves the response:
+
+- its invite token, which must still be unused
+- a place under the survey's ``max_responses`` (see response_counts.py)
+
+Each claim is a single statement that re-checks its condition against the
+committed row, so concurrent submissions cannot reuse a token or push a survey
+past its cap, however they interleave. If any claim fails the caller's
+transaction is rolled back, releasing the claims already made.
+
+Usage::
+
+    try:
+        with transaction.atomic():
+            admit_submission(survey, token, user)
+            mark_reserved(response)
+            response.save()
+    except SubmissionRefused as refused:
+        ...  # refused.reason: "token_used" or "max_responses"
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from django.utils import timezone
+
+from .response_counts import reserve_response
+
+if TYPE_CHECKING:
+    from ..models import Survey, SurveyAccessToken
+
+
+class SubmissionRefused(Exception):
+    """A submission could not claim its token or a place in the survey."""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        # Reason shown on the survey's closed page
+        self.reason = reason
+
+
+def claim_token(token: SurveyAccessToken, user=None) -> bool:
+    """Mark an invite token used, unless another submission already has."""
+    from ..models import SurveyAccessToken
+
+    changes = {"used_at": timezone.now()}
+    if user is not None and user.is_authenticated:
+        changes["used_by"] = user
+    claimed = SurveyAccessToken.objects.filter(
+        pk=token.pk, used_at__isnull=True
+    ).update(**changes)
+    if claimed:
+        for field, value in changes.items():
+            setattr(token, field, value)
+    return bool(claimed)
+
+
+def admit_submission(
+    survey: Survey, token: SurveyAccessToken | None = None, user=None
+) -> None:
+    """
+    Claim the token and a response place for a submission.
+
+    Must be called inside ``transaction.atomic()`` so that a refusal rolls
+    back any claim already made.
+
+    Raises:
+        SubmissionRefused: The token was used or the survey is full
+    """
+    if token is not None and not claim_token(token, user):
+        raise SubmissionRefused("token_used")
+    if not reserve_response(survey):
+        raise SubmissionRefused("max_responses")
@@ -0,0 +1,155 @@
+"""
+Single-pass analytics engine for survey responses.
+
+Reads the ``answers`` column once, in chunks. Each chunk becomes a matrix of
+raw values (one row per response, one column per chartable question) built
+with ``map``/``zip``, and each column is counted with ``Counter``; all three
+run in C, so there is no Python-level work per answer for single-value
+questions. Answer normalisation (yes/no spellings, labels) then runs once per
+*distinct* raw value rather than once per response.
+
+Used by compute_response_analytics for custom response querysets (unfiltered
+dashboards read the materialised ResponseAnswerCount aggregates instead) and
+by rebuild_survey_aggregates.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from itertools import chain, islice
+from typing import Iterable
+
+from .answer_aggregates import normalize_answer_options
+
+# Small chunks keep the transposed rows in CPU cache
+DEFAULT_CHUNK_SIZE = 256
+
+
+@dataclass
+class AnswerColumn:
+    """Counted answer values for one question across scanned responses."""
+
+    question_id: int
+    question_type: str
+    # Raw answer value -> number of responses (None/"" included for
+    # single-value questions and dropped when reading)
+    raw_counts: Counter = field(default_factory=Counter)
+    # Multi-select only: selected item -> number of selections
+    item_counts: Counter = field(default_factory=Counter)
+    multi_answered: int = 0
+
+    def add_values(self, values: tuple) -> None:
+        """Count one chunk of raw values for this question."""
+        if self.question_type == "mc_multi":
+            self._add_multi(values)
+            return
+        try:
+            self.raw_counts.update(values)
+        except TypeError:
+            # Unhashable answers (e.g. a list for a single-choice question)
+            # count by their string form, as normalize_answer_options would
+            self.raw_counts.update(_hashable(value) for value in values)
+
+    @property
+    def answered(self) -> int:
+        """Number of responses that answered this question."""
+        if self.question_type == "mc_multi":
+            return self.multi_answered
+        return sum(
+            count
+            for value, count in self.raw_counts.items()
+            if value is not None and value != ""
+        )
+
+    def option_counts(self) -> Counter:
+        """
+        Count selections per normalised option label.
+
+        Ties keep first-seen order, as in a response-by-response scan.
+        """
+        counts: Counter = Counter()
+        for item, count in self.item_counts.items():
+            counts[str(item)] += count
+        for value, count in self.raw_counts.items():
+            if value is None or value == "":
+                continue
+            for label in normalize_answer_options(self.question_type, value) or ():
+                counts[label] += count
+        return counts
+
+    def _add_multi(self, values: tuple) -> None:
+        present = [value for value in values if value is not None and value != ""]
+        self.multi_answered += len(present)
+        selections = [value for value in present if value.__class__ is list]
+        if len(selections) != len(present):
+            # A bare value counts as a single selection
+            self.raw_counts.update(
+                _hashable(value) for value in present if value.__class__ is not list
+            )
+        items = chain.from_iterable(selections)
+        try:
+            self.item_counts.update(items)
+        except TypeError:
+            self.item_counts.update(
+                _hashable(item) for item in chain.from_iterable(selections)
+            )
+
+
+@dataclass
+class AnswerMatrix:
+    """Column-per-question view of the chartable answers of a set of responses."""
+
+    columns: dict[int, AnswerColumn] = field(default_factory=dict)
+    response_count: int = 0
+
+
+def build_answer_matrix(
+    answer_rows: Iterable[dict | None],
+    question_types: dict[int, str],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> AnswerMatrix:
+    """
+    Scan response answers once and build an AnswerMatrix.
+
+    Args:
+        answer_rows: Iterable of SurveyResponse.answers dicts, typically
+            ``responses.values_list("answers", flat=True).iterator()``
+        question_types: Mapping of chartable question id -> question type
+        chunk_size: Responses transposed into columns at a time
+
+    Returns:
+        AnswerMatrix with one column per question
+    """
+    matrix = AnswerMatrix(
+        columns={
+            question_id: AnswerColumn(question_id, question_type)
+            for question_id, question_type in question_types.items()
+        }
+    )
+    if not matrix.columns:
+        matrix.response_count = sum(1 for _ in answer_rows)
+        return matrix
+
+    keys = [str(question_id) for question_id in matrix.columns]
+    columns = list(matrix.columns.values())
+
+    rows = iter(answer_rows)
+    while True:
+        chunk = [
+            tuple(map((answers or {}).get, keys))
+            for answers in islice(rows, chunk_size)
+        ]
+        if not chunk:
+            break
+        matrix.response_count += len(chunk)
+        for column, values in zip(columns, zip(*chunk)):
+            column.add_values(values)
+    return matrix
+
+
+def _hashable(value):
+    """Return value if hashable, else its string form."""
+    if value.__hash__ is None:
+        return str(value)
+    return value
@@ -0,0 +1,300 @@
+"""
+Materialised answer-distribution aggregates for response insights.
+
+ResponseAnswerCount holds one counter per (survey, question, option) for
+chartable questions. Signal handlers in ``surveys/signals.py`` apply the
+difference between a response's previous and new contribution whenever it is
+saved, frozen, unfrozen or deleted, so the dashboard can read every question's
+distribution with one query instead of re-parsing all responses. A question's
+counts are rebuilt from scratch when its type or options change.
+
+Bulk deletes skip the per-response deltas: ``delete_responses`` deletes with
+maintenance suspended and rebuilds each affected survey once, and responses
+deleted along with their survey leave its counters to the same cascade.
+
+Rules:
+- Only plaintext ``answers`` are counted (encrypted responses never are)
+- Frozen responses are excluded, matching exports
+- The row with option ``ResponseAnswerCount.ANSWERED`` ("") counts how many
+  responses answered the question, the denominator for percentages
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from contextlib import contextmanager
+import threading
+from typing import TYPE_CHECKING
+
+from django.db import transaction
+from django.db.models import F, Q
+
+if TYPE_CHECKING:
+    from ..models import Survey
+
+CHARTABLE_TYPES = {"mc_single", "mc_multi", "yesno", "likert", "dropdown"}
+MAX_OPTION_LENGTH = 255
+
+_state = threading.local()
+
+
+def normalize_answer_options(question_type: str, answer) -> list[str] | None:
+    """
+    Return the option labels an answer counts towards.
+
+    Args:
+        question_type: Question type (mc_single, mc_multi, yesno, ...)
+        answer: Raw answer value from SurveyResponse.answers
+
+    Returns:
+        List of option labels, or None if the question was not answered
+    """
+    if answer is None or answer == "":
+        return None
+
+    if question_type == "mc_multi":
+        # Multi-select: answer is a list
+        if isinstance(answer, list):
+            return [str(item) for item in answer]
+        return [str(answer)]
+    if question_type == "yesno":
+        # Normalize yes/no
+        if str(answer).lower() in ("yes", "true", "1"):
+            return ["Yes"]
+        return ["No"]
+    # Single value
+    return [str(answer)]
+
+
+def answer_option_counts(
+    answers: dict | None, question_types: dict[int, str]
+) -> Counter:
+    """
+    Count a single response's contribution to the aggregates.
+
+    Args:
+        answers: SurveyResponse.answers
+        question_types: Mapping of chartable question id -> question type
+
+    Returns:
+        Counter keyed by (question_id, option); the ANSWERED option counts
+        the question as answered
+    """
+    from ..models import ResponseAnswerCount
+
+    counts: Counter = Counter()
+    if not answers:
+        return counts
+    for question_id, question_type in question_types.items():
+        options = normalize_answer_options(question_type, answers.get(str(question_id)))
+        if options is None:
+            continue
+        counts[(question_id, ResponseAnswerCount.ANSWERED)] += 1
+        for option in options:
+            option = option[:MAX_OPTION_LENGTH]
+            if option != ResponseAnswerCount.ANSWERED:
+                counts[(question_id, option)] += 1
+    return counts
+
+
+def chartable_question_types(survey_id: int) -> dict[int, str]:
+    """Return {question_id: type} for a survey's chartable questions."""
+    from ..models import SurveyQuestion
+
+    return dict(
+        SurveyQuestion.objects.filter(
+            survey_id=survey_id, type__in=CHARTABLE_TYPES
+        ).values_list("id", "type")
+    )
+
+
+def apply_response_change(
+    survey_id: int, old_answers: dict | None, new_answers: dict | None
+) -> None:
+    """
+    Apply the difference between a response's old and new contribution.
+
+    Pass ``old_answers=None`` for a newly counted response (created or
+    unfrozen) and ``new_answers=None`` for one that stops counting (deleted or
+    frozen).
+    """
+    if is_suspended() or (not old_answers and not new_answers):
+        return
+
+    question_types = chartable_question_types(survey_id)
+    if not question_types:
+        return
+
+    delta = answer_option_counts(new_answers, question_types)
+    delta.subtract(answer_option_counts(old_answers, question_types))
+    apply_delta(survey_id, delta)
+
+
+def apply_delta(survey_id: int, delta: Counter) -> None:
+    """
+    Add ``delta`` to the stored counters with conditional F() updates.
+
+    Missing rows are created with ``ignore_conflicts`` first so concurrent
+    submissions never lose an increment; rows sharing a delta are updated in
+    one statement.
+    """
+    from ..models import ResponseAnswerCount
+
+    delta = {key: value for key, value in delta.items() if value}
+    if not delta:
+        return
+
+    with transaction.atomic():
+        new_keys = [key for key, value in delta.items() if value > 0]
+        if new_keys:
+            ResponseAnswerCount.objects.bulk_create(
+                [
+                    ResponseAnswerCount(
+                        survey_id=survey_id, question_id=question_id, option=option
+                    )
+                    for question_id, option in new_keys
+                ],
+                ignore_conflicts=True,
+            )
+
+        keys_by_delta: dict[int, list[tuple[int, str]]] = {}
+        for key, value in delta.items():
+            keys_by_delta.setdefault(value, []).append(key)
+
+        for value, keys in keys_by_delta.items():
+            match = Q()
+            for question_id, option in keys:
+                match |= Q(question_id=question_id, option=option)
+            ResponseAnswerCount.objects.filter(match, survey_id=survey_id).update(
+                count=F("count") + value
+            )
+
+
+def rebuild_survey_aggregates(survey: Survey, chunk_size: int = 2000) -> int:
+    """
+    Recompute a survey's aggregates from its responses.
+
+    Args:
+        survey: Survey to rebuild
+        chunk_size: Responses fetched per database round trip
+
+    Returns:
+        Number of responses counted
+    """
+    from ..models import ResponseAnswerCount
+
+    return _rebuild(
+        survey.id,
+        chartable_question_types(survey.id),
+        ResponseAnswerCount.objects.filter(survey=survey),
+        chunk_size,
+    )
+
+
+def rebuild_question_aggregates(question_id: int, chunk_size: int = 2000) -> None:
+    """
+    Recompute one question's aggregates from its survey's responses.
+
+    Called when a question's type or options change, since the stored counts
+    were normalised under the old type. A question that is no longer
+    chartable just loses its counts.
+    """
+    from ..models import ResponseAnswerCount, SurveyQuestion
+
+    if is_suspended():
+        return
+    question = (
+        SurveyQuestion.objects.filter(id=question_id)
+        .values("survey_id", "type")
+        .first()
+    )
+    if question is None:
+        return
+
+    existing = ResponseAnswerCount.objects.filter(question_id=question_id)
+    if question["type"] not in CHARTABLE_TYPES:
+        existing.delete()
+        return
+    _rebuild(
+        question["survey_id"],
+        {question_id: question["type"]},
+        existing,
+        chunk_size,
+    )
+
+
+def _rebuild(survey_id: int, question_types, existing, chunk_size: int) -> int:
+    """Replace the ``existing`` counter rows with counts for ``question_types``."""
+    from ..models import ResponseAnswerCount, SurveyResponse
+    from .analytics_engine import build_answer_matrix
+
+    matrix = build_answer_matrix(
+        SurveyResponse.objects.filter(survey_id=survey_id, is_frozen=False)
+        .values_list("answers", flat=True)
+        .iterator(chunk_size=chunk_size),
+        question_types,
+    )
+    totals: Counter = Counter()
+    for question_id, column in matrix.columns.items():
+        totals[(question_id, ResponseAnswerCount.ANSWERED)] = column.answered
+        for option, count in column.option_counts().items():
+            option = option[:MAX_OPTION_LENGTH]
+            if option != ResponseAnswerCount.ANSWERED:
+                totals[(question_id, option)] += count
+
+    with transaction.atomic():
+        existing.delete()
+        ResponseAnswerCount.objects.bulk_create(
+            [
+                ResponseAnswerCount(
+                    survey_id=survey_id,
+                    question_id=question_id,
+                    option=option,
+                    count=count,
+                )
+                for (question_id, option), count in totals.items()
+                if count
+            ],
+            batch_size=1000,
+        )
+    return matrix.response_count
+
+
+def delete_responses(responses) -> int:
+    """
+    Delete a queryset of responses and rebuild their surveys' aggregates once.
+
+    Deleting them one signal at a time would apply a delta per response.
+
+    Returns:
+        Number of responses deleted
+    """
+    from ..models import Survey, SurveyResponse
+
+    survey_ids = set(responses.values_list("survey_id", flat=True))
+    with transaction.atomic():
+        with aggregates_suspended():
+            _, deleted = responses.delete()
+        for survey in Survey.objects.filter(id__in=survey_ids):
+            rebuild_survey_aggregates(survey)
+    return deleted.get(SurveyResponse._meta.label, 0)
+
+
+def is_suspended() -> bool:
+    return getattr(_state, "suspended", False)
+
+
+@contextmanager
+def aggregates_suspended():
+    """
+    Skip incremental aggregate maintenance inside the block.
+
+    Used for bulk operations (``delete_responses``, rebuilds) that rebuild a
+    survey's aggregates wholesale instead of one response at a time.
+    """
+    previous = is_suspended()
+    _state.suspended = True
+    try:
+        yield
+    finally:
+        _state.suspended = previous
@@ -0,0 +1,370 @@
+"""
+Cross-tabulation and filtered insights for survey responses.
+
+Answers questions such as "Q7 broken down by Q3" or "distributions for
+responses submitted in March where Q2 is Yes" without a CSV export. Answer
+filters use the branching operators (SurveyQuestionCondition.Operator,
+evaluated with branching.evaluate_condition), so a filter matches exactly the
+responses a branching rule with the same operator and value would.
+
+The matching responses are read once per request: the scan feeds both the
+contingency table and the single-pass analytics engine. Results are cached
+per (survey, filter hash, latest response).
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+import hashlib
+import json
+from typing import Any, Iterable, Iterator, Mapping
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from ..branching import CompiledCondition
+from ..models import SurveyQuestionCondition
+from .analytics_engine import build_answer_matrix
+from .answer_aggregates import CHARTABLE_TYPES, normalize_answer_options
+from .date_bounds import parse_date_bound
+from .response_analytics import (
+    AnswerDistribution,
+    _build_distribution,
+    _reorder_by_question_options,
+    question_choice_labels,
+)
+
+CACHE_PREFIX = "survey-insights"
+MAX_FILTERS = 10
+
+
+@dataclass
+class AnswerFilter:
+    """Keep responses whose answer to a question meets a branching condition."""
+
+    question_id: int
+    operator: str
+    value: str = ""
+
+    def __post_init__(self):
+        if self.operator not in SurveyQuestionCondition.Operator.values:
+            raise ValueError(f"Unknown operator '{self.operator}'")
+        self._condition = CompiledCondition.compile(
+            SurveyQuestionCondition(operator=self.operator, value=self.value)
+        )
+
+    @classmethod
+    def parse(cls, expression: str) -> AnswerFilter:
+        """
+        Parse ``"<question_id>:<operator>[:<value>]"``, e.g. ``"12:eq:Yes"``.
+
+        Raises:
+            ValueError: If the expression is malformed
+        """
+        parts = expression.split(":", 2)
+        if len(parts) < 2 or not parts[0].strip().isdigit():
+            raise ValueError(
+                f"Invalid filter '{expression}', expected question_id:operator[:value]"
+            )
+        value = parts[2] if len(parts) == 3 else ""
+        return cls(int(parts[0]), parts[1].strip(), value)
+
+    def matches(self, answers: Mapping[str, Any]) -> bool:
+        return self._condition.matches(answers.get(str(self.question_id)))
+
+    def as_dict(self) -> dict:
+        return {
+            "question_id": self.question_id,
+            "operator": self.operator,
+            "value": self.value,
+        }
+
+
+@dataclass
+class InsightsQuery:
+    """What to compute: filters, date range and the optional crosstab pair."""
+
+    filters: list[AnswerFilter] = field(default_factory=list)
+    since: datetime | None = None
+    until: datetime | None = None
+    row_question_id: int | None = None
+    column_question_id: int | None = None
+
+    @classmethod
+    def from_params(cls, params) -> InsightsQuery:
+        """
+        Build a query from request parameters (QueryDict or plain dict).
+
+        Parameters: ``row``, ``column`` (question ids), ``since``, ``until``
+        (ISO date or datetime; a date ``until`` includes that whole day) and
+        repeated ``filter`` expressions (see AnswerFilter.parse).
+
+        Raises:
+            ValueError: If a parameter is invalid
+        """
+        if hasattr(params, "getlist"):
+            expressions = params.getlist("filter")
+        else:
+            expressions = params.get("filter") or []
+            if isinstance(expressions, str):
+                expressions = [expressions]
+        expressions = [e for e in expressions if e]
+        if len(expressions) > MAX_FILTERS:
+            raise ValueError(f"At most {MAX_FILTERS} filters are allowed")
+
+        query = cls(
+            filters=[AnswerFilter.parse(e) for e in expressions],
+            since=parse_date_bound(params.get("since"), "since"),
+            until=parse_date_bound(params.get("until"), "until"),
+            row_question_id=_parse_question_id(params.get("row"), "row"),
+            column_question_id=_parse_question_id(params.get("column"), "column"),
+        )
+        if (query.row_question_id is None) != (query.column_question_id is None):
+            raise ValueError("Both row and column are required for a crosstab")
+        return query
+
+    @property
+    def has_crosstab(self) -> bool:
+        return self.row_question_id is not None
+
+    def cache_token(self) -> str:
+        """Stable hash of the query, used in cache keys."""
+        payload = {
+            "filters": [f.as_dict() for f in self.filters],
+            "since": self.since.isoformat() if self.since else None,
+            "until": self.until.isoformat() if self.until else None,
+            "row": self.row_question_id,
+            "column": self.column_question_id,
+        }
+        encoded = json.dumps(payload, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()[:32]
+
+
+@dataclass
+class Crosstab:
+    """Contingency table of two questions' answers."""
+
+    row_question_id: int
+    row_question_text: str
+    column_question_id: int
+    column_question_text: str
+    row_labels: list[str] = field(default_factory=list)
+    column_labels: list[str] = field(default_factory=list)
+    # counts[i][j]: responses answering row_labels[i] and column_labels[j]
+    counts: list[list[int]] = field(default_factory=list)
+    row_totals: list[int] = field(default_factory=list)
+    column_totals: list[int] = field(default_factory=list)
+    # Responses that answered both questions
+    total: int = 0
+
+    @property
+    def rows(self) -> list[dict]:
+        """Rows zipped with their labels and totals, for templates."""
+        return [
+            {"label": label, "counts": counts, "total": total}
+            for label, counts, total in zip(
+                self.row_labels, self.counts, self.row_totals
+            )
+        ]
+
+
+@dataclass
+class Insights:
+    """Filtered distributions plus an optional crosstab."""
+
+    total_responses: int
+    distributions: list[AnswerDistribution] = field(default_factory=list)
+    crosstab: Crosstab | None = None
+
+    def as_dict(self) -> dict:
+        return {
+            "total_responses": self.total_responses,
+            "distributions": [asdict(d) for d in self.distributions],
+            "crosstab": asdict(self.crosstab) if self.crosstab else None,
+        }
+
+
+def compute_insights(survey, query: InsightsQuery | None = None) -> Insights:
+    """
+    Compute filtered distributions (and a crosstab if requested) in one scan.
+
+    Only non-frozen responses are included, as on the dashboard and in exports.
+
+    Args:
+        survey: Survey model instance
+        query: Filters, date range and crosstab questions
+
+    Returns:
+        Insights for the matching responses
+
+    Raises:
+        ValueError: If the query references questions outside the survey, or
+            a crosstab question that is not a choice-type question
+    """
+    from checktick_app.surveys.views import _order_questions_by_group
+
+    query = query or InsightsQuery()
+    questions = {q.id: q for q in survey.questions.select_related("group")}
+
+    for answer_filter in query.filters:
+        if answer_filter.question_id not in questions:
+            raise ValueError(
+                f"Question {answer_filter.question_id} is not part of this survey"
+            )
+    if query.has_crosstab:
+        for question_id in (query.row_question_id, query.column_question_id):
+            question = questions.get(question_id)
+            if question is None:
+                raise ValueError(f"Question {question_id} is not part of this survey")
+            if question.type not in CHARTABLE_TYPES:
+                raise ValueError(
+                    f"Question {question_id} is not a choice question and "
+                    "cannot be cross-tabulated"
+                )
+
+    responses = survey.responses.filter(is_frozen=False)
+    if query.since:
+        responses = responses.filter(submitted_at__gte=query.since)
+    if query.until:
+        responses = responses.filter(submitted_at__lt=query.until)
+
+    stamp = responses.aggregate(latest=Max("id"), count=Count("id"))
+    cache_key = _cache_key(survey, query, questions.values(), stamp)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    chartable = _order_questions_by_group(
+        survey, [q for q in questions.values() if q.type in CHARTABLE_TYPES]
+    )
+    pair_counts: Counter = Counter()
+    matched_rows = _matching_answers(
+        responses.values_list("answers", flat=True).iterator(chunk_size=2000),
+        query,
+        questions,
+        pair_counts,
+    )
+    matrix = build_answer_matrix(
+        matched_rows, {question.id: question.type for question in chartable}
+    )
+
+    distributions = []
+    for question in chartable:
+        column = matrix.columns[question.id]
+        dist = _build_distribution(question, column.option_counts(), column.answered)
+        if dist:
+            distributions.append(dist)
+
+    insights = Insights(
+        total_responses=matrix.response_count,
+        distributions=distributions,
+        crosstab=(
+            _build_crosstab(
+                questions[query.row_question_id],
+                questions[query.column_question_id],
+                pair_counts,
+            )
+            if query.has_crosstab
+            else None
+        ),
+    )
+    cache.set(
+        cache_key,
+        insights,
+        getattr(settings, "CHECKTICK_INSIGHTS_CACHE_SECONDS", 300),
+    )
+    return insights
+
+
+def _matching_answers(
+    rows: Iterable[dict | None],
+    query: InsightsQuery,
+    questions: dict,
+    pair_counts: Counter,
+) -> Iterator[dict]:
+    """Yield answers that pass every filter, counting crosstab pairs as we go."""
+    if query.has_crosstab:
+        row_key = str(query.row_question_id)
+        row_type = questions[query.row_question_id].type
+        column_key = str(query.column_question_id)
+        column_type = questions[query.column_question_id].type
+
+    for answers in rows:
+        answers = answers or {}
+        if query.filters and not all(f.matches(answers) for f in query.filters):
+            continue
+        if query.has_crosstab:
+            row_options = normalize_answer_options(row_type, answers.get(row_key))
+            column_options = normalize_answer_options(
+                column_type, answers.get(column_key)
+            )
+            if row_options is not None and column_options is not None:
+                pair_counts[None] += 1
+                for row_option in row_options:
+                    for column_option in column_options:
+                        pair_counts[(row_option, column_option)] += 1
+        yield answers
+
+
+def _build_crosstab(row_question, column_question, pair_counts: Counter) -> Crosstab:
+    row_totals: Counter = Counter()
+    column_totals: Counter = Counter()
+    for key, count in pair_counts.items():
+        if key is None:
+            continue
+        row_totals[key[0]] += count
+        column_totals[key[1]] += count
+
+    row_labels = _ordered_labels(row_question, row_totals)
+    column_labels = _ordered_labels(column_question, column_totals)
+    return Crosstab(
+        row_question_id=row_question.id,
+        row_question_text=row_question.text,
+        column_question_id=column_question.id,
+        column_question_text=column_question.text,
+        row_labels=row_labels,
+        column_labels=column_labels,
+        counts=[
+            [pair_counts[(row, column)] for column in column_labels]
+            for row in row_labels
+        ],
+        row_totals=[row_totals[label] for label in row_labels],
+        column_totals=[column_totals[label] for label in column_labels],
+        total=pair_counts[None],
+    )
+
+
+def _ordered_labels(question, totals: Counter) -> list[str]:
+    """Question-defined options first (even if unused), then the rest by count."""
+    for label in question_choice_labels(question):
+        totals.setdefault(label, 0)
+    options = [{"label": label, "count": count} for label, count in totals.items()]
+    options.sort(key=lambda option: -option["count"])
+    return [
+        option["label"] for option in _reorder_by_question_options(question, options)
+    ]
+
+
+def _cache_key(survey, query: InsightsQuery, questions, stamp: dict) -> str:
+    # Question edits (new options, type changes) must invalidate the result
+    question_sig = hashlib.sha256(
+        json.dumps(
+            sorted([q.id, q.type, q.options] for q in questions), default=str
+        ).encode("utf-8")
+    ).hexdigest()[:16]
+    return (
+        f"{CACHE_PREFIX}:{survey.id}:{query.cache_token()}:"
+        f"{stamp['latest'] or 0}:{stamp['count']}:{question_sig}"
+    )
+
+
+def _parse_question_id(raw, name: str) -> int | None:
+    if raw in (None, ""):
+        return None
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' must be a question id")
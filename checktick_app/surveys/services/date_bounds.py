@@ -0,0 +1,48 @@
+"""
+Parsing of the date range bounds accepted by insights filters and the API.
+
+Bounds are ISO dates or datetimes. A bare date is midnight at the start of
+that day, except for an ``until`` bound, which includes the whole day. Naive
+values are read in the current time zone.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+def parse_date_bound(raw, name: str) -> datetime | None:
+    """
+    Parse a ``since`` or ``until`` bound.
+
+    Args:
+        raw: ISO date or datetime string, a datetime, or None/"" for no bound
+        name: Parameter name, used for the error message and to treat a bare
+            ``until`` date as inclusive
+
+    Returns:
+        An aware datetime, or None if no bound was given
+
+    Raises:
+        ValueError: If ``raw`` is not an ISO date or datetime
+    """
+    if raw in (None, ""):
+        return None
+    if isinstance(raw, datetime):
+        value = raw
+    else:
+        day = parse_date(str(raw))
+        if day is not None:
+            value = datetime.combine(day, time.min)
+            if name == "until":
+                value += timedelta(days=1)
+        else:
+            value = parse_datetime(str(raw))
+            if value is None:
+                raise ValueError(f"'{name}' must be an ISO date or datetime")
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
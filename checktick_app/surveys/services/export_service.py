@@ -6,72 +6,213 @@ Features:
 - Create time-limited download tokens
 - Track export audit trail
 - Password-protected downloads
+
+Exports are background jobs. ``queue_export`` records a queued DataExport and
+a ``generate_export`` task (see tasks.py), which the ``run_worker`` workers
+claim, retry and reclaim like any other task. The task generates the file
+with ``run_export``, saving a checkpoint (keyset cursor plus an intermediate
+part file) every N responses so a retried or reclaimed job resumes where it
+stopped. Part files are encrypted with a per-job key, sealed with SECRET_KEY
+like a queued export's file key, and deleted when the job finishes or fails;
+``sweep_orphaned_files`` removes any left behind by a worker that died. The
+finished file is written once to the "exports" storage and every download
+serves that stored file.
+
+Surveys with whole-response encryption are generated in the request with
+``create_export``, because their key only exists in the user's session. That
+path writes the file in a single pass, with no part files.
 """
 
 from __future__ import annotations
 
-import csv
-from datetime import timedelta
-from io import StringIO
+from datetime import datetime, timedelta
+import json
 import logging
+import os
 import secrets
-from typing import TYPE_CHECKING
+from tempfile import SpooledTemporaryFile
+from typing import TYPE_CHECKING, Iterable, Iterator
+import uuid
 
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.core.files.storage import storages
 from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 
+from .export_writers import (
+    EXPORT_WRITERS,
+    CsvExportWriter,
+    ExportColumn,
+    ExportRecord,
+    ExportWriter,
+    get_export_writer,
+)
+from .imd_service import IMDService
+
 if TYPE_CHECKING:
-    from ..models import DataExport, Survey
+    from ..models import DataExport, Survey, SurveyResponse
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+# Deprivation columns of surveys with IMD enabled, read from the decrypted
+# demographics (or the IMD cache, for responses submitted before the lookup)
+IMD_COLUMNS = [
+    ExportColumn("imd_decile", "IMD Decile", "text"),
+    ExportColumn("imd_rank", "IMD Rank", "text"),
+]
+
 
 class ExportService:
     """
     Service for creating and managing survey data exports.
 
     Workflow:
-    1. User requests export via API
-    2. Service generates CSV from survey responses
-    3. Service encrypts CSV with user-provided password
-    4. Service creates DataExport record with download token
+    1. User requests export via the data governance dashboard
+    2. Service queues a DataExport record with download token
+    3. Worker generates the file from survey responses, checkpointing progress
+    4. Worker encrypts the file with the key derived from the user's password
     5. Service returns download URL (valid for configured days)
-    6. User downloads file using token
+    6. User downloads the stored file using token once it is ready
     7. Service tracks download in audit trail
     """
 
     # Download token length
     TOKEN_LENGTH = 32
 
+    # Responses fetched per database round trip, and responses per chunk
+    CHUNK_SIZE = 500
+
+    # HKDF info for sealing queued exports' file keys with SECRET_KEY
+    JOB_KEY_INFO = b"checktick-export-job-key-v1"
+    # Associated data for sealing a job's part file key
+    PART_KEY_INFO = b"checktick-export-part-key-v1"
+
     @classmethod
-    @transaction.atomic
     def create_export(
         cls,
         survey: Survey,
         user: User,
         password: str | None = None,
         survey_key: bytes | None = None,
+        export_format: str = "csv",
     ) -> DataExport:
         """
-        Create a new data export for a survey.
+        Create a data export and generate its file immediately.
+
+        Used for surveys with whole-response encryption, whose key is only
+        available in the requesting user's session. Other exports should be
+        queued with queue_export.
+
+        The file is written in a single pass, with no part files, and outside
+        any transaction: the export is saved as running first, so a failure
+        marks it failed and removes its file. If the request is killed,
+        fail_abandoned_exports fails the export later, as nothing has the key
+        to resume it.
 
         Args:
             survey: Survey to export data from
             user: User requesting the export
             password: Optional password to encrypt the export file
             survey_key: Survey's KEK (required for encrypted surveys)
+            export_format: File format, one of export_writers.EXPORT_WRITERS
 
         Returns:
-            DataExport instance with download token
+            Ready DataExport instance with download token
 
         Raises:
-            ValueError: If survey has no responses, is deleted, or is encrypted without key
+            ValueError: If survey has no responses, is deleted, is encrypted
+                without key, or the format is unknown or unavailable
+        """
+        export, file_key = cls._new_export(
+            survey, user, password, survey_key, export_format
+        )
+        export.status = export.Status.RUNNING
+        export.started_at = timezone.now()
+        export.save(force_insert=True)
+
+        # The file key stays in memory; it is never written to the database
+        try:
+            cls._store_export_file(
+                export, cls._iter_record_batches(survey, survey_key), file_key
+            )
+        except Exception as e:
+            logger.error(f"Export {export.id} failed: {e}", exc_info=True)
+            cls.fail_export(export, e)
+            raise
+
+        logger.info(
+            f"Export created successfully: ID={export.id}, survey={survey.slug}, "
+            f"size={export.file_size_bytes} bytes, encrypted={export.is_encrypted}"
+        )
+        return export
+
+    @classmethod
+    def queue_export(
+        cls,
+        survey: Survey,
+        user: User,
+        password: str | None = None,
+        export_format: str = "csv",
+    ) -> DataExport:
+        """
+        Create a queued data export and the task that generates it.
+
+        The password is turned into the file encryption key straight away and
+        only the sealed key is stored, until the job finishes. Call inside a
+        transaction: workers see the task once it commits.
+
+        Returns:
+            Queued DataExport instance with download token
+
+        Raises:
+            ValueError: As create_export. Surveys with whole-response
+                encryption cannot be queued.
+        """
+        from .task_queue import enqueue
+
+        export, file_key = cls._new_export(survey, user, password, None, export_format)
+        if file_key:
+            export.pending_encryption_key = cls._seal_file_key(*file_key)
+        export.task = enqueue(
+            "generate_export",
+            {"export_id": str(export.id)},
+            survey=survey,
+            created_by=user,
+            max_attempts=settings.CHECKTICK_EXPORT_MAX_ATTEMPTS,
+        )
+        export.save(force_insert=True)
+
+        logger.info(
+            f"Export queued: ID={export.id}, survey={survey.slug}, "
+            f"format={export_format}, encrypted={export.is_encrypted}"
+        )
+        return export
+
+    @classmethod
+    def _new_export(
+        cls,
+        survey: Survey,
+        user: User,
+        password: str | None,
+        survey_key: bytes | None,
+        export_format: str,
+    ) -> tuple[DataExport, tuple[bytes, bytes] | None]:
+        """
+        Validate an export request and build its unsaved DataExport.
+
+        Returns:
+            Tuple of (export, (file key, salt) or None without a password)
         """
         logger.info(f"Creating export for survey {survey.slug} by user {user.username}")
         from ..models import DataExport, SurveyResponse
+        from ..utils import derive_key
 
         # Validate survey state
         if survey.deleted_at:
@@ -80,6 +221,9 @@ class ExportService:
             )
             raise ValueError("Cannot export data from deleted survey")
 
+        # Fail before any work if the format cannot be produced
+        get_export_writer(export_format)
+
         # Validate survey_key for encrypted surveys
         if survey.requires_whole_response_encryption() and not survey_key:
             logger.error(
@@ -112,188 +256,695 @@ class ExportService:
             raise ValueError("Survey has no responses to export")
 
         logger.info(
-            f"Generating CSV for survey {survey.slug}: {response_count} responses, "
+            f"Preparing {export_format} export for survey {survey.slug}: "
+            f"{response_count} responses, "
             f"{frozen_count} frozen"
         )
 
-        # Generate CSV data (with decryption if survey_key provided)
-        csv_data = cls._generate_csv(survey, survey_key)
+        export = DataExport(
+            survey=survey,
+            created_by=user,
+            response_count=response_count,
+            export_format=export_format,
+            is_encrypted=bool(password),
+            # Generate secure download token
+            download_token=secrets.token_urlsafe(cls.TOKEN_LENGTH),
+            # Calculate expiry using configurable setting
+            download_url_expires_at=timezone.now()
+            + timedelta(days=settings.CHECKTICK_DOWNLOAD_LINK_EXPIRY_DAYS),
+        )
 
-        # Encrypt export file if password provided
+        file_key = None
         if password:
-            logger.info(f"Encrypting export file for survey {survey.slug}")
-            encrypted_data, encryption_key_id = cls._encrypt_csv(csv_data, password)
-            is_encrypted = True
-            file_data = encrypted_data
-        else:
-            logger.debug(f"Export file not encrypted for survey {survey.slug}")
-            is_encrypted = False
-            encryption_key_id = None
-            file_data = csv_data.encode("utf-8")
+            # One Scrypt derivation per export, done while the password is at hand
+            file_key = derive_key(password.encode("utf-8"))
+            export.encryption_key_id = f"export-{secrets.token_hex(8)}"
 
-        # Generate secure download token
-        download_token = secrets.token_urlsafe(cls.TOKEN_LENGTH)
+        return export, file_key
 
-        # Calculate expiry using configurable setting
-        expires_at = timezone.now() + timedelta(
-            days=settings.CHECKTICK_DOWNLOAD_LINK_EXPIRY_DAYS
-        )
+    @classmethod
+    def run_export(
+        cls,
+        export: DataExport,
+        survey_key: bytes | None = None,
+        file_key: tuple[bytes, bytes] | None = None,
+        checkpoint_every: int | None = None,
+    ) -> DataExport:
+        """
+        Generate an export's file, resuming from its last checkpoint.
 
-        # Create DataExport record
-        export = DataExport.objects.create(
-            survey=survey,
-            created_by=user,
-            download_token=download_token,
-            download_url_expires_at=expires_at,
-            response_count=response_count,
-            file_size_bytes=len(file_data),
-            is_encrypted=is_encrypted,
-            encryption_key_id=encryption_key_id,
+        Responses are read in (submitted_at, id) order. Every
+        ``checkpoint_every`` responses the records read so far are written to
+        an intermediate part file, encrypted with the job's part key, and the
+        cursor saved. Once every response has been read, the parts are
+        converted to the export's format, encrypted if a password was given,
+        and stored as the export file.
+
+        A failure leaves the export running with its checkpoint, for the
+        task's next attempt to resume; the task fails the export once it has
+        run out of attempts.
+
+        Args:
+            export: Queued or running DataExport
+            survey_key: Survey's KEK (required for encrypted surveys)
+            file_key: (key, salt) for password-protected exports; defaults to
+                the export's sealed pending key
+            checkpoint_every: Responses per checkpoint (default
+                CHECKTICK_EXPORT_CHECKPOINT_EVERY)
+
+        Returns:
+            The export, now ready
+
+        Raises:
+            ValueError: If the export's encryption key or the survey key is
+                missing, which retrying cannot fix
+            Exception: Whatever else stopped generation
+        """
+        from ..models import DataExport
+
+        checkpoint_every = (
+            checkpoint_every or settings.CHECKTICK_EXPORT_CHECKPOINT_EVERY
         )
+        if export.status == DataExport.Status.QUEUED:
+            export.status = DataExport.Status.RUNNING
+            export.started_at = timezone.now()
+            export.save(update_fields=["status", "started_at"])
+        elif export.processed_count:
+            logger.info(
+                f"Resuming export {export.id} after "
+                f"{export.processed_count} responses"
+            )
+
+        if export.is_encrypted and file_key is None:
+            if not export.pending_encryption_key:
+                raise ValueError("Export encryption key is missing")
+            file_key = cls._open_file_key(bytes(export.pending_encryption_key))
+
+        cls._collect_parts(export, survey_key, checkpoint_every)
+        cls._finish_export(export, file_key)
 
         logger.info(
-            f"Export created successfully: ID={export.id}, survey={survey.slug}, "
-            f"size={len(file_data)} bytes, encrypted={is_encrypted}, "
-            f"expires={expires_at.isoformat()}"
+            f"Export created successfully: ID={export.id}, survey={export.survey.slug}, "
+            f"size={export.file_size_bytes} bytes, encrypted={export.is_encrypted}, "
+            f"expires={export.download_url_expires_at.isoformat()}"
         )
+        return export
 
-        # TODO: Store encrypted file in object storage (S3/Azure Blob)
-        # For now, we'll regenerate on download (stateless)
+    @classmethod
+    def _collect_parts(
+        cls, export: DataExport, survey_key: bytes | None, checkpoint_every: int
+    ) -> None:
+        """Read the remaining responses into part files, checkpointing as we go."""
+        from ..models import SurveyResponse
+
+        survey = export.survey
+        requires_key = survey.requires_whole_response_encryption()
+        if requires_key and not survey_key:
+            raise ValueError("Survey key required to export encrypted survey data.")
+        decrypt_responses = bool(survey_key and requires_key)
+        imd_cache = cls._imd_cache(survey, decrypt_responses)
+        part_key = cls._part_key(export)
 
-        return export
+        # IMPORTANT: Exclude frozen responses - they are pending data subject request resolution
+        responses = (
+            SurveyResponse.objects.filter(survey=survey, is_frozen=False)
+            .select_related("submitted_by")
+            .order_by("submitted_at", "id")
+        )
+        cursor = export.checkpoint.get("cursor")
+        if cursor:
+            after = datetime.fromisoformat(cursor["submitted_at"])
+            responses = responses.filter(
+                Q(submitted_at__gt=after) | Q(submitted_at=after, id__gt=cursor["id"])
+            )
+
+        records: list[ExportRecord] = []
+        scanned = 0
+        last = None
+        for response in responses.iterator(chunk_size=cls.CHUNK_SIZE):
+            record = cls._export_record(
+                response, survey_key, decrypt_responses, imd_cache
+            )
+            if record is not None:
+                records.append(record)
+            scanned += 1
+            last = response
+            if scanned >= checkpoint_every:
+                cls._save_checkpoint(export, part_key, records, last, scanned)
+                records, scanned = [], 0
+
+        if scanned:
+            cls._save_checkpoint(export, part_key, records, last, scanned)
 
     @classmethod
-    def _generate_csv(cls, survey: Survey, survey_key: bytes | None = None) -> str:
+    def _save_checkpoint(
+        cls,
+        export: DataExport,
+        part_key: bytes,
+        records: list[ExportRecord],
+        last: SurveyResponse,
+        scanned: int,
+    ) -> None:
+        """Write records to the next part file and save the job's progress."""
+        parts = list(export.checkpoint.get("parts", []))
+        if records:
+            name = f"{export.survey_id}/{export.id}.part{len(parts):05d}.enc"
+            # Left behind if a worker died before saving its checkpoint
+            cls.storage().delete(name)
+            encrypted = cls._encrypt_part(
+                part_key, export, len(parts), cls._serialize_records(records)
+            )
+            path, _ = cls._store_file(name, iter([encrypted]))
+            parts.append(path)
+
+        export.checkpoint = {
+            "cursor": {"submitted_at": last.submitted_at.isoformat(), "id": last.id},
+            "parts": parts,
+        }
+        export.processed_count += scanned
+        export.save(update_fields=["checkpoint", "processed_count"])
+
+    @classmethod
+    def _finish_export(
+        cls, export: DataExport, file_key: tuple[bytes, bytes] | None
+    ) -> None:
+        """Convert the part files to the final format and store the file."""
+        parts = export.checkpoint.get("parts", [])
+        part_key = cls._part_key(export) if parts else None
+        cls._store_export_file(
+            export, cls._iter_part_batches(export, parts, part_key), file_key
+        )
+        for path in parts:
+            cls.storage().delete(path)
+
+    @classmethod
+    def _store_export_file(
+        cls,
+        export: DataExport,
+        batches: Iterator[list[ExportRecord]],
+        file_key: tuple[bytes, bytes] | None,
+    ) -> None:
+        """Write record batches as the export's file and mark it ready."""
+        from ..models import DataExport
+
+        written = 0
+
+        def counted(batches: Iterator[list[ExportRecord]]):
+            nonlocal written
+            for batch in batches:
+                written += len(batch)
+                yield batch
+
+        writer_class = get_export_writer(export.export_format)
+        chunks = writer_class(cls._export_columns(export.survey)).iter_chunks(
+            counted(batches)
+        )
+        if export.is_encrypted:
+            logger.info(f"Encrypting export file for survey {export.survey.slug}")
+            chunks = cls._encrypt_chunks(chunks, file_key)
+
+        name = f"{export.survey_id}/{export.id}.{cls.file_extension(export)}"
+        # Left behind if a worker died after storing the file
+        cls.storage().delete(name)
+        export.file_path, export.file_size_bytes = cls._store_file(name, chunks)
+
+        export.status = DataExport.Status.READY
+        export.processed_count = max(export.processed_count, written)
+        export.response_count = written
+        export.checkpoint = {}
+        export.pending_encryption_key = None
+        export.part_encryption_key = None
+        export.error = ""
+        export.completed_at = timezone.now()
+        export.save()
+
+    @classmethod
+    def fail_export(cls, export: DataExport, error: Exception | str) -> None:
+        """Mark an export failed and remove its partial files."""
+        from ..models import DataExport
+
+        cls.delete_file(export)
+        export.status = DataExport.Status.FAILED
+        export.error = str(error) or error.__class__.__name__
+        export.file_path = ""
+        export.checkpoint = {}
+        export.pending_encryption_key = None
+        export.part_encryption_key = None
+        export.completed_at = timezone.now()
+        export.save()
+
+    @classmethod
+    def _iter_part_batches(
+        cls, export: DataExport, parts: list[str], part_key: bytes | None
+    ) -> Iterator[list[ExportRecord]]:
+        """Read part files back as batches of up to CHUNK_SIZE records."""
+        for index, path in enumerate(parts):
+            with cls.storage().open(path, "rb") as part:
+                # A part holds at most one checkpoint's worth of records
+                data = cls._decrypt_part(part_key, export, index, part.read())
+            lines = data.splitlines()
+            for start in range(0, len(lines), cls.CHUNK_SIZE):
+                yield [
+                    cls._deserialize_record(line)
+                    for line in lines[start : start + cls.CHUNK_SIZE]
+                ]
+
+    @staticmethod
+    def _serialize_records(records: Iterable[ExportRecord]) -> bytes:
+        lines = [
+            json.dumps(
+                [
+                    record.response_id,
+                    record.submitted_at.isoformat() if record.submitted_at else None,
+                    record.submitted_by,
+                    record.answers,
+                ],
+                ensure_ascii=False,
+                default=str,
+            )
+            for record in records
+        ]
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    @staticmethod
+    def _deserialize_record(line: bytes) -> ExportRecord:
+        response_id, submitted_at, submitted_by, answers = json.loads(line)
+        return ExportRecord(
+            response_id=response_id,
+            submitted_at=datetime.fromisoformat(submitted_at) if submitted_at else None,
+            submitted_by=submitted_by,
+            answers=answers,
+        )
+
+    @classmethod
+    def _seal_file_key(cls, key: bytes, salt: bytes) -> bytes:
         """
-        Generate CSV string from survey responses.
+        Seal a queued export's file key for storage until the worker runs.
+
+        Encrypted with a key derived from SECRET_KEY, which web and worker
+        processes share, so a database dump alone cannot decrypt the export.
+        """
+        return cls._seal(salt + key, cls.JOB_KEY_INFO)
+
+    @classmethod
+    def _open_file_key(cls, sealed: bytes) -> tuple[bytes, bytes]:
+        """Inverse of _seal_file_key: returns (key, salt)."""
+        plaintext = cls._unseal(sealed, cls.JOB_KEY_INFO)
+        return plaintext[16:], plaintext[:16]
+
+    @classmethod
+    def _part_key(cls, export: DataExport) -> bytes:
+        """
+        The key encrypting a job's part files, created on first use.
+
+        Stored sealed like a queued export's file key, so part files hold no
+        readable response data at rest, whether or not the export itself is
+        password-protected.
+        """
+        if export.part_encryption_key:
+            return cls._unseal(bytes(export.part_encryption_key), cls.PART_KEY_INFO)
+        key = AESGCM.generate_key(bit_length=256)
+        export.part_encryption_key = cls._seal(key, cls.PART_KEY_INFO)
+        export.save(update_fields=["part_encryption_key"])
+        return key
+
+    @staticmethod
+    def _encrypt_part(
+        part_key: bytes, export: DataExport, index: int, data: bytes
+    ) -> bytes:
+        # Bound to the export and position, so parts cannot be swapped
+        nonce = os.urandom(12)
+        aad = f"{export.id}:{index}".encode("ascii")
+        return nonce + AESGCM(part_key).encrypt(nonce, data, aad)
+
+    @staticmethod
+    def _decrypt_part(
+        part_key: bytes, export: DataExport, index: int, blob: bytes
+    ) -> bytes:
+        aad = f"{export.id}:{index}".encode("ascii")
+        return AESGCM(part_key).decrypt(blob[:12], blob[12:], aad)
+
+    @classmethod
+    def _seal(cls, data: bytes, context: bytes) -> bytes:
+        nonce = os.urandom(12)
+        return nonce + AESGCM(cls._job_sealing_key()).encrypt(nonce, data, context)
+
+    @classmethod
+    def _unseal(cls, sealed: bytes, context: bytes) -> bytes:
+        return AESGCM(cls._job_sealing_key()).decrypt(sealed[:12], sealed[12:], context)
+
+    @classmethod
+    def _job_sealing_key(cls) -> bytes:
+        secret = settings.SECRET_KEY
+        if isinstance(secret, str):
+            secret = secret.encode("utf-8")
+        return HKDF(
+            algorithm=hashes.SHA256(), length=32, salt=None, info=cls.JOB_KEY_INFO
+        ).derive(secret)
+
+    @classmethod
+    def iter_export_chunks(
+        cls,
+        survey: Survey,
+        survey_key: bytes | None = None,
+        export_format: str = "csv",
+    ) -> Iterator[bytes]:
+        """
+        Generate an export file as a stream of byte chunks.
 
         Args:
             survey: Survey to export
             survey_key: Survey's KEK for decrypting responses (required for encrypted surveys)
+            export_format: One of export_writers.EXPORT_WRITERS
 
         Returns:
-            CSV string with headers and response data
+            Iterator of chunks, each covering up to CHUNK_SIZE responses
 
-        Note:
-            - For encrypted surveys, survey_key is required to decrypt responses
-            - Whole-response encryption surveys store data in enc_answers
-            - Legacy surveys store plaintext in answers and encrypted demographics in enc_demographics
-            - Question IDs are used as keys in the answers dict
+        Raises:
+            ValueError: If the format is unknown or unavailable
         """
-        logger.debug(f"Generating CSV for survey {survey.slug}")
-        from ..models import SurveyQuestion, SurveyResponse
+        writer_class = get_export_writer(export_format)
+        return writer_class(cls._export_columns(survey)).iter_chunks(
+            cls._iter_record_batches(survey, survey_key)
+        )
 
-        output = StringIO()
+    @staticmethod
+    def _export_columns(survey: Survey) -> list[ExportColumn]:
+        """One column per survey question, in question order, then IMD."""
+        from ..models import SurveyQuestion
 
-        # Get all questions for this survey, ordered
-        questions = SurveyQuestion.objects.filter(survey=survey).order_by("order")
+        columns = [
+            ExportColumn(question.id, question.text, question.type)
+            for question in SurveyQuestion.objects.filter(survey=survey).order_by(
+                "order"
+            )
+        ]
+        if IMDService.survey_includes_imd(survey):
+            columns += IMD_COLUMNS
+        return columns
 
-        # Create CSV writer
-        writer = csv.writer(output)
+    @staticmethod
+    def _imd_cache(survey: Survey, decrypt: bool) -> dict | None:
+        """
+        Shared IMD cache lookups for an export, or None if it has no IMD.
 
-        # Write header row
-        headers = [
-            "Response ID",
-            "Submitted At",
-            "Submitted By",
-        ]
+        Only decrypted demographics carry a postcode.
+        """
+        if decrypt and IMDService.survey_includes_imd(survey):
+            return {}
+        return None
 
-        # Add question text as headers (using question ID as reference)
-        question_list = list(questions)
-        for question in question_list:
-            # Use question text for header, will lookup by ID in answers
-            headers.append(question.text)
+    @classmethod
+    def iter_csv_chunks(
+        cls, survey: Survey, survey_key: bytes | None = None
+    ) -> Iterator[bytes]:
+        """Generate the export CSV as UTF-8 encoded chunks of rows."""
+        return cls.iter_export_chunks(survey, survey_key, "csv")
+
+    @classmethod
+    def _iter_record_batches(
+        cls, survey: Survey, survey_key: bytes | None = None
+    ) -> Iterator[list[ExportRecord]]:
+        """
+        Yield exportable responses in batches of up to CHUNK_SIZE records.
 
-        writer.writerow(headers)
+        Note:
+            - For encrypted surveys, survey_key is required to decrypt responses
+            - Whole-response encryption surveys store data in enc_answers
+            - Legacy surveys store plaintext in answers and encrypted demographics in enc_demographics
+            - Responses are read with iterator(), so memory use is bounded by
+              the chunk size rather than the number of responses
+        """
+        logger.debug(f"Generating export for survey {survey.slug}")
+        from ..models import SurveyResponse
 
-        # Write response rows
         # IMPORTANT: Exclude frozen responses - they are pending data subject request resolution
-        responses = SurveyResponse.objects.filter(
-            survey=survey,
-            is_frozen=False,  # Exclude frozen responses
-        ).order_by("submitted_at")
+        responses = (
+            SurveyResponse.objects.filter(
+                survey=survey,
+                is_frozen=False,  # Exclude frozen responses
+            )
+            .select_related("submitted_by")
+            .order_by("submitted_at", "id")
+        )
 
-        logger.debug(f"Processing {responses.count()} responses for CSV export")
+        # Resolved once: the check queries question groups. Decryption itself
+        # reuses the cached per-survey data key, so only the first v2 blob
+        # pays for key derivation.
+        decrypt_responses = bool(
+            survey_key and survey.requires_whole_response_encryption()
+        )
+        imd_cache = cls._imd_cache(survey, decrypt_responses)
 
-        for response in responses:
-            # Decrypt response if survey uses whole-response encryption
-            if survey.requires_whole_response_encryption() and survey_key:
-                try:
-                    full_response = response.load_complete_response(survey_key)
-                    answers_dict = full_response.get("answers", {})
-                    logger.debug(
-                        f"Decrypted response {response.id} for encrypted survey"
-                    )
-                except Exception as e:
-                    logger.error(
-                        f"Failed to decrypt response {response.id}: {e}",
-                        exc_info=True,
+        batch: list[ExportRecord] = []
+        for response in responses.iterator(chunk_size=cls.CHUNK_SIZE):
+            record = cls._export_record(
+                response, survey_key, decrypt_responses, imd_cache
+            )
+            if record is None:
+                continue
+            batch.append(record)
+            if len(batch) >= cls.CHUNK_SIZE:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+    @staticmethod
+    def _export_record(
+        response: SurveyResponse,
+        survey_key: bytes | None,
+        decrypt: bool,
+        imd_cache: dict | None = None,
+    ) -> ExportRecord | None:
+        """
+        Build a response's export record.
+
+        With an ``imd_cache`` (surveys with IMD enabled), the IMD decile and
+        rank from the demographics, or from the IMD cache if the response
+        was submitted before its postcode was looked up, are added under the
+        IMD_COLUMNS keys.
+
+        Returns:
+            The record, or None if the response could not be decrypted
+        """
+        # Decrypt response if survey uses whole-response encryption
+        if decrypt:
+            try:
+                full_response = response.load_complete_response(survey_key)
+                answers_dict = full_response.get("answers", {})
+                if imd_cache is not None:
+                    demographics = IMDService.add_cached_imd(
+                        full_response.get("demographics") or {}, imd_cache
                     )
-                    # Skip this response if decryption fails
-                    continue
-            else:
-                # Legacy format: answers stored in plaintext
-                answers_dict = response.answers or {}
-
-            row = [
-                str(response.id),
-                response.submitted_at.isoformat() if response.submitted_at else "",
-                (
-                    response.submitted_by.username
-                    if response.submitted_by
-                    else "Anonymous"
-                ),
-            ]
-
-            # Add answer for each question
-            # Answers are keyed by question ID or field name
-            for question in question_list:
-                # Try both question.id and str(question.id) as keys
-                answer = (
-                    answers_dict.get(str(question.id))
-                    or answers_dict.get(question.id)
-                    or ""
+                    answers_dict = {
+                        **answers_dict,
+                        **{
+                            column.question_id: demographics[column.question_id]
+                            for column in IMD_COLUMNS
+                            if demographics.get(column.question_id)
+                        },
+                    }
+            except Exception as e:
+                logger.error(
+                    f"Failed to decrypt response {response.id}: {e}",
+                    exc_info=True,
                 )
-                row.append(str(answer) if answer else "")
+                # Skip this response if decryption fails
+                return None
+        else:
+            # Legacy format: answers stored in plaintext
+            answers_dict = response.answers or {}
+
+        return ExportRecord(
+            response_id=response.id,
+            submitted_at=response.submitted_at,
+            submitted_by=(
+                response.submitted_by.username if response.submitted_by else "Anonymous"
+            ),
+            answers=answers_dict,
+        )
 
-            writer.writerow(row)
+    @classmethod
+    def _generate_csv(cls, survey: Survey, survey_key: bytes | None = None) -> str:
+        """
+        Generate CSV string from survey responses.
 
-        return output.getvalue()
+        Holds the whole CSV in memory; exports use iter_csv_chunks instead.
+        """
+        return b"".join(cls.iter_csv_chunks(survey, survey_key)).decode("utf-8")
 
     @classmethod
-    def _encrypt_csv(cls, csv_data: str, password: str) -> tuple[bytes, str]:
+    def _encrypt_chunks(
+        cls, chunks: Iterator[bytes], file_key: tuple[bytes, bytes]
+    ) -> Iterator[bytes]:
         """
-        Encrypt CSV data with user-provided password using AES-256-GCM.
+        Encrypt export chunks with the key derived from the user's password.
 
-        Args:
-            csv_data: CSV string to encrypt
-            password: User-provided password
+        Each chunk becomes one authenticated AES-256-GCM frame (see
+        utils.encrypt_stream). The file can be decrypted with
+        ``manage.py decrypt_export``.
+        """
+        from ..utils import encrypt_stream_with_key
+
+        key, salt = file_key
+        return encrypt_stream_with_key(key, salt, chunks)
+
+    @classmethod
+    def _store_file(cls, name: str, chunks: Iterator[bytes]) -> tuple[str, int]:
+        """
+        Write chunks to the exports storage.
+
+        Chunks are spooled in memory up to CHECKTICK_EXPORT_SPOOL_MAX_BYTES
+        and to a temporary file beyond that.
 
         Returns:
-            Tuple of (encrypted_bytes, encryption_key_id)
+            Tuple of (stored file path, size in bytes)
+        """
+        with SpooledTemporaryFile(
+            max_size=settings.CHECKTICK_EXPORT_SPOOL_MAX_BYTES
+        ) as spool:
+            for chunk in chunks:
+                spool.write(chunk)
+            size = spool.tell()
+            spool.seek(0)
+            path = cls.storage().save(name, File(spool, name=name))
+        return path, size
+
+    @staticmethod
+    def storage():
+        """Storage backend holding generated export files."""
+        return storages["exports"]
+
+    @staticmethod
+    def writer_class(export: DataExport) -> type[ExportWriter]:
+        """Writer for an export's format (known even if pyarrow is missing)."""
+        return EXPORT_WRITERS.get(export.export_format, CsvExportWriter)
 
-        This uses the same encryption utilities as survey data encryption,
-        ensuring consistent security across the platform.
+    @classmethod
+    def file_extension(cls, export: DataExport) -> str:
+        """File extension of an export's stored file."""
+        extension = cls.writer_class(export).extension
+        return f"{extension}.enc" if export.is_encrypted else extension
+
+    @classmethod
+    def content_type(cls, export: DataExport) -> str:
+        """Content type of an export's stored file."""
+        if export.is_encrypted:
+            return "application/octet-stream"
+        return cls.writer_class(export).content_type
+
+    @classmethod
+    def open_file(cls, export: DataExport):
         """
-        from ..utils import encrypt_sensitive
+        Open an export's stored file for reading.
 
-        logger.debug(f"Encrypting CSV data ({len(csv_data)} bytes)")
+        Returns:
+            Binary file object, or None if the export has no stored file
+            (created before files were stored, or already cleaned up)
+        """
+        if not export.file_path or not cls.storage().exists(export.file_path):
+            return None
+        return cls.storage().open(export.file_path, "rb")
 
-        # Encrypt CSV with password (encrypt_sensitive handles KDF internally)
-        # Pass password as bytes - encrypt_sensitive will derive key with Scrypt
-        encrypted_blob = encrypt_sensitive(
-            password.encode("utf-8"), {"csv_content": csv_data}
-        )
+    @classmethod
+    def delete_file(cls, export: DataExport) -> None:
+        """Delete an export's stored file and unfinished part files, if any."""
+        if export.file_path:
+            cls.storage().delete(export.file_path)
+        for path in (export.checkpoint or {}).get("parts", []):
+            cls.storage().delete(path)
 
-        # Generate key ID for tracking
-        encryption_key_id = f"export-{secrets.token_hex(8)}"
+    @classmethod
+    def sweep_orphaned_files(cls, older_than: timedelta | None = None) -> int:
+        """
+        Delete export files that no export needs any more.
 
-        logger.info(
-            f"CSV encrypted: key_id={encryption_key_id}, "
-            f"size={len(encrypted_blob)} bytes"
-        )
+        Part files are only kept while their export is queued or running, and
+        a generated file only while its export exists. Anything else was left
+        behind by a worker or request that stopped between writing a file and
+        recording it. Files modified within ``older_than`` (default
+        CHECKTICK_TASK_STALE_SECONDS) are kept, as their export may not be
+        committed yet.
+
+        Returns:
+            Number of files deleted
+        """
+        from ..models import DataExport
+
+        if older_than is None:
+            older_than = timedelta(seconds=settings.CHECKTICK_TASK_STALE_SECONDS)
+        cutoff = timezone.now() - older_than
+        storage = cls.storage()
+        try:
+            directories, _ = storage.listdir("")
+        except FileNotFoundError:
+            return 0
+
+        pending = {DataExport.Status.QUEUED, DataExport.Status.RUNNING}
+        deleted = 0
+        for directory in directories:
+            # Export files are named after their export's id
+            paths: dict[str, uuid.UUID] = {}
+            for name in storage.listdir(directory)[1]:
+                try:
+                    paths[f"{directory}/{name}"] = uuid.UUID(name.split(".", 1)[0])
+                except ValueError:
+                    continue
+
+            exports = {
+                export_id: (status, file_path)
+                for export_id, status, file_path in DataExport.objects.filter(
+                    id__in=set(paths.values())
+                ).values_list("id", "status", "file_path")
+            }
+            for path, export_id in paths.items():
+                if export_id in exports:
+                    status, file_path = exports[export_id]
+                    if status in pending or path == file_path:
+                        continue
+                try:
+                    if storage.get_modified_time(path) > cutoff:
+                        continue
+                except NotImplementedError:
+                    pass
+                storage.delete(path)
+                deleted += 1
+
+        if deleted:
+            logger.info(f"Deleted {deleted} orphaned export file(s)")
+        return deleted
+
+    @classmethod
+    def fail_abandoned_exports(cls, older_than: timedelta | None = None) -> int:
+        """
+        Fail in-request exports whose request stopped part-way.
 
-        return encrypted_blob, encryption_key_id
+        Exports generated in the request have no task to retry them, and
+        nothing else holds the survey key to finish them. Those still running
+        after ``older_than`` (default CHECKTICK_TASK_STALE_SECONDS) are
+        failed and their files removed.
+
+        Returns:
+            Number of exports failed
+        """
+        from ..models import DataExport
+
+        if older_than is None:
+            older_than = timedelta(seconds=settings.CHECKTICK_TASK_STALE_SECONDS)
+        abandoned = DataExport.objects.filter(
+            status=DataExport.Status.RUNNING,
+            task__isnull=True,
+            started_at__lt=timezone.now() - older_than,
+        )
+        failed = 0
+        for export in abandoned:
+            cls.fail_export(export, "Export stopped before it finished")
+            failed += 1
+        if failed:
+            logger.warning(f"Failed {failed} abandoned export(s)")
+        return failed
 
     @classmethod
     def get_download_url(cls, export: DataExport) -> str:
@@ -364,7 +1015,7 @@ class ExportService:
 
         count = expired_exports.count()
 
-        # No files stored (generated on-demand), just delete records
+        # Stored files are removed by the DataExport post_delete signal
         expired_exports.delete()
 
         return count
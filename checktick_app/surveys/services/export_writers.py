@@ -0,0 +1,355 @@
+"""
+Export file writers for data-governance exports.
+
+Each writer turns batches of ExportRecord rows into chunks of bytes so that
+ExportService can stream any format through the same store/encrypt pipeline.
+
+- ``csv``: one text column per question, answers stringified (the default)
+- ``ndjson``: one JSON object per response, streamed line by line
+- ``arrow``: Arrow IPC stream with typed columns
+- ``parquet``: Parquet with typed columns
+
+The Arrow and Parquet writers need pyarrow, which is an optional dependency;
+they are only offered when it is installed. Typed columns use list<string>
+for multi-select and orderable questions, dictionary-encoded strings for
+single-choice questions and a UTC timestamp for ``submitted_at``.
+"""
+
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass
+from datetime import datetime
+import importlib.util
+from io import StringIO
+import json
+from typing import Any, Iterable, Iterator
+
+# Questions whose answer is a list of options
+LIST_TYPES = {"mc_multi", "orderable"}
+# Questions whose answer is one option from a fixed set
+CATEGORICAL_TYPES = {"mc_single", "likert", "dropdown", "yesno"}
+
+
+@dataclass(frozen=True)
+class ExportColumn:
+    """One question column of an export."""
+
+    # Question ID, or the demographics field name of an IMD column
+    question_id: int | str
+    header: str
+    question_type: str
+
+
+@dataclass
+class ExportRecord:
+    """One response, with its answers already decrypted."""
+
+    response_id: int
+    submitted_at: datetime | None
+    submitted_by: str
+    answers: dict
+
+    def answer(self, column: ExportColumn) -> Any:
+        # Answers are keyed by question ID, as a string or an int; falsy
+        # answers (0, False, "") are real answers, so test membership
+        key = str(column.question_id)
+        if key in self.answers:
+            return self.answers[key]
+        return self.answers.get(column.question_id)
+
+
+def typed_answer(question_type: str, answer: Any) -> Any:
+    """
+    Normalise an answer for typed formats.
+
+    Returns None for unanswered questions, a list of strings for multi-select
+    and orderable questions, a string for single-choice questions, and the
+    answer as stored (string, or dict for structured answers) otherwise.
+    """
+    if answer is None or answer == "" or answer == []:
+        return None
+    if question_type in LIST_TYPES:
+        if isinstance(answer, list):
+            return [str(item) for item in answer]
+        return [str(answer)]
+    if isinstance(answer, list):
+        return "; ".join(str(item) for item in answer)
+    if isinstance(answer, dict):
+        return answer
+    return str(answer)
+
+
+class ExportWriter:
+    """Base class: turns record batches into byte chunks of one file format."""
+
+    format = ""
+    label = ""
+    extension = ""
+    content_type = "application/octet-stream"
+
+    def __init__(self, columns: list[ExportColumn]):
+        self.columns = columns
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return True
+
+    def iter_chunks(self, batches: Iterable[list[ExportRecord]]) -> Iterator[bytes]:
+        raise NotImplementedError
+
+    def field_names(self) -> list[str]:
+        """Unique column names: metadata fields, then question text."""
+        names = ["response_id", "submitted_at", "submitted_by"]
+        seen = set(names)
+        for column in self.columns:
+            name = " ".join(column.header.split())
+            if name in seen:
+                name = f"{name} [{column.question_id}]"
+            seen.add(name)
+            names.append(name)
+        return names
+
+
+class CsvExportWriter(ExportWriter):
+    format = "csv"
+    label = "CSV"
+    extension = "csv"
+    content_type = "text/csv"
+
+    def iter_chunks(self, batches: Iterable[list[ExportRecord]]) -> Iterator[bytes]:
+        # One buffer reused for every chunk
+        output = StringIO()
+        writer = csv.writer(output)
+
+        def flush() -> bytes:
+            data = output.getvalue().encode("utf-8")
+            output.seek(0)
+            output.truncate()
+            return data
+
+        writer.writerow(
+            ["Response ID", "Submitted At", "Submitted By"]
+            + [column.header for column in self.columns]
+        )
+        yield flush()
+
+        for batch in batches:
+            for record in batch:
+                row = [
+                    str(record.response_id),
+                    record.submitted_at.isoformat() if record.submitted_at else "",
+                    record.submitted_by,
+                ]
+                for column in self.columns:
+                    answer = record.answer(column)
+                    row.append(str(answer) if answer else "")
+                writer.writerow(row)
+            if batch:
+                yield flush()
+
+
+class NdjsonExportWriter(ExportWriter):
+    format = "ndjson"
+    label = "NDJSON"
+    extension = "ndjson"
+    content_type = "application/x-ndjson"
+
+    def iter_chunks(self, batches: Iterable[list[ExportRecord]]) -> Iterator[bytes]:
+        names = self.field_names()
+        question_names = names[3:]
+        for batch in batches:
+            lines = []
+            for record in batch:
+                obj = {
+                    "response_id": record.response_id,
+                    "submitted_at": (
+                        record.submitted_at.isoformat() if record.submitted_at else None
+                    ),
+                    "submitted_by": record.submitted_by,
+                }
+                for name, column in zip(question_names, self.columns):
+                    obj[name] = typed_answer(
+                        column.question_type, record.answer(column)
+                    )
+                lines.append(json.dumps(obj, ensure_ascii=False, default=str))
+            if lines:
+                yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class _ChunkSink:
+    """
+    Write-only file object collecting pyarrow output between drains.
+
+    ``tell()`` reports the total bytes written, which Parquet needs to record
+    column chunk offsets, while drained bytes are released.
+    """
+
+    closed = False
+
+    def __init__(self):
+        self._parts: list[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def writable(self) -> bool:
+        return True
+
+    def readable(self) -> bool:
+        return False
+
+    def seekable(self) -> bool:
+        return False
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+class _ArrowExportWriter(ExportWriter):
+    """Shared schema and batch building for the Arrow-based formats."""
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return importlib.util.find_spec("pyarrow") is not None
+
+    def schema(self):
+        import pyarrow as pa
+
+        names = self.field_names()
+        fields = [
+            pa.field("response_id", pa.int64(), nullable=False),
+            pa.field("submitted_at", pa.timestamp("us", tz="UTC")),
+            pa.field("submitted_by", pa.string()),
+        ]
+        for name, column in zip(names[3:], self.columns):
+            if column.question_type in LIST_TYPES:
+                type_ = pa.list_(pa.string())
+            elif column.question_type in CATEGORICAL_TYPES:
+                type_ = pa.dictionary(pa.int32(), pa.string())
+            else:
+                type_ = pa.string()
+            fields.append(
+                pa.field(
+                    name,
+                    type_,
+                    metadata={
+                        "question_id": str(column.question_id),
+                        "question_type": column.question_type,
+                    },
+                )
+            )
+        return pa.schema(fields)
+
+    def record_batch(self, schema, batch: list[ExportRecord]):
+        import pyarrow as pa
+
+        arrays = [
+            pa.array([r.response_id for r in batch], pa.int64()),
+            pa.array([r.submitted_at for r in batch], pa.timestamp("us", tz="UTC")),
+            pa.array([r.submitted_by for r in batch], pa.string()),
+        ]
+        for field, column in zip(list(schema)[3:], self.columns):
+            values = []
+            for record in batch:
+                value = typed_answer(column.question_type, record.answer(column))
+                if isinstance(value, dict):
+                    value = json.dumps(value, default=str)
+                values.append(value)
+            if pa.types.is_dictionary(field.type):
+                arrays.append(pa.array(values, pa.string()).dictionary_encode())
+            else:
+                arrays.append(pa.array(values, field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    def open_writer(self, sink, schema):
+        raise NotImplementedError
+
+    def iter_chunks(self, batches: Iterable[list[ExportRecord]]) -> Iterator[bytes]:
+        schema = self.schema()
+        sink = _ChunkSink()
+        writer = self.open_writer(sink, schema)
+        for batch in batches:
+            if batch:
+                writer.write_batch(self.record_batch(schema, batch))
+                data = sink.drain()
+                if data:
+                    yield data
+        writer.close()
+        yield sink.drain()
+
+
+class ArrowExportWriter(_ArrowExportWriter):
+    format = "arrow"
+    label = "Arrow IPC stream"
+    extension = "arrows"
+    content_type = "application/vnd.apache.arrow.stream"
+
+    def open_writer(self, sink, schema):
+        import pyarrow as pa
+
+        return pa.ipc.new_stream(sink, schema)
+
+
+class ParquetExportWriter(_ArrowExportWriter):
+    format = "parquet"
+    label = "Parquet"
+    extension = "parquet"
+    content_type = "application/vnd.apache.parquet"
+
+    def open_writer(self, sink, schema):
+        import pyarrow.parquet as pq
+
+        return pq.ParquetWriter(sink, schema, compression="zstd")
+
+
+EXPORT_WRITERS: dict[str, type[ExportWriter]] = {
+    writer.format: writer
+    for writer in (
+        CsvExportWriter,
+        NdjsonExportWriter,
+        ArrowExportWriter,
+        ParquetExportWriter,
+    )
+}
+
+
+def get_export_writer(export_format: str) -> type[ExportWriter]:
+    """
+    Return the writer class for a format.
+
+    Raises:
+        ValueError: If the format is unknown or its dependency is not installed
+    """
+    writer = EXPORT_WRITERS.get(export_format)
+    if writer is None:
+        raise ValueError(f"Unknown export format '{export_format}'")
+    if not writer.is_available():
+        raise ValueError(
+            f"{writer.label} exports require pyarrow, which is not installed"
+        )
+    return writer
+
+
+def available_export_formats() -> list[tuple[str, str]]:
+    """(format, label) pairs for the formats that can be produced here."""
+    return [
+        (name, writer.label)
+        for name, writer in EXPORT_WRITERS.items()
+        if writer.is_available()
+    ]
@@ -0,0 +1,161 @@
+"""
+Compiled participant form plans.
+
+Rendering the participant form needs the survey's ordered questions (with
+groups, images and normalised template options), where each group starts and
+ends, which questions are hidden until a SHOW condition is met, the compiled
+branching program (see branching.py) and the patient/professional details
+settings. Compiling that takes a query per question for the branching
+conditions, so the result is compiled once per survey content version and
+kept in the default cache.
+
+The content version is a per-survey stamp in the cache. signals.py bumps it
+whenever a question, question group, condition or image of the survey
+changes (and views that reorder questions with ``QuerySet.update`` bump it
+themselves), so a participant GET costs a constant number of queries
+however many questions the survey has. detail.html also caches the rendered
+form body under the plan's version.
+
+The stamp and plans only stay consistent across gunicorn workers because
+CACHES is a shared backend (the database cache by default, see settings.py).
+With a per-process cache, a worker that missed a bump would serve its old plan
+for up to ``CHECKTICK_FORM_PLAN_CACHE_SECONDS``.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from ..branching import BranchingProgram, compile_branching
+from ..models import QuestionGroup, Survey, SurveyQuestion, SurveyQuestionCondition
+
+
+@dataclass
+class FormPlan:
+    """Everything the participant form needs that depends only on content."""
+
+    # Ordered questions with ``idx``, ``group_start``, ``group_end`` and
+    # ``has_show_condition`` set, and groups/images already loaded
+    questions: list[SurveyQuestion]
+    # Evaluates branching for server-side checks; branching_config is its
+    # JSON configuration for static/js/branching.js
+    branching: BranchingProgram
+    branching_config: str
+    patient_group: QuestionGroup | None = None
+    demographics_fields: list[str] = field(default_factory=list)
+    professional_group: QuestionGroup | None = None
+    professional_fields: list[str] = field(default_factory=list)
+    professional_ods: dict[str, bool] = field(default_factory=dict)
+    # Content version the plan was compiled under
+    version: int = 0
+
+    @property
+    def collects_patient_data(self) -> bool:
+        return bool(self.patient_group and self.demographics_fields)
+
+
+def _version_key(survey_id: int) -> str:
+    return f"survey-content-version:{survey_id}"
+
+
+def get_content_version(survey_id: int) -> int:
+    """The survey's current content version stamp."""
+    key = _version_key(survey_id)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock so a stamp lost from the cache never reuses
+        # the key of a plan compiled under an earlier one
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key) or 0
+    return version
+
+
+def bump_content_version(*survey_ids: int) -> None:
+    """Invalidate the compiled plans of these surveys once the change commits."""
+
+    def bump():
+        for survey_id in set(survey_ids):
+            try:
+                cache.incr(_version_key(survey_id))
+            except ValueError:
+                # Not set yet: the next read starts a fresh stamp
+                pass
+
+    transaction.on_commit(bump)
+
+
+def compile_form_plan(survey: Survey) -> FormPlan:
+    """Compile the participant form plan from the database."""
+    from ..views import (
+        _get_patient_group_and_fields,
+        _get_professional_group_and_fields,
+        _normalize_patient_template_options,
+        _normalize_professional_template_options,
+    )
+
+    questions = list(
+        survey.questions.select_related("group").prefetch_related(
+            "images", "conditions"
+        )
+    )
+    show_condition_targets = set(
+        SurveyQuestionCondition.objects.filter(
+            target_question__survey=survey,
+            action=SurveyQuestionCondition.Action.SHOW,
+        ).values_list("target_question_id", flat=True)
+    )
+
+    for i, q in enumerate(questions, start=1):
+        if q.type == SurveyQuestion.Types.TEMPLATE_PATIENT:
+            q.options = _normalize_patient_template_options(q.options)
+        elif q.type == SurveyQuestion.Types.TEMPLATE_PROFESSIONAL:
+            q.options = _normalize_professional_template_options(q.options)
+        prev_gid = questions[i - 2].group_id if i >= 2 else None
+        next_gid = questions[i].group_id if i < len(questions) else None
+        setattr(q, "idx", i)
+        setattr(q, "group_start", bool(q.group_id and q.group_id != prev_gid))
+        setattr(q, "group_end", bool(q.group_id and q.group_id != next_gid))
+        setattr(q, "has_show_condition", q.id in show_condition_targets)
+
+    patient_group, demographics_fields = _get_patient_group_and_fields(survey)
+    professional_group, professional_fields, professional_ods = (
+        _get_professional_group_and_fields(survey)
+    )
+    branching = compile_branching(questions)
+
+    # The prefetched conditions were only needed for the branching program
+    for q in questions:
+        getattr(q, "_prefetched_objects_cache", {}).pop("conditions", None)
+
+    return FormPlan(
+        questions=questions,
+        branching=branching,
+        branching_config=json.dumps(branching.to_config()),
+        patient_group=patient_group,
+        demographics_fields=demographics_fields,
+        professional_group=professional_group,
+        professional_fields=professional_fields,
+        professional_ods=professional_ods,
+    )
+
+
+def get_form_plan(survey: Survey) -> FormPlan:
+    """The survey's participant form plan, from the cache when possible."""
+    version = get_content_version(survey.id)
+    # The leading number changes with the fields of FormPlan and the objects it
+    # holds, so plans cached by an older release are not unpickled into them
+    key = f"survey-form-plan:3:{survey.id}:{version}"
+    plan = cache.get(key)
+    if plan is None:
+        plan = compile_form_plan(survey)
+        plan.version = version
+        cache.set(
+            key, plan, getattr(settings, "CHECKTICK_FORM_PLAN_CACHE_SECONDS", 300)
+        )
+    return plan
@@ -17,19 +17,48 @@ It combines information from seven domains:
 IMD data is returned as a quantile (decile by default), where:
 - 1 = Most deprived 10%
 - 10 = Least deprived 10%
+
+Decile lookups are cached by postcode in the PostcodeIMD table for
+``IMD_CACHE_TTL_DAYS``. Participant submissions only read the cache: a
+postcode that is not cached yet is looked up by a background task (one per
+postcode while it is pending), and the decile is attached from the cache
+wherever decrypted demographics are read back - exports and the response
+API (a worker cannot add it to the encrypted demographics, which need the
+survey key). Those reads use expired cache entries too, so a decile is never
+lost just because its entry is due a refresh.
+
+With ``IMD_PROVIDER = "local"`` lookups never call the API: they are read
+from the PostcodeDeprivation table, loaded from the ONS Postcode Directory
+and the English Indices of Deprivation by ``manage.py load_imd_dataset``.
 """
 
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from datetime import timedelta
 import logging
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Iterable
 
 from django.conf import settings
+from django.utils import timezone
 import requests
 
 if TYPE_CHECKING:
-    pass
+    from ..models import Survey
+
+# IMD_PROVIDER values
+PROVIDER_API = "api"
+PROVIDER_LOCAL = "local"
+
+# Postcodes per query when reading the offline dataset
+LOCAL_LOOKUP_BATCH_SIZE = 900
+
+# Lookup errors that are answers rather than failures, so are cached
+NOT_FOUND_ERRORS = {
+    "Postcode not found in IMD data",
+    "No IMD data available for this postcode",
+}
 
 logger = logging.getLogger(__name__)
 
@@ -48,14 +77,21 @@ class IMDResult:
         """Return True if the lookup was successful."""
         return self.error is None and self.imd_decile is not None
 
+    @property
+    def is_cacheable(self) -> bool:
+        """Return True if the API gave a definitive answer for the postcode."""
+        return self.is_valid or self.error in NOT_FOUND_ERRORS
+
 
 class IMDService:
     """
     Service for looking up Index of Multiple Deprivation data.
 
-    Uses the RCPCH Deprivation API to look up IMD quantile from postcodes.
+    Uses the RCPCH Deprivation API to look up IMD quantile from postcodes,
+    or the offline PostcodeDeprivation dataset.
 
     Configuration:
+        - IMD_PROVIDER: "api" (default) or "local" for the offline dataset
         - IMD_API_URL: Base URL for the IMD API
         - IMD_API_KEY: API key for authentication
 
@@ -80,9 +116,16 @@ class IMDService:
     # Default quantile (10 = deciles)
     DEFAULT_QUANTILE = 10
 
+    @staticmethod
+    def provider() -> str:
+        """The configured lookup provider: PROVIDER_API or PROVIDER_LOCAL."""
+        return getattr(settings, "IMD_PROVIDER", PROVIDER_API)
+
     @classmethod
     def is_configured(cls) -> bool:
-        """Check if the IMD API is configured."""
+        """Check if the IMD API, or the offline dataset, is configured."""
+        if cls.provider() == PROVIDER_LOCAL:
+            return True
         api_url = getattr(settings, "IMD_API_URL", None)
         api_key = getattr(settings, "IMD_API_KEY", None)
         return bool(api_url and api_key)
@@ -121,6 +164,9 @@ class IMDService:
                 error="Empty postcode",
             )
 
+        if cls.provider() == PROVIDER_LOCAL:
+            return cls.local_imd([clean_postcode])[clean_postcode]
+
         # Check API configuration
         api_url = getattr(settings, "IMD_API_URL", None)
         api_key = getattr(settings, "IMD_API_KEY", None)
@@ -220,3 +266,197 @@ class IMDService:
                 imd_rank=None,
                 error=f"Invalid API response: {str(e)}",
             )
+
+    @staticmethod
+    def normalize_postcode(postcode: str) -> str:
+        """Postcode as used for lookups and cache keys: uppercase, no spaces."""
+        return (postcode or "").replace(" ", "").strip().upper()
+
+    @classmethod
+    def local_imd(cls, postcodes: Iterable[str]) -> dict[str, IMDResult]:
+        """
+        Look up IMD data in the offline dataset (never calls the API).
+
+        Returns:
+            Results for every postcode, keyed by normalised postcode.
+            Postcodes missing from the dataset are returned as not found.
+        """
+        from ..models import PostcodeDeprivation
+
+        clean = sorted({cls.normalize_postcode(p) for p in postcodes} - {""})
+        results = {
+            postcode: IMDResult(
+                postcode=postcode,
+                imd_decile=None,
+                imd_rank=None,
+                error="Postcode not found in IMD data",
+            )
+            for postcode in clean
+        }
+        for start in range(0, len(clean), LOCAL_LOOKUP_BATCH_SIZE):
+            rows = PostcodeDeprivation.objects.filter(
+                postcode__in=clean[start : start + LOCAL_LOOKUP_BATCH_SIZE]
+            ).values_list("postcode", "imd_decile", "imd_rank")
+            for postcode, imd_decile, imd_rank in rows:
+                results[postcode] = IMDResult(
+                    postcode=postcode, imd_decile=imd_decile, imd_rank=imd_rank
+                )
+        return results
+
+    @classmethod
+    def cached_imd(
+        cls, postcodes: Iterable[str], include_expired: bool = False
+    ) -> dict[str, IMDResult]:
+        """
+        Look up IMD data in the cache only (never calls the API).
+
+        With the local provider the offline dataset is the cache, so every
+        postcode has a result.
+
+        Args:
+            postcodes: Postcodes to read
+            include_expired: Also return entries older than
+                IMD_CACHE_TTL_DAYS (still correct, just due a refresh)
+
+        Returns:
+            Results for the postcodes with a cache entry, keyed by
+            normalised postcode
+        """
+        from ..models import PostcodeIMD
+
+        if cls.provider() == PROVIDER_LOCAL:
+            return cls.local_imd(postcodes)
+
+        clean = {cls.normalize_postcode(p) for p in postcodes} - {""}
+        if not clean:
+            return {}
+        rows = PostcodeIMD.objects.filter(postcode__in=clean)
+        if not include_expired:
+            ttl = timedelta(days=getattr(settings, "IMD_CACHE_TTL_DAYS", 30))
+            rows = rows.filter(fetched_at__gte=timezone.now() - ttl)
+        return {
+            row.postcode: IMDResult(
+                postcode=row.postcode,
+                imd_decile=row.imd_decile,
+                imd_rank=row.imd_rank,
+                error=(
+                    None
+                    if row.imd_decile is not None
+                    else "Postcode not found in IMD data"
+                ),
+            )
+            for row in rows
+        }
+
+    @classmethod
+    def lookup_imd_batch(
+        cls,
+        postcodes: Iterable[str],
+        timeout: int = DEFAULT_TIMEOUT,
+        max_workers: int = 4,
+    ) -> dict[str, IMDResult]:
+        """
+        Look up IMD deciles for many postcodes, using and filling the cache.
+
+        Postcodes missing from the cache are fetched from the API in parallel
+        (up to ``max_workers`` requests at a time). Definitive answers are
+        cached; timeouts and API errors are returned but not cached. With the
+        local provider everything is read from the offline dataset.
+
+        Returns:
+            Results keyed by normalised postcode
+        """
+        from ..models import PostcodeIMD
+
+        clean = {cls.normalize_postcode(p) for p in postcodes} - {""}
+        results = cls.cached_imd(clean)
+        missing = sorted(clean - results.keys())
+        if not missing:
+            return results
+
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(max_workers, len(missing)))
+        ) as pool:
+            fetched = dict(
+                zip(
+                    missing,
+                    pool.map(lambda p: cls.lookup_imd(p, timeout=timeout), missing),
+                )
+            )
+        results.update(fetched)
+
+        now = timezone.now()
+        PostcodeIMD.objects.bulk_create(
+            [
+                PostcodeIMD(
+                    postcode=postcode,
+                    imd_decile=result.imd_decile,
+                    imd_rank=result.imd_rank,
+                    fetched_at=now,
+                )
+                for postcode, result in fetched.items()
+                if result.is_cacheable
+            ],
+            update_conflicts=True,
+            unique_fields=["postcode"],
+            update_fields=["imd_decile", "imd_rank", "fetched_at"],
+        )
+        return results
+
+    @classmethod
+    def add_cached_imd(
+        cls, demographics: dict, cached: dict[str, IMDResult | None] | None = None
+    ) -> dict:
+        """
+        Add a missing IMD decile to decrypted demographics from the cache.
+
+        For responses submitted before their postcode's lookup finished.
+        Expired cache entries are used too. Pass the same ``cached`` dict for
+        every response of an export so each postcode is read from the cache
+        once.
+        """
+        postcode = cls.normalize_postcode(demographics.get("post_code", ""))
+        if not postcode or demographics.get("imd_decile"):
+            return demographics
+        if cached is None:
+            cached = {}
+        if postcode not in cached:
+            cached[postcode] = cls.cached_imd([postcode], include_expired=True).get(
+                postcode
+            )
+        result = cached[postcode]
+        if result is not None and result.is_valid:
+            demographics = {**demographics, "imd_decile": str(result.imd_decile)}
+            if result.imd_rank is not None:
+                demographics["imd_rank"] = str(result.imd_rank)
+        return demographics
+
+    @classmethod
+    def queue_lookup(cls, postcode: str) -> None:
+        """
+        Queue a background lookup for an uncached postcode.
+
+        Skipped if a queued or running lookup already covers the postcode, so
+        many submissions with one new postcode queue one task (and store the
+        postcode in one task payload).
+        """
+        from ..models import Task
+        from .task_queue import enqueue
+
+        clean = cls.normalize_postcode(postcode)
+        if not clean:
+            return
+        pending = Task.objects.filter(
+            name="lookup_imd",
+            status__in=[Task.Status.QUEUED, Task.Status.RUNNING],
+            payload__postcodes__contains=[clean],
+        )
+        if not pending.exists():
+            enqueue("lookup_imd", {"postcodes": [clean]})
+
+    @staticmethod
+    def survey_includes_imd(survey: Survey) -> bool:
+        """Whether a survey's patient details group has IMD enabled."""
+        return survey.question_groups.filter(
+            schema__template="patient_details_encrypted", schema__include_imd=True
+        ).exists()
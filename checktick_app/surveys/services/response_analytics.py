@@ -12,6 +12,9 @@ from typing import Any
 
 from django.db.models import QuerySet
 
+from .analytics_engine import build_answer_matrix
+from .answer_aggregates import CHARTABLE_TYPES
+
 
 @dataclass
 class AnswerDistribution:
@@ -34,84 +37,96 @@ class ResponseAnalytics:
     distributions: list[AnswerDistribution] = field(default_factory=list)
 
 
-CHARTABLE_TYPES = {"mc_single", "mc_multi", "yesno", "likert", "dropdown"}
-
-
 def compute_response_analytics(
-    survey, responses: QuerySet | None = None, limit_questions: int = 10
+    survey, responses: QuerySet | None = None, limit_questions: int | None = None
 ) -> ResponseAnalytics:
     """
     Compute analytics for a survey's responses.
 
     Args:
         survey: Survey model instance
-        responses: Optional queryset of responses (defaults to all)
-        limit_questions: Max number of questions to analyze (for performance)
+        responses: Optional queryset of responses. When omitted, distributions
+            are read from the materialised ResponseAnswerCount aggregates
+            (non-frozen responses); when given, the queryset is scanned once
+            for all questions (see analytics_engine).
+        limit_questions: Optional max number of questions to include
 
     Returns:
         ResponseAnalytics with distributions for chartable questions
     """
-    if responses is None:
-        responses = survey.responses.all()
-
-    total = responses.count()
-    if total == 0:
-        return ResponseAnalytics(total_responses=0, distributions=[])
-
     # Get chartable questions, ordered by group position (from survey.style) then by question order
     from checktick_app.surveys.views import _order_questions_by_group
 
     all_chartable = list(
         survey.questions.filter(type__in=CHARTABLE_TYPES).select_related("group")
     )
-    ordered_questions = _order_questions_by_group(survey, all_chartable)
-    questions = ordered_questions[:limit_questions]
+    questions = _order_questions_by_group(survey, all_chartable)
+    if limit_questions is not None:
+        questions = questions[:limit_questions]
 
-    distributions = []
+    if responses is None:
+        total = survey.responses.filter(is_frozen=False).count()
+        if total == 0:
+            return ResponseAnalytics(total_responses=0, distributions=[])
+        distributions = _distributions_from_aggregates(survey, questions)
+    else:
+        total, distributions = _distributions_from_scan(questions, responses)
+
+    return ResponseAnalytics(total_responses=total, distributions=distributions)
 
+
+def _distributions_from_aggregates(survey, questions) -> list[AnswerDistribution]:
+    """Build distributions for ``questions`` from ResponseAnswerCount rows."""
+    from checktick_app.surveys.models import ResponseAnswerCount
+
+    counters: dict[int, Counter] = {question.id: Counter() for question in questions}
+    answered: Counter = Counter()
+    rows = ResponseAnswerCount.objects.filter(
+        survey=survey, question_id__in=counters.keys(), count__gt=0
+    ).values_list("question_id", "option", "count")
+    for question_id, option, count in rows:
+        if option == ResponseAnswerCount.ANSWERED:
+            answered[question_id] = count
+        else:
+            counters[question_id][option] = count
+
+    distributions = []
     for question in questions:
-        dist = _compute_question_distribution(question, responses)
+        # Sort by label first so ties are stable once ordered by count
+        counter = Counter(dict(sorted(counters[question.id].items())))
+        dist = _build_distribution(question, counter, answered[question.id])
         if dist:
             distributions.append(dist)
+    return distributions
 
-    return ResponseAnalytics(total_responses=total, distributions=distributions)
 
+def _distributions_from_scan(
+    questions, responses: QuerySet
+) -> tuple[int, list[AnswerDistribution]]:
+    """
+    Build distributions by scanning ``responses`` once.
+
+    Returns:
+        Tuple of (number of responses scanned, distributions)
+    """
+    matrix = build_answer_matrix(
+        responses.values_list("answers", flat=True).iterator(chunk_size=2000),
+        {question.id: question.type for question in questions},
+    )
+
+    distributions = []
+    for question in questions:
+        column = matrix.columns[question.id]
+        dist = _build_distribution(question, column.option_counts(), column.answered)
+        if dist:
+            distributions.append(dist)
+    return matrix.response_count, distributions
 
-def _compute_question_distribution(
-    question, responses: QuerySet
-) -> AnswerDistribution | None:
-    """Compute answer distribution for a single question."""
-    q_id = str(question.id)
-    counter: Counter = Counter()
-    answered_count = 0
-
-    for response in responses.iterator():
-        answers = response.answers or {}
-        answer = answers.get(q_id)
-
-        if answer is None or answer == "":
-            continue
-
-        answered_count += 1
-
-        if question.type == "mc_multi":
-            # Multi-select: answer is a list
-            if isinstance(answer, list):
-                for item in answer:
-                    counter[str(item)] += 1
-            else:
-                counter[str(answer)] += 1
-        elif question.type == "yesno":
-            # Normalize yes/no
-            val = str(answer).lower()
-            if val in ("yes", "true", "1"):
-                counter["Yes"] += 1
-            else:
-                counter["No"] += 1
-        else:
-            # Single value
-            counter[str(answer)] += 1
 
+def _build_distribution(
+    question, counter: Counter, answered_count: int
+) -> AnswerDistribution | None:
+    """Turn option counts into an AnswerDistribution (None if unanswered)."""
     if answered_count == 0:
         return None
 
@@ -152,18 +167,12 @@ def _reorder_by_question_options(question, options: list[dict]) -> list[dict]:
     Reorder options to match the question's defined order.
     Falls back to count-sorted order for any options not in the definition.
     """
-    q_options = (question.options or {}).get("choices", [])
+    q_options = question_choice_labels(question)
     if not q_options:
         return options
 
     # Build order map from question definition
-    order_map = {}
-    for i, opt in enumerate(q_options):
-        if isinstance(opt, dict):
-            label = opt.get("label") or opt.get("value", "")
-        else:
-            label = str(opt)
-        order_map[label] = i
+    order_map = {label: i for i, label in enumerate(q_options)}
 
     # Sort: defined options first (in order), then others by count
     def sort_key(opt):
@@ -173,3 +182,26 @@ def _reorder_by_question_options(question, options: list[dict]) -> list[dict]:
         return (1, -opt["count"])
 
     return sorted(options, key=sort_key)
+
+
+def question_choice_labels(question) -> list[str]:
+    """
+    Return a question's defined option labels, in order.
+
+    Handles both the builder's list format (strings or {"label", "value"}
+    dicts) and the {"choices": [...]} format; config entries such as a
+    likert number-scale ({"type": ...}) are skipped.
+    """
+    q_options = question.options or []
+    if isinstance(q_options, dict):
+        q_options = q_options.get("choices", [])
+
+    labels = []
+    for opt in q_options:
+        if isinstance(opt, dict):
+            if "type" in opt:
+                continue
+            labels.append(str(opt.get("label") or opt.get("value", "")))
+        else:
+            labels.append(str(opt))
+    return labels
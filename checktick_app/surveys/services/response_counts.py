@@ -0,0 +1,109 @@
+"""
+Denormalised survey response counts.
+
+``Survey.response_count`` mirrors ``survey.responses.count()`` so that
+``Survey.is_live()`` and the ``max_responses`` check on every participant
+request read a column instead of counting the response table.
+
+The counter is only changed with F() updates:
+- participant submissions reserve their place with ``reserve_response()``,
+  a conditional UPDATE that fails once the survey is full, in the same
+  transaction as the response insert
+- other inserts and all deletes are applied by signal handlers in
+  ``surveys/signals.py``
+- the ``reconcile_response_counts`` command recounts from the table, for
+  example after responses were bulk-created, loaded from fixtures or restored
+
+Frozen responses still count, as they always have towards ``max_responses``.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Iterable
+
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+if TYPE_CHECKING:
+    from ..models import Survey
+
+# Set on a SurveyResponse whose place was reserved before it was saved
+RESERVED_ATTR = "_response_count_reserved"
+
+
+def reserve_response(survey: Survey) -> bool:
+    """
+    Count a response that is about to be saved, if the survey has room.
+
+    Call inside the transaction that saves the response and mark the response
+    with ``mark_reserved()`` so the save signal does not count it again.
+
+    Returns:
+        False if the survey already has ``max_responses`` responses
+    """
+    from ..models import Survey
+
+    updated = (
+        Survey.objects.filter(pk=survey.pk)
+        .filter(
+            Q(max_responses__isnull=True) | Q(response_count__lt=F("max_responses"))
+        )
+        .update(response_count=F("response_count") + 1)
+    )
+    return bool(updated)
+
+
+def mark_reserved(response) -> None:
+    setattr(response, RESERVED_ATTR, True)
+
+
+def is_reserved(response) -> bool:
+    return getattr(response, RESERVED_ATTR, False)
+
+
+def adjust_response_count(survey_id: int, delta: int) -> None:
+    """Add ``delta`` to a survey's response count (never below zero)."""
+    from ..models import Survey
+
+    surveys = Survey.objects.filter(pk=survey_id)
+    if delta < 0:
+        surveys = surveys.filter(response_count__gte=-delta)
+    surveys.update(response_count=F("response_count") + delta)
+
+
+def reconcile_response_counts(
+    surveys: Iterable[Survey], dry_run: bool = False
+) -> list[tuple[Survey, int]]:
+    """
+    Recount responses for ``surveys`` and correct the stored counts.
+
+    Args:
+        surveys: Surveys to check
+        dry_run: Only report wrong counts, don't correct them
+
+    Returns:
+        (survey, actual count) for each survey whose stored count was wrong
+    """
+    from ..models import Survey, SurveyResponse
+
+    actual = Coalesce(
+        Subquery(
+            SurveyResponse.objects.filter(survey=OuterRef("pk"))
+            .order_by()
+            .values("survey")
+            .annotate(n=Count("id"))
+            .values("n")
+        ),
+        0,
+    )
+    wrong = []
+    for survey in surveys:
+        counted = survey.responses.count()
+        if counted != survey.response_count:
+            wrong.append((survey, counted))
+    if dry_run:
+        return wrong
+    for survey, _ in wrong:
+        # Recount in the UPDATE itself so concurrent submissions are not lost
+        Survey.objects.filter(pk=survey.pk).update(response_count=actual)
+    return wrong
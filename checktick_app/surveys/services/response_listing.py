@@ -0,0 +1,251 @@
+"""
+Response listing for the API: keyset-paginated pages and NDJSON streams.
+
+Responses are read in (submitted_at, id) order, which the (survey,
+submitted_at) index serves. Each page ends with an opaque cursor holding the
+last (submitted_at, id) and the next page starts strictly after it, so a page
+costs the same however far a client has paged and stays stable while new
+responses arrive. ``since`` starts from a submission time, for incremental
+sync.
+
+The stream mode reads the same rows in chunks and writes one JSON object per
+line, each with its own cursor so an interrupted sync can resume. Whole
+response encrypted surveys are decrypted with the unlocked survey key as each
+chunk is read; v2 blobs share a cached per-survey data key, so decryption
+costs one KDF per request. Frozen responses are excluded, as in exports.
+
+Listings are data exports for governance purposes: the API audit logs every
+page and stream (see ``on_finish``) and rejects deleted surveys.
+"""
+
+from __future__ import annotations
+
+import base64
+from dataclasses import dataclass
+from datetime import datetime
+import json
+import logging
+from typing import Any, Callable, Iterator
+
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+
+from ..models import Survey, SurveyResponse
+from .date_bounds import parse_date_bound
+from .imd_service import IMDService
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("id", "submitted_at", "submitted_by", "answers", "demographics")
+# Fields read from the encrypted blobs
+ENCRYPTED_FIELDS = {"answers", "demographics"}
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Rows read (and decrypted) per database round trip when streaming
+CHUNK_SIZE = 500
+
+
+def encode_cursor(submitted_at: datetime, response_id: int) -> str:
+    """Opaque cursor for the position just after a response."""
+    raw = json.dumps([submitted_at.isoformat(), response_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Position encoded by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        submitted_at, response_id = json.loads(base64.urlsafe_b64decode(padded))
+        position = parse_datetime(submitted_at), int(response_id)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if position[0] is None:
+        raise ValueError("Invalid cursor")
+    return position
+
+
+@dataclass
+class ResponseListQuery:
+    """Which responses to list and which fields to include."""
+
+    after: tuple[datetime, int] | None = None
+    since: datetime | None = None
+    fields: tuple[str, ...] = FIELDS
+    limit: int = DEFAULT_PAGE_SIZE
+    stream: bool = False
+
+    @classmethod
+    def from_params(cls, params) -> ResponseListQuery:
+        """
+        Build a query from request parameters (QueryDict or plain dict).
+
+        Parameters: ``cursor`` (from a previous page or streamed line),
+        ``since`` (ISO date or datetime), ``fields`` (comma-separated subset
+        of FIELDS), ``limit`` (page size, up to MAX_PAGE_SIZE) and ``stream``
+        (``1`` or ``true`` for NDJSON).
+
+        Raises:
+            ValueError: If a parameter is invalid
+        """
+        cursor = params.get("cursor")
+        fields = FIELDS
+        if params.get("fields"):
+            requested = [f.strip() for f in params["fields"].split(",") if f.strip()]
+            unknown = sorted(set(requested) - set(FIELDS))
+            if unknown:
+                raise ValueError(
+                    f"Unknown fields: {', '.join(unknown)} "
+                    f"(choose from {', '.join(FIELDS)})"
+                )
+            fields = tuple(f for f in FIELDS if f in requested)
+
+        try:
+            limit = int(params.get("limit") or DEFAULT_PAGE_SIZE)
+        except ValueError:
+            raise ValueError("'limit' must be an integer")
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"'limit' must be between 1 and {MAX_PAGE_SIZE}")
+
+        return cls(
+            after=decode_cursor(cursor) if cursor else None,
+            since=parse_date_bound(params.get("since"), "since"),
+            fields=fields,
+            limit=limit,
+            stream=str(params.get("stream", "")).lower() in ("1", "true"),
+        )
+
+    @property
+    def reads_encrypted_data(self) -> bool:
+        return bool(ENCRYPTED_FIELDS.intersection(self.fields))
+
+
+def response_queryset(survey: Survey, query: ResponseListQuery) -> QuerySet:
+    """Unfrozen responses after the query's position, in keyset order."""
+    responses = SurveyResponse.objects.filter(survey=survey, is_frozen=False)
+    if query.since:
+        responses = responses.filter(submitted_at__gte=query.since)
+    if query.after:
+        submitted_at, response_id = query.after
+        responses = responses.filter(
+            Q(submitted_at__gt=submitted_at)
+            | Q(submitted_at=submitted_at, id__gt=response_id)
+        )
+
+    columns = ["id", "survey", "submitted_at"]
+    if "submitted_by" in query.fields:
+        responses = responses.select_related("submitted_by")
+        columns += ["submitted_by", "submitted_by__username"]
+    if query.reads_encrypted_data:
+        columns += ["answers", "enc_answers", "enc_demographics"]
+    return responses.only(*columns).order_by("submitted_at", "id")
+
+
+def _record(
+    response: SurveyResponse,
+    fields: tuple[str, ...],
+    survey_key: bytes | None,
+    imd_cache: dict,
+) -> dict[str, Any]:
+    """
+    A response's listing record, limited to ``fields``.
+
+    Demographics get their IMD decile from the IMD cache if the response was
+    submitted before its postcode was looked up; ``imd_cache`` is shared by
+    a request's records.
+    """
+    answers = response.answers if "answers" in fields else None
+    demographics = None
+    if survey_key and ENCRYPTED_FIELDS.intersection(fields) and response.is_encrypted:
+        try:
+            full_response = response.load_complete_response(survey_key)
+            answers = full_response.get("answers") or answers
+            demographics = full_response.get("demographics")
+            if demographics and "demographics" in fields:
+                demographics = IMDService.add_cached_imd(demographics, imd_cache)
+        except Exception as e:
+            # Keep the row (and the client's cursor) moving past it
+            logger.error(f"Failed to decrypt response {response.id}: {e}")
+
+    values = {
+        "id": response.id,
+        "submitted_at": response.submitted_at,
+        "submitted_by": (
+            response.submitted_by.username
+            if "submitted_by" in fields and response.submitted_by
+            else None
+        ),
+        "answers": answers,
+        "demographics": demographics,
+    }
+    return {name: values[name] for name in fields}
+
+
+def list_page(
+    survey: Survey, query: ResponseListQuery, survey_key: bytes | None = None
+) -> dict[str, Any]:
+    """
+    One page of responses.
+
+    Returns:
+        ``{"items": [...], "next_cursor": str | None, "has_more": bool}``.
+        next_cursor is after the page's last item (or the requested position
+        if the page is empty), so a client at the end keeps it to fetch
+        responses submitted later.
+    """
+    responses = list(response_queryset(survey, query)[: query.limit + 1])
+    has_more = len(responses) > query.limit
+    responses = responses[: query.limit]
+    imd_cache: dict = {}
+    if responses:
+        next_cursor = encode_cursor(responses[-1].submitted_at, responses[-1].id)
+    elif query.after:
+        next_cursor = encode_cursor(*query.after)
+    else:
+        next_cursor = None
+    return {
+        "items": [_record(r, query.fields, survey_key, imd_cache) for r in responses],
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+    }
+
+
+def iter_ndjson(
+    survey: Survey,
+    query: ResponseListQuery,
+    survey_key: bytes | None = None,
+    on_finish: Callable[[int, str | None], None] | None = None,
+) -> Iterator[bytes]:
+    """
+    Every response after the query's position as NDJSON, one chunk at a time.
+
+    Each line carries a ``cursor`` to resume from after that response.
+    ``on_finish`` is called with the number of responses sent and the last
+    sent cursor once the stream ends, including when the client disconnects.
+    """
+    lines = []
+    imd_cache: dict = {}
+    # A chunk counts as sent once yielded; the client holds it even if it
+    # disconnects before asking for the next one
+    sent, sent_cursor = 0, None
+    try:
+        responses = response_queryset(survey, query).iterator(chunk_size=CHUNK_SIZE)
+        for response in responses:
+            record = _record(response, query.fields, survey_key, imd_cache)
+            cursor = encode_cursor(response.submitted_at, response.id)
+            record["cursor"] = cursor
+            lines.append(json.dumps(record, ensure_ascii=False, default=str))
+            if len(lines) >= CHUNK_SIZE:
+                sent, sent_cursor = sent + len(lines), cursor
+                yield ("\n".join(lines) + "\n").encode("utf-8")
+                lines = []
+        if lines:
+            sent, sent_cursor = sent + len(lines), cursor
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+    finally:
+        if on_finish:
+            on_finish(sent, sent_cursor)
@@ -0,0 +1,343 @@
+"""
+Durable, database-backed background task queue.
+
+Views enqueue a Task row and return its id; ``manage.py run_worker``
+processes run the registered handler. Because both the task and its progress
+live in the database, any web process can answer a status poll, and adding
+workers adds throughput: each worker claims the oldest runnable task with
+SELECT ... FOR UPDATE SKIP LOCKED, so workers never block on or duplicate
+each other's tasks.
+
+Handlers are registered with ``@task_handler("name")`` and receive the Task.
+They report progress with ``report_progress``, which also keeps the task's
+heartbeat fresh, and return a dict of results. Raising TaskError fails the
+task immediately; any other exception is retried with exponential backoff
+until ``max_attempts`` is reached. A task whose worker died (no heartbeat
+for CHECKTICK_TASK_STALE_SECONDS) is claimed again as a new attempt, so
+handlers keep enough state in ``task.result`` to resume without repeating
+side effects; one that has already used its last attempt is failed instead,
+so a handler that kills its worker is not retried forever. Handlers that
+block for longer than the stale window without reporting progress wrap the
+call in ``heartbeat`` so the task is not reclaimed while it is still running.
+A handler registered with ``on_failure`` has that function called once its
+task has failed for good, whichever way it failed, to clean up after it.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from datetime import timedelta
+import logging
+import random
+import threading
+from typing import TYPE_CHECKING, Any, Callable
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+if TYPE_CHECKING:
+    from ..models import Task
+
+logger = logging.getLogger(__name__)
+
+TaskHandler = Callable[["Task"], "dict[str, Any] | None"]
+FailureHandler = Callable[["Task"], None]
+
+TASK_HANDLERS: dict[str, TaskHandler] = {}
+FAILURE_HANDLERS: dict[str, FailureHandler] = {}
+
+
+class TaskError(Exception):
+    """A task failure that retrying will not fix."""
+
+
+def task_handler(
+    name: str, on_failure: FailureHandler | None = None
+) -> Callable[[TaskHandler], TaskHandler]:
+    """
+    Register a function as the handler for tasks called ``name``.
+
+    ``on_failure`` is called with the task when it fails for good: its last
+    attempt raised, it raised TaskError, or its worker died on the last
+    attempt.
+    """
+
+    def register(func: TaskHandler) -> TaskHandler:
+        TASK_HANDLERS[name] = func
+        if on_failure is not None:
+            FAILURE_HANDLERS[name] = on_failure
+        return func
+
+    return register
+
+
+def enqueue(
+    name: str,
+    payload: dict[str, Any] | None = None,
+    *,
+    survey=None,
+    created_by=None,
+    max_attempts: int = 3,
+    message: str = "",
+) -> Task:
+    """
+    Queue a task for the workers.
+
+    The task becomes visible to workers when the surrounding transaction
+    commits.
+
+    Raises:
+        ValueError: If no handler is registered under ``name``
+    """
+    from ..models import Task
+
+    if name not in TASK_HANDLERS:
+        raise ValueError(f"Unknown task '{name}'")
+
+    task = Task.objects.create(
+        name=name,
+        payload=payload or {},
+        survey=survey,
+        created_by=created_by,
+        max_attempts=max_attempts,
+        message=message,
+    )
+    logger.info(f"Queued task {name} {task.id}")
+    return task
+
+
+def claim_next_task(stale_after: timedelta | None = None) -> Task | None:
+    """
+    Claim the oldest runnable task for this worker.
+
+    Runnable means queued and due, or running with a heartbeat older than
+    ``stale_after`` (its worker died). A stale task that has used all its
+    attempts is marked failed rather than claimed.
+
+    Returns:
+        The claimed task, now running, or None if there is nothing to do
+    """
+    from ..models import Task
+
+    if stale_after is None:
+        stale_after = timedelta(seconds=settings.CHECKTICK_TASK_STALE_SECONDS)
+    now = timezone.now()
+
+    while True:
+        with transaction.atomic():
+            task = (
+                Task.objects.select_for_update(skip_locked=True)
+                .filter(
+                    Q(status=Task.Status.QUEUED, run_after__lte=now)
+                    | Q(status=Task.Status.RUNNING, locked_at__lt=now - stale_after)
+                )
+                .order_by("run_after", "created_at")
+                .first()
+            )
+            if task is None:
+                return None
+
+            if task.status == Task.Status.RUNNING:
+                if task.attempts >= task.max_attempts:
+                    # Its worker died on the last attempt
+                    _finish(
+                        task,
+                        Task.Status.FAILED,
+                        error=(
+                            f"Worker stopped responding after {task.attempts} "
+                            "attempt(s)"
+                        ),
+                    )
+                    logger.error(
+                        f"Task {task.name} {task.id} failed: worker stopped "
+                        f"responding on its last attempt"
+                    )
+                    continue
+                logger.warning(f"Reclaiming stale task {task.name} {task.id}")
+            task.status = Task.Status.RUNNING
+            task.attempts += 1
+            task.locked_at = now
+            task.save(update_fields=["status", "attempts", "locked_at", "updated_at"])
+
+        return task
+
+
+def run_task(task: Task) -> None:
+    """
+    Run a claimed task's handler and record the outcome.
+
+    Never raises for handler errors: they are recorded on the task, which is
+    requeued with backoff or marked failed.
+    """
+    from ..models import Task
+
+    handler = TASK_HANDLERS.get(task.name)
+    try:
+        if handler is None:
+            raise TaskError(f"No handler registered for task '{task.name}'")
+        result = handler(task)
+    except TaskError as e:
+        _finish(task, Task.Status.FAILED, error=str(e))
+        logger.error(f"Task {task.name} {task.id} failed: {e}")
+        return
+    except Exception as e:
+        if task.attempts < task.max_attempts:
+            delay = retry_delay(task.attempts)
+            task.status = Task.Status.QUEUED
+            task.run_after = timezone.now() + delay
+            task.locked_at = None
+            task.error = str(e)
+            task.save(
+                update_fields=[
+                    "status",
+                    "run_after",
+                    "locked_at",
+                    "error",
+                    "updated_at",
+                ]
+            )
+            logger.warning(
+                f"Task {task.name} {task.id} attempt {task.attempts} failed, "
+                f"retrying in {delay.total_seconds():.0f}s: {e}",
+                exc_info=True,
+            )
+        else:
+            _finish(task, Task.Status.FAILED, error=str(e))
+            logger.error(
+                f"Task {task.name} {task.id} failed after {task.attempts} attempts: {e}",
+                exc_info=True,
+            )
+        return
+
+    if result:
+        task.result = {**task.result, **result}
+    _finish(task, Task.Status.SUCCEEDED)
+    logger.info(f"Task {task.name} {task.id} succeeded")
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff with jitter after ``attempts`` failed attempts."""
+    base = settings.CHECKTICK_TASK_RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1)
+    return timedelta(seconds=base * random.uniform(0.75, 1.25))
+
+
+def report_progress(
+    task: Task, progress: int, message: str = "", **result: Any
+) -> None:
+    """
+    Record a running task's progress and refresh its heartbeat.
+
+    Keyword arguments are merged into ``task.result``, so handlers can keep
+    the state they need to resume after a retry.
+    """
+    task.progress = max(0, min(100, progress))
+    if message:
+        task.message = message[:255]
+    if result:
+        task.result = {**task.result, **result}
+    task.locked_at = timezone.now()
+    task.save(
+        update_fields=["progress", "message", "result", "locked_at", "updated_at"]
+    )
+
+
+@contextmanager
+def heartbeat(task: Task, interval: float | None = None):
+    """
+    Keep a running task's heartbeat fresh while a long call blocks.
+
+    A background thread refreshes ``locked_at`` every ``interval`` seconds (a
+    third of CHECKTICK_TASK_STALE_SECONDS by default) until the block exits,
+    so other workers do not reclaim and re-run the task in the meantime.
+    """
+    from django.db import connection
+
+    from ..models import Task
+
+    if interval is None:
+        interval = settings.CHECKTICK_TASK_STALE_SECONDS / 3
+    stop = threading.Event()
+
+    def beat() -> None:
+        try:
+            while not stop.wait(interval):
+                try:
+                    Task.objects.filter(id=task.id, status=Task.Status.RUNNING).update(
+                        locked_at=timezone.now()
+                    )
+                except Exception as e:
+                    logger.warning(f"Heartbeat for task {task.id} failed: {e}")
+        finally:
+            # The thread has its own database connection
+            connection.close()
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+        task.locked_at = timezone.now()
+
+
+def _finish(task: Task, status: str, error: str = "") -> None:
+    task.status = status
+    task.error = error
+    task.locked_at = None
+    task.completed_at = timezone.now()
+    if status == task.Status.SUCCEEDED:
+        task.progress = 100
+    task.save()
+
+    on_failure = FAILURE_HANDLERS.get(task.name)
+    if status == task.Status.FAILED and on_failure is not None:
+        try:
+            on_failure(task)
+        except Exception as e:
+            logger.error(
+                f"Failure handler for task {task.name} {task.id} failed: {e}",
+                exc_info=True,
+            )
+
+
+def purge_finished_tasks(older_than: timedelta) -> int:
+    """Delete succeeded and failed tasks completed before ``older_than`` ago."""
+    from ..models import Task
+
+    deleted, _ = Task.objects.filter(
+        status__in=[Task.Status.SUCCEEDED, Task.Status.FAILED],
+        completed_at__lt=timezone.now() - older_than,
+    ).delete()
+    return deleted
+
+
+def task_status(task: Task) -> dict[str, Any]:
+    """
+    JSON status for polling endpoints.
+
+    ``status`` is "processing" until the task finishes, then "completed" or
+    "error", with the handler's results merged in.
+    """
+    if task.status == task.Status.SUCCEEDED:
+        return {
+            **task.result,
+            "status": "completed",
+            "progress": 100,
+            "message": task.message,
+        }
+    if task.status == task.Status.FAILED:
+        return {
+            **task.result,
+            "status": "error",
+            "progress": 100,
+            "message": task.error,
+        }
+    return {
+        **task.result,
+        "status": "processing",
+        "progress": task.progress,
+        "message": task.message or "Waiting to start...",
+    }
@@ -0,0 +1,171 @@
+"""
+Time series service for survey dashboards and metrics.
+
+Counts rows per time bucket (hour, day or week) with a single aggregate query
+per series, then fills empty buckets in Python so charts always get a
+contiguous series. Used by the survey dashboard sparkline and the
+``metrics/responses`` API action.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from django.db.models import Count, Q, QuerySet
+from django.db.models.functions import TruncDay, TruncHour, TruncWeek
+from django.utils import timezone
+
+BUCKET_FUNCTIONS = {
+    "hour": TruncHour,
+    "day": TruncDay,
+    "week": TruncWeek,
+}
+BUCKET_STEPS = {
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+}
+# Default window (number of buckets, including the current one) per bucket size
+DEFAULT_BUCKET_COUNTS = {"hour": 48, "day": 14, "week": 12}
+
+
+@dataclass
+class TimeSeries:
+    """Gap-filled counts for consecutive time buckets (oldest -> newest)."""
+
+    bucket: str
+    starts: list[datetime] = field(default_factory=list)
+    counts: list[int] = field(default_factory=list)
+
+    @property
+    def labels(self) -> list[str]:
+        """ISO labels: dates for day/week buckets, datetimes for hours."""
+        if self.bucket == "hour":
+            return [start.isoformat() for start in self.starts]
+        return [start.date().isoformat() for start in self.starts]
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts)
+
+    def as_dict(self) -> dict:
+        return {
+            "bucket": self.bucket,
+            "points": [
+                {"start": label, "count": count}
+                for label, count in zip(self.labels, self.counts)
+            ],
+        }
+
+
+def floor_to_bucket(value: datetime, bucket: str) -> datetime:
+    """
+    Truncate a datetime to the start of its bucket in the current timezone.
+
+    Matches the database truncation used by count_by_bucket (weeks start on
+    Monday, as with TruncWeek).
+    """
+    if bucket not in BUCKET_FUNCTIONS:
+        raise ValueError(f"Unknown bucket '{bucket}'")
+    value = timezone.localtime(value)
+    if bucket == "hour":
+        return value.replace(minute=0, second=0, microsecond=0)
+    value = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if bucket == "week":
+        value -= timedelta(days=value.weekday())
+    return value
+
+
+def count_by_bucket(
+    queryset: QuerySet,
+    field_name: str,
+    start: datetime,
+    end: datetime,
+    bucket: str = "day",
+) -> TimeSeries:
+    """
+    Count rows per time bucket with one GROUP BY query.
+
+    Args:
+        queryset: Rows to count (already filtered, e.g. survey.responses)
+        field_name: Datetime field to bucket on (e.g. "submitted_at")
+        start: Start of the range; floored to its bucket
+        end: End of the range (exclusive)
+        bucket: "hour", "day" or "week"
+
+    Returns:
+        TimeSeries covering every bucket from start up to end, zeros included
+    """
+    start = floor_to_bucket(start, bucket)
+    step = BUCKET_STEPS[bucket]
+    trunc = BUCKET_FUNCTIONS[bucket]
+
+    rows = (
+        queryset.filter(**{f"{field_name}__gte": start, f"{field_name}__lt": end})
+        .annotate(bucket_start=trunc(field_name))
+        .values("bucket_start")
+        .annotate(count=Count("pk"))
+        .order_by()
+    )
+    counts_by_start = {
+        floor_to_bucket(row["bucket_start"], bucket): row["count"] for row in rows
+    }
+
+    series = TimeSeries(bucket=bucket)
+    current = start
+    while current < end:
+        series.starts.append(current)
+        series.counts.append(counts_by_start.get(current, 0))
+        current = floor_to_bucket(current + step, bucket)
+    return series
+
+
+def recent_series(
+    queryset: QuerySet,
+    field_name: str,
+    bucket: str = "day",
+    buckets: int | None = None,
+    now: datetime | None = None,
+) -> TimeSeries:
+    """
+    Count rows for the most recent ``buckets`` buckets, including the current one.
+
+    Args:
+        queryset: Rows to count
+        field_name: Datetime field to bucket on
+        bucket: "hour", "day" or "week"
+        buckets: Number of buckets (defaults per bucket size)
+        now: Reference time (defaults to timezone.now())
+
+    Returns:
+        TimeSeries ending with the bucket containing ``now``
+    """
+    if bucket not in BUCKET_FUNCTIONS:
+        raise ValueError(f"Unknown bucket '{bucket}'")
+    now = now or timezone.now()
+    buckets = buckets or DEFAULT_BUCKET_COUNTS[bucket]
+    current_start = floor_to_bucket(now, bucket)
+    start = current_start - BUCKET_STEPS[bucket] * (buckets - 1)
+    end = floor_to_bucket(current_start + BUCKET_STEPS[bucket], bucket)
+    return count_by_bucket(queryset, field_name, start, end, bucket)
+
+
+def summary_counts(
+    queryset: QuerySet, field_name: str, now: datetime | None = None
+) -> dict[str, int]:
+    """
+    Return total/today/last7/last14 counts in a single aggregate query.
+
+    ``today`` starts at local midnight; ``last7``/``last14`` are rolling windows.
+    """
+    now = now or timezone.now()
+    start_today = floor_to_bucket(now, "day")
+    return queryset.aggregate(
+        total=Count("pk"),
+        today=Count("pk", filter=Q(**{f"{field_name}__gte": start_today})),
+        last7=Count("pk", filter=Q(**{f"{field_name}__gte": now - timedelta(days=7)})),
+        last14=Count(
+            "pk", filter=Q(**{f"{field_name}__gte": now - timedelta(days=14)})
+        ),
+    )
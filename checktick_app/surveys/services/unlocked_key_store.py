@@ -0,0 +1,201 @@
+"""
+UnlockedKeyStore - Short-lived, session-bound cache of unlocked survey KEKs.
+
+Unlocking a survey stores encrypted credentials in the session, and
+get_survey_key_from_session used to re-derive the KEK from them on every
+request: one Scrypt to decrypt the credentials plus a second Scrypt in
+Survey.unlock_with_password / unlock_with_recovery. This store keeps the
+unlocked KEK in the session instead, wrapped with AES-256-GCM under a secret
+that only exists in the memory of the current worker process.
+
+Security properties:
+- The wrapping secret is generated at process start and never persisted, so a
+  copy of the session table alone cannot recover a KEK
+- Wrapped keys are bound to the session key, the survey slug and the expiry
+  via AES-GCM associated data
+- Entries expire with the existing 30-minute unlock window
+- A worker restart drops all entries; the next request falls back to
+  re-deriving the KEK from the stored credentials
+"""
+
+from __future__ import annotations
+
+import base64
+from datetime import timedelta
+import logging
+import os
+import threading
+from typing import TYPE_CHECKING
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from django.utils import timezone
+
+from ..utils import key_fingerprint
+
+if TYPE_CHECKING:
+    from django.http import HttpRequest
+
+logger = logging.getLogger(__name__)
+
+# Per-process wrapping secret, see module docstring.
+_PROCESS_SECRET = os.urandom(32)
+_PROCESS_ID = key_fingerprint(_PROCESS_SECRET)[:16]
+
+
+class UnlockedKeyStore:
+    """
+    Session-scoped store of unlocked survey KEKs.
+
+    Workflow:
+    1. survey_unlock (or OIDC/org recovery) derives the KEK once and calls store()
+    2. get_survey_key_from_session calls get() and only re-derives on a miss
+    3. Expiry, a different survey or a new session key all produce a miss
+    4. clear() drops the entry when the unlock is revoked or expires
+
+    Each worker process wraps the KEK with its own secret, so the session holds
+    one wrapped copy per worker (bounded by MAX_WRAPPED_COPIES).
+    """
+
+    SESSION_KEY = "unlock_kek_store"
+    UNLOCK_WINDOW = timedelta(minutes=30)
+    MAX_WRAPPED_COPIES = 8
+
+    _counters = {"hits": 0, "misses": 0, "stores": 0}
+    _counters_lock = threading.Lock()
+
+    @classmethod
+    def store(cls, request: HttpRequest, survey_slug: str, kek: bytes) -> None:
+        """
+        Wrap and store an unlocked KEK in the session.
+
+        Args:
+            request: Request whose session holds the unlock
+            survey_slug: Survey the KEK belongs to
+            kek: Unlocked survey KEK
+        """
+        session_key = request.session.session_key
+        if not session_key or not kek:
+            return
+
+        # A new unlock (different survey or unlock time) replaces the entry
+        expires_at = cls._expiry_for(request).isoformat()
+        entry = request.session.get(cls.SESSION_KEY) or {}
+        if (
+            entry.get("survey_slug") != survey_slug
+            or entry.get("expires_at") != expires_at
+        ):
+            entry = {"survey_slug": survey_slug, "expires_at": expires_at}
+
+        wrapped = dict(entry.get("wrapped") or {})
+        wrapped.pop(_PROCESS_ID, None)
+        while len(wrapped) >= cls.MAX_WRAPPED_COPIES:
+            wrapped.pop(next(iter(wrapped)))
+
+        nonce = os.urandom(12)
+        aad = cls._associated_data(session_key, survey_slug, entry["expires_at"])
+        ciphertext = AESGCM(_PROCESS_SECRET).encrypt(nonce, bytes(kek), aad)
+        wrapped[_PROCESS_ID] = base64.b64encode(nonce + ciphertext).decode("ascii")
+        entry["wrapped"] = wrapped
+
+        request.session[cls.SESSION_KEY] = entry
+        cls._count("stores")
+
+    @classmethod
+    def get(cls, request: HttpRequest, survey_slug: str) -> bytes | None:
+        """
+        Return the unlocked KEK for this session and survey, if cached.
+
+        Args:
+            request: Request whose session holds the unlock
+            survey_slug: Survey the KEK is requested for
+
+        Returns:
+            The KEK, or None on a miss (caller should re-derive and store())
+        """
+        session_key = request.session.session_key
+        entry = request.session.get(cls.SESSION_KEY)
+        blob_b64 = (entry or {}).get("wrapped", {}).get(_PROCESS_ID)
+
+        if (
+            not session_key
+            or not blob_b64
+            or entry.get("survey_slug") != survey_slug
+            or cls._is_expired(entry)
+        ):
+            cls._count("misses")
+            return None
+
+        try:
+            blob = base64.b64decode(blob_b64)
+            aad = cls._associated_data(session_key, survey_slug, entry["expires_at"])
+            kek = AESGCM(_PROCESS_SECRET).decrypt(blob[:12], blob[12:], aad)
+        except (InvalidTag, ValueError):
+            cls._count("misses")
+            return None
+
+        cls._count("hits")
+        return kek
+
+    @classmethod
+    def clear(cls, request: HttpRequest) -> None:
+        """Remove any cached KEK from the session."""
+        request.session.pop(cls.SESSION_KEY, None)
+
+    @classmethod
+    def stats(cls) -> dict:
+        """
+        Return hit/miss counters for this worker process.
+
+        Returns:
+            Dictionary with hits, misses, stores and hit_rate (0.0-1.0)
+        """
+        with cls._counters_lock:
+            stats = dict(cls._counters)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    @classmethod
+    def reset_stats(cls) -> None:
+        """Reset the counters for this worker process."""
+        with cls._counters_lock:
+            for name in cls._counters:
+                cls._counters[name] = 0
+
+    @classmethod
+    def _count(cls, name: str) -> None:
+        with cls._counters_lock:
+            cls._counters[name] += 1
+            hits, misses = cls._counters["hits"], cls._counters["misses"]
+        if name != "stores" and (hits + misses) % 100 == 0:
+            logger.info(
+                f"Unlocked key store: {hits} hits, {misses} misses "
+                f"(hit rate {hits / (hits + misses):.0%})"
+            )
+
+    @classmethod
+    def _expiry_for(cls, request: HttpRequest):
+        """Expiry matches the unlock window started at unlock_verified_at."""
+        verified_at_str = request.session.get("unlock_verified_at")
+        if verified_at_str:
+            verified_at = timezone.datetime.fromisoformat(verified_at_str)
+            if timezone.is_naive(verified_at):
+                verified_at = timezone.make_aware(verified_at)
+        else:
+            verified_at = timezone.now()
+        return verified_at + cls.UNLOCK_WINDOW
+
+    @classmethod
+    def _is_expired(cls, entry: dict) -> bool:
+        try:
+            expires_at = timezone.datetime.fromisoformat(entry["expires_at"])
+        except (KeyError, TypeError, ValueError):
+            return True
+        if timezone.is_naive(expires_at):
+            expires_at = timezone.make_aware(expires_at)
+        return timezone.now() >= expires_at
+
+    @staticmethod
+    def _associated_data(session_key: str, survey_slug: str, expires_at: str) -> bytes:
+        return f"{session_key}|{survey_slug}|{expires_at}".encode("utf-8")
@@ -0,0 +1,220 @@
+"""
+Signal handlers for the surveys app.
+
+Keeps the materialised ResponseAnswerCount aggregates and the denormalised
+Survey.response_count in step with SurveyResponse rows, and recounts a
+question's aggregates when its type or options change (see
+services/answer_aggregates.py and services/response_counts.py), removes stored
+export files along with their DataExport records, and invalidates compiled
+participant form plans when survey content changes (see
+services/form_plan.py) and loaded permission contexts when roles change (see
+permissions.py).
+"""
+
+from functools import partial
+
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from .models import (
+    DataCustodian,
+    DataExport,
+    Organization,
+    OrganizationMembership,
+    QuestionGroup,
+    QuestionImage,
+    Survey,
+    SurveyMembership,
+    SurveyQuestion,
+    SurveyQuestionCondition,
+    SurveyResponse,
+    TeamMembership,
+)
+from .permissions import invalidate_permission_contexts
+from .services.answer_aggregates import (
+    apply_response_change,
+    rebuild_question_aggregates,
+)
+from .services.export_service import ExportService
+from .services.form_plan import bump_content_version
+from .services.response_counts import adjust_response_count, is_reserved
+
+# Fields whose change can alter a response's contribution to the aggregates
+AGGREGATE_FIELDS = {"answers", "is_frozen"}
+# Question fields whose change can alter how its answers are counted
+QUESTION_AGGREGATE_FIELDS = {"type", "options"}
+
+
+@receiver(pre_save, sender=SurveyResponse)
+def snapshot_response_for_aggregates(sender, instance, raw=False, **kwargs):
+    """Remember the stored answers/frozen state before an update."""
+    instance._aggregate_previous = None
+    instance._aggregate_skip = False
+    if raw or instance._state.adding or not instance.pk:
+        return
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and not AGGREGATE_FIELDS & set(update_fields):
+        instance._aggregate_skip = True
+        return
+    instance._aggregate_previous = (
+        SurveyResponse.objects.filter(pk=instance.pk)
+        .values("answers", "is_frozen")
+        .first()
+    )
+
+
+@receiver(post_save, sender=SurveyResponse)
+def update_aggregates_on_response_save(sender, instance, created, raw=False, **kwargs):
+    """Apply the response's change in contribution after create/update/freeze."""
+    if raw or getattr(instance, "_aggregate_skip", False):
+        return
+    previous = getattr(instance, "_aggregate_previous", None)
+    old_answers = (
+        previous["answers"] if previous and not previous["is_frozen"] else None
+    )
+    new_answers = None if instance.is_frozen else instance.answers
+    apply_response_change(instance.survey_id, old_answers, new_answers)
+
+
+def _deleted_with_survey(origin) -> bool:
+    """
+    Whether a response is being deleted because its survey is.
+
+    The survey is the only cascade that deletes responses, so any deletion
+    that did not start from responses removes their survey, and the
+    survey's aggregates and count go with it.
+    """
+    if origin is None:
+        return False
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is not SurveyResponse
+
+
+@receiver(post_delete, sender=SurveyResponse)
+def update_aggregates_on_response_delete(sender, instance, origin=None, **kwargs):
+    """Remove a deleted response's contribution."""
+    if not instance.is_frozen and not _deleted_with_survey(origin):
+        apply_response_change(instance.survey_id, instance.answers, None)
+
+
+@receiver(pre_save, sender=SurveyQuestion)
+def snapshot_question_for_aggregates(sender, instance, raw=False, **kwargs):
+    """Remember the stored type/options before an update."""
+    instance._aggregate_previous = None
+    if raw or instance._state.adding or not instance.pk:
+        return
+    update_fields = kwargs.get("update_fields")
+    if update_fields is not None and not QUESTION_AGGREGATE_FIELDS & set(update_fields):
+        return
+    instance._aggregate_previous = (
+        SurveyQuestion.objects.filter(pk=instance.pk).values("type", "options").first()
+    )
+
+
+@receiver(post_save, sender=SurveyQuestion)
+def rebuild_aggregates_on_question_change(sender, instance, raw=False, **kwargs):
+    """Recount a question's answers once a type or options change commits."""
+    previous = getattr(instance, "_aggregate_previous", None)
+    if raw or previous is None:
+        return
+    if previous == {"type": instance.type, "options": instance.options}:
+        return
+    transaction.on_commit(partial(rebuild_question_aggregates, instance.id))
+
+
+@receiver(post_save, sender=SurveyResponse)
+def count_created_response(sender, instance, created, raw=False, **kwargs):
+    """Count new responses (submissions reserve their place beforehand)."""
+    if created and not raw and not is_reserved(instance):
+        adjust_response_count(instance.survey_id, 1)
+
+
+@receiver(post_delete, sender=SurveyResponse)
+def uncount_deleted_response(sender, instance, origin=None, **kwargs):
+    if not _deleted_with_survey(origin):
+        adjust_response_count(instance.survey_id, -1)
+
+
+@receiver(post_delete, sender=DataExport)
+def delete_export_file(sender, instance, **kwargs):
+    """Delete the stored export file, including on survey deletion cascades."""
+    ExportService.delete_file(instance)
+
+
+@receiver(post_save, sender=SurveyQuestion)
+@receiver(post_delete, sender=SurveyQuestion)
+def invalidate_form_plan_on_question_change(sender, instance, raw=False, **kwargs):
+    if not raw:
+        bump_content_version(instance.survey_id)
+
+
+@receiver(post_save, sender=SurveyQuestionCondition)
+@receiver(post_delete, sender=SurveyQuestionCondition)
+@receiver(post_save, sender=QuestionImage)
+@receiver(post_delete, sender=QuestionImage)
+def invalidate_form_plan_on_question_detail_change(
+    sender, instance, raw=False, **kwargs
+):
+    if raw:
+        return
+    survey_id = (
+        SurveyQuestion.objects.filter(id=instance.question_id)
+        .values_list("survey_id", flat=True)
+        .first()
+    )
+    if survey_id:
+        bump_content_version(survey_id)
+
+
+@receiver(post_save, sender=QuestionGroup)
+def invalidate_form_plan_on_group_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    survey_ids = list(instance.surveys.values_list("id", flat=True))
+    if survey_ids:
+        bump_content_version(*survey_ids)
+
+
+@receiver(pre_delete, sender=QuestionGroup)
+def invalidate_form_plan_on_group_delete(sender, instance, **kwargs):
+    """Deleting a group ungroups its questions with an UPDATE (no signals)."""
+    survey_ids = list(instance.surveys.values_list("id", flat=True))
+    if survey_ids:
+        bump_content_version(*survey_ids)
+
+
+@receiver(m2m_changed, sender=Survey.question_groups.through)
+def invalidate_form_plan_on_groups_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action == "pre_clear" and reverse:
+        # Clearing a group's surveys: find them before the links go
+        survey_ids = list(instance.surveys.values_list("id", flat=True))
+    elif action in {"post_add", "post_remove", "post_clear"}:
+        survey_ids = list(pk_set or []) if reverse else [instance.pk]
+    else:
+        return
+    if survey_ids:
+        bump_content_version(*survey_ids)
+
+
+@receiver(post_save, sender=Organization)
+@receiver(post_delete, sender=Organization)
+@receiver(post_save, sender=OrganizationMembership)
+@receiver(post_delete, sender=OrganizationMembership)
+@receiver(post_save, sender=SurveyMembership)
+@receiver(post_delete, sender=SurveyMembership)
+@receiver(post_save, sender=TeamMembership)
+@receiver(post_delete, sender=TeamMembership)
+@receiver(post_save, sender=DataCustodian)
+@receiver(post_delete, sender=DataCustodian)
+def invalidate_permissions_on_role_change(sender, instance, **kwargs):
+    invalidate_permission_contexts()
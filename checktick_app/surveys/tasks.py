@@ -0,0 +1,293 @@
+"""
+Background task handlers, run by ``manage.py run_worker``.
+
+Each handler is registered with services.task_queue and receives its Task.
+Handlers record their progress in ``task.result`` as they go, so a retried
+or reclaimed task resumes without repeating work it had already done.
+"""
+
+from __future__ import annotations
+
+import logging
+import secrets
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils.dateparse import parse_datetime
+
+from .models import DataExport, Survey, SurveyAccessToken, Task
+from .services.task_queue import TaskError, heartbeat, report_progress, task_handler
+
+logger = logging.getLogger(__name__)
+
+
+@task_handler("send_invites")
+def send_invites(task: Task) -> dict:
+    """
+    Send survey invitation emails.
+
+    Payload: ``emails``, ``visibility``, ``end_at`` (ISO datetime or None),
+    ``contact_email`` and ``include_qr_code``. Invites are sent by
+    ``task.created_by`` for ``task.survey``.
+
+    Invitations go out in batches of ``CHECKTICK_INVITE_BATCH_SIZE``: each
+    batch's tokens are created in one query and its emails sent over one
+    mail connection, and progress is saved once per batch.
+    """
+    from checktick_app.core.email_utils import SurveyInviteSender
+
+    User = get_user_model()
+
+    survey = task.survey
+    user = task.created_by
+    if survey is None or user is None:
+        raise TaskError("Survey or inviting user no longer exists")
+
+    payload = task.payload
+    email_list = payload["emails"]
+    visibility = payload["visibility"]
+    end_at = parse_datetime(payload["end_at"]) if payload.get("end_at") else None
+    batch_size = max(1, getattr(settings, "CHECKTICK_INVITE_BATCH_SIZE", 100))
+
+    # Resume after the last batch a previous attempt got through
+    start = task.result.get("next_index", 0)
+    sent_count = task.result.get("sent_count", 0)
+    failed_emails = list(task.result.get("failed_emails", []))
+    total_emails = len(email_list)
+
+    with SurveyInviteSender(
+        survey,
+        contact_email=payload.get("contact_email"),
+        include_qr_code=payload.get("include_qr_code", True),
+    ) as sender:
+        for batch_start in range(start, total_emails, batch_size):
+            batch = email_list[batch_start : batch_start + batch_size]
+
+            valid_emails = []
+            for email_address in batch:
+                # Validate email format (basic check)
+                if "@" not in email_address or "." not in email_address.split("@")[1]:
+                    failed_emails.append(f"{email_address} (invalid format)")
+                else:
+                    valid_emails.append(email_address)
+
+            if visibility == Survey.Visibility.TOKEN:
+                # Anonymous tokens, one per recipient
+                tokens = SurveyAccessToken.objects.bulk_create(
+                    _invite_tokens(survey, user, end_at, valid_emails, False)
+                )
+                invites = [
+                    (email_address, "token", token.token)
+                    for email_address, token in zip(valid_emails, tokens)
+                ]
+            elif visibility == Survey.Visibility.AUTHENTICATED:
+                SurveyAccessToken.objects.bulk_create(
+                    _invite_tokens(survey, user, end_at, valid_emails, True)
+                )
+                # Existing users sign in; everyone else is asked to sign up
+                existing = set(
+                    User.objects.filter(email__in=valid_emails).values_list(
+                        "email", flat=True
+                    )
+                )
+                invites = [
+                    (
+                        email_address,
+                        "existing_user" if email_address in existing else "new_user",
+                        None,
+                    )
+                    for email_address in valid_emails
+                ]
+            else:
+                invites = []
+
+            failed = sender.send(invites)
+            sent_count += len(invites) - len(failed)
+            failed_emails.extend(failed)
+
+            next_index = batch_start + len(batch)
+            report_progress(
+                task,
+                int(next_index * 100 / total_emails),
+                f"Sent invitations {next_index} of {total_emails}...",
+                next_index=next_index,
+                sent_count=sent_count,
+                failed_count=len(failed_emails),
+                failed_emails=failed_emails,
+            )
+
+    task.message = "All invitations processed"
+    return {"sent_count": sent_count, "failed_emails": failed_emails}
+
+
+def _invite_tokens(survey, user, end_at, emails, for_authenticated):
+    """Build (unsaved) invitation tokens for a batch of recipients."""
+    return [
+        SurveyAccessToken(
+            survey=survey,
+            token=secrets.token_urlsafe(24),
+            created_by=user,
+            expires_at=end_at,
+            note=f"Invited: {email_address}",
+            for_authenticated=for_authenticated,
+            invite_kind=(
+                SurveyAccessToken.InviteKind.AUTHENTICATED
+                if for_authenticated
+                else SurveyAccessToken.InviteKind.EMAIL
+            ),
+            invited_email=SurveyAccessToken.normalize_email(email_address),
+        )
+        for email_address in emails
+    ]
+
+
+@task_handler("create_translation")
+def create_translation(task: Task) -> dict:
+    """
+    Create (or re-translate) a translation of ``task.survey`` with the LLM.
+
+    Payload: ``target_language`` and ``translation_id`` (the existing
+    translation to re-translate, or None to create a new one).
+    """
+    survey = task.survey
+    if survey is None:
+        raise TaskError("Survey no longer exists")
+
+    target_language = task.payload["target_language"]
+    translation_id = task.payload.get("translation_id")
+    # Re-translations keep their survey on failure; new ones are removed
+    is_retranslate = translation_id is not None
+    translation = None
+
+    try:
+        report_progress(
+            task,
+            25,
+            (
+                "Preparing to re-translate..."
+                if is_retranslate
+                else "Creating survey structure..."
+            ),
+        )
+
+        if is_retranslate:
+            translation = Survey.objects.filter(id=translation_id).first()
+            if translation is None:
+                raise TaskError("Translation to re-translate no longer exists")
+            logger.info(
+                f"Re-translating existing survey {translation.slug} for {survey.slug} in {target_language}"
+            )
+        else:
+            translation = survey.create_translation(target_language=target_language)
+            logger.info(
+                f"Created translation survey {translation.slug} for {survey.slug} in {target_language}"
+            )
+
+        # Run LLM translation
+        report_progress(task, 50, "Translating content with AI...")
+        # The LLM call can outlast the stale window; keep the task claimed so
+        # another worker does not create a duplicate translation
+        with heartbeat(task):
+            results = survey.translate_survey_content(translation, use_llm=True)
+        logger.info(
+            f"Translation results for {translation.slug}: {results['translated_fields']} fields, errors: {results['errors']}"
+        )
+
+        if not results["success"]:
+            error_msg = (
+                "; ".join(results["errors"]) if results["errors"] else "Unknown error"
+            )
+            logger.error(f"Translation failed for {translation.slug}: {error_msg}")
+            task.result = {**task.result, "errors": results["errors"]}
+            raise TaskError(f"Translation failed: {error_msg}")
+
+    except Exception:
+        # Only delete the failed translation if it was just created, not if
+        # re-translating; a retry creates it again
+        if translation and not is_retranslate:
+            logger.info(f"Deleting failed translation survey {translation.slug}")
+            try:
+                translation.delete()
+            except Exception as delete_error:
+                logger.error(f"Failed to delete translation survey: {delete_error}")
+        elif translation:
+            logger.info(
+                f"Preserving existing translation survey {translation.slug} after failed re-translate"
+            )
+        raise
+
+    task.message = "Translation completed successfully"
+    return {
+        "translation_slug": translation.slug,
+        "translated_fields": results["translated_fields"],
+        "warnings": results.get("warnings", []),
+    }
+
+
+def _fail_export(task: Task) -> None:
+    """Fail the export of a generate_export task that has failed for good."""
+    from .services import ExportService
+
+    export = DataExport.objects.filter(id=task.payload.get("export_id")).first()
+    if export is not None and export.is_pending:
+        ExportService.fail_export(export, task.error)
+
+
+@task_handler("generate_export", on_failure=_fail_export)
+def generate_export(task: Task) -> dict:
+    """
+    Generate a queued data export with ExportService.run_export.
+
+    Payload: ``export_id``. Each attempt resumes from the export's last
+    checkpoint, so a retried or reclaimed task does not read the responses
+    it has already written out again.
+    """
+    from .services import ExportService
+
+    export = (
+        DataExport.objects.select_related("survey")
+        .filter(id=task.payload["export_id"])
+        .first()
+    )
+    if export is None:
+        raise TaskError("Export no longer exists")
+    if not export.is_pending:
+        return {"status": export.status}
+
+    try:
+        # Checkpoints of a large survey can be further apart than the stale
+        # window, and converting the parts takes a while too
+        with heartbeat(task):
+            ExportService.run_export(export)
+    except ValueError as e:
+        # A missing key, which no later attempt will have either
+        raise TaskError(str(e)) from e
+
+    task.message = "Export ready"
+    return {
+        "response_count": export.response_count,
+        "file_size_bytes": export.file_size_bytes,
+    }
+
+
+@task_handler("lookup_imd")
+def lookup_imd(task: Task) -> dict:
+    """
+    Look up IMD deciles for postcodes and cache them.
+
+    Payload: ``postcodes``. Queued for postcodes that were not cached when a
+    participant entered or submitted them. Lookups that fail (timeouts, API
+    errors) raise so the task is retried with backoff; postcodes cached by an
+    earlier attempt are not looked up again.
+    """
+    from .services.imd_service import IMDService
+
+    if not IMDService.is_configured():
+        raise TaskError("IMD API not configured")
+
+    results = IMDService.lookup_imd_batch(task.payload.get("postcodes", []))
+    failed = sum(1 for result in results.values() if not result.is_cacheable)
+    if failed:
+        # Postcodes are patient data, so only the count is recorded
+        raise RuntimeError(f"IMD lookup failed for {failed} postcode(s)")
+    return {"looked_up": len(results)}
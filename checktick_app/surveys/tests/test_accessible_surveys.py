@@ -0,0 +1,213 @@
+"""Tests for the single-query accessible-surveys resolver."""
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+import pytest
+from rest_framework.test import APIClient
+
+from checktick_app.surveys.models import (
+    Organization,
+    OrganizationMembership,
+    Survey,
+    SurveyMembership,
+    SurveyQuestion,
+    Team,
+    TeamMembership,
+)
+from checktick_app.surveys.services.accessible_surveys import (
+    accessible_surveys,
+    translations_by_survey,
+)
+
+
+@pytest.fixture(autouse=True)
+def disable_rate_limiting(settings):
+    settings.RATELIMIT_ENABLE = False
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create_user(username="member", password="p")
+
+
+@pytest.fixture
+def other(django_user_model):
+    return django_user_model.objects.create_user(username="other", password="p")
+
+
+def make_survey(owner, slug, **kwargs):
+    return Survey.objects.create(owner=owner, name=slug.title(), slug=slug, **kwargs)
+
+
+def add_translation(survey, language):
+    if not survey.translation_group:
+        survey.translation_group = f"group-{survey.slug}"
+        survey.save(update_fields=["translation_group"])
+    return make_survey(
+        survey.owner,
+        f"{survey.slug}-{language}",
+        language=language,
+        translation_group=survey.translation_group,
+        is_original=False,
+    )
+
+
+@pytest.mark.django_db
+def test_each_survey_appears_once_with_its_access_source(user, other):
+    org = Organization.objects.create(name="Org", owner=other)
+    OrganizationMembership.objects.create(
+        organization=org, user=user, role=OrganizationMembership.Role.VIEWER
+    )
+    team = Team.objects.create(name="Team", owner=other)
+    TeamMembership.objects.create(team=team, user=user, role=TeamMembership.Role.ADMIN)
+
+    owned = make_survey(user, "owned", organization=org)
+    team_survey = make_survey(other, "team", team=team, organization=org)
+    org_survey = make_survey(other, "org", organization=org)
+    shared = make_survey(other, "shared")
+    SurveyMembership.objects.create(
+        user=user, survey=shared, role=SurveyMembership.Role.EDITOR
+    )
+    # Shared as well as owned: still listed once, as owned
+    SurveyMembership.objects.create(
+        user=user, survey=owned, role=SurveyMembership.Role.VIEWER
+    )
+    make_survey(other, "private")
+    add_translation(owned, "fr")
+
+    surveys = list(accessible_surveys(user))
+
+    assert [(s.slug, s.access_source, s.access_role) for s in surveys] == [
+        (owned.slug, "owned", "owner"),
+        (team_survey.slug, "team", TeamMembership.Role.ADMIN),
+        (org_survey.slug, "organisation", OrganizationMembership.Role.VIEWER),
+        (shared.slug, "shared", SurveyMembership.Role.EDITOR),
+    ]
+
+
+@pytest.mark.django_db
+def test_org_roles_and_teams_can_be_restricted(user, other):
+    viewer_org = Organization.objects.create(name="Viewed", owner=other)
+    OrganizationMembership.objects.create(
+        organization=viewer_org, user=user, role=OrganizationMembership.Role.VIEWER
+    )
+    admin_org = Organization.objects.create(name="Administered", owner=other)
+    OrganizationMembership.objects.create(
+        organization=admin_org, user=user, role=OrganizationMembership.Role.ADMIN
+    )
+    team = Team.objects.create(name="Team", owner=other)
+    TeamMembership.objects.create(team=team, user=user)
+
+    make_survey(other, "viewed", organization=viewer_org)
+    administered = make_survey(other, "administered", organization=admin_org)
+    make_survey(other, "team", team=team)
+
+    surveys = accessible_surveys(
+        user,
+        org_roles=[OrganizationMembership.Role.ADMIN],
+        include_teams=False,
+    )
+
+    assert [s.slug for s in surveys] == [administered.slug]
+
+
+@pytest.mark.django_db
+def test_translations_are_loaded_in_one_query(user):
+    surveys = [make_survey(user, f"survey-{i}") for i in range(3)]
+    french = add_translation(surveys[0], "fr")
+    welsh = add_translation(surveys[0], "cy")
+
+    with CaptureQueriesContext(connection) as ctx:
+        translations = translations_by_survey(accessible_surveys(user))
+
+    assert len(ctx.captured_queries) == 2
+    assert {t.id for t in translations[surveys[0].id]} == {french.id, welsh.id}
+    assert translations[surveys[1].id] == []
+
+
+def _list_queries(client):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(reverse("surveys:list"))
+    assert response.status_code == 200
+    return len(ctx.captured_queries)
+
+
+@pytest.mark.django_db
+def test_survey_list_queries_do_not_grow_with_the_organisation(client, user, other):
+    org = Organization.objects.create(name="Org", owner=other)
+    OrganizationMembership.objects.create(
+        organization=org, user=user, role=OrganizationMembership.Role.CREATOR
+    )
+    team = Team.objects.create(name="Team", owner=other, organization=org)
+    TeamMembership.objects.create(team=team, user=user)
+    client.force_login(user)
+
+    for i in range(2):
+        add_translation(make_survey(other, f"org-{i}", organization=org), "fr")
+    make_survey(other, "team-0", team=team, organization=org)
+    # Warm the branding cache and session flags so both runs start alike
+    _list_queries(client)
+    small = _list_queries(client)
+
+    for i in range(2, 30):
+        survey = make_survey(other, f"org-{i}", organization=org)
+        add_translation(survey, "fr")
+        SurveyQuestion.objects.create(
+            survey=survey, text="Q", type=SurveyQuestion.Types.TEXT, order=0
+        )
+        make_survey(other, f"team-{i}", team=team, organization=org)
+        shared = make_survey(other, f"shared-{i}")
+        SurveyMembership.objects.create(user=user, survey=shared)
+    # The new memberships invalidate the session flags; warm them again
+    _list_queries(client)
+    large = _list_queries(client)
+
+    assert large == small
+
+
+@pytest.mark.django_db
+def test_survey_list_is_paginated(client, user):
+    for i in range(55):
+        make_survey(user, f"survey-{i:02d}")
+    client.force_login(user)
+
+    first = client.get(reverse("surveys:list"))
+    second = client.get(reverse("surveys:list"), {"page": 2})
+
+    assert len(first.context["page_obj"]) == 50
+    assert len(second.context["page_obj"]) == 5
+    assert {s.slug for s in second.context["page_obj"]} == {
+        f"survey-{i:02d}" for i in range(50, 55)
+    }
+
+
+@pytest.mark.django_db
+def test_api_list_keeps_its_access_rules(user, other):
+    org = Organization.objects.create(name="Org", owner=other)
+    OrganizationMembership.objects.create(
+        organization=org, user=user, role=OrganizationMembership.Role.ADMIN
+    )
+    viewer_org = Organization.objects.create(name="Viewed", owner=other)
+    OrganizationMembership.objects.create(
+        organization=viewer_org, user=user, role=OrganizationMembership.Role.VIEWER
+    )
+    owned = make_survey(user, "owned")
+    translation = add_translation(owned, "fr")
+    administered = make_survey(other, "administered", organization=org)
+    shared = make_survey(other, "shared")
+    SurveyMembership.objects.create(user=user, survey=shared)
+    make_survey(other, "viewed", organization=viewer_org)
+    make_survey(other, "private")
+
+    client = APIClient()
+    client.force_authenticate(user)
+    response = client.get("/api/surveys/")
+
+    assert response.status_code == 200
+    assert {s["id"] for s in response.data} == {
+        owned.id,
+        translation.id,
+        administered.id,
+        shared.id,
+    }
@@ -0,0 +1,153 @@
+"""Tests for the single-pass analytics engine."""
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+import pytest
+
+from checktick_app.surveys.models import (
+    QuestionGroup,
+    Survey,
+    SurveyQuestion,
+    SurveyResponse,
+)
+from checktick_app.surveys.services.analytics_engine import build_answer_matrix
+from checktick_app.surveys.services.response_analytics import compute_response_analytics
+
+TEST_PASSWORD = "x"  # noqa: S105
+
+
+class TestBuildAnswerMatrix:
+    def test_counts_every_question_in_one_pass(self):
+        rows = [
+            {"1": "Red", "2": ["a", "b"], "3": "yes"},
+            {"1": "Blue", "2": ["a"], "3": "TRUE"},
+            {"1": "Red", "3": "no"},
+            {"1": "", "2": None},
+            None,
+        ]
+
+        matrix = build_answer_matrix(
+            iter(rows), {1: "mc_single", 2: "mc_multi", 3: "yesno"}, chunk_size=2
+        )
+
+        assert matrix.response_count == 5
+        colour, tags, agree = (matrix.columns[q] for q in (1, 2, 3))
+        assert colour.answered == 3
+        assert colour.option_counts() == {"Red": 2, "Blue": 1}
+        assert tags.answered == 2
+        assert tags.option_counts() == {"a": 2, "b": 1}
+        assert agree.option_counts() == {"Yes": 2, "No": 1}
+
+    def test_ties_keep_first_seen_order(self):
+        rows = [{"1": "Blue"}, {"1": "Red"}, {"1": "Red"}, {"1": "Blue"}]
+
+        matrix = build_answer_matrix(rows, {1: "dropdown"})
+
+        assert list(matrix.columns[1].option_counts().most_common()) == [
+            ("Blue", 2),
+            ("Red", 2),
+        ]
+
+    def test_unexpected_shapes_are_counted_by_string_form(self):
+        rows = [
+            {"1": ["odd"], "2": "single"},
+            {"1": "Red", "2": [{"nested": True}]},
+        ]
+
+        matrix = build_answer_matrix(rows, {1: "mc_single", 2: "mc_multi"})
+
+        assert matrix.columns[1].option_counts() == {"['odd']": 1, "Red": 1}
+        assert matrix.columns[2].answered == 2
+        assert matrix.columns[2].option_counts() == {
+            "single": 1,
+            "{'nested': True}": 1,
+        }
+
+
+@pytest.mark.django_db
+def test_filtered_analytics_reads_responses_once():
+    from django.contrib.auth import get_user_model
+
+    user = get_user_model().objects.create_user(
+        username="engineuser", password=TEST_PASSWORD
+    )
+    survey = Survey.objects.create(name="Engine", slug="engine", owner=user)
+    group = QuestionGroup.objects.create(name="Group", owner=user)
+    survey.question_groups.add(group)
+    questions = [
+        SurveyQuestion.objects.create(
+            survey=survey,
+            group=group,
+            text=f"Question {i}",
+            type="mc_single",
+            options={"choices": ["A", "B"]},
+            order=i,
+        )
+        for i in range(5)
+    ]
+    for choice in ("A", "B", "A"):
+        SurveyResponse.objects.create(
+            survey=survey, answers={str(q.id): choice for q in questions}
+        )
+
+    with CaptureQueriesContext(connection) as ctx:
+        analytics = compute_response_analytics(survey, responses=survey.responses.all())
+
+    response_queries = [
+        q for q in ctx.captured_queries if "surveys_surveyresponse" in q["sql"]
+    ]
+    assert len(response_queries) == 1
+    assert analytics.total_responses == 3
+    assert len(analytics.distributions) == 5
+    assert analytics.distributions[0].options[0] == {
+        "label": "A",
+        "count": 2,
+        "percent": 66.7,
+    }
+
+
+@pytest.mark.django_db
+def test_benchmark_command_enforces_budget():
+    from django.core.management.base import CommandError
+
+    call_command(
+        "benchmark_response_analytics", "--questions", "5", "--responses", "50"
+    )
+    assert not Survey.objects.exists()
+    with pytest.raises(CommandError):
+        call_command(
+            "benchmark_response_analytics",
+            "--questions",
+            "5",
+            "--responses",
+            "50",
+            "--scan-budget",
+            "0",
+        )
+
+
+def test_benchmark_command_memory_source_enforces_budget():
+    from django.core.management.base import CommandError
+
+    call_command(
+        "benchmark_response_analytics",
+        "--source",
+        "memory",
+        "--questions",
+        "5",
+        "--responses",
+        "50",
+    )
+    with pytest.raises(CommandError):
+        call_command(
+            "benchmark_response_analytics",
+            "--source",
+            "memory",
+            "--questions",
+            "5",
+            "--responses",
+            "50",
+            "--budget",
+            "0",
+        )
@@ -0,0 +1,242 @@
+"""Tests for materialised answer-distribution aggregates."""
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+import pytest
+
+from checktick_app.surveys.models import (
+    QuestionGroup,
+    ResponseAnswerCount,
+    Survey,
+    SurveyQuestion,
+    SurveyResponse,
+)
+from checktick_app.surveys.services.answer_aggregates import delete_responses
+from checktick_app.surveys.services.response_analytics import compute_response_analytics
+
+TEST_PASSWORD = "x"  # noqa: S105
+
+
+@pytest.fixture
+def survey(db):
+    from django.contrib.auth import get_user_model
+
+    user = get_user_model().objects.create_user(
+        username="aggregateuser", password=TEST_PASSWORD
+    )
+    survey = Survey.objects.create(name="Aggregates", slug="aggregates", owner=user)
+    group = QuestionGroup.objects.create(name="Group", owner=user)
+    survey.question_groups.add(group)
+    return survey
+
+
+def _question(survey, qtype, text, choices=None, order=0):
+    return SurveyQuestion.objects.create(
+        survey=survey,
+        group=survey.question_groups.first(),
+        text=text,
+        type=qtype,
+        options={"choices": choices} if choices else {},
+        order=order,
+    )
+
+
+def _counts(survey):
+    return {
+        (row.question_id, row.option): row.count
+        for row in ResponseAnswerCount.objects.filter(survey=survey)
+        if row.count
+    }
+
+
+@pytest.mark.django_db
+class TestIncrementalAggregates:
+    def test_create_update_and_delete(self, survey):
+        colour = _question(survey, "mc_single", "Colour?", ["Red", "Blue"])
+        ANSWERED = ResponseAnswerCount.ANSWERED
+
+        first = SurveyResponse.objects.create(
+            survey=survey, answers={str(colour.id): "Red"}
+        )
+        SurveyResponse.objects.create(survey=survey, answers={str(colour.id): "Red"})
+        assert _counts(survey) == {(colour.id, ANSWERED): 2, (colour.id, "Red"): 2}
+
+        first.answers = {str(colour.id): "Blue"}
+        first.save()
+        assert _counts(survey) == {
+            (colour.id, ANSWERED): 2,
+            (colour.id, "Red"): 1,
+            (colour.id, "Blue"): 1,
+        }
+
+        first.delete()
+        assert _counts(survey) == {(colour.id, ANSWERED): 1, (colour.id, "Red"): 1}
+
+    def test_freeze_and_unfreeze(self, survey):
+        agree = _question(survey, "yesno", "Agree?")
+        response = SurveyResponse.objects.create(
+            survey=survey, answers={str(agree.id): "yes"}
+        )
+        assert _counts(survey)[(agree.id, "Yes")] == 1
+
+        response.is_frozen = True
+        response.save(update_fields=["is_frozen"])
+        assert _counts(survey) == {}
+
+        response.is_frozen = False
+        response.save(update_fields=["is_frozen"])
+        assert _counts(survey)[(agree.id, "Yes")] == 1
+
+    def test_unrelated_update_fields_skip_aggregates(self, survey):
+        agree = _question(survey, "yesno", "Agree?")
+        response = SurveyResponse.objects.create(
+            survey=survey, answers={str(agree.id): "no"}
+        )
+
+        with CaptureQueriesContext(connection) as ctx:
+            response.save(update_fields=["submitted_at"])
+
+        assert len(ctx.captured_queries) == 1
+        assert _counts(survey)[(agree.id, "No")] == 1
+
+    def test_hard_delete_removes_aggregates(self, survey):
+        agree = _question(survey, "yesno", "Agree?")
+        SurveyResponse.objects.create(survey=survey, answers={str(agree.id): "yes"})
+
+        survey.hard_delete()
+
+        assert not ResponseAnswerCount.objects.exists()
+
+    def test_bulk_delete_rebuilds_instead_of_applying_deltas(self, survey):
+        agree = _question(survey, "yesno", "Agree?")
+        responses = [
+            SurveyResponse.objects.create(
+                survey=survey, answers={str(agree.id): answer}
+            )
+            for answer in ["yes", "yes", "no", "no", "no"]
+        ]
+
+        with CaptureQueriesContext(connection) as ctx:
+            deleted = delete_responses(
+                SurveyResponse.objects.filter(id__in=[r.id for r in responses[2:]])
+            )
+
+        assert deleted == 3
+        assert _counts(survey) == {
+            (agree.id, ResponseAnswerCount.ANSWERED): 2,
+            (agree.id, "Yes"): 2,
+        }
+        table = ResponseAnswerCount._meta.db_table
+        assert not [
+            q for q in ctx.captured_queries if q["sql"].startswith(f'UPDATE "{table}"')
+        ]
+
+    def test_deleting_survey_skips_per_response_updates(self, survey):
+        agree = _question(survey, "yesno", "Agree?")
+        for _ in range(5):
+            SurveyResponse.objects.create(survey=survey, answers={str(agree.id): "yes"})
+
+        # Deleting the owner cascades to the survey as well
+        with CaptureQueriesContext(connection) as ctx:
+            survey.owner.delete()
+
+        assert not Survey.objects.filter(id=survey.id).exists()
+        assert not ResponseAnswerCount.objects.exists()
+        table = ResponseAnswerCount._meta.db_table
+        assert not [
+            q for q in ctx.captured_queries if q["sql"].startswith(f'UPDATE "{table}"')
+        ]
+
+
+@pytest.mark.django_db
+class TestAnalyticsFromAggregates:
+    def test_matches_scanning_path(self, survey):
+        colour = _question(survey, "mc_single", "Colour?", ["Red", "Blue"])
+        tags = _question(survey, "mc_multi", "Tags?", ["a", "b", "c"], order=1)
+        for answers in (
+            {str(colour.id): "Blue", str(tags.id): ["a", "b"]},
+            {str(colour.id): "Red", str(tags.id): ["a"]},
+            {str(colour.id): "Blue"},
+        ):
+            SurveyResponse.objects.create(survey=survey, answers=answers)
+
+        from_aggregates = compute_response_analytics(survey)
+        scanned = compute_response_analytics(
+            survey, responses=survey.responses.filter(is_frozen=False)
+        )
+
+        assert from_aggregates == scanned
+        colour_dist = from_aggregates.distributions[0]
+        assert [o["label"] for o in colour_dist.options] == ["Red", "Blue"]
+        assert colour_dist.options[1]["count"] == 2
+
+    def test_query_count_independent_of_response_count(self, survey):
+        colour = _question(survey, "mc_single", "Colour?", ["Red", "Blue"])
+        SurveyResponse.objects.create(survey=survey, answers={str(colour.id): "Red"})
+
+        with CaptureQueriesContext(connection) as few:
+            compute_response_analytics(survey)
+
+        for _ in range(20):
+            SurveyResponse.objects.create(
+                survey=survey, answers={str(colour.id): "Blue"}
+            )
+
+        with CaptureQueriesContext(connection) as many:
+            analytics = compute_response_analytics(survey)
+
+        assert len(many.captured_queries) == len(few.captured_queries)
+        assert analytics.total_responses == 21
+
+
+@pytest.mark.django_db
+def test_rebuild_command_restores_counts(survey):
+    colour = _question(survey, "mc_single", "Colour?", ["Red", "Blue"])
+    SurveyResponse.objects.create(survey=survey, answers={str(colour.id): "Red"})
+    # queryset.update() bypasses the signal handlers
+    SurveyResponse.objects.filter(survey=survey).update(
+        answers={str(colour.id): "Blue"}
+    )
+    expected = {
+        (colour.id, ResponseAnswerCount.ANSWERED): 1,
+        (colour.id, "Blue"): 1,
+    }
+    assert _counts(survey) != expected
+
+    call_command("rebuild_answer_aggregates", "--survey", survey.slug)
+
+    assert _counts(survey) == expected
+
+
+@pytest.mark.django_db
+def test_question_type_change_recounts_its_answers(
+    survey, django_capture_on_commit_callbacks
+):
+    ANSWERED = ResponseAnswerCount.ANSWERED
+    question = _question(survey, "text", "Agree?")
+    colour = _question(survey, "mc_single", "Colour?", ["Red", "Blue"], order=1)
+    response = SurveyResponse.objects.create(
+        survey=survey, answers={str(question.id): "yes", str(colour.id): "Red"}
+    )
+    assert (question.id, ANSWERED) not in _counts(survey)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        question.type = "yesno"
+        question.save()
+    assert _counts(survey) == {
+        (question.id, ANSWERED): 1,
+        (question.id, "Yes"): 1,
+        (colour.id, ANSWERED): 1,
+        (colour.id, "Red"): 1,
+    }
+
+    # Later deltas match the rebuilt counts
+    response.delete()
+    assert _counts(survey) == {}
+
+    SurveyResponse.objects.create(survey=survey, answers={str(question.id): "no"})
+    with django_capture_on_commit_callbacks(execute=True):
+        question.type = "text"
+        question.save()
+    assert _counts(survey) == {}
@@ -0,0 +1,216 @@
+"""Tests for the compiled branching program."""
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+import pytest
+
+from checktick_app.surveys.branching import (
+    CompiledCondition,
+    compile_branching,
+    get_visible_questions,
+)
+from checktick_app.surveys.models import (
+    Survey,
+    SurveyQuestion,
+    SurveyQuestionCondition,
+    SurveyResponse,
+)
+
+Operator = SurveyQuestionCondition.Operator
+Action = SurveyQuestionCondition.Action
+
+
+@pytest.fixture(autouse=True)
+def disable_rate_limiting(settings):
+    settings.RATELIMIT_ENABLE = False
+
+
+@pytest.fixture
+def survey(django_user_model):
+    owner = django_user_model.objects.create_user(username="owner", password="p")
+    survey = Survey.objects.create(
+        owner=owner,
+        name="S",
+        slug="s",
+        status=Survey.Status.PUBLISHED,
+        visibility=Survey.Visibility.PUBLIC,
+    )
+    for i in range(6):
+        SurveyQuestion.objects.create(
+            survey=survey, text=f"Q{i}", type=SurveyQuestion.Types.TEXT, order=i
+        )
+    return survey
+
+
+def condition(question, operator, value, action, target=None, order=0):
+    return SurveyQuestionCondition.objects.create(
+        question=question,
+        operator=operator,
+        value=value,
+        action=action,
+        target_question=target,
+        order=order,
+    )
+
+
+def visible(program, questions, **answers):
+    ids, ended = program.evaluate(
+        {str(questions[int(k[1:])].id): v for k, v in answers.items()}
+    )
+    return [program.index[q_id] for q_id in ids], ended
+
+
+@pytest.mark.django_db
+def test_program_applies_each_action(survey):
+    q = list(survey.questions.all())
+    condition(q[0], Operator.EQUALS, "skip", Action.SKIP, q[1])
+    condition(q[0], Operator.EQUALS, " JUMP ", Action.JUMP_TO, q[4], order=1)
+    condition(q[1], Operator.GREATER_THAN, "10", Action.END_SURVEY)
+    condition(q[2], Operator.EXISTS, "", Action.SHOW, q[3])
+
+    program = compile_branching(survey.questions.prefetch_related("conditions"))
+
+    # q3 is hidden until its SHOW condition is met
+    assert visible(program, q) == ([0, 1, 2, 4, 5], False)
+    assert visible(program, q, q2="x") == ([0, 1, 2, 3, 4, 5], False)
+    assert visible(program, q, q0="Skip") == ([0, 2, 4, 5], False)
+    assert visible(program, q, q0="jump", q2="x") == ([0, 4, 5], False)
+    # The question that ends the survey stays visible; numbers compare as numbers
+    assert visible(program, q, q1="9.5") == ([0, 1, 2, 4, 5], False)
+    assert visible(program, q, q1="11") == ([0, 1], True)
+    assert visible(program, q, q1="eleven") == ([0, 1, 2, 4, 5], False)
+
+
+@pytest.mark.django_db
+def test_first_matching_condition_wins_in_order(survey):
+    q = list(survey.questions.all())
+    condition(q[0], Operator.CONTAINS, "b", Action.SKIP, q[2], order=2)
+    condition(q[0], Operator.CONTAINS, "a", Action.SKIP, q[1], order=1)
+
+    program = compile_branching(survey.questions.prefetch_related("conditions"))
+
+    assert visible(program, q, q0=["a", "b"])[0] == [0, 2, 3, 4, 5]
+
+
+@pytest.mark.django_db
+def test_compiles_with_prefetched_conditions_in_one_query(survey):
+    q = list(survey.questions.all())
+    for i in range(5):
+        condition(q[i], Operator.EQUALS, "x", Action.SHOW, q[i + 1])
+
+    with CaptureQueriesContext(connection) as ctx:
+        questions = list(survey.questions.prefetch_related("conditions"))
+        program = compile_branching(questions)
+        visible_questions, _ = get_visible_questions(questions, {str(q[0].id): "x"})
+    assert len(ctx) == 2
+
+    assert [v.id for v in visible_questions] == [q[0].id, q[1].id]
+    config = program.to_config()
+    assert config["show_conditions"][str(q[1].id)] == [
+        {"source_question": str(q[0].id), "operator": "eq", "value": "x"}
+    ]
+    assert config["conditions"][str(q[0].id)][0]["target_question"] == str(q[1].id)
+
+
+# Expected results are those of evaluateCondition in static/js/branching.js
+@pytest.mark.parametrize(
+    "operator,value,answer,expected",
+    [
+        ("gt", "18", "20 years", True),
+        ("gt", "18", "  21", True),
+        ("gte", "20", "20.0abc", True),
+        ("lt", "10", "abc", False),
+        ("lt", "10", ".5", True),
+        ("lte", "1e2", "100", True),
+        ("gt", "0", "-.5", False),
+        ("gt", "5", "1e1x", True),
+        ("gt", "5", "1e", False),
+        ("gt", "abc", "10", False),
+        ("gt", " 5 ", "6", True),
+        ("lt", "Infinity", "1e308", True),
+        ("gt", "5", "Infinity", True),
+        ("gt", "5", "NaN", False),
+        ("gt", "5", "0x10", False),
+        ("gt", "5", "1_000", False),
+        ("gte", "3", ["3", "4"], True),
+        ("lt", "2", ["1", "9"], True),
+        ("gt", "5", " ", False),
+        ("contains", " yes ", "Oh yes indeed", True),
+        ("contains", "Yes", "YES", True),
+        ("not_contains", " no", "nothing", False),
+        ("not_contains", "x", "abc", True),
+        ("eq", " Yes ", "yes  ", True),
+        ("neq", "a", "A", False),
+        ("contains", "b", ["a", "b"], True),
+        ("eq", "a,b", ["a", "b"], True),
+        ("exists", "", "", False),
+        ("exists", "", " ", True),
+        ("not_exists", "", [], True),
+        ("eq", "", "x", False),
+        ("contains", "", "x", True),
+        ("gt", "1", "+2", True),
+        ("gt", "1", "++2", False),
+        ("lt", "1", "-", False),
+    ],
+)
+def test_conditions_match_the_browser(operator, value, answer, expected):
+    condition = SurveyQuestionCondition(
+        operator=operator, value=value, action=Action.SHOW
+    )
+    assert CompiledCondition.compile(condition).matches(answer) is expected
+
+
+@pytest.mark.django_db
+def test_submission_drops_answers_to_hidden_questions(client, survey):
+    q = list(survey.questions.all())
+    condition(q[0], Operator.EQUALS, "no", Action.JUMP_TO, q[3])
+
+    client.post(
+        reverse("surveys:take", kwargs={"slug": survey.slug}),
+        {f"q_{q[0].id}": "no", f"q_{q[1].id}": "stale", f"q_{q[3].id}": "kept"},
+    )
+
+    answers = SurveyResponse.objects.get().answers
+    assert answers[str(q[0].id)] == "no"
+    assert str(q[1].id) not in answers
+    assert answers[str(q[3].id)] == "kept"
+
+
+@pytest.mark.django_db
+def test_submission_keeps_answers_shown_by_a_numeric_prefix(client, survey):
+    q = list(survey.questions.all())
+    condition(q[0], Operator.GREATER_THAN, "18", Action.SHOW, q[1])
+
+    client.post(
+        reverse("surveys:take", kwargs={"slug": survey.slug}),
+        {f"q_{q[0].id}": "20 years", f"q_{q[1].id}": "shown"},
+    )
+
+    # The browser reads "20 years" as 20 and shows the question
+    assert SurveyResponse.objects.get().answers[str(q[1].id)] == "shown"
+
+@pytest.mark.django_db
+def test_submission_keeps_answers_when_the_cached_plan_is_stale(
+    client, survey, monkeypatch
+):
+    from checktick_app.surveys import views
+    from checktick_app.surveys.services.form_plan import compile_form_plan
+
+    # A plan compiled, and cached by another process, before the edit below
+    stale = compile_form_plan(survey)
+    monkeypatch.setattr(views, "get_form_plan", lambda s: stale)
+    q = list(survey.questions.all())
+    condition(q[0], Operator.EQUALS, "no", Action.SKIP, q[1])
+    added = SurveyQuestion.objects.create(
+        survey=survey, text="New", type=SurveyQuestion.Types.TEXT, order=6
+    )
+
+    client.post(
+        reverse("surveys:take", kwargs={"slug": survey.slug}),
+        {f"q_{q[0].id}": "no", f"q_{q[1].id}": "stale", f"q_{added.id}": "new"},
+    )
+
+    answers = SurveyResponse.objects.get().answers
+    assert answers[str(added.id)] == "new"
+    assert str(q[1].id) not in answers
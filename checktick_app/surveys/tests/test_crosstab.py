@@ -0,0 +1,252 @@
+"""Tests for cross-tabulation and filtered insights."""
+
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+import pytest
+
+from checktick_app.surveys.models import (
+    QuestionGroup,
+    Survey,
+    SurveyQuestion,
+    SurveyResponse,
+)
+from checktick_app.surveys.services.crosstab import (
+    AnswerFilter,
+    InsightsQuery,
+    compute_insights,
+)
+
+TEST_PASSWORD = "x"  # noqa: S105
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def user(db):
+    from django.contrib.auth import get_user_model
+
+    return get_user_model().objects.create_user(
+        username="crosstabuser", password=TEST_PASSWORD
+    )
+
+
+@pytest.fixture
+def survey(user):
+    survey = Survey.objects.create(name="Crosstab", slug="crosstab", owner=user)
+    group = QuestionGroup.objects.create(name="Group", owner=user)
+    survey.question_groups.add(group)
+    return survey
+
+
+@pytest.fixture
+def questions(survey):
+    group = survey.question_groups.first()
+    smoker = SurveyQuestion.objects.create(
+        survey=survey, group=group, text="Smoker?", type="yesno", order=0
+    )
+    rating = SurveyQuestion.objects.create(
+        survey=survey,
+        group=group,
+        text="Rating",
+        type="likert",
+        options={"choices": ["Poor", "Fair", "Good"]},
+        order=1,
+    )
+    age = SurveyQuestion.objects.create(
+        survey=survey, group=group, text="Age", type="text", order=2
+    )
+    for smokes, score, years in (
+        ("yes", "Good", "30"),
+        ("yes", "Poor", "70"),
+        ("no", "Good", "45"),
+        ("no", "Good", "20"),
+        ("no", "Fair", "65"),
+    ):
+        SurveyResponse.objects.create(
+            survey=survey,
+            answers={
+                str(smoker.id): smokes,
+                str(rating.id): score,
+                str(age.id): years,
+            },
+        )
+    return smoker, rating, age
+
+
+class TestInsightsQuery:
+    def test_parses_filters_dates_and_crosstab(self):
+        query = InsightsQuery.from_params(
+            {
+                "filter": ["3:gte:60", "4:exists"],
+                "since": "2025-03-01",
+                "until": "2025-03-31",
+                "row": "1",
+                "column": "2",
+            }
+        )
+
+        assert [f.as_dict() for f in query.filters] == [
+            {"question_id": 3, "operator": "gte", "value": "60"},
+            {"question_id": 4, "operator": "exists", "value": ""},
+        ]
+        assert query.since.isoformat().startswith("2025-03-01T00:00:00")
+        # A bare until date includes the whole day
+        assert query.until.isoformat().startswith("2025-04-01T00:00:00")
+        assert (query.row_question_id, query.column_question_id) == (1, 2)
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {"filter": "nope"},
+            {"filter": "1:between:3"},
+            {"since": "last tuesday"},
+            {"row": "1"},
+            {"row": "x", "column": "2"},
+        ],
+    )
+    def test_invalid_params_raise_value_error(self, params):
+        with pytest.raises(ValueError):
+            InsightsQuery.from_params(params)
+
+    def test_filter_uses_branching_semantics(self):
+        contains = AnswerFilter(1, "contains", "b")
+        assert contains.matches({"1": ["a", "B"]})
+        assert not AnswerFilter(1, "gt", "5").matches({"1": "abc"})
+        assert AnswerFilter(1, "not_exists").matches({"1": []})
+
+
+@pytest.mark.django_db
+class TestComputeInsights:
+    def test_crosstab_orders_labels_and_totals(self, survey, questions):
+        smoker, rating, _ = questions
+
+        insights = compute_insights(
+            survey,
+            InsightsQuery(row_question_id=smoker.id, column_question_id=rating.id),
+        )
+
+        table = insights.crosstab
+        assert table.row_labels == ["No", "Yes"]
+        assert table.column_labels == ["Poor", "Fair", "Good"]
+        assert table.counts == [[0, 1, 2], [1, 0, 1]]
+        assert table.row_totals == [3, 2]
+        assert table.column_totals == [1, 1, 3]
+        assert table.total == 5
+        assert insights.total_responses == 5
+
+    def test_filters_and_date_range_restrict_distributions(self, survey, questions):
+        smoker, rating, age = questions
+        old = SurveyResponse.objects.create(
+            survey=survey, answers={str(smoker.id): "yes", str(age.id): "80"}
+        )
+        old.submitted_at = timezone.now() - timedelta(days=30)
+        old.save(update_fields=["submitted_at"])
+
+        insights = compute_insights(
+            survey,
+            InsightsQuery(
+                filters=[AnswerFilter(age.id, "gte", "60")],
+                since=timezone.now() - timedelta(days=7),
+            ),
+        )
+
+        assert insights.total_responses == 2
+        smoker_dist = insights.distributions[0]
+        assert {o["label"]: o["count"] for o in smoker_dist.options} == {
+            "Yes": 1,
+            "No": 1,
+        }
+
+    def test_rejects_questions_from_other_surveys_and_text_crosstabs(
+        self, survey, questions
+    ):
+        smoker, _, age = questions
+        with pytest.raises(ValueError):
+            compute_insights(
+                survey, InsightsQuery(filters=[AnswerFilter(999999, "exists")])
+            )
+        with pytest.raises(ValueError):
+            compute_insights(
+                survey,
+                InsightsQuery(row_question_id=smoker.id, column_question_id=age.id),
+            )
+
+    def test_cached_until_new_response(self, survey, questions):
+        smoker, rating, _ = questions
+        query = InsightsQuery(row_question_id=smoker.id, column_question_id=rating.id)
+        compute_insights(survey, query)
+
+        with CaptureQueriesContext(connection) as ctx:
+            cached = compute_insights(survey, query)
+        assert not any(
+            "answers" in q["sql"] and "SELECT" in q["sql"]
+            for q in ctx.captured_queries
+            if "MAX" not in q["sql"].upper()
+        )
+        assert cached.crosstab.total == 5
+
+        SurveyResponse.objects.create(
+            survey=survey, answers={str(smoker.id): "no", str(rating.id): "Poor"}
+        )
+        assert compute_insights(survey, query).crosstab.total == 6
+
+
+@pytest.mark.django_db
+def test_insights_api(survey, questions, user):
+    from rest_framework.test import APIClient
+
+    smoker, rating, age = questions
+    client = APIClient()
+    client.force_authenticate(user)
+    url = f"/api/surveys/{survey.id}/insights/"
+
+    resp = client.get(
+        url,
+        {"row": smoker.id, "column": rating.id, "filter": f"{age.id}:lt:50"},
+    )
+    assert resp.status_code == 200
+    assert resp.data["total_responses"] == 3
+    assert resp.data["crosstab"]["counts"] == [[0, 0, 2], [0, 0, 1]]
+
+    assert client.get(url, {"filter": "1:between:2"}).status_code == 400
+
+    from django.contrib.auth import get_user_model
+
+    outsider = get_user_model().objects.create_user(
+        username="outsider", password=TEST_PASSWORD
+    )
+    client.force_authenticate(outsider)
+    assert client.get(url).status_code in (403, 404)
+
+
+@pytest.mark.django_db
+def test_insights_page_adds_filters_from_form(survey, questions):
+    smoker, rating, age = questions
+    client = Client()
+    client.login(username="crosstabuser", password=TEST_PASSWORD)
+
+    resp = client.get(
+        f"/surveys/{survey.slug}/insights/",
+        {
+            "row": smoker.id,
+            "column": rating.id,
+            "filter_question": age.id,
+            "filter_operator": "gte",
+            "filter_value": "60",
+        },
+    )
+
+    assert resp.status_code == 200
+    assert resp.context["filters"] == [f"{age.id}:gte:60"]
+    assert resp.context["insights"].crosstab.total == 2
+    assert b"Poor" in resp.content
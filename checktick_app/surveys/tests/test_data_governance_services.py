@@ -5,13 +5,21 @@ Tests for data governance services: ExportService and RetentionService.
 from __future__ import annotations
 
 from datetime import timedelta
+from io import StringIO
+import json
 from unittest.mock import patch
+import uuid
 
 from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 import pytest
 
 from checktick_app.surveys.models import (
+    DataExport,
     DataRetentionExtension,
     LegalHold,
     Organization,
@@ -19,12 +27,21 @@ from checktick_app.surveys.models import (
     Survey,
     SurveyQuestion,
     SurveyResponse,
+    Task,
 )
 from checktick_app.surveys.services import ExportService, RetentionService
+from checktick_app.surveys.services.task_queue import claim_next_task, run_task
+from checktick_app.surveys.utils import decrypt_stream
 
 TEST_PASSWORD = "x"
 
 
+@pytest.fixture
+def export_storage(tmp_path):
+    """Directory the export files are written to (see conftest.py)."""
+    return tmp_path / "exports"
+
+
 @pytest.fixture
 def user(db):
     return User.objects.create_user(username="testuser", password=TEST_PASSWORD)
@@ -232,6 +249,353 @@ class TestExportService:
         assert export.downloaded_at is not None
         assert export.download_count == 1
 
+    def test_create_export_stores_csv_file(self, survey_with_responses, user):
+        """The generated CSV is stored once and its size recorded."""
+        export = ExportService.create_export(survey_with_responses, user)
+
+        with ExportService.open_file(export) as f:
+            content = f.read()
+
+        assert export.file_size_bytes == len(content)
+        assert export.file_path.endswith(f"{export.id}.csv")
+        assert content.decode("utf-8").startswith("Response ID,Submitted At")
+
+    def test_create_export_with_password_stores_encrypted_file(
+        self, survey_with_responses, user
+    ):
+        """Password-protected exports are stored encrypted and decrypt to the CSV."""
+        export = ExportService.create_export(
+            survey_with_responses, user, password="export-pass"
+        )
+
+        with ExportService.open_file(export) as f:
+            decrypted = b"".join(decrypt_stream(b"export-pass", f))
+
+        assert export.file_path.endswith(".csv.enc")
+        assert decrypted.decode("utf-8") == ExportService._generate_csv(
+            survey_with_responses
+        )
+
+    def test_csv_chunks_use_constant_queries(self, survey_with_responses, user):
+        """Rows are chunked and submitters loaded without a query per response."""
+        for i in range(5):
+            SurveyResponse.objects.create(
+                survey=survey_with_responses,
+                submitted_by=User.objects.create_user(username=f"respondent{i}"),
+                answers={},
+            )
+
+        with patch.object(ExportService, "CHUNK_SIZE", 3):
+            with CaptureQueriesContext(connection) as ctx:
+                chunks = list(ExportService.iter_csv_chunks(survey_with_responses))
+
+        # Header chunk, then 7 responses in chunks of 3
+        assert len(chunks) == 4
+        assert b"".join(chunks).count(b"respondent") == 5
+        assert len(ctx.captured_queries) <= 5
+
+    def test_create_export_in_ndjson_format(self, survey_with_responses, user):
+        """The export format selects the writer and the stored file type."""
+        export = ExportService.create_export(
+            survey_with_responses, user, export_format="ndjson"
+        )
+
+        with ExportService.open_file(export) as f:
+            lines = f.read().decode("utf-8").splitlines()
+
+        assert export.export_format == "ndjson"
+        assert export.file_path.endswith(".ndjson")
+        assert ExportService.content_type(export) == "application/x-ndjson"
+        assert len(lines) == 2
+
+    def test_create_export_rejects_unknown_format(self, survey_with_responses, user):
+        with pytest.raises(ValueError, match="Unknown export format"):
+            ExportService.create_export(
+                survey_with_responses, user, export_format="xlsx"
+            )
+
+    def test_deleting_export_removes_file(self, survey_with_responses, user):
+        """Stored files go with their DataExport record."""
+        export = ExportService.create_export(survey_with_responses, user)
+        path = export.file_path
+
+        export.delete()
+
+        assert not ExportService.storage().exists(path)
+
+
+class TestExportJobs:
+    """Queued exports generated by generate_export tasks."""
+
+    def _read(self, export) -> bytes:
+        with ExportService.open_file(export) as f:
+            return f.read()
+
+    def _run_next_task(self):
+        run_task(claim_next_task())
+
+    def _make_stale(self, export):
+        Task.objects.filter(id=export.task_id).update(
+            locked_at=timezone.now() - timedelta(hours=1)
+        )
+
+    def test_queued_export_is_generated_by_worker(self, survey_with_responses, user):
+        export = ExportService.queue_export(survey_with_responses, user)
+
+        assert export.status == DataExport.Status.QUEUED
+        assert export.task.name == "generate_export"
+        assert ExportService.open_file(export) is None
+
+        self._run_next_task()
+        export.refresh_from_db()
+
+        assert export.is_ready
+        assert export.task.status == Task.Status.SUCCEEDED
+        assert export.processed_count == export.response_count == 2
+        assert export.checkpoint == {}
+        assert self._read(export).decode("utf-8") == ExportService._generate_csv(
+            survey_with_responses
+        )
+
+    def test_queued_password_export_does_not_store_password(
+        self, survey_with_responses, user
+    ):
+        export = ExportService.queue_export(
+            survey_with_responses, user, password="export-pass"
+        )
+        sealed = bytes(export.pending_encryption_key)
+        assert b"export-pass" not in sealed
+        assert b"export-pass" not in json.dumps(export.task.payload).encode()
+
+        self._run_next_task()
+        export.refresh_from_db()
+
+        assert export.pending_encryption_key is None
+        with ExportService.open_file(export) as f:
+            decrypted = b"".join(decrypt_stream(b"export-pass", f))
+        assert decrypted.decode("utf-8") == ExportService._generate_csv(
+            survey_with_responses
+        )
+
+    def test_interrupted_export_resumes_from_checkpoint(
+        self, survey_with_responses, user, settings
+    ):
+        """A job whose worker died is reclaimed and continues."""
+        settings.CHECKTICK_EXPORT_CHECKPOINT_EVERY = 1
+        export = ExportService.queue_export(survey_with_responses, user)
+        real_export_record = ExportService._export_record
+        calls = []
+
+        def dies_on_second_response(*args):
+            calls.append(args[0].id)
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            return real_export_record(*args)
+
+        with patch.object(
+            ExportService, "_export_record", side_effect=dies_on_second_response
+        ):
+            with pytest.raises(KeyboardInterrupt):
+                self._run_next_task()
+
+        export.refresh_from_db()
+        assert export.status == DataExport.Status.RUNNING
+        assert export.processed_count == 1
+        assert len(export.checkpoint["parts"]) == 1
+        # Part files hold no readable response data
+        with ExportService.storage().open(export.checkpoint["parts"][0]) as part:
+            assert b"John" not in part.read()
+        assert export.part_encryption_key
+
+        # Not stale yet, so no other worker takes it over
+        assert claim_next_task() is None
+        self._make_stale(export)
+        self._run_next_task()
+        export.refresh_from_db()
+
+        assert export.is_ready
+        assert export.task.attempts == 2
+        assert export.processed_count == 2
+        assert self._read(export).decode("utf-8") == ExportService._generate_csv(
+            survey_with_responses
+        )
+        assert export.part_encryption_key is None
+        # Intermediate part files are removed
+        assert ExportService.storage().listdir(str(survey_with_responses.id))[1] == [
+            export.file_path.rsplit("/", 1)[-1]
+        ]
+
+    def test_failed_attempt_is_retried_from_checkpoint(
+        self, survey_with_responses, user
+    ):
+        export = ExportService.queue_export(survey_with_responses, user)
+
+        with patch.object(
+            ExportService, "_finish_export", side_effect=OSError("disk full")
+        ):
+            self._run_next_task()
+
+        export.refresh_from_db()
+        assert export.task.status == Task.Status.QUEUED
+        assert export.status == DataExport.Status.RUNNING
+        assert export.processed_count == 2
+
+        Task.objects.filter(id=export.task_id).update(run_after=timezone.now())
+        with patch.object(
+            ExportService, "_export_record", side_effect=AssertionError
+        ) as export_record:
+            self._run_next_task()
+
+        export.refresh_from_db()
+        # The responses were not read again
+        export_record.assert_not_called()
+        assert export.is_ready
+        assert self._read(export).decode("utf-8") == ExportService._generate_csv(
+            survey_with_responses
+        )
+
+    def test_export_that_keeps_failing_is_failed(
+        self, survey_with_responses, user, settings
+    ):
+        settings.CHECKTICK_EXPORT_MAX_ATTEMPTS = 2
+        export = ExportService.queue_export(survey_with_responses, user)
+
+        with patch.object(
+            ExportService, "_finish_export", side_effect=OSError("disk full")
+        ):
+            for _ in range(2):
+                Task.objects.filter(id=export.task_id).update(run_after=timezone.now())
+                self._run_next_task()
+
+        export.refresh_from_db()
+        assert export.task.status == Task.Status.FAILED
+        assert export.status == DataExport.Status.FAILED
+        assert export.error == "disk full"
+        assert export.checkpoint == {}
+        assert ExportService.storage().listdir(str(survey_with_responses.id))[1] == []
+
+    def test_export_that_keeps_stopping_its_worker_fails(
+        self, survey_with_responses, user, settings
+    ):
+        settings.CHECKTICK_EXPORT_MAX_ATTEMPTS = 2
+        export = ExportService.queue_export(survey_with_responses, user)
+
+        # Each worker dies part-way (OOM, hard timeout) after one checkpoint
+        for attempt in (1, 2):
+            task = claim_next_task()
+            assert task.attempts == attempt
+            export.refresh_from_db()
+            ExportService._collect_parts(export, None, checkpoint_every=1)
+            self._make_stale(export)
+
+        assert claim_next_task() is None
+        export.refresh_from_db()
+        assert export.status == DataExport.Status.FAILED
+        assert "after 2 attempt(s)" in export.error
+        assert export.checkpoint == {}
+        assert ExportService.storage().listdir(str(survey_with_responses.id))[1] == []
+
+    def test_export_missing_its_key_fails_without_retry(
+        self, survey_with_responses, user
+    ):
+        export = ExportService.queue_export(
+            survey_with_responses, user, password="export-pass"
+        )
+        DataExport.objects.filter(id=export.id).update(pending_encryption_key=None)
+
+        self._run_next_task()
+
+        export.refresh_from_db()
+        assert export.task.status == Task.Status.FAILED
+        assert export.task.attempts == 1
+        assert export.status == DataExport.Status.FAILED
+        assert export.error == "Export encryption key is missing"
+
+    def test_in_request_export_writes_no_part_files(
+        self, survey_with_responses, user, export_storage
+    ):
+        export = ExportService.create_export(survey_with_responses, user)
+
+        assert export.is_ready
+        assert export.response_count == 2
+        assert export.part_encryption_key is None
+        assert [p.name for p in export_storage.rglob("*") if p.is_file()] == [
+            export.file_path.rsplit("/", 1)[-1]
+        ]
+
+    def test_failed_in_request_export_is_recorded_and_cleaned_up(
+        self, survey_with_responses, user, export_storage
+    ):
+        with patch.object(
+            ExportService, "_iter_record_batches", side_effect=OSError("disk full")
+        ):
+            with pytest.raises(OSError):
+                ExportService.create_export(survey_with_responses, user)
+
+        export = DataExport.objects.get(survey=survey_with_responses)
+        assert export.status == DataExport.Status.FAILED
+        assert export.error == "disk full"
+        assert not [p for p in export_storage.rglob("*") if p.is_file()]
+
+    def test_abandoned_in_request_export_is_failed(
+        self, survey_with_responses, user, export_storage
+    ):
+        abandoned = ExportService.create_export(survey_with_responses, user)
+        DataExport.objects.filter(id=abandoned.id).update(
+            status=DataExport.Status.RUNNING,
+            started_at=timezone.now() - timedelta(hours=1),
+        )
+        queued = ExportService.queue_export(survey_with_responses, user)
+        DataExport.objects.filter(id=queued.id).update(
+            status=DataExport.Status.RUNNING,
+            started_at=timezone.now() - timedelta(hours=1),
+        )
+
+        assert ExportService.fail_abandoned_exports() == 1
+
+        abandoned.refresh_from_db()
+        assert abandoned.status == DataExport.Status.FAILED
+        assert not [p for p in export_storage.rglob("*") if p.is_file()]
+        # Its task retries the queued export
+        queued.refresh_from_db()
+        assert queued.status == DataExport.Status.RUNNING
+
+    def test_sweep_removes_orphaned_files(self, survey_with_responses, user):
+        storage = ExportService.storage()
+        ready = ExportService.create_export(survey_with_responses, user)
+        queued = ExportService.queue_export(survey_with_responses, user)
+        prefix = survey_with_responses.id
+        kept = [
+            ready.file_path,
+            storage.save(f"{prefix}/{queued.id}.part00000.enc", ContentFile(b"x")),
+            storage.save(f"{prefix}/notes.txt", ContentFile(b"x")),
+        ]
+        orphans = [
+            # Export rolled back or deleted without its files
+            storage.save(f"{prefix}/{uuid.uuid4()}.part00000.enc", ContentFile(b"x")),
+            storage.save(f"{prefix}/{uuid.uuid4()}.csv", ContentFile(b"x")),
+            # Parts of an export that already finished
+            storage.save(f"{prefix}/{ready.id}.part00003.enc", ContentFile(b"x")),
+        ]
+
+        # Recent files may belong to exports that are not committed yet
+        assert ExportService.sweep_orphaned_files() == 0
+        assert ExportService.sweep_orphaned_files(older_than=timedelta(0)) == 3
+
+        assert all(storage.exists(path) for path in kept)
+        assert not any(storage.exists(path) for path in orphans)
+
+    def test_run_worker_generates_exports(self, survey_with_responses, user):
+        export = ExportService.queue_export(
+            survey_with_responses, user, export_format="ndjson"
+        )
+
+        call_command("run_worker", "--once", stdout=StringIO())
+        export.refresh_from_db()
+
+        assert export.is_ready
+        assert len(self._read(export).decode("utf-8").splitlines()) == 2
+
 
 # ============================================================================
 # RetentionService Tests
@@ -15,6 +15,7 @@ import pytest
 
 from checktick_app.surveys.models import DataExport, Survey
 from checktick_app.surveys.services import ExportService
+from checktick_app.surveys.services.task_queue import claim_next_task, run_task
 
 User = get_user_model()
 TEST_PASSWORD = "x"
@@ -193,6 +194,48 @@ class TestSurveyExportCreateView:
         assert export is not None
         assert export.created_by == user
 
+    def test_export_create_queues_export(self, client, user, closed_survey):
+        """Exports are generated by the worker; the download page shows progress."""
+        from checktick_app.surveys.models import SurveyResponse
+
+        SurveyResponse.objects.create(
+            survey=closed_survey, submitted_by=user, answers={}
+        )
+        client.force_login(user)
+        client.post(
+            reverse(
+                "surveys:survey_export_create", kwargs={"slug": closed_survey.slug}
+            ),
+            {"attestation_accepted": True},
+        )
+        export = DataExport.objects.get(survey=closed_survey)
+        assert export.status == DataExport.Status.QUEUED
+
+        page = client.get(
+            reverse(
+                "surveys:survey_export_download",
+                kwargs={"slug": closed_survey.slug, "export_id": export.id},
+            )
+        )
+        assert "Preparing Export" in page.content.decode()
+        assert export.download_token not in page.content.decode()
+
+        file_url = reverse(
+            "surveys:survey_export_file",
+            kwargs={
+                "slug": closed_survey.slug,
+                "export_id": export.id,
+                "token": export.download_token,
+            },
+        )
+        response = client.get(file_url)
+        assert response.status_code == 302
+        assert str(export.id) in response.url
+
+        run_task(claim_next_task())
+        response = client.get(file_url)
+        assert response.status_code == 200
+
     def test_export_create_requires_attestation(self, client, user, closed_survey):
         """Export creation should require attestation acceptance."""
         client.force_login(user)
@@ -422,7 +465,7 @@ class TestSurveyExportFileView:
         assert response.status_code == 200
 
         # Check content contains CSV data
-        content = response.content.decode()
+        content = b"".join(response.streaming_content).decode()
 
         # Should be CSV with headers
         assert "Submitted At" in content or "submitted_at" in content
@@ -431,6 +474,66 @@ class TestSurveyExportFileView:
         # Should have CSV structure (commas and line breaks)
         assert "," in content and "\n" in content
 
+    def test_file_download_serves_byte_ranges(self, client, user, export_with_token):
+        """Range requests return the requested bytes of the stored file."""
+        client.force_login(user)
+        url = reverse(
+            "surveys:survey_export_file",
+            kwargs={
+                "slug": export_with_token.survey.slug,
+                "export_id": export_with_token.id,
+                "token": export_with_token.download_token,
+            },
+        )
+        full = b"".join(client.get(url).streaming_content)
+        size = len(full)
+
+        response = client.get(url, HTTP_RANGE="bytes=5-")
+        assert response.status_code == 206
+        assert response["Content-Range"] == f"bytes 5-{size - 1}/{size}"
+        assert b"".join(response.streaming_content) == full[5:]
+
+        response = client.get(url, HTTP_RANGE="bytes=-4")
+        assert b"".join(response.streaming_content) == full[-4:]
+
+        response = client.get(url, HTTP_RANGE=f"bytes={size}-")
+        assert response.status_code == 416
+
+        # Resuming part-way through is not counted as another download
+        export_with_token.refresh_from_db()
+        assert export_with_token.download_count == 1
+
+    def test_password_export_downloads_encrypted_file(
+        self, client, user, closed_survey
+    ):
+        """Password-protected exports are served as the stored encrypted file."""
+        from checktick_app.surveys.models import SurveyResponse
+        from checktick_app.surveys.utils import EXPORT_STREAM_MAGIC
+
+        SurveyResponse.objects.create(
+            survey=closed_survey, submitted_by=user, answers={"q": "a"}
+        )
+        export = ExportService.create_export(
+            survey=closed_survey, user=user, password="export-pass"
+        )
+
+        client.force_login(user)
+        response = client.get(
+            reverse(
+                "surveys:survey_export_file",
+                kwargs={
+                    "slug": closed_survey.slug,
+                    "export_id": export.id,
+                    "token": export.download_token,
+                },
+            )
+        )
+
+        assert response.status_code == 200
+        assert response["Content-Type"] == "application/octet-stream"
+        assert ".csv.enc" in response["Content-Disposition"]
+        assert b"".join(response.streaming_content).startswith(EXPORT_STREAM_MAGIC)
+
 
 # ========== Survey Close Integration Test ==========
 
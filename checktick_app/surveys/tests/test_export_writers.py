@@ -0,0 +1,97 @@
+"""Tests for the pluggable export file writers."""
+
+from datetime import datetime, timezone
+import io
+import json
+
+import pytest
+
+from checktick_app.surveys.services.export_writers import (
+    ExportColumn,
+    ExportRecord,
+    get_export_writer,
+    typed_answer,
+)
+
+COLUMNS = [
+    ExportColumn(1, "Colours", "mc_multi"),
+    ExportColumn(2, "Smoker?", "yesno"),
+    ExportColumn(3, "Notes", "text"),
+    ExportColumn(4, "Notes", "text"),
+]
+SUBMITTED = datetime(2025, 3, 1, 12, 30, tzinfo=timezone.utc)
+BATCHES = [
+    [
+        ExportRecord(1, SUBMITTED, "alice", {"1": ["red", "blue"], "2": "yes"}),
+        ExportRecord(2, None, "Anonymous", {"2": "no", "3": "hello", "4": "again"}),
+    ],
+    [ExportRecord(3, SUBMITTED, "bob", {"1": "green", "3": {"nested": 1}})],
+]
+
+
+def _write(export_format: str) -> bytes:
+    writer = get_export_writer(export_format)(COLUMNS)
+    return b"".join(writer.iter_chunks(iter(BATCHES)))
+
+
+def test_typed_answer_normalises_by_question_type():
+    assert typed_answer("mc_multi", ["a", 2]) == ["a", "2"]
+    assert typed_answer("orderable", "only") == ["only"]
+    assert typed_answer("mc_single", "") is None
+    assert typed_answer("text", {"a": 1}) == {"a": 1}
+    assert typed_answer("likert", 4) == "4"
+
+
+def test_record_answer_keeps_falsy_answers():
+    record = ExportRecord(1, None, "", {"1": 0, "2": False, "3": "", 4: "int key"})
+
+    assert [record.answer(column) for column in COLUMNS] == [0, False, "", "int key"]
+    # A string key wins over an int key for the same question
+    assert ExportRecord(1, None, "", {"4": "", 4: "x"}).answer(COLUMNS[3]) == ""
+
+
+def test_unknown_format_rejected():
+    with pytest.raises(ValueError, match="Unknown export format"):
+        get_export_writer("xlsx")
+
+
+def test_csv_keeps_existing_layout():
+    lines = _write("csv").decode("utf-8").splitlines()
+
+    assert (
+        lines[0] == "Response ID,Submitted At,Submitted By,Colours,Smoker?,Notes,Notes"
+    )
+    assert lines[2] == "2,,Anonymous,,no,hello,again"
+
+
+def test_ndjson_has_one_typed_object_per_response():
+    rows = [json.loads(line) for line in _write("ndjson").decode().splitlines()]
+
+    assert [row["response_id"] for row in rows] == [1, 2, 3]
+    assert rows[0]["Colours"] == ["red", "blue"]
+    assert rows[0]["submitted_at"] == "2025-03-01T12:30:00+00:00"
+    assert rows[1]["Colours"] is None
+    # Duplicate question text gets the question id appended
+    assert rows[1]["Notes [4]"] == "again"
+    assert rows[2]["Notes"] == {"nested": 1}
+
+
+@pytest.mark.parametrize("export_format", ["arrow", "parquet"])
+def test_arrow_formats_have_typed_columns(export_format):
+    pa = pytest.importorskip("pyarrow")
+    data = _write(export_format)
+
+    if export_format == "arrow":
+        table = pa.ipc.open_stream(data).read_all()
+    else:
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(io.BytesIO(data))
+
+    assert table.num_rows == 3
+    assert pa.types.is_timestamp(table.schema.field("submitted_at").type)
+    assert pa.types.is_list(table.schema.field("Colours").type)
+    assert pa.types.is_dictionary(table.schema.field("Smoker?").type)
+    assert table.schema.field("Colours").metadata[b"question_id"] == b"1"
+    assert table.column("Colours").to_pylist() == [["red", "blue"], None, ["green"]]
+    assert table.column("Notes").to_pylist()[2] == '{"nested": 1}'
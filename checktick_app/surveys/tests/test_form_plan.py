@@ -0,0 +1,154 @@
+"""Tests for compiled, cached participant form plans."""
+
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+import pytest
+
+from checktick_app.surveys.models import (
+    QuestionGroup,
+    Survey,
+    SurveyQuestion,
+    SurveyQuestionCondition,
+)
+from checktick_app.surveys.services.form_plan import get_content_version, get_form_plan
+
+
+@pytest.fixture(autouse=True)
+def disable_rate_limiting(settings):
+    settings.RATELIMIT_ENABLE = False
+
+
+@pytest.fixture
+def owner(django_user_model):
+    return django_user_model.objects.create_user(username="owner", password="p")
+
+
+def make_survey(owner, slug, n_questions):
+    survey = Survey.objects.create(
+        owner=owner,
+        name=slug,
+        slug=slug,
+        status=Survey.Status.PUBLISHED,
+        visibility=Survey.Visibility.PUBLIC,
+    )
+    group = QuestionGroup.objects.create(name="Group", owner=owner)
+    survey.question_groups.add(group)
+    for i in range(n_questions):
+        SurveyQuestion.objects.create(
+            survey=survey,
+            group=group,
+            text=f"Question {i}",
+            type=SurveyQuestion.Types.TEXT,
+            order=i,
+        )
+    return survey
+
+
+def warm_get_queries(client, survey):
+    url = reverse("surveys:take", kwargs={"slug": survey.slug})
+    assert client.get(url).status_code == 200
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(ctx)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_participant_get_queries_do_not_grow_with_questions(client, owner):
+    small = make_survey(owner, "small", 2)
+    large = make_survey(owner, "large", 20)
+
+    assert warm_get_queries(client, small) == warm_get_queries(client, large)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_plan_marks_groups_and_show_conditions(owner):
+    survey = make_survey(owner, "s", 3)
+    q1, q2, q3 = survey.questions.all()
+    SurveyQuestionCondition.objects.create(
+        question=q1,
+        operator=SurveyQuestionCondition.Operator.EQUALS,
+        value="yes",
+        target_question=q3,
+        action=SurveyQuestionCondition.Action.SHOW,
+    )
+
+    plan = get_form_plan(survey)
+
+    assert [q.idx for q in plan.questions] == [1, 2, 3]
+    assert [q.group_start for q in plan.questions] == [True, False, False]
+    assert [q.group_end for q in plan.questions] == [False, False, True]
+    assert [q.has_show_condition for q in plan.questions] == [False, False, True]
+    config = json.loads(plan.branching_config)
+    assert config["questions"] == [str(q.id) for q in (q1, q2, q3)]
+    assert config["show_conditions"][str(q3.id)][0]["source_question"] == str(q1.id)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_content_changes_invalidate_the_plan(owner):
+    survey = make_survey(owner, "s", 2)
+    version = get_content_version(survey.id)
+    assert get_form_plan(survey) is not None
+
+    question = survey.questions.first()
+    question.text = "Edited"
+    question.save()
+    assert get_content_version(survey.id) != version
+    assert get_form_plan(survey).questions[0].text == "Edited"
+
+    version = get_content_version(survey.id)
+    SurveyQuestion.objects.create(
+        survey=survey, text="New", type=SurveyQuestion.Types.TEXT, order=5
+    )
+    assert get_content_version(survey.id) != version
+    assert len(get_form_plan(survey).questions) == 3
+
+    version = get_content_version(survey.id)
+    survey.question_groups.clear()
+    assert get_content_version(survey.id) != version
+
+
+@pytest.mark.django_db(transaction=True)
+def test_reorder_view_invalidates_the_plan(client, owner):
+    survey = make_survey(owner, "s", 2)
+    q1, q2 = survey.questions.all()
+    assert [q.id for q in get_form_plan(survey).questions] == [q1.id, q2.id]
+
+    client.force_login(owner)
+    client.post(
+        reverse("surveys:builder_questions_reorder", kwargs={"slug": survey.slug}),
+        {"order": f"{q2.id},{q1.id}"},
+    )
+
+    assert [q.id for q in get_form_plan(survey).questions] == [q2.id, q1.id]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_form_body_fragment_is_cached_per_content_version(client, owner):
+    survey = make_survey(owner, "s", 2)
+    url = reverse("surveys:take", kwargs={"slug": survey.slug})
+    partial = "surveys/partials/participant_form_body.html"
+
+    def rendered_templates():
+        response = client.get(url)
+        assert response.status_code == 200
+        return response, [t.name for t in response.templates]
+
+    response, templates = rendered_templates()
+    assert partial in templates
+    response, templates = rendered_templates()
+    assert partial not in templates
+    assert "Question 1" in response.content.decode()
+    # Per-respondent parts are still rendered on every request
+    assert "csrfmiddlewaretoken" in response.content.decode()
+
+    question = survey.questions.get(text="Question 1")
+    question.text = "Edited question"
+    question.save()
+
+    response, templates = rendered_templates()
+    assert partial in templates
+    assert "Edited question" in response.content.decode()
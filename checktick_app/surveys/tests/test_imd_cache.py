@@ -0,0 +1,221 @@
+"""Tests for cached, background IMD enrichment against a local stand-in API."""
+
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+import threading
+from urllib.parse import parse_qs, urlparse
+
+from django.urls import reverse
+from django.utils import timezone
+import pytest
+
+from checktick_app.surveys.models import (
+    PostcodeIMD,
+    QuestionGroup,
+    Survey,
+    SurveyResponse,
+    Task,
+)
+from checktick_app.surveys.services import ExportService
+from checktick_app.surveys.services.imd_service import IMDService
+from checktick_app.surveys.services.response_listing import ResponseListQuery, list_page
+from checktick_app.surveys.services.task_queue import claim_next_task, run_task
+from checktick_app.surveys.views import _enrich_demographics_with_imd
+
+
+class StandInIMDHandler(BaseHTTPRequestHandler):
+    """Answers like the RCPCH Deprivation API from the server's ``deciles``."""
+
+    def do_GET(self):
+        postcode = parse_qs(urlparse(self.path).query).get("postcode", [""])[0]
+        self.server.requests.append(postcode)
+        if postcode in self.server.failing:
+            self.send_response(500)
+            self.end_headers()
+            return
+        decile = self.server.deciles.get(postcode)
+        if decile is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        body = json.dumps({"imd_decile": decile, "imd_rank": decile * 1000}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def imd_api(settings):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInIMDHandler)
+    server.requests = []
+    server.deciles = {"SW1A1AA": 7, "M11AE": 2}
+    server.failing = set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    settings.IMD_API_URL = f"http://127.0.0.1:{server.server_port}/imd"
+    settings.IMD_API_KEY = "test-key"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def patient_group(django_user_model):
+    owner = django_user_model.objects.create_user(username="owner", password="p")
+    return QuestionGroup.objects.create(
+        name="Patient", owner=owner, schema={"include_imd": True}
+    )
+
+
+@pytest.mark.django_db
+def test_batch_lookup_fetches_each_postcode_once(imd_api):
+    results = IMDService.lookup_imd_batch(["SW1A 1AA", "m1 1ae", "EH11YZ"])
+
+    assert results["SW1A1AA"].imd_decile == 7
+    assert results["M11AE"].imd_decile == 2
+    assert results["EH11YZ"].error == "Postcode not found in IMD data"
+    assert sorted(imd_api.requests) == ["EH11YZ", "M11AE", "SW1A1AA"]
+
+    # Found and not-found answers are both cached
+    again = IMDService.lookup_imd_batch(["SW1A1AA", "EH1 1YZ"])
+    assert again["SW1A1AA"].imd_decile == 7
+    assert not again["EH11YZ"].is_valid
+    assert len(imd_api.requests) == 3
+
+
+@pytest.mark.django_db
+def test_failures_and_expired_entries_are_looked_up_again(imd_api, settings):
+    imd_api.failing.add("M11AE")
+    assert IMDService.lookup_imd_batch(["M11AE"])["M11AE"].error == "API error: 500"
+    assert not PostcodeIMD.objects.exists()
+
+    imd_api.failing.clear()
+    IMDService.lookup_imd_batch(["M11AE"])
+    PostcodeIMD.objects.update(
+        fetched_at=timezone.now() - timedelta(days=settings.IMD_CACHE_TTL_DAYS + 1)
+    )
+    IMDService.lookup_imd_batch(["M11AE"])
+
+    assert imd_api.requests == ["M11AE"] * 3
+    assert PostcodeIMD.objects.get().fetched_at > timezone.now() - timedelta(hours=1)
+
+
+@pytest.mark.django_db
+def test_submission_defers_uncached_lookup_to_background_task(imd_api, patient_group):
+    demo = _enrich_demographics_with_imd({"post_code": "SW1A 1AA"}, patient_group)
+
+    # The submission never waits on the API
+    assert "imd_decile" not in demo
+    assert imd_api.requests == []
+    task = Task.objects.get(name="lookup_imd")
+    assert task.payload == {"postcodes": ["SW1A1AA"]}
+
+    run_task(claim_next_task())
+    task.refresh_from_db()
+    assert task.status == Task.Status.SUCCEEDED
+    assert imd_api.requests == ["SW1A1AA"]
+
+    # Exports fill the decile in from the cache
+    assert IMDService.add_cached_imd({"post_code": "SW1A 1AA"}) == {
+        "post_code": "SW1A 1AA",
+        "imd_decile": "7",
+        "imd_rank": "7000",
+    }
+    # Later submissions read it straight from the cache
+    demo = _enrich_demographics_with_imd({"post_code": "sw1a 1aa"}, patient_group)
+    assert demo["imd_decile"] == "7"
+    assert Task.objects.filter(name="lookup_imd").count() == 1
+
+
+@pytest.mark.django_db
+def test_pending_lookup_is_queued_once_per_postcode(imd_api, patient_group):
+    for postcode in ["SW1A 1AA", "sw1a1aa", "M1 1AE"]:
+        _enrich_demographics_with_imd({"post_code": postcode}, patient_group)
+
+    assert sorted(
+        task.payload["postcodes"][0] for task in Task.objects.filter(name="lookup_imd")
+    ) == ["M11AE", "SW1A1AA"]
+
+    # Once the lookup has finished, an expired entry can be refreshed again
+    Task.objects.update(status=Task.Status.SUCCEEDED)
+    _enrich_demographics_with_imd({"post_code": "SW1A 1AA"}, patient_group)
+    assert Task.objects.filter(status=Task.Status.QUEUED).count() == 1
+
+
+@pytest.mark.django_db
+def test_expired_cache_entries_still_fill_in_deciles(settings):
+    PostcodeIMD.objects.create(
+        postcode="SW1A1AA",
+        imd_decile=7,
+        imd_rank=7000,
+        fetched_at=timezone.now() - timedelta(days=settings.IMD_CACHE_TTL_DAYS + 1),
+    )
+
+    # Due a refresh, so submissions queue a lookup...
+    assert IMDService.cached_imd(["SW1A1AA"]) == {}
+    # ...but responses read back keep their decile
+    assert IMDService.add_cached_imd({"post_code": "SW1A 1AA"})["imd_decile"] == "7"
+
+
+@pytest.mark.django_db
+def test_exports_and_response_api_fill_in_deciles(django_user_model):
+    owner = django_user_model.objects.create_user(username="imd-owner")
+    survey = Survey.objects.create(owner=owner, name="IMD", slug="imd")
+    survey.question_groups.add(
+        QuestionGroup.objects.create(
+            name="Patient",
+            owner=owner,
+            schema={"template": "patient_details_encrypted", "include_imd": True},
+        )
+    )
+    survey_key = os.urandom(32)
+    response = SurveyResponse(survey=survey)
+    # Submitted before the postcode's lookup finished
+    response.store_complete_response(survey_key, {}, {"post_code": "SW1A 1AA"})
+    response.save()
+    PostcodeIMD.objects.create(postcode="SW1A1AA", imd_decile=7, imd_rank=7000)
+
+    (row,) = [
+        json.loads(line)
+        for line in b"".join(
+            ExportService.iter_export_chunks(survey, survey_key, "ndjson")
+        ).splitlines()
+    ]
+    assert row["IMD Decile"] == "7"
+    assert row["IMD Rank"] == "7000"
+
+    (item,) = list_page(survey, ResponseListQuery(), survey_key)["items"]
+    assert item["demographics"]["imd_decile"] == "7"
+
+
+@pytest.mark.django_db
+def test_lookup_task_retries_api_failures(imd_api):
+    imd_api.failing.add("M11AE")
+    task = Task.objects.create(name="lookup_imd", payload={"postcodes": ["M11AE"]})
+
+    run_task(claim_next_task())
+    task.refresh_from_db()
+
+    assert task.status == Task.Status.QUEUED
+    assert "M11AE" not in task.error
+
+
+@pytest.mark.django_db
+def test_validate_postcode_uses_imd_cache(client, settings):
+    settings.RATELIMIT_ENABLE = False
+    # Any call to the postcodes API would fail to connect
+    settings.POSTCODES_API_URL = "http://127.0.0.1:9/postcodes/"
+    settings.POSTCODES_API_KEY = "test-key"
+    PostcodeIMD.objects.create(postcode="SW1A1AA", imd_decile=7, imd_rank=7000)
+
+    response = client.post(
+        reverse("surveys:validate_postcode"), {"post_code": "sw1a 1aa"}
+    )
+
+    assert "input-success" in response.content.decode()
@@ -0,0 +1,107 @@
+"""Tests for the offline postcode to IMD decile dataset."""
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+import pytest
+
+from checktick_app.surveys.models import PostcodeDeprivation, QuestionGroup, Task
+from checktick_app.surveys.services.imd_service import IMDService
+from checktick_app.surveys.views import _enrich_demographics_with_imd
+
+IMD_CSV = """\ufeffLSOA code (2011),LSOA name (2011),Index of Multiple Deprivation (IMD) Rank,Index of Multiple Deprivation (IMD) Decile
+E01004736,Westminster 018C,"23,812",8
+E01005062,Manchester 054C,1200,1
+"""
+
+ONSPD_CSV = """pcd,pcds,doterm,lsoa11
+SW1A1AA,SW1A 1AA,,E01004736
+M1  1AE,M1 1AE,,E01005062
+EH1 1YZ,EH1 1YZ,,S01008677
+"""
+
+
+@pytest.fixture
+def dataset_files(tmp_path):
+    imd = tmp_path / "imd.csv"
+    imd.write_text(IMD_CSV, encoding="utf-8")
+    onspd = tmp_path / "onspd.csv"
+    onspd.write_text(ONSPD_CSV, encoding="utf-8")
+    return ["--postcodes", str(onspd), "--imd", str(imd)]
+
+
+@pytest.fixture
+def local_provider(settings):
+    settings.IMD_PROVIDER = "local"
+    # Any call to the API would fail to connect
+    settings.IMD_API_URL = "http://127.0.0.1:9/imd"
+    settings.IMD_API_KEY = "test-key"
+
+
+@pytest.mark.django_db
+def test_load_joins_postcodes_to_imd_by_lsoa(dataset_files):
+    out = StringIO()
+    call_command("load_imd_dataset", *dataset_files, stdout=out)
+
+    assert "Loaded IMD deciles for 2 postcodes (1 without IMD data skipped)" in (
+        out.getvalue()
+    )
+    row = PostcodeDeprivation.objects.get(postcode="SW1A1AA")
+    assert (row.lsoa_code, row.imd_decile, row.imd_rank) == ("E01004736", 8, 23812)
+
+    # Reloading replaces the dataset rather than adding to it
+    call_command("load_imd_dataset", *dataset_files, stdout=StringIO())
+    assert PostcodeDeprivation.objects.count() == 2
+
+
+@pytest.mark.django_db
+def test_dry_run_and_bad_files_leave_dataset_alone(dataset_files, tmp_path):
+    PostcodeDeprivation.objects.create(
+        postcode="OLD1AA", lsoa_code="E01000001", imd_decile=5, imd_rank=1
+    )
+
+    out = StringIO()
+    call_command("load_imd_dataset", *dataset_files, "--dry-run", stdout=out)
+    assert "Would load IMD deciles for 2 postcodes" in out.getvalue()
+
+    with pytest.raises(CommandError, match="lsoa21"):
+        call_command(
+            "load_imd_dataset",
+            *dataset_files,
+            "--lsoa-column",
+            "lsoa21",
+            stdout=StringIO(),
+        )
+    assert list(PostcodeDeprivation.objects.values_list("postcode", flat=True)) == [
+        "OLD1AA"
+    ]
+
+
+@pytest.mark.django_db
+def test_local_provider_never_calls_the_api(dataset_files, local_provider):
+    call_command("load_imd_dataset", *dataset_files, stdout=StringIO())
+
+    assert IMDService.lookup_imd("sw1a 1aa").imd_decile == 8
+    assert IMDService.lookup_imd("EH1 1YZ").error == "Postcode not found in IMD data"
+
+    results = IMDService.lookup_imd_batch(["M1 1AE", "SW1A1AA", "EH11YZ"])
+    assert results["M11AE"].imd_decile == 1
+    assert results["SW1A1AA"].imd_rank == 23812
+    assert not results["EH11YZ"].is_valid
+
+
+@pytest.mark.django_db
+def test_submission_reads_decile_from_local_dataset(
+    dataset_files, local_provider, django_user_model
+):
+    call_command("load_imd_dataset", *dataset_files, stdout=StringIO())
+    owner = django_user_model.objects.create_user(username="owner", password="p")
+    group = QuestionGroup.objects.create(
+        name="Patient", owner=owner, schema={"include_imd": True}
+    )
+
+    demo = _enrich_demographics_with_imd({"post_code": "M1 1AE"}, group)
+
+    assert demo["imd_decile"] == "1"
+    assert not Task.objects.exists()
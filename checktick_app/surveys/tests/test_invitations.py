@@ -0,0 +1,153 @@
+"""Tests for structured invitation tokens."""
+
+from importlib import import_module
+
+from django.apps import apps
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+import pytest
+
+from checktick_app.surveys.models import (
+    Survey,
+    SurveyAccessToken,
+    SurveyQuestion,
+    SurveyResponse,
+)
+from checktick_app.surveys.tasks import _invite_tokens
+
+
+@pytest.fixture(autouse=True)
+def disable_rate_limiting(settings):
+    settings.RATELIMIT_ENABLE = False
+
+
+@pytest.fixture
+def owner(django_user_model):
+    return django_user_model.objects.create_user(
+        username="owner", email="owner@example.com", password="p"
+    )
+
+
+@pytest.fixture
+def survey(owner):
+    survey = Survey.objects.create(
+        owner=owner,
+        name="Invite only",
+        slug="invite-only",
+        status=Survey.Status.PUBLISHED,
+        visibility=Survey.Visibility.AUTHENTICATED,
+    )
+    SurveyQuestion.objects.create(
+        survey=survey, text="Name", type=SurveyQuestion.Types.TEXT, order=0
+    )
+    return survey
+
+
+def invite(survey, owner, *emails, for_authenticated=True):
+    return SurveyAccessToken.objects.bulk_create(
+        _invite_tokens(survey, owner, None, list(emails), for_authenticated)
+    )
+
+
+@pytest.mark.django_db
+def test_invite_tokens_record_kind_and_normalised_email(survey, owner):
+    (anonymous,) = invite(survey, owner, " Alice@Example.com", for_authenticated=False)
+    (signed_in,) = invite(survey, owner, "bob@example.com")
+
+    assert anonymous.invite_kind == SurveyAccessToken.InviteKind.EMAIL
+    assert anonymous.invited_email == "alice@example.com"
+    assert signed_in.invite_kind == SurveyAccessToken.InviteKind.AUTHENTICATED
+    assert signed_in.invited_email == "bob@example.com"
+
+
+@pytest.mark.django_db
+def test_only_invited_users_can_take_the_survey(
+    client, django_user_model, survey, owner
+):
+    invite(survey, owner, "carol@example.com")
+    carol = django_user_model.objects.create_user(
+        username="carol", email="Carol@Example.com", password="p"
+    )
+    # Previously matched as a substring of carol's invitation note
+    caro = django_user_model.objects.create_user(
+        username="caro", email="caro@example.co", password="p"
+    )
+    no_email = django_user_model.objects.create_user(username="anon", password="p")
+    url = reverse("surveys:take", kwargs={"slug": survey.slug})
+    closed = reverse("surveys:closed", kwargs={"slug": survey.slug})
+
+    client.force_login(carol)
+    assert client.get(url).status_code == 200
+
+    for user in (caro, no_email):
+        client.force_login(user)
+        response = client.get(url)
+        assert response.status_code == 302
+        assert response.url == closed
+
+
+@pytest.mark.django_db
+def test_pending_invites_are_listed_without_per_row_queries(client, survey, owner):
+    client.force_login(owner)
+    url = reverse("surveys:invites_pending", kwargs={"slug": survey.slug})
+
+    completed, _ = invite(survey, owner, "a@example.com", "b@example.com")
+    SurveyResponse.objects.create(survey=survey, answers={}, access_token=completed)
+    # Warm the per-request caches (branding, session flags) first
+    client.get(url)
+    with CaptureQueriesContext(connection) as small:
+        client.get(url)
+
+    tokens = invite(survey, owner, *(f"user{i}@example.com" for i in range(20)))
+    for token in tokens[:5]:
+        SurveyResponse.objects.create(survey=survey, answers={}, access_token=token)
+    # Plain tokens are not invitations
+    SurveyAccessToken.objects.create(survey=survey, token="plain", created_by=owner)
+    with CaptureQueriesContext(connection) as large:
+        response = client.get(url)
+
+    assert len(large.captured_queries) == len(small.captured_queries)
+    assert response.context["completed_count"] == 6
+    assert response.context["pending_count"] == 16
+    emails = {i["email"] for i in response.context["invites"]}
+    assert "user0@example.com" in emails and len(emails) == 22
+
+
+@pytest.mark.django_db
+def test_backfill_parses_invitation_notes(survey, owner):
+    migration = import_module(
+        "checktick_app.surveys.migrations.0052_surveyaccesstoken_invitations"
+    )
+    SurveyAccessToken.objects.bulk_create(
+        [
+            SurveyAccessToken(
+                survey=survey,
+                token="anonymous",
+                created_by=owner,
+                note="Invited: Dave@Example.com",
+            ),
+            SurveyAccessToken(
+                survey=survey,
+                token="signed-in",
+                created_by=owner,
+                note="Invited: erin@example.com",
+                for_authenticated=True,
+            ),
+            SurveyAccessToken(
+                survey=survey, token="plain", created_by=owner, note="Front desk"
+            ),
+        ]
+    )
+
+    migration.backfill_invitations(apps, None)
+
+    tokens = {
+        t.token: (t.invite_kind, t.invited_email)
+        for t in SurveyAccessToken.objects.all()
+    }
+    assert tokens == {
+        "anonymous": ("email", "dave@example.com"),
+        "signed-in": ("authenticated", "erin@example.com"),
+        "plain": ("", ""),
+    }
@@ -0,0 +1,127 @@
+"""Tests for the request-scoped permission context."""
+
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+import pytest
+
+from checktick_app.surveys.models import (
+    DataCustodian,
+    Organization,
+    OrganizationMembership,
+    Survey,
+    SurveyMembership,
+    TeamMembership,
+)
+from checktick_app.surveys.permissions import (
+    attach_permission_context,
+    can_edit_survey,
+    can_export_survey_data,
+    can_manage_survey_users,
+    can_view_survey,
+)
+
+ROLE_MODELS = [
+    OrganizationMembership,
+    SurveyMembership,
+    TeamMembership,
+    DataCustodian,
+]
+
+
+@pytest.fixture(autouse=True)
+def disable_rate_limiting(settings):
+    settings.RATELIMIT_ENABLE = False
+
+
+@pytest.fixture
+def setup(db):
+    owner = User.objects.create_user(username="owner", password="x")
+    admin = User.objects.create_user(username="admin", password="x")
+    editor = User.objects.create_user(username="editor", password="x")
+    org = Organization.objects.create(name="Org", owner=owner)
+    OrganizationMembership.objects.create(
+        organization=org, user=admin, role=OrganizationMembership.Role.ADMIN
+    )
+    OrganizationMembership.objects.create(
+        organization=org, user=editor, role=OrganizationMembership.Role.VIEWER
+    )
+    survey = Survey.objects.create(owner=owner, organization=org, name="S", slug="s")
+    SurveyMembership.objects.create(
+        survey=survey, user=editor, role=SurveyMembership.Role.EDITOR
+    )
+    return survey, admin, editor
+
+
+def role_queries(ctx) -> Counter:
+    """Number of queries loading a user's rows from each role table."""
+    counts = Counter()
+    for query in ctx.captured_queries:
+        for model in ROLE_MODELS:
+            table = model._meta.db_table
+            if f'FROM "{table}"' in query["sql"] and f'"{table}"."user_id" =' in (
+                query["sql"]
+            ):
+                counts[table] += 1
+    return counts
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("username", ["admin", "editor"])
+def test_dashboard_loads_each_role_table_at_most_once(client, setup, username):
+    survey, *_ = setup
+    client.force_login(User.objects.get(username=username))
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(
+            reverse("surveys:dashboard", kwargs={"slug": survey.slug})
+        )
+
+    assert response.status_code == 200
+    assert max(role_queries(ctx).values(), default=0) <= 1
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("username", ["admin", "editor"])
+def test_builder_loads_each_role_table_at_most_once(client, setup, username):
+    survey, *_ = setup
+    client.force_login(User.objects.get(username=username))
+
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(reverse("surveys:groups", kwargs={"slug": survey.slug}))
+
+    assert response.status_code == 200
+    assert max(role_queries(ctx).values(), default=0) <= 1
+
+
+@pytest.mark.django_db
+def test_attached_context_answers_checks_from_memory(setup):
+    survey, admin, editor = setup
+    attach_permission_context(editor)
+    assert can_view_survey(editor, survey)
+
+    with CaptureQueriesContext(connection) as ctx:
+        assert can_edit_survey(editor, survey)
+        assert not can_manage_survey_users(editor, survey)
+        assert can_view_survey(editor, survey)
+    assert len(ctx) == 0
+
+
+@pytest.mark.django_db
+def test_role_changes_invalidate_attached_contexts(setup):
+    survey, admin, editor = setup
+    attach_permission_context(editor)
+    attach_permission_context(admin)
+    assert can_edit_survey(editor, survey)
+    assert not can_export_survey_data(editor, survey)
+
+    SurveyMembership.objects.filter(user=editor).delete()
+    assert not can_edit_survey(editor, survey)
+
+    DataCustodian.objects.create(
+        user=editor, survey=survey, granted_by=admin, reason="Audit"
+    )
+    assert can_export_survey_data(editor, survey)
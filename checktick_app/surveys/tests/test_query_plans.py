@@ -0,0 +1,167 @@
+"""
+Query plan regression tests for the hottest SurveyResponse queries.
+
+Seeds a large response table (1M rows by default, set
+CHECKTICK_QUERY_PLAN_ROWS to change it), runs EXPLAIN on the ORM queries
+behind the dashboard, the exports, data subject request lookups and
+survey_take, and fails if any of them scans the whole response table.
+PostgreSQL only: the planner decisions are what is under test.
+"""
+
+from datetime import timedelta
+import json
+import os
+
+from django.db import connection
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+import pytest
+
+from checktick_app.surveys.models import Survey, SurveyAccessToken, SurveyResponse
+
+ROWS = int(os.environ.get("CHECKTICK_QUERY_PLAN_ROWS", 1_000_000))
+SURVEYS = 200
+
+pytestmark = [
+    pytest.mark.slow,
+    pytest.mark.skipif(
+        connection.vendor != "postgresql",
+        reason="Query plans are checked on PostgreSQL",
+    ),
+]
+
+
+def seed_responses(survey_ids: list[int], respondent_id: int, rows: int) -> None:
+    """
+    Insert ``rows`` responses spread over the surveys in one statement.
+
+    The respondent submits the first response to each survey; the rest are
+    anonymous.
+    """
+    table = SurveyResponse._meta.db_table
+    surveys = len(survey_ids)
+    generated = {
+        "survey_id": ("(%s::bigint[])[1 + mod(i, %s)]", [survey_ids, surveys]),
+        "submitted_by_id": (
+            "CASE WHEN i <= %s THEN %s::bigint END",
+            [surveys, respondent_id],
+        ),
+        "submitted_at": ("now() - i * interval '30 seconds'", []),
+        "answers": ("'{}'::jsonb", []),
+        "is_frozen": ("mod(i, 1000) = 0", []),
+        # Pseudonymous surveys only: half the responses have a receipt
+        "receipt_token": ("CASE WHEN mod(i, 2) = 0 THEN gen_random_uuid() END", []),
+    }
+    columns, expressions, params = [], [], []
+    for f in SurveyResponse._meta.concrete_fields:
+        if f.primary_key:
+            continue
+        if f.column in generated:
+            sql, sql_params = generated[f.column]
+        elif f.null:
+            continue
+        else:
+            sql, sql_params = "%s", [f.get_db_prep_save(f.get_default(), connection)]
+        columns.append(connection.ops.quote_name(f.column))
+        expressions.append(sql)
+        params.extend(sql_params)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) "
+            f"SELECT {', '.join(expressions)} FROM generate_series(1, %s) AS i",
+            [*params, rows],
+        )
+        cursor.execute(f"ANALYZE {table}")
+
+
+def full_scans(plan: dict, table: str) -> list[str]:
+    """Sequential scans of ``table`` anywhere in an EXPLAIN (FORMAT JSON) plan."""
+    scans = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") == table:
+        scans.append(plan.get("Filter", "(no filter)"))
+    for child in plan.get("Plans", []):
+        scans.extend(full_scans(child, table))
+    return scans
+
+
+@pytest.mark.django_db
+def test_hot_response_queries_use_indexes(django_user_model):
+    owner = django_user_model.objects.create_user(username="owner", password="p")
+    respondent = django_user_model.objects.create_user(
+        username="respondent", password="p"
+    )
+    surveys = Survey.objects.bulk_create(
+        Survey(owner=owner, name=f"Survey {i}", slug=f"survey-{i}")
+        for i in range(SURVEYS)
+    )
+    survey = surveys[0]
+    seed_responses([s.id for s in surveys], respondent.id, ROWS)
+    token = SurveyAccessToken.objects.create(
+        survey=survey, token="invite", created_by=owner
+    )
+    SurveyResponse.objects.create(survey=survey, answers={}, access_token=token)
+    receipt = (
+        survey.responses.filter(receipt_token__isnull=False)
+        .values_list("receipt_token", flat=True)
+        .first()
+    )
+
+    now = timezone.now()
+    cursor_at = now - timedelta(days=30)
+    exportable = SurveyResponse.objects.filter(survey=survey, is_frozen=False)
+    queries = {
+        # Dashboard: summary_counts and the count_by_bucket sparkline
+        "dashboard summary": survey.responses.all(),
+        "dashboard sparkline": survey.responses.filter(
+            submitted_at__gte=now - timedelta(days=14), submitted_at__lt=now
+        )
+        .annotate(bucket_start=TruncDay("submitted_at"))
+        .values("bucket_start")
+        .annotate(count=Count("pk"))
+        .order_by(),
+        # metrics/responses API: hourly series
+        "metrics series": survey.responses.filter(
+            submitted_at__gte=now - timedelta(hours=48), submitted_at__lt=now
+        )
+        .annotate(bucket_start=TruncHour("submitted_at"))
+        .values("bucket_start")
+        .annotate(count=Count("pk"))
+        .order_by(),
+        # Exports: counts, then batches in submission order
+        "export count": exportable,
+        "export frozen count": SurveyResponse.objects.filter(
+            survey=survey, is_frozen=True
+        ),
+        "export batch": exportable.select_related("submitted_by").order_by(
+            "submitted_at", "id"
+        )[:500],
+        "export resumed batch": exportable.select_related("submitted_by")
+        .filter(Q(submitted_at__gt=cursor_at) | Q(submitted_at=cursor_at, id__gt=0))
+        .order_by("submitted_at", "id")[:500],
+        # Data subject requests: find a respondent's response by receipt
+        "receipt lookup": SurveyResponse.objects.filter(receipt_token=receipt),
+        # Participants: my responses and key recovery
+        "participant history": SurveyResponse.objects.filter(submitted_by=respondent)
+        .select_related("survey", "survey__organization")
+        .order_by("-submitted_at"),
+        "recovery check": survey.responses.filter(submitted_by=respondent).exclude(
+            enc_demographics__isnull=True
+        ),
+        # survey_take: one response per invite token
+        "token response check": SurveyResponse.objects.filter(access_token=token),
+    }
+
+    table = SurveyResponse._meta.db_table
+    regressions = {}
+    for name, queryset in queries.items():
+        plan = json.loads(queryset.explain(format="json"))
+        # The driver may already have decoded the one-plan JSON array
+        if isinstance(plan, list):
+            (plan,) = plan
+        scans = full_scans(plan["Plan"], table)
+        if scans:
+            regressions[name] = scans
+
+    assert regressions == {}
@@ -54,6 +54,24 @@ class TestReorderByQuestionOptions:
         assert result[1]["label"] == "Second"
         assert result[2]["label"] == "Third"
 
+    def test_builder_list_options_supported(self):
+        """Options stored as a list of label/value dicts are honoured."""
+
+        class MockQuestion:
+            options = [
+                {"label": "Low", "value": "Low"},
+                {"label": "High", "value": "High"},
+            ]
+
+        options = [
+            {"label": "High", "count": 5, "percent": 50},
+            {"label": "Low", "count": 3, "percent": 30},
+        ]
+
+        result = _reorder_by_question_options(MockQuestion(), options)
+
+        assert [o["label"] for o in result] == ["Low", "High"]
+
     def test_unknown_options_sorted_by_count(self):
         """Options not in question definition should be sorted by count."""
 
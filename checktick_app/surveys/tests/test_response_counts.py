@@ -0,0 +1,133 @@
+"""Tests for the denormalised Survey.response_count."""
+
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+import pytest
+
+from checktick_app.surveys.models import Survey, SurveyQuestion, SurveyResponse
+from checktick_app.surveys.services import form_plan
+from checktick_app.surveys.services.response_counts import reserve_response
+
+
+@pytest.fixture(autouse=True)
+def disable_rate_limiting(settings):
+    settings.RATELIMIT_ENABLE = False
+
+
+@pytest.fixture
+def owner(django_user_model):
+    return django_user_model.objects.create_user(username="owner", password="p")
+
+
+@pytest.fixture
+def survey(owner):
+    survey = Survey.objects.create(
+        owner=owner,
+        name="S",
+        slug="s",
+        status=Survey.Status.PUBLISHED,
+        visibility=Survey.Visibility.PUBLIC,
+        max_responses=2,
+    )
+    SurveyQuestion.objects.create(
+        survey=survey, text="Name", type=SurveyQuestion.Types.TEXT, order=0
+    )
+    return survey
+
+
+def stored_count(survey):
+    return Survey.objects.values_list("response_count", flat=True).get(pk=survey.pk)
+
+
+@pytest.mark.django_db
+def test_count_follows_response_creation_and_deletion(survey):
+    first = SurveyResponse.objects.create(survey=survey, answers={})
+    SurveyResponse.objects.create(survey=survey, answers={})
+    assert stored_count(survey) == 2
+
+    first.delete()
+    assert stored_count(survey) == 1
+    survey.responses.all().delete()
+    assert stored_count(survey) == 0
+
+
+@pytest.mark.django_db
+def test_is_live_does_not_count_responses(survey):
+    SurveyResponse.objects.create(survey=survey, answers={})
+    survey.refresh_from_db()
+
+    with CaptureQueriesContext(connection) as ctx:
+        assert survey.is_live()
+    assert len(ctx) == 0
+
+    SurveyResponse.objects.create(survey=survey, answers={})
+    survey.refresh_from_db()
+    assert survey.is_full
+    assert not survey.is_live()
+
+
+@pytest.mark.django_db
+def test_full_survey_save_keeps_concurrent_counts(survey):
+    stale = Survey.objects.get(pk=survey.pk)
+    SurveyResponse.objects.create(survey=survey, answers={})
+
+    stale.name = "Renamed"
+    stale.save()
+
+    assert stored_count(survey) == 1
+    assert Survey.objects.get(pk=survey.pk).name == "Renamed"
+
+
+@pytest.mark.django_db
+def test_reservation_fails_once_full_even_for_stale_survey(survey):
+    stale = Survey.objects.get(pk=survey.pk)
+    assert stale.is_live()
+
+    assert reserve_response(survey)
+    assert reserve_response(survey)
+    # The check happens in the UPDATE, not against the loaded row
+    assert not reserve_response(stale)
+    assert stored_count(survey) == 2
+
+
+@pytest.mark.django_db
+def test_submission_past_max_responses_is_refused(client, survey):
+    question = survey.questions.get()
+    url = reverse("surveys:take", kwargs={"slug": survey.slug})
+    SurveyResponse.objects.create(survey=survey, answers={})
+
+    def take_last_place(survey):
+        # Another respondent submits after this request passed is_live()
+        SurveyResponse.objects.create(survey=survey, answers={})
+        return form_plan.get_form_plan(survey)
+
+    with patch(
+        "checktick_app.surveys.views.get_form_plan", side_effect=take_last_place
+    ):
+        response = client.post(url, {f"q_{question.id}": "Late"})
+
+    assert response.status_code == 302
+    assert "reason=max_responses" in response["Location"]
+    assert survey.responses.count() == 2
+    assert stored_count(survey) == 2
+
+
+@pytest.mark.django_db
+def test_reconcile_command_corrects_drift(survey):
+    SurveyResponse.objects.bulk_create(
+        [SurveyResponse(survey=survey, answers={}) for _ in range(3)]
+    )
+    assert stored_count(survey) == 0
+
+    out = StringIO()
+    call_command("reconcile_response_counts", "--dry-run", stdout=out)
+    assert "Would correct response counts for 1 surveys" in out.getvalue()
+    assert stored_count(survey) == 0
+
+    call_command("reconcile_response_counts", stdout=StringIO())
+    assert stored_count(survey) == 3
@@ -0,0 +1,121 @@
+"""Tests for atomic admission of participant submissions under concurrency."""
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import transaction
+import pytest
+
+from checktick_app.surveys.models import (
+    Survey,
+    SurveyAccessToken,
+    SurveyQuestion,
+    SurveyResponse,
+)
+from checktick_app.surveys.services.admission import (
+    SubmissionRefused,
+    admit_submission,
+    claim_token,
+)
+
+
+@pytest.fixture(autouse=True)
+def disable_rate_limiting(settings):
+    settings.RATELIMIT_ENABLE = False
+
+
+@pytest.fixture
+def owner(django_user_model):
+    return django_user_model.objects.create_user(username="owner", password="p")
+
+
+def make_survey(owner, visibility, max_responses=None, tokens=0):
+    survey = Survey.objects.create(
+        owner=owner,
+        name="S",
+        slug="s",
+        status=Survey.Status.PUBLISHED,
+        visibility=visibility,
+        max_responses=max_responses,
+    )
+    SurveyQuestion.objects.create(
+        survey=survey, text="Name", type=SurveyQuestion.Types.TEXT, order=0
+    )
+    for i in range(tokens):
+        SurveyAccessToken.objects.create(
+            survey=survey, token=f"token-{i}", created_by=owner
+        )
+    return survey
+
+
+@pytest.mark.django_db
+def test_token_can_only_be_claimed_once(owner):
+    survey = make_survey(owner, Survey.Visibility.TOKEN, tokens=1)
+    token = survey.access_tokens.get()
+    stale = SurveyAccessToken.objects.get(pk=token.pk)
+
+    assert claim_token(token)
+    assert token.used_at is not None
+    assert not claim_token(stale)
+
+
+@pytest.mark.django_db
+def test_refused_submission_releases_its_token(owner):
+    survey = make_survey(owner, Survey.Visibility.TOKEN, max_responses=1, tokens=2)
+    first, second = survey.access_tokens.order_by("token")
+    SurveyResponse.objects.create(survey=survey, answers={}, access_token=first)
+
+    with pytest.raises(SubmissionRefused) as refused:
+        with transaction.atomic():
+            admit_submission(survey, second)
+    assert refused.value.reason == "max_responses"
+
+    # The token claim was rolled back with the refusal
+    second.refresh_from_db()
+    assert second.used_at is None
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_submissions_respect_max_responses(live_server, owner):
+    survey = make_survey(owner, Survey.Visibility.PUBLIC, max_responses=5)
+
+    out = StringIO()
+    call_command(
+        "loadtest_submissions",
+        "--survey",
+        survey.slug,
+        "--url",
+        live_server.url,
+        "--requests",
+        "40",
+        "--concurrency",
+        "10",
+        stdout=out,
+    )
+
+    assert "submitted: 5" in out.getvalue()
+    survey.refresh_from_db()
+    assert survey.responses.count() == survey.response_count == 5
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_submissions_use_each_token_once(live_server, owner):
+    survey = make_survey(owner, Survey.Visibility.TOKEN, tokens=4)
+
+    out = StringIO()
+    call_command(
+        "loadtest_submissions",
+        "--survey",
+        survey.slug,
+        "--url",
+        live_server.url,
+        "--requests",
+        "32",
+        "--concurrency",
+        "8",
+        stdout=out,
+    )
+
+    assert "submitted: 4" in out.getvalue()
+    assert survey.responses.count() == 4
+    assert not survey.access_tokens.filter(used_at__isnull=True).exists()
@@ -375,3 +375,59 @@ class TestSurveyUnlockView:
         # Try to get KEK for different survey - should fail
         kek = get_survey_key_from_session(request, other_survey.slug)
         assert kek is None
+
+    def test_unlocked_kek_cached_after_unlock(
+        self, client_logged_in, dual_encrypted_survey, monkeypatch
+    ):
+        """Requests after unlock reuse the cached KEK without running a KDF."""
+        from django.test import RequestFactory
+
+        from checktick_app.surveys import utils
+        from checktick_app.surveys.services.unlocked_key_store import UnlockedKeyStore
+        from checktick_app.surveys.views import get_survey_key_from_session
+
+        client_logged_in.post(
+            reverse("surveys:unlock", args=[dual_encrypted_survey.slug]),
+            {"unlock_method": "password", "password": "TestPassword123"},
+        )
+        assert UnlockedKeyStore.SESSION_KEY in client_logged_in.session
+
+        def fail_kdf(*args, **kwargs):
+            raise AssertionError("KDF should not run on a cache hit")
+
+        monkeypatch.setattr(utils, "decrypt_sensitive", fail_kdf)
+        monkeypatch.setattr(utils, "decrypt_kek_with_passphrase", fail_kdf)
+        UnlockedKeyStore.reset_stats()
+
+        request = RequestFactory().get("/")
+        request.session = client_logged_in.session
+        kek1 = get_survey_key_from_session(request, dual_encrypted_survey.slug)
+        kek2 = get_survey_key_from_session(request, dual_encrypted_survey.slug)
+
+        assert kek1 == kek2 == b"0" * 32
+        stats = UnlockedKeyStore.stats()
+        assert stats["hits"] == 2
+        assert stats["hit_rate"] == 1.0
+
+    def test_unlocked_kek_bound_to_session_key(
+        self, client_logged_in, dual_encrypted_survey
+    ):
+        """A wrapped KEK copied to another session cannot be unwrapped."""
+        from django.contrib.sessions.backends.db import SessionStore
+        from django.test import RequestFactory
+
+        from checktick_app.surveys.services.unlocked_key_store import UnlockedKeyStore
+
+        client_logged_in.post(
+            reverse("surveys:unlock", args=[dual_encrypted_survey.slug]),
+            {"unlock_method": "password", "password": "TestPassword123"},
+        )
+        other_session = SessionStore()
+        other_session.create()
+        other_session[UnlockedKeyStore.SESSION_KEY] = client_logged_in.session[
+            UnlockedKeyStore.SESSION_KEY
+        ]
+
+        request = RequestFactory().get("/")
+        request.session = other_session
+        assert UnlockedKeyStore.get(request, dual_encrypted_survey.slug) is None
@@ -0,0 +1,351 @@
+"""Tests for the database-backed background task queue."""
+
+from datetime import timedelta
+from io import StringIO
+import time
+from unittest.mock import patch
+
+from django.core import mail
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+import pytest
+
+from checktick_app.core import email_utils
+from checktick_app.surveys.models import Survey, SurveyAccessToken, Task
+from checktick_app.surveys.services import task_queue
+from checktick_app.surveys.services.task_queue import (
+    TaskError,
+    claim_next_task,
+    enqueue,
+    heartbeat,
+    report_progress,
+    run_task,
+    task_status,
+)
+
+
+@pytest.fixture
+def owner(django_user_model):
+    return django_user_model.objects.create_user(
+        username="owner", password="p", email="owner@example.com"
+    )
+
+
+@pytest.fixture
+def survey(owner):
+    return Survey.objects.create(
+        owner=owner,
+        name="S",
+        slug="s",
+        status=Survey.Status.PUBLISHED,
+        visibility=Survey.Visibility.TOKEN,
+    )
+
+
+@pytest.fixture
+def handlers():
+    """Register test handlers for the duration of a test."""
+    with patch.dict(task_queue.TASK_HANDLERS):
+        yield task_queue.TASK_HANDLERS
+
+
+@pytest.mark.django_db
+def test_enqueue_rejects_unknown_task():
+    with pytest.raises(ValueError, match="Unknown task"):
+        enqueue("no_such_task")
+
+
+@pytest.mark.django_db
+def test_worker_runs_task_and_reports_result(handlers):
+    def echo(task):
+        report_progress(task, 50, "Halfway", seen=task.payload["value"])
+        return {"done": True}
+
+    handlers["echo"] = echo
+    task = enqueue("echo", {"value": 3})
+    assert task_status(task)["status"] == "processing"
+
+    claimed = claim_next_task()
+    assert claimed.id == task.id
+    assert claim_next_task() is None
+
+    run_task(claimed)
+    task.refresh_from_db()
+
+    assert task.status == Task.Status.SUCCEEDED
+    assert task.attempts == 1
+    assert task_status(task) == {
+        "seen": 3,
+        "done": True,
+        "status": "completed",
+        "progress": 100,
+        "message": "Halfway",
+    }
+
+
+@pytest.mark.django_db
+def test_failed_attempts_are_retried_with_backoff(handlers, settings):
+    settings.CHECKTICK_TASK_RETRY_BACKOFF_SECONDS = 60
+    handlers["flaky"] = lambda task: 1 / 0
+    task = enqueue("flaky", max_attempts=2)
+
+    run_task(claim_next_task())
+    task.refresh_from_db()
+
+    assert task.status == Task.Status.QUEUED
+    assert task.run_after > timezone.now() + timedelta(seconds=30)
+    assert "division by zero" in task.error
+    # Not due yet
+    assert claim_next_task() is None
+
+    Task.objects.filter(id=task.id).update(run_after=timezone.now())
+    run_task(claim_next_task())
+    task.refresh_from_db()
+
+    assert task.status == Task.Status.FAILED
+    assert task.attempts == 2
+    assert task_status(task)["status"] == "error"
+
+
+@pytest.mark.django_db
+def test_task_error_fails_without_retry(handlers):
+    def refuse(task):
+        raise TaskError("Nothing to do")
+
+    handlers["refuse"] = refuse
+    task = enqueue("refuse")
+
+    run_task(claim_next_task())
+    task.refresh_from_db()
+
+    assert task.status == Task.Status.FAILED
+    assert task_status(task)["message"] == "Nothing to do"
+
+
+@pytest.mark.django_db
+def test_stale_running_task_is_reclaimed(handlers):
+    handlers["noop"] = lambda task: None
+    task = enqueue("noop")
+    claim_next_task()
+
+    # Its worker stopped sending heartbeats
+    Task.objects.filter(id=task.id).update(
+        locked_at=timezone.now() - timedelta(hours=1)
+    )
+    reclaimed = claim_next_task()
+
+    assert reclaimed.id == task.id
+    assert reclaimed.attempts == 2
+
+
+@pytest.mark.django_db
+def test_stale_task_on_its_last_attempt_fails(handlers):
+    handlers["noop"] = lambda task: None
+    task = enqueue("noop", max_attempts=1)
+    claim_next_task()
+
+    # Its worker died (OOM, hard timeout) on the only attempt
+    Task.objects.filter(id=task.id).update(
+        locked_at=timezone.now() - timedelta(hours=1)
+    )
+
+    assert claim_next_task() is None
+    task.refresh_from_db()
+    assert task.status == Task.Status.FAILED
+    assert task.attempts == 1
+    assert "stopped responding" in task.error
+
+
+@pytest.mark.django_db(transaction=True)
+def test_heartbeat_keeps_long_call_from_being_reclaimed(handlers, settings):
+    settings.CHECKTICK_TASK_STALE_SECONDS = 1
+    reclaimed = []
+
+    def slow(task):
+        with heartbeat(task, interval=0.1):
+            time.sleep(1.5)
+            reclaimed.append(claim_next_task())
+
+    handlers["slow"] = slow
+    enqueue("slow")
+    task = claim_next_task()
+    run_task(task)
+    task.refresh_from_db()
+
+    assert reclaimed == [None]
+    assert task.status == Task.Status.SUCCEEDED
+    assert task.attempts == 1
+
+
+@pytest.mark.django_db
+def test_send_invites_resumes_after_sent_invitations(survey, owner):
+    task = enqueue(
+        "send_invites",
+        {
+            "emails": ["a@example.com", "not-an-email", "c@example.com"],
+            "visibility": Survey.Visibility.TOKEN,
+            "end_at": None,
+            "contact_email": owner.email,
+            "include_qr_code": False,
+        },
+        survey=survey,
+        created_by=owner,
+    )
+    # A previous attempt already sent the first invitation
+    task.result = {"next_index": 1, "sent_count": 1, "failed_emails": []}
+    task.save()
+
+    run_task(claim_next_task())
+    task.refresh_from_db()
+
+    assert [m.to for m in mail.outbox] == [["c@example.com"]]
+    token = SurveyAccessToken.objects.get(survey=survey)
+    assert token.note == "Invited: c@example.com"
+    assert f"/surveys/s/take/token/{token.token}/" in mail.outbox[0].body
+    status = task_status(task)
+    assert status["status"] == "completed"
+    assert status["sent_count"] == 2
+    assert status["failed_emails"] == ["not-an-email (invalid format)"]
+
+
+@pytest.mark.django_db
+def test_send_invites_batches_over_one_connection(survey, owner, settings):
+    settings.CHECKTICK_INVITE_BATCH_SIZE = 2
+    emails = [f"p{i}@example.com" for i in range(5)]
+    task = enqueue(
+        "send_invites",
+        {
+            "emails": emails,
+            "visibility": Survey.Visibility.TOKEN,
+            "end_at": None,
+            "contact_email": owner.email,
+            "include_qr_code": True,
+        },
+        survey=survey,
+        created_by=owner,
+    )
+
+    with (
+        patch(
+            "checktick_app.core.email_utils.get_connection",
+            wraps=email_utils.get_connection,
+        ) as get_connection,
+        patch(
+            "checktick_app.surveys.tasks.report_progress",
+            wraps=task_queue.report_progress,
+        ) as progress,
+    ):
+        run_task(claim_next_task())
+    task.refresh_from_db()
+
+    assert get_connection.call_count == 1
+    # Progress is saved once per batch, not once per email
+    assert progress.call_count == 3
+    assert task.result["next_index"] == 5
+    assert task.result["sent_count"] == 5
+
+    tokens = {t.note: t.token for t in SurveyAccessToken.objects.filter(survey=survey)}
+    assert len(tokens) == 5
+    for message in mail.outbox:
+        (to_email,) = message.to
+        html = message.alternatives[0][0]
+        # Each recipient gets their own link and QR code
+        assert tokens[f"Invited: {to_email}"] in message.body
+        assert "data:image/png;base64," in html
+        assert "CHECKTICKRECIPIENT" not in html
+
+
+@pytest.mark.django_db
+def test_send_invites_opens_one_smtp_session(survey, owner, settings):
+    settings.EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+    settings.EMAIL_USE_TLS = False
+    settings.EMAIL_HOST_USER = ""
+    settings.CHECKTICK_INVITE_BATCH_SIZE = 2
+    enqueue(
+        "send_invites",
+        {
+            "emails": [f"p{i}@example.com" for i in range(5)],
+            "visibility": Survey.Visibility.TOKEN,
+            "end_at": None,
+            "contact_email": owner.email,
+            "include_qr_code": False,
+        },
+        survey=survey,
+        created_by=owner,
+    )
+
+    with patch("django.core.mail.backends.smtp.smtplib.SMTP") as smtp:
+        smtp.return_value.sendmail.return_value = {}
+        run_task(claim_next_task())
+
+    # One SMTP session for every batch, ended once
+    assert smtp.call_count == 1
+    assert smtp.return_value.sendmail.call_count == 5
+    assert smtp.return_value.quit.call_count == 1
+
+
+@pytest.mark.django_db
+def test_send_invites_authenticated_new_and_existing_users(
+    survey, owner, django_user_model
+):
+    django_user_model.objects.create_user(
+        username="member", password="p", email="member@example.com"
+    )
+    survey.visibility = Survey.Visibility.AUTHENTICATED
+    survey.save()
+    enqueue(
+        "send_invites",
+        {
+            "emails": ["member@example.com", "new@example.com"],
+            "visibility": Survey.Visibility.AUTHENTICATED,
+            "end_at": None,
+            "contact_email": owner.email,
+            "include_qr_code": False,
+        },
+        survey=survey,
+        created_by=owner,
+    )
+
+    run_task(claim_next_task())
+
+    by_recipient = {m.to[0]: m for m in mail.outbox}
+    assert by_recipient["member@example.com"].subject == (
+        "You're invited to complete: S"
+    )
+    new_user = by_recipient["new@example.com"]
+    assert new_user.subject == "You're invited to join CheckTick and complete: S"
+    assert "email=new@example.com" in new_user.alternatives[0][0]
+    assert SurveyAccessToken.objects.filter(for_authenticated=True).count() == 2
+
+
+@pytest.mark.django_db
+def test_send_invites_view_queues_task_and_status_reads_it(client, survey, owner):
+    client.force_login(owner)
+    response = client.post(
+        reverse("surveys:send_invites_async", kwargs={"slug": survey.slug}),
+        {"invite_emails": "a@example.com; b@example.com"},
+    )
+    data = response.json()
+    assert data["total_emails"] == 2
+
+    status_url = reverse(
+        "surveys:email_status", kwargs={"slug": survey.slug, "task_id": data["task_id"]}
+    )
+    status = client.get(status_url).json()
+    assert status["status"] == "processing"
+    assert status["progress"] == 0
+
+    call_command("run_worker", "--once", stdout=StringIO())
+
+    status = client.get(status_url).json()
+    assert status["status"] == "completed"
+    assert status["sent_count"] == 2
+
+    # Unknown ids, and tasks of other kinds, are not found
+    for task_id in ["not-a-uuid", data["task_id"]]:
+        url = reverse(
+            "surveys:translation_status",
+            kwargs={"slug": survey.slug, "task_id": task_id},
+        )
+        assert client.get(url).status_code == 404
@@ -0,0 +1,115 @@
+"""Tests for the bucketed time series service behind dashboard sparklines."""
+
+from datetime import timedelta
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+import pytest
+
+from checktick_app.surveys.models import Survey, SurveyResponse
+from checktick_app.surveys.services.time_series import (
+    count_by_bucket,
+    floor_to_bucket,
+    recent_series,
+)
+
+TEST_PASSWORD = "x"  # noqa: S105
+
+
+@pytest.fixture
+def user(db):
+    from django.contrib.auth import get_user_model
+
+    return get_user_model().objects.create_user(
+        username="seriesuser", password=TEST_PASSWORD
+    )
+
+
+@pytest.fixture
+def survey(user):
+    return Survey.objects.create(name="Series", slug="series", owner=user)
+
+
+def _response_at(survey, when):
+    response = SurveyResponse.objects.create(survey=survey, answers={})
+    response.submitted_at = when
+    response.save(update_fields=["submitted_at"])
+    return response
+
+
+@pytest.mark.django_db
+class TestCountByBucket:
+    def test_fills_gaps_with_zeros(self, survey):
+        today = floor_to_bucket(timezone.now(), "day")
+        _response_at(survey, today - timedelta(days=4, hours=-2))
+        _response_at(survey, today - timedelta(days=4, hours=-3))
+        _response_at(survey, today + timedelta(hours=1))
+
+        series = count_by_bucket(
+            survey.responses.all(),
+            "submitted_at",
+            today - timedelta(days=5),
+            today + timedelta(days=1),
+        )
+
+        assert series.counts == [0, 2, 0, 0, 0, 1]
+        assert series.labels[-1] == today.date().isoformat()
+        assert series.total == 3
+
+    def test_single_query_regardless_of_range(self, survey):
+        now = timezone.now()
+        for days_ago in (0, 100, 300):
+            _response_at(survey, now - timedelta(days=days_ago))
+
+        with CaptureQueriesContext(connection) as ctx:
+            series = count_by_bucket(
+                survey.responses.all(),
+                "submitted_at",
+                now - timedelta(days=365),
+                now + timedelta(days=1),
+            )
+
+        assert len(ctx.captured_queries) == 1
+        assert series.total == 3
+
+    def test_hour_and_week_buckets(self, survey):
+        now = timezone.now()
+        _response_at(survey, now - timedelta(hours=2))
+
+        hourly = recent_series(survey.responses.all(), "submitted_at", "hour")
+        assert len(hourly.counts) == 48
+        assert hourly.counts[-3] == 1
+
+        weekly = recent_series(survey.responses.all(), "submitted_at", "week")
+        assert len(weekly.counts) == 12
+        assert weekly.total == 1
+        assert all(start.weekday() == 0 for start in weekly.starts)
+
+    def test_unknown_bucket_rejected(self, survey):
+        with pytest.raises(ValueError):
+            recent_series(survey.responses.all(), "submitted_at", "month")
+
+
+@pytest.mark.django_db
+def test_dashboard_query_count_independent_of_survey_age(user, survey):
+    """A survey live for a year must not cost one query per day."""
+    client = Client()
+    client.login(username="seriesuser", password=TEST_PASSWORD)
+    url = f"/surveys/{survey.slug}/dashboard/"
+    # Warm the branding cache and session flags so both runs start alike
+    assert client.get(url).status_code == 200
+
+    survey.start_at = timezone.now() - timedelta(days=3)
+    survey.save(update_fields=["start_at"])
+    with CaptureQueriesContext(connection) as short_lived:
+        assert client.get(url).status_code == 200
+
+    survey.start_at = timezone.now() - timedelta(days=365)
+    survey.save(update_fields=["start_at"])
+    with CaptureQueriesContext(connection) as long_lived:
+        response = client.get(url)
+        assert response.status_code == 200
+
+    assert len(long_lived.captured_queries) == len(short_lived.captured_queries)
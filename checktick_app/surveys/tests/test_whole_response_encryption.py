@@ -1,11 +1,20 @@
 """Tests for whole-response encryption for patient data surveys."""
 
+from io import StringIO
 import os
 
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 import pytest
 
+from checktick_app.surveys import utils
 from checktick_app.surveys.models import QuestionGroup, Survey, SurveyResponse
+from checktick_app.surveys.utils import (
+    RESPONSE_BLOB_MAGIC,
+    DerivedKeyCache,
+    encrypt_sensitive,
+    get_response_key_cache,
+)
 
 User = get_user_model()
 
@@ -302,3 +311,114 @@ class TestBackwardsCompatibility:
         assert response.load_demographics(survey_key) == demographics
         # Plaintext answers should be accessible
         assert response.answers == {"q1": "plaintext answer"}
+
+
+@pytest.mark.django_db
+class TestResponseBlobV2:
+    """Test the v2 response blob format and the per-survey data key cache."""
+
+    def test_new_blobs_use_v2_format(self, survey_with_patient_data, user):
+        """Newly stored responses are written in the v2 format."""
+        survey_key = os.urandom(32)
+        response = SurveyResponse.objects.create(
+            survey=survey_with_patient_data, submitted_by=user
+        )
+
+        response.store_complete_response(survey_key, {"q1": "yes"}, {"nhs": "1"})
+        response.save()
+        response.refresh_from_db()
+
+        assert bytes(response.enc_answers).startswith(RESPONSE_BLOB_MAGIC)
+        assert response.needs_rewrap is False
+        assert response.load_complete_response(survey_key)["answers"] == {"q1": "yes"}
+
+    def test_legacy_blobs_still_readable(self, survey_with_patient_data, user):
+        """Blobs written by encrypt_sensitive keep decrypting."""
+        survey_key = os.urandom(32)
+        full_response = {"answers": {"q1": "legacy"}}
+        response = SurveyResponse.objects.create(
+            survey=survey_with_patient_data,
+            submitted_by=user,
+            enc_answers=encrypt_sensitive(survey_key, full_response),
+        )
+        response.refresh_from_db()
+
+        assert response.needs_rewrap is True
+        assert response.load_complete_response(survey_key) == full_response
+
+    def test_many_responses_derive_key_once(
+        self, survey_with_patient_data, user, monkeypatch
+    ):
+        """Decrypting N v2 responses runs the KDF once per survey key."""
+        survey_key = os.urandom(32)
+        get_response_key_cache().clear()
+        for i in range(5):
+            response = SurveyResponse(survey=survey_with_patient_data)
+            response.store_complete_response(survey_key, {"q1": str(i)})
+            response.save()
+
+        get_response_key_cache().clear()
+        calls = []
+        original_derive = utils.HKDF.derive
+
+        def counting_derive(self, key_material):
+            calls.append(1)
+            return original_derive(self, key_material)
+
+        monkeypatch.setattr(utils.HKDF, "derive", counting_derive)
+
+        loaded = [
+            r.load_complete_response(survey_key)["answers"]["q1"]
+            for r in SurveyResponse.objects.filter(
+                survey=survey_with_patient_data
+            ).order_by("id")
+        ]
+
+        assert loaded == ["0", "1", "2", "3", "4"]
+        assert len(calls) == 1
+
+    def test_rewrap_command_converts_legacy_blobs(
+        self, survey_with_patient_data, user, monkeypatch
+    ):
+        """rewrap_response_encryption upgrades legacy blobs in place."""
+        survey_key = os.urandom(32)
+        password = "correct horse battery staple"  # noqa: S105
+        survey_with_patient_data.set_dual_encryption(
+            survey_key, password, ["alpha", "beta", "gamma", "delta"]
+        )
+        legacy = SurveyResponse.objects.create(
+            survey=survey_with_patient_data,
+            enc_answers=encrypt_sensitive(survey_key, {"answers": {"q1": "a"}}),
+        )
+        current = SurveyResponse(survey=survey_with_patient_data)
+        current.store_complete_response(survey_key, {"q1": "b"})
+        current.save()
+        monkeypatch.setenv("REWRAP_TEST_PASSWORD", password)
+
+        out = StringIO()
+        call_command(
+            "rewrap_response_encryption",
+            "--survey",
+            survey_with_patient_data.slug,
+            "--password-env",
+            "REWRAP_TEST_PASSWORD",
+            stdout=out,
+        )
+
+        legacy.refresh_from_db()
+        assert legacy.needs_rewrap is False
+        assert legacy.load_complete_response(survey_key) == {"answers": {"q1": "a"}}
+        assert "Re-wrapped 1 responses (1 already in v2 format" in out.getvalue()
+
+    def test_derived_key_cache_evicts_expired_and_oldest(self):
+        """The derived key cache is bounded and TTL-evicted."""
+        cache = DerivedKeyCache(max_entries=2, ttl_seconds=60)
+        cache.set("a", b"1")
+        cache.set("b", b"2")
+        cache.set("c", b"3")
+        assert cache.get("a") is None
+        assert cache.get("c") == b"3"
+
+        expiring = DerivedKeyCache(max_entries=2, ttl_seconds=0)
+        expiring.set("a", b"1")
+        assert expiring.get("a") is None
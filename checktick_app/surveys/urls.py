@@ -178,6 +178,7 @@ urlpatterns = [
     path("<slug:slug>/closed/", views.survey_closed, name="closed"),
     path("<slug:slug>/", views.survey_detail, name="detail"),
     path("<slug:slug>/dashboard/", views.survey_dashboard, name="dashboard"),
+    path("<slug:slug>/insights/", views.survey_insights, name="insights"),
     path("<slug:slug>/update-title/", views.update_survey_title, name="update_title"),
     path("<slug:slug>/delete/", views.survey_delete, name="delete"),
     path(
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+from collections import OrderedDict
+import hashlib
 import json
 import os
 import secrets
-from typing import Tuple
+import threading
+import time
+from typing import BinaryIO, Hashable, Iterable, Iterator, Tuple
 
+from cryptography.exceptions import InvalidTag
 from cryptography.hazmat.primitives import hashes, hmac
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
 
@@ -300,6 +306,271 @@ def decrypt_sensitive(passphrase_key: bytes, blob: bytes) -> dict:
     return json.loads(pt.decode("utf-8"))
 
 
+# Versioned response blob format (v2)
+#
+# Legacy response blobs are ``salt (16) | nonce (12) | ciphertext`` and run a
+# full Scrypt derivation per blob, so decrypting N responses costs N Scrypt
+# calls. v2 blobs expand the survey KEK once through HKDF into a data key that
+# is shared by every response of the survey, and only the AES-GCM nonce is
+# per-response:
+#
+#     magic (4) | nonce (12) | ciphertext
+#
+# The derived data key is held in a small in-process cache keyed by
+# (survey id, key fingerprint) so exports and analytics pay one KDF per survey.
+RESPONSE_BLOB_MAGIC = b"CTR2"
+RESPONSE_DATA_KEY_INFO = b"checktick-response-data-key-v2"
+
+_RESPONSE_KEY_CACHE: DerivedKeyCache | None = None
+_RESPONSE_KEY_CACHE_LOCK = threading.Lock()
+
+
+class DerivedKeyCache:
+    """
+    Bounded, TTL-evicted, thread-safe cache of derived keys.
+
+    Entries expire ``ttl_seconds`` after they were stored and the least
+    recently used entry is evicted once ``max_entries`` is reached. Only
+    derived keys are cached, never passphrases or KEKs.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[Hashable, tuple[float, bytes]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, cache_key: Hashable) -> bytes | None:
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[cache_key]
+                return None
+            self._entries.move_to_end(cache_key)
+            return value
+
+    def set(self, cache_key: Hashable, value: bytes) -> None:
+        with self._lock:
+            self._entries[cache_key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def get_response_key_cache() -> DerivedKeyCache:
+    """Return the process-wide response data key cache (created lazily)."""
+    global _RESPONSE_KEY_CACHE
+    if _RESPONSE_KEY_CACHE is None:
+        from django.conf import settings
+
+        with _RESPONSE_KEY_CACHE_LOCK:
+            if _RESPONSE_KEY_CACHE is None:
+                _RESPONSE_KEY_CACHE = DerivedKeyCache(
+                    max_entries=getattr(
+                        settings, "CHECKTICK_RESPONSE_KEY_CACHE_SIZE", 256
+                    ),
+                    ttl_seconds=getattr(
+                        settings, "CHECKTICK_RESPONSE_KEY_CACHE_TTL_SECONDS", 300
+                    ),
+                )
+    return _RESPONSE_KEY_CACHE
+
+
+def key_fingerprint(key: bytes) -> str:
+    """Return a short, non-reversible fingerprint identifying a key."""
+    return hashlib.sha256(b"checktick-key-fingerprint:" + bytes(key)).hexdigest()[:32]
+
+
+def derive_response_data_key(survey_key: bytes, survey_id: int | None = None) -> bytes:
+    """
+    Expand a survey KEK into the data key used for v2 response blobs.
+
+    Args:
+        survey_key: Survey's KEK
+        survey_id: Survey primary key, used to scope the cache entry
+
+    Returns:
+        32-byte AES-256-GCM data key
+    """
+    survey_key = bytes(survey_key)
+    cache = get_response_key_cache()
+    cache_key = (survey_id, key_fingerprint(survey_key))
+    data_key = cache.get(cache_key)
+    if data_key is None:
+        data_key = HKDF(
+            algorithm=hashes.SHA256(),
+            length=32,
+            salt=None,
+            info=RESPONSE_DATA_KEY_INFO,
+        ).derive(survey_key)
+        cache.set(cache_key, data_key)
+    return data_key
+
+
+def is_legacy_response_blob(blob: bytes) -> bool:
+    """Return True if ``blob`` is not in the v2 response format."""
+    return not bytes(blob).startswith(RESPONSE_BLOB_MAGIC)
+
+
+def encrypt_response_data(
+    survey_key: bytes, data: dict, survey_id: int | None = None
+) -> bytes:
+    """
+    Encrypt response data in the v2 blob format.
+
+    Args:
+        survey_key: Survey's KEK (32-byte key)
+        data: JSON-serialisable dictionary to encrypt
+        survey_id: Survey primary key, used to scope the derived key cache
+
+    Returns:
+        Binary blob: magic (4) | nonce (12) | ciphertext
+    """
+    aesgcm = AESGCM(derive_response_data_key(survey_key, survey_id))
+    nonce = os.urandom(12)
+    plaintext = json.dumps(data).encode("utf-8")
+    ct = aesgcm.encrypt(nonce, plaintext, RESPONSE_BLOB_MAGIC)
+    return RESPONSE_BLOB_MAGIC + nonce + ct
+
+
+def decrypt_response_data(
+    survey_key: bytes, blob: bytes, survey_id: int | None = None
+) -> dict:
+    """
+    Decrypt a response blob in either the v2 or the legacy format.
+
+    Args:
+        survey_key: Survey's KEK (32-byte key)
+        blob: Blob from encrypt_response_data or legacy encrypt_sensitive
+        survey_id: Survey primary key, used to scope the derived key cache
+
+    Returns:
+        Decrypted dictionary
+
+    Raises:
+        cryptography.exceptions.InvalidTag: If the key is incorrect
+    """
+    blob = bytes(blob)
+    if not is_legacy_response_blob(blob):
+        magic_len = len(RESPONSE_BLOB_MAGIC)
+        nonce, ct = blob[magic_len : magic_len + 12], blob[magic_len + 12 :]
+        aesgcm = AESGCM(derive_response_data_key(survey_key, survey_id))
+        try:
+            pt = aesgcm.decrypt(nonce, ct, RESPONSE_BLOB_MAGIC)
+            return json.loads(pt.decode("utf-8"))
+        except InvalidTag:
+            # A legacy blob whose random salt happens to start with the magic
+            # bytes; fall through to the legacy format.
+            pass
+    return decrypt_sensitive(survey_key, blob)
+
+
+# Framed export stream format
+#
+# Password-protected exports are encrypted as a sequence of independently
+# authenticated AES-GCM frames so that neither writer nor reader has to hold
+# the whole file in memory:
+#
+#     magic (4) | salt (16) | frame | frame | ...
+#     frame = length (4, big-endian) | nonce (12) | ciphertext
+#
+# The key is derived once per file with Scrypt. Each frame's associated data
+# binds its index and whether it is the final frame, so frames cannot be
+# reordered, dropped or the file truncated without failing authentication.
+EXPORT_STREAM_MAGIC = b"CTE1"
+
+
+def _export_frame_aad(index: int, final: bool) -> bytes:
+    flag = b"\x01" if final else b"\x00"
+    return EXPORT_STREAM_MAGIC + index.to_bytes(8, "big") + flag
+
+
+def encrypt_stream(passphrase: bytes, chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """
+    Encrypt an iterable of byte chunks in the framed export stream format.
+
+    Args:
+        passphrase: Password the reader will need to decrypt the stream
+        chunks: Plaintext chunks; each becomes one frame
+
+    Yields:
+        The header, then one encrypted frame per chunk
+    """
+    key, salt = derive_key(passphrase)
+    return encrypt_stream_with_key(key, salt, chunks)
+
+
+def encrypt_stream_with_key(
+    key: bytes, salt: bytes, chunks: Iterable[bytes]
+) -> Iterator[bytes]:
+    """
+    Like encrypt_stream, with a key and salt already produced by derive_key.
+
+    Lets queued exports derive the key when the export is requested and
+    encrypt the file later, without keeping the password.
+    """
+    aesgcm = AESGCM(key)
+    yield EXPORT_STREAM_MAGIC + salt
+
+    chunks = iter(chunks)
+    pending = next(chunks, b"")
+    index = 0
+    while True:
+        following = next(chunks, None)
+        final = following is None
+        nonce = os.urandom(12)
+        ct = aesgcm.encrypt(nonce, pending, _export_frame_aad(index, final))
+        yield len(ct).to_bytes(4, "big") + nonce + ct
+        if final:
+            return
+        pending = following
+        index += 1
+
+
+def decrypt_stream(passphrase: bytes, stream: BinaryIO) -> Iterator[bytes]:
+    """
+    Decrypt a file object written by encrypt_stream, one frame at a time.
+
+    Raises:
+        ValueError: If the stream is not in the export format or is truncated
+        cryptography.exceptions.InvalidTag: If the password is incorrect or a
+            frame has been tampered with
+    """
+    header = stream.read(len(EXPORT_STREAM_MAGIC) + 16)
+    if not header.startswith(EXPORT_STREAM_MAGIC):
+        raise ValueError("Not an encrypted CheckTick export")
+    key, _ = derive_key(passphrase, header[len(EXPORT_STREAM_MAGIC) :])
+    aesgcm = AESGCM(key)
+
+    index = 0
+    frame_header = stream.read(16)
+    while frame_header:
+        if len(frame_header) < 16:
+            raise ValueError("Encrypted export is truncated")
+        length = int.from_bytes(frame_header[:4], "big")
+        ct = stream.read(length)
+        if len(ct) < length:
+            raise ValueError("Encrypted export is truncated")
+        next_header = stream.read(16)
+        yield aesgcm.decrypt(
+            frame_header[4:], ct, _export_frame_aad(index, not next_header)
+        )
+        frame_header = next_header
+        index += 1
+    if index == 0:
+        raise ValueError("Encrypted export is truncated")
+
+
 def make_key_hash(key: bytes) -> tuple[bytes, bytes]:
     salt = os.urandom(16)
     kdf = PBKDF2HMAC(
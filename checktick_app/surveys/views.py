@@ -17,7 +17,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.core.exceptions import PermissionDenied, ValidationError
 from django.db import DatabaseError, models, transaction
-from django.db.models import Q, QuerySet
+from django.db.models import Exists, OuterRef, Q, QuerySet
 from django.http import (
     Http404,
     HttpRequest,
@@ -36,6 +36,7 @@ from django.utils.translation import gettext as _
 from django.views.decorators.http import require_http_methods
 from django_ratelimit.decorators import ratelimit
 
+from .branching import compile_branching
 from .color import hex_to_oklch
 from .external_datasets import get_available_datasets
 from .llm_client import ConversationalSurveyLLM
@@ -60,6 +61,7 @@ from .models import (
     SurveyQuestion,
     SurveyQuestionCondition,
     SurveyResponse,
+    Task,
 )
 from .permissions import (
     can_create_datasets,
@@ -73,6 +75,15 @@ from .permissions import (
     require_can_edit_dataset,
     require_can_view,
 )
+from .services.accessible_surveys import accessible_surveys, translations_by_survey
+from .services.admission import SubmissionRefused, admit_submission
+from .services.answer_aggregates import CHARTABLE_TYPES
+from .services.form_plan import bump_content_version, get_form_plan
+from .services.imd_service import IMDService
+from .services.response_counts import mark_reserved
+from .services.task_queue import enqueue, task_status
+from .services.time_series import count_by_bucket, summary_counts
+from .services.unlocked_key_store import UnlockedKeyStore
 from .utils import verify_key
 
 logger = logging.getLogger(__name__)
@@ -115,11 +126,13 @@ def _enrich_demographics_with_imd(
     demo: dict[str, str], patient_group: QuestionGroup | None
 ) -> dict[str, str]:
     """
-    If include_imd is enabled and a postcode is present, look up IMD decile.
+    If include_imd is enabled and a postcode is present, add its IMD decile.
 
     Adds 'imd_decile' (1-10, where 1=most deprived) to the demographics dict.
-    The IMD lookup is non-blocking - if it fails, the submission continues
-    without IMD data.
+    Only the IMD cache is read, so a slow IMD API never holds up a
+    submission: a postcode that is not cached yet is looked up by a
+    background task, and exports and the response API add its decile from
+    the cache.
 
     Args:
         demo: Demographics dictionary (may contain 'post_code')
@@ -141,16 +154,16 @@ def _enrich_demographics_with_imd(
     if not postcode:
         return demo
 
-    # Import here to avoid circular imports
-    from .services.imd_service import IMDService
-
     if not IMDService.is_configured():
         logger.warning("IMD lookup requested but API not configured")
         return demo
 
-    result = IMDService.lookup_imd(postcode)
+    clean_postcode = IMDService.normalize_postcode(postcode)
+    result = IMDService.cached_imd([clean_postcode]).get(clean_postcode)
 
-    if result.is_valid:
+    if result is None:
+        IMDService.queue_lookup(clean_postcode)
+    elif result.is_valid:
         demo["imd_decile"] = str(result.imd_decile)
         if result.imd_rank is not None:
             demo["imd_rank"] = str(result.imd_rank)
@@ -515,7 +528,11 @@ def survey_list(request: HttpRequest) -> HttpResponse:
     - Team: Surveys belonging to teams the user is a member of
     - Organisation: Surveys in organisations the user is a member of
     - Shared: Surveys explicitly shared with the user via SurveyMembership
+
+    Surveys are paginated, 50 per page, in the order of the groups.
     """
+    from django.core.paginator import Paginator
+
     from .models import LANGUAGE_FLAGS, LANGUAGE_NAMES, SurveyMembership, TeamMembership
 
     user = request.user
@@ -532,95 +549,18 @@ def survey_list(request: HttpRequest) -> HttpResponse:
             },
         )
 
-    # Collect all surveys the user can access, with role information
-    survey_access = {}  # survey_id -> {survey, role, source, source_name}
-
-    # 1. Owned surveys - user is the creator/owner
-    owned_surveys = Survey.objects.filter(owner=user, is_original=True).select_related(
-        "team", "organization"
-    )
-    for survey in owned_surveys:
-        survey_access[survey.id] = {
-            "survey": survey,
-            "role": "owner",
-            "source": "owned",
-            "source_name": None,
-            "can_edit": True,
-            "can_manage": True,
-        }
-
-    # 2. Team surveys - surveys belonging to teams user is a member of
-    team_memberships = TeamMembership.objects.filter(user=user).select_related("team")
-    team_ids = [tm.team_id for tm in team_memberships]
-    team_roles = {tm.team_id: tm.role for tm in team_memberships}
-
-    if team_ids:
-        team_surveys = Survey.objects.filter(
-            team_id__in=team_ids, is_original=True
-        ).select_related("team", "organization")
-        for survey in team_surveys:
-            if survey.id not in survey_access:  # Don't override owned
-                team_role = team_roles.get(survey.team_id)
-                can_edit = team_role in [
-                    TeamMembership.Role.ADMIN,
-                    TeamMembership.Role.CREATOR,
-                ]
-                survey_access[survey.id] = {
-                    "survey": survey,
-                    "role": team_role,
-                    "source": "team",
-                    "source_name": survey.team.name if survey.team else None,
-                    "can_edit": can_edit,
-                    "can_manage": team_role == TeamMembership.Role.ADMIN,
-                }
-
-    # 3. Organisation surveys - surveys in orgs user is a member of
-    org_memberships = user.org_memberships.select_related("organization")  # type: ignore[attr-defined]
-    org_roles = {om.organization_id: om.role for om in org_memberships}
-
-    if org_roles:
-        org_surveys = Survey.objects.filter(
-            organization_id__in=list(org_roles.keys()), is_original=True
-        ).select_related("team", "organization")
-        for survey in org_surveys:
-            if survey.id not in survey_access:  # Don't override owned or team
-                org_role = org_roles.get(survey.organization_id)
-                can_edit = org_role in [
-                    OrganizationMembership.Role.ADMIN,
-                    OrganizationMembership.Role.CREATOR,
-                ]
-                survey_access[survey.id] = {
-                    "survey": survey,
-                    "role": org_role,
-                    "source": "organisation",
-                    "source_name": (
-                        survey.organization.name if survey.organization else None
-                    ),
-                    "can_edit": can_edit,
-                    "can_manage": org_role == OrganizationMembership.Role.ADMIN,
-                }
-
-    # 4. Explicit SurveyMembership - surveys shared directly with user
-    survey_memberships = SurveyMembership.objects.filter(user=user).select_related(
-        "survey", "survey__team", "survey__organization"
+    # Every accessible survey with how the user reaches it, in one query
+    surveys = accessible_surveys(user)
+    page_obj = Paginator(surveys, 50).get_page(request.GET.get("page"))
+    page = list(page_obj)
+    translations = translations_by_survey(page)
+    question_counts = dict(
+        SurveyQuestion.objects.filter(survey__in=page)
+        .order_by()
+        .values("survey_id")
+        .annotate(count=models.Count("id"))
+        .values_list("survey_id", "count")
     )
-    for sm in survey_memberships:
-        survey = sm.survey
-        if not survey.is_original:
-            continue
-        if survey.id not in survey_access:  # Don't override higher access
-            can_edit = sm.role in [
-                SurveyMembership.Role.CREATOR,
-                SurveyMembership.Role.EDITOR,
-            ]
-            survey_access[survey.id] = {
-                "survey": survey,
-                "role": sm.role,
-                "source": "shared",
-                "source_name": None,
-                "can_edit": can_edit,
-                "can_manage": sm.role == SurveyMembership.Role.CREATOR,
-            }
 
     # Group surveys by source for display
     grouped_surveys = {
@@ -629,13 +569,32 @@ def survey_list(request: HttpRequest) -> HttpResponse:
         "organisation": {},  # org_name -> [surveys]
         "shared": [],
     }
+    surveys_with_translations = []
 
-    for access_info in survey_access.values():
-        survey = access_info["survey"]
-        source = access_info["source"]
+    for survey in page:
+        source = survey.access_source
+        role = survey.access_role
+        if source == "owned":
+            can_edit = can_manage = True
+        elif source == "team":
+            can_edit = role in [
+                TeamMembership.Role.ADMIN,
+                TeamMembership.Role.CREATOR,
+            ]
+            can_manage = role == TeamMembership.Role.ADMIN
+        elif source == "organisation":
+            can_edit = role in [
+                OrganizationMembership.Role.ADMIN,
+                OrganizationMembership.Role.CREATOR,
+            ]
+            can_manage = role == OrganizationMembership.Role.ADMIN
+        else:
+            can_edit = role in [
+                SurveyMembership.Role.CREATOR,
+                SurveyMembership.Role.EDITOR,
+            ]
+            can_manage = role == SurveyMembership.Role.CREATOR
 
-        # Get translations
-        translations = survey.get_available_translations()
         translation_data = [
             {
                 "survey": trans,
@@ -643,75 +602,45 @@ def survey_list(request: HttpRequest) -> HttpResponse:
                 "language_name": LANGUAGE_NAMES.get(trans.language, trans.language),
                 "status": trans.status,
             }
-            for trans in translations
+            for trans in translations[survey.id]
         ]
 
         survey_data = {
             "survey": survey,
             "translations": translation_data,
             "translation_count": len(translation_data),
+            "question_count": question_counts.get(survey.id, 0),
             "flag": LANGUAGE_FLAGS.get(survey.language, "🏳️"),
             "language_name": LANGUAGE_NAMES.get(survey.language, survey.language),
-            "role": access_info["role"],
+            "role": role,
             "source": source,
-            "source_name": access_info["source_name"],
-            "can_edit": access_info["can_edit"],
-            "can_manage": access_info["can_manage"],
+            "can_edit": can_edit,
+            "can_manage": can_manage,
         }
+        surveys_with_translations.append(survey_data)
 
+        # Surveys arrive ordered by source, team/organisation name and name
         if source == "owned":
             grouped_surveys["owned"].append(survey_data)
         elif source == "team":
-            team_name = access_info["source_name"] or "Unknown Team"
-            if team_name not in grouped_surveys["team"]:
-                grouped_surveys["team"][team_name] = []
-            grouped_surveys["team"][team_name].append(survey_data)
+            team_name = survey.team.name if survey.team else "Unknown Team"
+            grouped_surveys["team"].setdefault(team_name, []).append(survey_data)
         elif source == "organisation":
-            org_name = access_info["source_name"] or "Unknown Organisation"
-            if org_name not in grouped_surveys["organisation"]:
-                grouped_surveys["organisation"][org_name] = []
-            grouped_surveys["organisation"][org_name].append(survey_data)
-        elif source == "shared":
+            org_name = (
+                survey.organization.name
+                if survey.organization
+                else "Unknown Organisation"
+            )
+            grouped_surveys["organisation"].setdefault(org_name, []).append(survey_data)
+        else:
             grouped_surveys["shared"].append(survey_data)
 
-    # Sort within each group by survey name
-    grouped_surveys["owned"].sort(key=lambda x: x["survey"].name.lower())
-    grouped_surveys["shared"].sort(key=lambda x: x["survey"].name.lower())
-    for team_name in grouped_surveys["team"]:
-        grouped_surveys["team"][team_name].sort(key=lambda x: x["survey"].name.lower())
-    for org_name in grouped_surveys["organisation"]:
-        grouped_surveys["organisation"][org_name].sort(
-            key=lambda x: x["survey"].name.lower()
-        )
-
-    # Flatten for backwards compatibility with template (surveys_with_translations)
-    all_surveys = list(survey_access.values())
-    surveys_with_translations = [
-        {
-            "survey": item["survey"],
-            "translations": item["survey"].get_available_translations(),
-            "translation_count": len(item["survey"].get_available_translations()),
-            "flag": LANGUAGE_FLAGS.get(item["survey"].language, "🏳️"),
-            "language_name": LANGUAGE_NAMES.get(
-                item["survey"].language, item["survey"].language
-            ),
-            "role": item["role"],
-            "can_edit": item["can_edit"],
-            "can_manage": item["can_manage"],
-        }
-        for item in all_surveys
-    ]
-
-    # Get the original queryset for tier limits
-    original_surveys = Survey.objects.filter(
-        id__in=[s["survey"].id for s in surveys_with_translations]
-    )
-
     return render(
         request,
         "surveys/list.html",
         {
-            "surveys": original_surveys,
+            "surveys": surveys,
+            "page_obj": page_obj,
             "surveys_with_translations": surveys_with_translations,
             "grouped_surveys": grouped_surveys,
             "supported_languages": SUPPORTED_SURVEY_LANGUAGES,
@@ -1090,7 +1019,12 @@ def survey_detail(request: HttpRequest, slug: str) -> HttpResponse:
             if survey_key:
                 resp.store_demographics(survey_key, demo)
         try:
-            resp.save()
+            with transaction.atomic():
+                admit_submission(survey)
+                mark_reserved(resp)
+                resp.save()
+        except SubmissionRefused as refused:
+            return redirect(f"/surveys/{slug}/closed/?reason={refused.reason}")
         except Exception:
             messages.error(request, "You have already submitted this survey.")
             return redirect("surveys:detail", slug=slug)
@@ -1101,7 +1035,9 @@ def survey_detail(request: HttpRequest, slug: str) -> HttpResponse:
     _prepare_question_rendering(survey)
     # Prepare ordered questions by group position, then by question order within group
     all_questions = list(
-        survey.questions.select_related("group").prefetch_related("images").all()
+        survey.questions.select_related("group")
+        .prefetch_related("images", "conditions")
+        .all()
     )
     qs = _order_questions_by_group(survey, all_questions)
 
@@ -1211,7 +1147,9 @@ def survey_preview(request: HttpRequest, slug: str) -> HttpResponse:
     # Render the same detail template in preview mode
     _prepare_question_rendering(survey)
     all_questions = list(
-        survey.questions.select_related("group").prefetch_related("images").all()
+        survey.questions.select_related("group")
+        .prefetch_related("images", "conditions")
+        .all()
     )
     qs = _order_questions_by_group(survey, all_questions)
 
@@ -1339,52 +1277,7 @@ def _build_branching_config(questions: list[SurveyQuestion]) -> dict[str, Any]:
         "show_conditions": {question_id: [incoming SHOW conditions]}
     }
     """
-    config: dict[str, Any] = {"questions": [], "conditions": {}, "show_conditions": {}}
-
-    for q in questions:
-        q_id = str(q.id)
-        config["questions"].append(q_id)
-
-        # Get outgoing conditions from this question
-        try:
-            conditions = list(q.conditions.all())
-        except Exception:
-            conditions = []
-
-        if conditions:
-            config["conditions"][q_id] = []
-            for cond in conditions:
-                cond_data = {
-                    "operator": cond.operator,
-                    "value": cond.value or "",
-                    "action": cond.action,
-                    "target_question": (
-                        str(cond.target_question.id) if cond.target_question else None
-                    ),
-                }
-                config["conditions"][q_id].append(cond_data)
-
-    # Build show_conditions map (incoming SHOW conditions)
-    for q in questions:
-        q_id = str(q.id)
-        try:
-            show_conditions = SurveyQuestionCondition.objects.filter(
-                target_question=q, action=SurveyQuestionCondition.Action.SHOW
-            ).select_related("question")
-
-            if show_conditions.exists():
-                config["show_conditions"][q_id] = []
-                for cond in show_conditions:
-                    cond_data = {
-                        "source_question": str(cond.question.id),
-                        "operator": cond.operator,
-                        "value": cond.value or "",
-                    }
-                    config["show_conditions"][q_id].append(cond_data)
-        except Exception:
-            pass
-
-    return config
+    return compile_branching(questions).to_config()
 
 
 def _order_questions_by_group(
@@ -2014,15 +1907,13 @@ def _serialize_question_for_builder(
 def survey_dashboard(request: HttpRequest, slug: str) -> HttpResponse:
     survey = get_object_or_404(Survey, slug=slug)
     require_can_view(request.user, survey)
-    total = survey.responses.count()
     # Simple analytics
     now = timezone.now()
     start_today = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    last7 = now - timezone.timedelta(days=7)
-    today_count = survey.responses.filter(submitted_at__gte=start_today).count()
-    last7_count = survey.responses.filter(submitted_at__gte=last7).count()
-    # Sparkline data: last 14 full days (oldest -> newest)
-    from collections import OrderedDict
+    counts = summary_counts(survey.responses.all(), "submitted_at", now=now)
+    total = counts["total"]
+    today_count = counts["today"]
+    last7_count = counts["last7"]
 
     spark_points = ""
     spark_labels = []
@@ -2046,31 +1937,24 @@ def survey_dashboard(request: HttpRequest, slug: str) -> HttpResponse:
         if start_date == start_today:
             start_date = start_today - timezone.timedelta(days=1)
 
-        day_counts = OrderedDict()
-        current_day = start_date
         # Always include at least up to and including today
         end_day = start_today + timezone.timedelta(days=1)
-        # Also build invites-per-day alongside response counts so we can
-        # render both series in the sparkline.
-        invite_day_counts = OrderedDict()
-        while current_day < end_day:
-            next_day = current_day + timezone.timedelta(days=1)
-            day_counts[current_day.date().isoformat()] = survey.responses.filter(
-                submitted_at__gte=current_day, submitted_at__lt=next_day
-            ).count()
-            invite_day_counts[current_day.date().isoformat()] = (
-                survey.access_tokens.filter(
-                    created_at__gte=current_day,
-                    created_at__lt=next_day,
-                    note__icontains="Invited",
-                ).count()
-            )
-            current_day = next_day
+        # One GROUP BY query per series; empty days are filled in Python.
+        # Invites are built alongside responses so the sparkline shows both.
+        response_series = count_by_bucket(
+            survey.responses.all(), "submitted_at", start_date, end_day
+        )
+        invite_series = count_by_bucket(
+            survey.access_tokens.exclude(invite_kind=""),
+            "created_at",
+            start_date,
+            end_day,
+        )
 
         # Build sparkline polyline points (0..100 width, 0..24 height)
-        response_values = list(day_counts.values())
-        invite_values = list(invite_day_counts.values())
-        dates = list(day_counts.keys())
+        response_values = response_series.counts
+        invite_values = invite_series.counts
+        dates = response_series.labels
 
         if response_values or invite_values:  # Create sparkline even if all zeros
             # Use combined max so both series share the same vertical scale
@@ -2140,6 +2024,11 @@ def survey_dashboard(request: HttpRequest, slug: str) -> HttpResponse:
 
     analytics = compute_response_analytics(survey)
 
+    invite_counts = survey.access_tokens.exclude(invite_kind="").aggregate(
+        sent=models.Count("id"),
+        pending=models.Count("id", filter=Q(response__isnull=True)),
+    )
+
     ctx = {
         "survey": survey,
         "total": total,
@@ -2151,10 +2040,8 @@ def survey_dashboard(request: HttpRequest, slug: str) -> HttpResponse:
         "spark_points": spark_points,
         "spark_labels": spark_labels,
         # Invites stats
-        "invites_sent": survey.access_tokens.filter(note__icontains="Invited").count(),
-        "invites_pending": survey.access_tokens.filter(
-            note__icontains="Invited", response__isnull=True
-        ).count(),
+        "invites_sent": invite_counts["sent"],
+        "invites_pending": invite_counts["pending"],
         "invites_points": invites_points,
         "survey_not_started": survey_not_started,
         "can_manage_users": can_manage_survey_users(request.user, survey),
@@ -2163,9 +2050,9 @@ def survey_dashboard(request: HttpRequest, slug: str) -> HttpResponse:
             survey.is_closed and can_export_survey_data(request.user, survey)
         ),
         # Export history (last 5 exports for this survey)
-        "recent_exports": survey.exports.select_related("created_by").order_by(
-            "-created_at"
-        )[:5],
+        "recent_exports": survey.exports.select_related("created_by")
+        .defer("pending_encryption_key")
+        .order_by("-created_at")[:5],
         # Data subject requests
         "has_pending_dsr": survey.has_pending_dsr,
         "dsr_warning_message": survey.dsr_warning_message,
@@ -2219,6 +2106,54 @@ def survey_dashboard(request: HttpRequest, slug: str) -> HttpResponse:
     return render(request, "surveys/dashboard.html", ctx)
 
 
+@login_required
+@ratelimit(key="user", rate="100/h", block=True)
+def survey_insights(request: HttpRequest, slug: str) -> HttpResponse:
+    """Filtered insights and cross-tabulation for a survey's responses."""
+    from .services.crosstab import InsightsQuery, compute_insights
+
+    survey = get_object_or_404(Survey, slug=slug)
+    require_can_view(request.user, survey)
+
+    # The form adds one filter at a time from separate fields; earlier filters
+    # are carried over as ``filter`` expressions
+    params = request.GET.copy()
+    new_filter_question = params.pop("filter_question", [""])[0]
+    new_filter_operator = params.pop("filter_operator", [""])[0]
+    new_filter_value = params.pop("filter_value", [""])[0]
+    if new_filter_question and new_filter_operator:
+        params.appendlist(
+            "filter",
+            f"{new_filter_question}:{new_filter_operator}:{new_filter_value}",
+        )
+
+    error = None
+    insights = None
+    try:
+        insights = compute_insights(survey, InsightsQuery.from_params(params))
+    except ValueError as e:
+        error = str(e)
+
+    ctx = {
+        "survey": survey,
+        "insights": insights,
+        "error": error,
+        "params": params,
+        "filters": params.getlist("filter"),
+        "chartable_questions": _order_questions_by_group(
+            survey,
+            list(
+                survey.questions.filter(type__in=CHARTABLE_TYPES).select_related(
+                    "group"
+                )
+            ),
+        ),
+        "all_questions": survey.questions.order_by("order"),
+        "operators": SurveyQuestionCondition.Operator.choices,
+    }
+    return render(request, "surveys/insights.html", ctx)
+
+
 @login_required
 @require_http_methods(["POST"])
 def update_survey_title(request: HttpRequest, slug: str) -> JsonResponse:
@@ -2263,8 +2198,14 @@ def survey_invites_pending(request: HttpRequest, slug: str) -> HttpResponse:
     require_can_view(request.user, survey)
 
     # Get all tokens that were created via invite workflow
-    tokens = survey.access_tokens.filter(note__icontains="Invited").order_by(
-        "-created_at"
+    tokens = (
+        survey.access_tokens.exclude(invite_kind="")
+        .annotate(
+            has_response=Exists(
+                SurveyResponse.objects.filter(access_token=OuterRef("pk"))
+            )
+        )
+        .order_by("-created_at")
     )
 
     invites = []
@@ -2272,15 +2213,8 @@ def survey_invites_pending(request: HttpRequest, slug: str) -> HttpResponse:
     completed_count = 0
 
     for t in tokens:
-        # Note format used when creating invites: 'Invited: email@domain'
-        email = None
-        if t.note and ":" in t.note:
-            email = t.note.split(":", 1)[1].strip()
-
-        # Check if this token has been used (has a response)
-        has_response = hasattr(t, "response") and t.response is not None
-        # Also check used_at field for token surveys
-        is_completed = has_response or t.used_at is not None
+        # A token is used when it has a response; used_at covers token surveys
+        is_completed = t.has_response or t.used_at is not None
 
         if is_completed:
             completed_count += 1
@@ -2290,7 +2224,7 @@ def survey_invites_pending(request: HttpRequest, slug: str) -> HttpResponse:
         invites.append(
             {
                 "token": t,
-                "email": email or t.note or "",
+                "email": t.invited_email or t.note or "",
                 "is_completed": is_completed,
                 "completed_at": t.used_at,
             }
@@ -2321,18 +2255,12 @@ def survey_invite_resend(
     require_can_edit(request.user, survey)
 
     token = get_object_or_404(
-        SurveyAccessToken,
+        survey.access_tokens.exclude(invite_kind=""),
         id=token_id,
-        survey=survey,
-        note__icontains="Invited",
         response__isnull=True,
     )
 
-    # Extract email from note (format: "Invited: email@domain.com")
-    email = None
-    if token.note and ":" in token.note:
-        email = token.note.split(":", 1)[1].strip()
-
+    email = token.invited_email
     if not email or "@" not in email:
         messages.error(request, "Cannot resend: invalid email address in token note.")
         return redirect("surveys:invites_pending", slug=slug)
@@ -2648,44 +2576,14 @@ def survey_publish_settings(request: HttpRequest, slug: str) -> HttpResponse:
                 Survey.Visibility.TOKEN,
                 Survey.Visibility.AUTHENTICATED,
             ]:
-                import threading
-                import uuid
-
-                from django.core.cache import cache
-
                 # Parse email addresses
                 email_list = _parse_email_addresses(invite_emails)
 
-                # Generate task ID
-                task_id = str(uuid.uuid4())
-
-                # Set initial status in cache
-                cache.set(
-                    f"email_task_{task_id}",
-                    {
-                        "status": "processing",
-                        "progress": 0,
-                        "message": f"Starting to send {len(email_list)} invitation(s)...",
-                        "sent_count": 0,
-                        "failed_count": 0,
-                    },
-                    timeout=3600,
+                # Queue for the task workers
+                task = _enqueue_invites(
+                    request, survey, email_list, include_qr_code=True
                 )
-
-                # Start background thread
-                thread = threading.Thread(
-                    target=_send_invites_background,
-                    args=(
-                        survey.id,
-                        email_list,
-                        visibility,
-                        survey.end_at,
-                        request.user.email if request.user.email else None,
-                        request.user.id,
-                        task_id,
-                    ),
-                )
-                thread.start()
+                task_id = str(task.id)
 
                 # Store task ID in session for status tracking
                 request.session["pending_invites"] = {
@@ -2833,10 +2731,6 @@ def create_translation_async(request: HttpRequest, slug: str) -> JsonResponse:
     Returns a task_id for polling status.
     """
     import json
-    import threading
-    import uuid
-
-    from django.core.cache import cache
 
     survey = get_object_or_404(Survey, slug=slug)
     require_can_edit(request.user, survey)
@@ -2873,334 +2767,69 @@ def create_translation_async(request: HttpRequest, slug: str) -> JsonResponse:
             status=400,
         )
 
-    # Generate task ID
-    task_id = str(uuid.uuid4())
-
-    # Set initial status
-    cache.set(
-        f"translation_task_{task_id}",
+    # Queue for the task workers
+    task = enqueue(
+        "create_translation",
         {
-            "status": "processing",
-            "progress": 0,
-            "message": "Creating translation...",
+            "target_language": target_language,
+            "translation_id": existing.id if existing else None,
         },
-        timeout=3600,  # 1 hour
+        survey=survey,
+        created_by=request.user,
+        message="Creating translation...",
     )
 
-    def translate_in_background():
-        import logging
-        import traceback
-
-        logger = logging.getLogger(__name__)
-        translation = None
-        is_retranslate = False  # Track if we're re-translating an existing survey
-
-        try:
-            # Create or get existing translation survey
-            cache.set(
-                f"translation_task_{task_id}",
-                {
-                    "status": "processing",
-                    "progress": 25,
-                    "message": (
-                        "Creating survey structure..."
-                        if not existing
-                        else "Preparing to re-translate..."
-                    ),
-                },
-                timeout=3600,
-            )
-
-            if existing and force_retranslate:
-                # Re-use existing translation survey
-                translation = existing
-                is_retranslate = True  # Mark as re-translate to preserve on failure
-                logger.info(
-                    f"Re-translating existing survey {translation.slug} for {survey.slug} in {target_language}"
-                )
-            else:
-                # Create new translation survey
-                translation = survey.create_translation(target_language=target_language)
-                logger.info(
-                    f"Created translation survey {translation.slug} for {survey.slug} in {target_language}"
-                )
-
-            # Run LLM translation
-            cache.set(
-                f"translation_task_{task_id}",
-                {
-                    "status": "processing",
-                    "progress": 50,
-                    "message": "Translating content with AI...",
-                },
-                timeout=3600,
-            )
-
-            results = survey.translate_survey_content(translation, use_llm=True)
-            logger.info(
-                f"Translation results for {translation.slug}: {results['translated_fields']} fields, errors: {results['errors']}"
-            )
-
-            # Update final status
-            if results["success"]:
-                cache.set(
-                    f"translation_task_{task_id}",
-                    {
-                        "status": "completed",
-                        "progress": 100,
-                        "message": "Translation completed successfully",
-                        "translation_slug": translation.slug,
-                        "translated_fields": results["translated_fields"],
-                        "warnings": results.get("warnings", []),
-                    },
-                    timeout=3600,
-                )
-            else:
-                error_msg = (
-                    "; ".join(results["errors"])
-                    if results["errors"]
-                    else "Unknown error"
-                )
-                logger.error(f"Translation failed for {translation.slug}: {error_msg}")
-
-                # Only delete if this was a new translation, not a re-translate
-                if translation and not is_retranslate:
-                    logger.info(
-                        f"Deleting failed translation survey {translation.slug}"
-                    )
-                    translation.delete()
-                elif is_retranslate:
-                    logger.info(
-                        f"Preserving existing translation survey {translation.slug} after failed re-translate"
-                    )
-
-                cache.set(
-                    f"translation_task_{task_id}",
-                    {
-                        "status": "error",
-                        "progress": 100,
-                        "message": f"Translation failed: {error_msg}",
-                        "errors": results["errors"],
-                    },
-                    timeout=3600,
-                )
-
-        except Exception as e:
-            error_details = traceback.format_exc()
-            logger.error(f"Translation exception for {survey.slug}: {error_details}")
-
-            # Only delete the failed translation if it was just created, not if re-translating
-            if translation and not is_retranslate:
-                try:
-                    logger.info(
-                        f"Deleting failed translation survey {translation.slug} after exception"
-                    )
-                    translation.delete()
-                except Exception as delete_error:
-                    logger.error(f"Failed to delete translation survey: {delete_error}")
-            elif translation and is_retranslate:
-                logger.info(
-                    f"Preserving existing translation survey {translation.slug} after exception"
-                )
-
-            cache.set(
-                f"translation_task_{task_id}",
-                {
-                    "status": "error",
-                    "progress": 100,
-                    "message": f"Translation error: {str(e)}",
-                },
-                timeout=3600,
-            )
-
-    # Start background thread
-    thread = threading.Thread(target=translate_in_background)
-    thread.daemon = True
-    thread.start()
-
-    return JsonResponse({"task_id": task_id})
+    return JsonResponse({"task_id": str(task.id)})
 
 
 @login_required
 @require_http_methods(["GET"])
 def translation_status(request: HttpRequest, slug: str, task_id: str) -> JsonResponse:
     """Poll status of an async translation task."""
-    from django.core.cache import cache
-
     survey = get_object_or_404(Survey, slug=slug)
     require_can_view(request.user, survey)
 
-    status_data = cache.get(f"translation_task_{task_id}")
+    return _task_status_response(survey, "create_translation", task_id)
 
-    if not status_data:
+
+def _task_status_response(survey: Survey, name: str, task_id: str) -> JsonResponse:
+    """Status of one of a survey's background tasks, for polling."""
+    try:
+        task = Task.objects.get(id=task_id, survey=survey, name=name)
+    except (Task.DoesNotExist, ValidationError):
         return JsonResponse(
             {"status": "error", "message": "Task not found or expired"}, status=404
         )
 
-    return JsonResponse(status_data)
+    return JsonResponse(task_status(task))
 
 
-def _send_invites_background(
-    survey_id: int,
+def _enqueue_invites(
+    request: HttpRequest,
+    survey: Survey,
     email_list: list[str],
-    visibility: str,
-    end_at,
-    contact_email: str,
-    user_id: int,
-    task_id: str,
-    include_qr_code: bool = True,
-) -> None:
-    """Background task to send survey invitation emails."""
-    from django.conf import settings
-    from django.contrib.auth import get_user_model
-    from django.core.cache import cache
-
-    from checktick_app.core.email_utils import (
-        send_authenticated_survey_invite_existing_user,
-        send_authenticated_survey_invite_new_user,
-        send_survey_invite_email,
+    include_qr_code: bool,
+) -> Task:
+    """Queue invitation emails to a survey for the task workers."""
+    return enqueue(
+        "send_invites",
+        {
+            "emails": email_list,
+            "visibility": survey.visibility,
+            "end_at": survey.end_at.isoformat() if survey.end_at else None,
+            "contact_email": request.user.email or None,
+            "include_qr_code": include_qr_code,
+        },
+        survey=survey,
+        created_by=request.user,
+        message=f"Starting to send {len(email_list)} invitation(s)...",
     )
-    from checktick_app.core.qr_utils import generate_qr_code_data_uri
-
-    User = get_user_model()
-
-    try:
-        survey = Survey.objects.get(id=survey_id)
-        user = User.objects.get(id=user_id)
-
-        sent_count = 0
-        failed_emails = []
-        total_emails = len(email_list)
-
-        for idx, email_address in enumerate(email_list):
-            # Update progress
-            progress = int(((idx + 1) / total_emails) * 100)
-            cache.set(
-                f"email_task_{task_id}",
-                {
-                    "status": "processing",
-                    "progress": progress,
-                    "message": f"Sending invitation {idx + 1} of {total_emails}...",
-                    "sent_count": sent_count,
-                    "failed_count": len(failed_emails),
-                },
-                timeout=3600,
-            )
-
-            # Validate email format (basic check)
-            if "@" not in email_address or "." not in email_address.split("@")[1]:
-                failed_emails.append(f"{email_address} (invalid format)")
-                continue
-
-            if visibility == Survey.Visibility.TOKEN:
-                # Create anonymous token
-                token = SurveyAccessToken(
-                    survey=survey,
-                    token=secrets.token_urlsafe(24),
-                    created_by=user,
-                    expires_at=end_at if end_at else None,
-                    note=f"Invited: {email_address}",
-                    for_authenticated=False,
-                )
-                token.save()
-
-                # Generate QR code for the survey link if requested
-                qr_code_data_uri = None
-                if include_qr_code:
-                    site_url = getattr(settings, "SITE_URL", "http://localhost:8000")
-                    survey_link = (
-                        f"{site_url}/surveys/{survey.slug}/take/token/{token.token}/"
-                    )
-                    qr_code_data_uri = generate_qr_code_data_uri(survey_link, size=200)
-
-                # Send invitation email
-                if send_survey_invite_email(
-                    to_email=email_address,
-                    survey=survey,
-                    token=token.token,
-                    contact_email=contact_email,
-                    qr_code_data_uri=qr_code_data_uri,
-                ):
-                    sent_count += 1
-                else:
-                    failed_emails.append(email_address)
-
-            elif visibility == Survey.Visibility.AUTHENTICATED:
-                # Create authenticated invitation token
-                token = SurveyAccessToken(
-                    survey=survey,
-                    token=secrets.token_urlsafe(24),
-                    created_by=user,
-                    expires_at=end_at if end_at else None,
-                    note=f"Invited: {email_address}",
-                    for_authenticated=True,
-                )
-                token.save()
-
-                # Generate QR code for the survey link if requested
-                qr_code_data_uri = None
-                if include_qr_code:
-                    site_url = getattr(settings, "SITE_URL", "http://localhost:8000")
-                    survey_link = f"{site_url}/surveys/{survey.slug}/take/"
-                    qr_code_data_uri = generate_qr_code_data_uri(survey_link, size=200)
-
-                # Check if user exists
-                user_exists = User.objects.filter(email=email_address).exists()
-
-                # Send appropriate email
-                if user_exists:
-                    email_sent = send_authenticated_survey_invite_existing_user(
-                        to_email=email_address,
-                        survey=survey,
-                        contact_email=contact_email,
-                        qr_code_data_uri=qr_code_data_uri,
-                    )
-                else:
-                    email_sent = send_authenticated_survey_invite_new_user(
-                        to_email=email_address,
-                        survey=survey,
-                        contact_email=contact_email,
-                        qr_code_data_uri=qr_code_data_uri,
-                    )
-
-                if email_sent:
-                    sent_count += 1
-                else:
-                    failed_emails.append(email_address)
-
-        # Update final status
-        cache.set(
-            f"email_task_{task_id}",
-            {
-                "status": "completed",
-                "progress": 100,
-                "message": "All invitations processed",
-                "sent_count": sent_count,
-                "failed_emails": failed_emails,
-            },
-            timeout=3600,
-        )
-
-    except Exception as e:
-        cache.set(
-            f"email_task_{task_id}",
-            {
-                "status": "error",
-                "message": f"Failed to send invitations: {str(e)}",
-            },
-            timeout=3600,
-        )
 
 
 @login_required
 @require_http_methods(["POST"])
 def send_invites_async(request: HttpRequest, slug: str) -> JsonResponse:
     """Start async email sending for survey invitations."""
-    import threading
-    import uuid
-
-    from django.core.cache import cache
-
     survey = get_object_or_404(Survey, slug=slug)
     require_can_edit(request.user, survey)
 
@@ -3215,64 +2844,22 @@ def send_invites_async(request: HttpRequest, slug: str) -> JsonResponse:
     if not email_list:
         return JsonResponse({"error": "No valid email addresses found"}, status=400)
 
-    # Get parameters
-    visibility = survey.visibility
-    end_at = survey.end_at
-    contact_email = request.user.email if request.user.email else None
     include_qr_code = request.POST.get("include_qr_code") == "on"
 
-    # Generate task ID
-    task_id = str(uuid.uuid4())
-
-    # Set initial status in cache
-    cache.set(
-        f"email_task_{task_id}",
-        {
-            "status": "processing",
-            "progress": 0,
-            "message": f"Starting to send {len(email_list)} invitation(s)...",
-            "sent_count": 0,
-            "failed_count": 0,
-        },
-        timeout=3600,
-    )
-
-    # Start background thread
-    thread = threading.Thread(
-        target=_send_invites_background,
-        args=(
-            survey.id,
-            email_list,
-            visibility,
-            end_at,
-            contact_email,
-            request.user.id,
-            task_id,
-            include_qr_code,
-        ),
-    )
-    thread.start()
+    # Queue for the task workers
+    task = _enqueue_invites(request, survey, email_list, include_qr_code)
 
-    return JsonResponse({"task_id": task_id, "total_emails": len(email_list)})
+    return JsonResponse({"task_id": str(task.id), "total_emails": len(email_list)})
 
 
 @login_required
 @require_http_methods(["GET"])
 def email_status(request: HttpRequest, slug: str, task_id: str) -> JsonResponse:
     """Poll status of an async email sending task."""
-    from django.core.cache import cache
-
     survey = get_object_or_404(Survey, slug=slug)
     require_can_view(request.user, survey)
 
-    status_data = cache.get(f"email_task_{task_id}")
-
-    if not status_data:
-        return JsonResponse(
-            {"status": "error", "message": "Task not found or expired"}, status=404
-        )
-
-    return JsonResponse(status_data)
+    return _task_status_response(survey, "send_invites", task_id)
 
 
 @login_required
@@ -3816,9 +3403,8 @@ def survey_take(request: HttpRequest, slug: str) -> HttpResponse:
             return redirect(f"/surveys/{slug}/closed/?reason=not_started")
         elif survey.end_at and now > survey.end_at:
             return redirect(f"/surveys/{slug}/closed/?reason=ended")
-        elif survey.max_responses and hasattr(survey, "responses"):
-            if survey.responses.count() >= survey.max_responses:
-                return redirect(f"/surveys/{slug}/closed/?reason=max_responses")
+        elif survey.is_full:
+            return redirect(f"/surveys/{slug}/closed/?reason=max_responses")
         return redirect("surveys:closed", slug=slug)
     if survey.visibility == Survey.Visibility.UNLISTED:
         raise Http404()
@@ -3840,12 +3426,15 @@ def survey_take(request: HttpRequest, slug: str) -> HttpResponse:
         and not survey.allow_any_authenticated
     ):
         # Check if user has a valid invitation
-        user_email = request.user.email
-        has_invitation = SurveyAccessToken.objects.filter(
-            survey=survey,
-            for_authenticated=True,
-            note__icontains=f"Invited: {user_email}",
-        ).exists()
+        user_email = SurveyAccessToken.normalize_email(request.user.email)
+        has_invitation = (
+            bool(user_email)
+            and SurveyAccessToken.objects.filter(
+                survey=survey,
+                for_authenticated=True,
+                invited_email=user_email,
+            ).exists()
+        )
 
         if not has_invitation:
             messages.error(
@@ -3892,9 +3481,8 @@ def survey_take_unlisted(request: HttpRequest, slug: str, key: str) -> HttpRespo
                     return redirect(f"/surveys/{slug}/closed/?reason=not_started")
                 elif survey.end_at and now > survey.end_at:
                     return redirect(f"/surveys/{slug}/closed/?reason=ended")
-                elif survey.max_responses and hasattr(survey, "responses"):
-                    if survey.responses.count() >= survey.max_responses:
-                        return redirect(f"/surveys/{slug}/closed/?reason=max_responses")
+                elif survey.is_full:
+                    return redirect(f"/surveys/{slug}/closed/?reason=max_responses")
         raise Http404()
     if (
         request.method == "POST"
@@ -3923,9 +3511,8 @@ def survey_take_token(request: HttpRequest, slug: str, token: str) -> HttpRespon
                 return redirect(f"/surveys/{slug}/closed/?reason=not_started")
             elif survey.end_at and now > survey.end_at:
                 return redirect(f"/surveys/{slug}/closed/?reason=ended")
-            elif survey.max_responses and hasattr(survey, "responses"):
-                if survey.responses.count() >= survey.max_responses:
-                    return redirect(f"/surveys/{slug}/closed/?reason=max_responses")
+            elif survey.is_full:
+                return redirect(f"/surveys/{slug}/closed/?reason=max_responses")
         raise Http404()
     tok = get_object_or_404(SurveyAccessToken, survey=survey, token=token)
     if not tok.is_valid():
@@ -3956,10 +3543,12 @@ def _handle_participant_submission(
         )
         return redirect("surveys:dashboard", slug=survey.slug)
 
+    # Questions, groups and branching compiled once per survey content version
+    plan = get_form_plan(survey)
+
     # Disallow collecting patient data on non-authenticated visibilities unless explicitly acknowledged at publish.
-    collects_patient = _survey_collects_patient_data(survey)
     if (
-        collects_patient
+        plan.collects_patient_data
         and survey.visibility != Survey.Visibility.AUTHENTICATED
         and not survey.no_patient_data_ack
     ):
@@ -3977,12 +3566,15 @@ def _handle_participant_submission(
         is_draft = request.POST.get("action") == "save_draft"
         is_ajax = request.headers.get("X-Requested-With") == "XMLHttpRequest"
 
-        # Prevent duplicate submission for tokenized link
+        # Turn away resubmissions early (the token is claimed atomically below)
         if token_obj and SurveyResponse.objects.filter(access_token=token_obj).exists():
             return redirect(f"/surveys/{survey.slug}/closed/?reason=token_used")
 
+        # Read the questions afresh: the cached plan can lag behind an edit
+        # made in another process, and would drop answers to new questions
+        questions = list(survey.questions.prefetch_related("conditions"))
         answers = {}
-        for q in survey.questions.all():
+        for q in questions:
             key = f"q_{q.id}"
             value = (
                 request.POST.getlist(key)
@@ -4007,6 +3599,12 @@ def _handle_participant_submission(
                 }
             )
 
+        # Drop answers to questions the branching rules hide, which the
+        # browser still posts, so stored answers match what was shown
+        visible_ids, _ = compile_branching(questions).evaluate(answers)
+        visible = set(visible_ids)
+        answers = {q_id: a for q_id, a in answers.items() if q_id in visible}
+
         # Professional details (non-encrypted)
         _, professional_fields, professional_ods = _get_professional_group_and_fields(
             survey
@@ -4050,18 +3648,19 @@ def _handle_participant_submission(
                 resp.store_demographics(survey_key, demo)
 
         try:
-            resp.save()
+            with transaction.atomic():
+                # Claim the token and a place under max_responses with
+                # conditional UPDATEs, so concurrent submissions can neither
+                # reuse the token nor overshoot the cap
+                admit_submission(survey, token_obj, request.user)
+                mark_reserved(resp)
+                resp.save()
+        except SubmissionRefused as refused:
+            return redirect(f"/surveys/{survey.slug}/closed/?reason={refused.reason}")
         except Exception:
             messages.error(request, "You have already submitted this survey.")
             return redirect("surveys:take", slug=survey.slug)
 
-        # Mark token as used
-        if token_obj:
-            token_obj.used_at = timezone.now()
-            if request.user.is_authenticated:
-                token_obj.used_by = request.user
-            token_obj.save(update_fields=["used_at", "used_by"])
-
         # Delete progress record after successful submission
         if progress:
             progress.delete()
@@ -4076,37 +3675,30 @@ def _handle_participant_submission(
         # Redirect to thank-you page
         return redirect("surveys:thank_you", slug=survey.slug)
 
-    # GET: render using existing detail template
-    _prepare_question_rendering(survey)
-    qs = list(survey.questions.select_related("group").all())
-    for i, q in enumerate(qs, start=1):
-        setattr(q, "idx", i)
-        prev_gid = qs[i - 2].group_id if i - 2 >= 0 else None
-        next_gid = qs[i].group_id if i < len(qs) else None
-        curr_gid = q.group_id
-        setattr(q, "group_start", bool(curr_gid and curr_gid != prev_gid))
-        setattr(q, "group_end", bool(curr_gid and curr_gid != next_gid))
-    patient_group, demographics_fields = _get_patient_group_and_fields(survey)
-    prof_group, professional_fields, professional_ods = (
-        _get_professional_group_and_fields(survey)
-    )
-    show_patient_details = patient_group is not None
-    show_professional_details = prof_group is not None
+    # GET: render the compiled plan using the existing detail template
     ctx = {
         "survey": survey,
-        "questions": qs,
-        "show_patient_details": show_patient_details,
-        "demographics_fields": demographics_fields,
+        "questions": plan.questions,
+        "branching_config": plan.branching_config,
+        "show_patient_details": plan.patient_group is not None,
+        "demographics_fields": plan.demographics_fields,
         "demographic_defs": DEMOGRAPHIC_FIELD_DEFS,
         "demographics_fields_with_labels": [
-            (k, DEMOGRAPHIC_FIELD_DEFS[k]) for k in demographics_fields
+            (k, DEMOGRAPHIC_FIELD_DEFS[k]) for k in plan.demographics_fields
         ],
-        "show_professional_details": show_professional_details,
-        "professional_fields": professional_fields,
+        "show_professional_details": plan.professional_group is not None,
+        "professional_fields": plan.professional_fields,
         "professional_defs": PROFESSIONAL_FIELD_DEFS,
-        "professional_ods": professional_ods,
+        "professional_ods": plan.professional_ods,
         "professional_field_datasets": PROFESSIONAL_FIELD_TO_DATASET,
         "is_preview": False,  # Flag to indicate this is public submission
+        # The form body has no per-respondent content, so it is rendered once
+        # per content version and language (CSRF, captcha and progress are not
+        # part of it)
+        "form_cache_version": plan.version,
+        "form_cache_seconds": getattr(
+            settings, "CHECKTICK_FORM_PLAN_CACHE_SECONDS", 300
+        ),
         # Progress tracking
         "show_progress": True,
         "progress_percentage": progress.calculate_progress_percentage(),
@@ -5488,9 +5080,10 @@ def survey_group_create_from_template(request: HttpRequest, slug: str) -> HttpRe
 
 def get_survey_key_from_session(request: HttpRequest, survey_slug: str) -> bytes | None:
     """
-    Option 4: Re-derive KEK from stored credentials on each request.
-    This provides forward secrecy - no key material persists in sessions.
-    Credentials are encrypted with session-specific key.
+    Option 4: Re-derive KEK from stored credentials when needed.
+    Credentials are encrypted with session-specific key. The unlocked KEK is
+    cached in the session wrapped with a per-process secret (UnlockedKeyStore),
+    so the KDFs only run on the first request a worker sees after unlock.
     Returns None if session expired (>30 min) or credentials invalid.
     """
     import base64
@@ -5520,12 +5113,17 @@ def get_survey_key_from_session(request: HttpRequest, survey_slug: str) -> bytes
         request.session.pop("unlock_method", None)
         request.session.pop("unlock_verified_at", None)
         request.session.pop("unlock_survey_slug", None)
+        UnlockedKeyStore.clear(request)
         return None
 
     # Check survey matches
     if request.session.get("unlock_survey_slug") != survey_slug:
         return None
 
+    kek = UnlockedKeyStore.get(request, survey_slug)
+    if kek:
+        return kek
+
     # Decrypt credentials
     try:
         session_key = request.session.session_key
@@ -5543,33 +5141,36 @@ def get_survey_key_from_session(request: HttpRequest, survey_slug: str) -> bytes
         if unlock_method == "password":
             password = creds.get("password")
             if password:
-                return survey.unlock_with_password(password)
+                kek = survey.unlock_with_password(password)
         elif unlock_method == "recovery":
             recovery_phrase = creds.get("recovery_phrase")
             if recovery_phrase:
-                return survey.unlock_with_recovery(recovery_phrase)
+                kek = survey.unlock_with_recovery(recovery_phrase)
         elif unlock_method == "oidc":
             oidc_provider = creds.get("oidc_provider")
             oidc_subject = creds.get("oidc_subject")
             if oidc_provider and oidc_subject:
-                return survey.unlock_with_oidc(request.user)
+                kek = survey.unlock_with_oidc(request.user)
         elif unlock_method == "organization_recovery":
             organization_id = creds.get("organization_id")
             if organization_id:
                 org = Organization.objects.get(id=organization_id)
-                return survey.unlock_with_org_key(org)
+                kek = survey.unlock_with_org_key(org)
         elif unlock_method == "legacy":
             legacy_key_b64 = creds.get("legacy_key")
             if legacy_key_b64:
-                return base64.b64decode(legacy_key_b64)
+                kek = base64.b64decode(legacy_key_b64)
 
-        return None
+        if kek:
+            UnlockedKeyStore.store(request, survey_slug, kek)
+        return kek
     except Exception:
         # If anything fails, clear session and return None
         request.session.pop("unlock_credentials", None)
         request.session.pop("unlock_method", None)
         request.session.pop("unlock_verified_at", None)
         request.session.pop("unlock_survey_slug", None)
+        UnlockedKeyStore.clear(request)
         return None
 
 
@@ -5681,6 +5282,7 @@ def survey_unlock(request: HttpRequest, slug: str) -> HttpResponse:
             request.session["unlock_method"] = "oidc"
             request.session["unlock_verified_at"] = timezone.now().isoformat()
             request.session["unlock_survey_slug"] = slug
+            UnlockedKeyStore.store(request, slug, kek)
 
             messages.success(
                 request,
@@ -5737,6 +5339,7 @@ def survey_unlock(request: HttpRequest, slug: str) -> HttpResponse:
                             timezone.now().isoformat()
                         )
                         request.session["unlock_survey_slug"] = slug
+                        UnlockedKeyStore.store(request, slug, kek)
                         messages.success(request, "Survey unlocked with password.")
                         return redirect("surveys:dashboard", slug=slug)
                     else:
@@ -5781,6 +5384,7 @@ def survey_unlock(request: HttpRequest, slug: str) -> HttpResponse:
                             timezone.now().isoformat()
                         )
                         request.session["unlock_survey_slug"] = slug
+                        UnlockedKeyStore.store(request, slug, kek)
                         messages.success(
                             request, "Survey unlocked with recovery phrase."
                         )
@@ -5829,6 +5433,7 @@ def survey_unlock(request: HttpRequest, slug: str) -> HttpResponse:
                     request.session["unlock_method"] = "legacy"
                     request.session["unlock_verified_at"] = timezone.now().isoformat()
                     request.session["unlock_survey_slug"] = slug
+                    UnlockedKeyStore.store(request, slug, key)
                     messages.success(request, "Survey unlocked for this session.")
                     return redirect("surveys:dashboard", slug=slug)
             messages.error(request, "Invalid key.")
@@ -5951,6 +5556,7 @@ def organization_key_recovery(request: HttpRequest, slug: str) -> HttpResponse:
             request.session["unlock_method"] = "organization_recovery"
             request.session["unlock_verified_at"] = timezone.now().isoformat()
             request.session["unlock_survey_slug"] = slug
+            UnlockedKeyStore.store(request, slug, kek)
 
             logger.warning(
                 f"Organization key recovery performed by {request.user.username} "
@@ -6051,6 +5657,8 @@ def survey_export_csv(
         if patient_group
         else False
     )
+    # IMD cache reads, shared by all responses with the same postcode
+    imd_cache: dict = {}
 
     # Get professional group configuration
     prof_group, professional_fields, _ = _get_professional_group_and_fields(survey)
@@ -6114,20 +5722,27 @@ def survey_export_csv(
                 r.submitted_by.username if r.submitted_by else "Anonymous",
             ]
 
-            # Decrypt demographics if present
+            # Decrypt the response (whole-response or legacy demographics-only).
+            # The per-survey data key is cached, so this costs one KDF per export.
             demographics = {}
-            if r.enc_demographics and survey_key:
+            answers_dict = r.answers or {}
+            if r.is_encrypted:
                 try:
-                    demographics = r.load_demographics(survey_key)
+                    full_response = r.load_complete_response(survey_key)
+                    answers_dict = full_response.get("answers") or answers_dict
+                    demographics = full_response.get("demographics") or {}
                 except Exception:
-                    pass  # Continue without demographics if decryption fails
+                    pass  # Continue without decrypted data if decryption fails
+
+            # Responses submitted before their postcode's IMD lookup finished
+            if include_imd:
+                demographics = IMDService.add_cached_imd(demographics, imd_cache)
 
             # Add demographics fields
             for field in demo_fields_for_export:
                 row.append(demographics.get(field, ""))
 
             # Get professional details from answers
-            answers_dict = r.answers or {}
             professional_data = answers_dict.get("professional", {})
 
             # Add professional fields
@@ -7042,6 +6657,7 @@ def builder_questions_reorder(request: HttpRequest, slug: str) -> HttpResponse:
     ids = [int(i) for i in order_csv.split(",") if i.isdigit()]
     for idx, qid in enumerate(ids):
         SurveyQuestion.objects.filter(id=qid, survey=survey).update(order=idx)
+    bump_content_version(survey.id)
     questions_qs = survey.questions.select_related("group").all()
     questions = _prepare_question_rendering(survey, questions_qs)
     groups = survey.question_groups.filter(owner=request.user)
@@ -7071,6 +6687,7 @@ def builder_group_questions_reorder(
         SurveyQuestion.objects.filter(id=qid, survey=survey, group=group).update(
             order=idx
         )
+    bump_content_version(survey.id)
     questions_qs = survey.questions.select_related("group").filter(group=group)
     questions = _prepare_question_rendering(survey, questions_qs)
     return render(
@@ -10554,65 +10171,71 @@ def validate_postcode(request: HttpRequest) -> HttpResponse:
             "</label>"
         )
 
-    # Check if API is configured
-    api_url = settings.POSTCODES_API_URL
-    api_key = settings.POSTCODES_API_KEY
-
-    if not api_url or not api_key:
-        # API not configured - return input without validation styling
-        return HttpResponse(
-            f'<label class="input input-bordered input-sm flex items-center gap-1.5">'
-            f'<span class="sr-only">Post code</span>'
-            f'<input type="text" name="post_code" value="{postcode_html}" '
-            f'class="grow min-w-0 bg-transparent outline-none border-0" '
-            f'placeholder="Post code" '
-            f'aria-label="Post code" '
-            f'hx-post="/surveys/validate/postcode/" '
-            f'hx-trigger="blur, keyup changed delay:500ms" '
-            f'hx-target="closest label" '
-            f'hx-swap="outerHTML" />'
-            f'<svg class="w-4 h-4 opacity-50 shrink-0" aria-hidden="true" xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24">'
-            f'<g stroke-linejoin="round" stroke-linecap="round" stroke-width="2.5" fill="none" stroke="currentColor">'
-            f'<path d="M2.586 17.414A2 2 0 0 0 2 18.828V21a1 1 0 0 0 1 1h3a1 1 0 0 0 1-1v-1a1 1 0 0 1 1-1h1a1 1 0 0 0 1-1v-1a1 1 0 0 1 1-1h.172a2 2 0 0 0 1.414-.586l.814-.814a6.5 6.5 0 1 0-4-4z"></path>'
-            f'<circle cx="16.5" cy="7.5" r=".5" fill="currentColor"></circle>'
-            f"</g></svg>"
-            f"</label>"
-        )
+    # Postcodes with cached IMD data are real postcodes: skip the API call
+    clean_postcode = IMDService.normalize_postcode(postcode)
+    cached_imd = IMDService.cached_imd([clean_postcode]).get(clean_postcode)
+    if cached_imd is not None and cached_imd.is_valid:
+        valid = True
+    else:
+        # Check if API is configured
+        api_url = settings.POSTCODES_API_URL
+        api_key = settings.POSTCODES_API_KEY
+
+        if not api_url or not api_key:
+            # API not configured - return input without validation styling
+            return HttpResponse(
+                f'<label class="input input-bordered input-sm flex items-center gap-1.5">'
+                f'<span class="sr-only">Post code</span>'
+                f'<input type="text" name="post_code" value="{postcode_html}" '
+                f'class="grow min-w-0 bg-transparent outline-none border-0" '
+                f'placeholder="Post code" '
+                f'aria-label="Post code" '
+                f'hx-post="/surveys/validate/postcode/" '
+                f'hx-trigger="blur, keyup changed delay:500ms" '
+                f'hx-target="closest label" '
+                f'hx-swap="outerHTML" />'
+                f'<svg class="w-4 h-4 opacity-50 shrink-0" aria-hidden="true" xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24">'
+                f'<g stroke-linejoin="round" stroke-linecap="round" stroke-width="2.5" fill="none" stroke="currentColor">'
+                f'<path d="M2.586 17.414A2 2 0 0 0 2 18.828V21a1 1 0 0 0 1 1h3a1 1 0 0 0 1-1v-1a1 1 0 0 1 1-1h1a1 1 0 0 0 1-1v-1a1 1 0 0 1 1-1h.172a2 2 0 0 0 1.414-.586l.814-.814a6.5 6.5 0 1 0-4-4z"></path>'
+                f'<circle cx="16.5" cy="7.5" r=".5" fill="currentColor"></circle>'
+                f"</g></svg>"
+                f"</label>"
+            )
 
-    # Validate using RCPCH Postcodes API
-    try:
-        # URL encode the postcode (remove spaces for API call)
-        postcode_for_api = postcode.replace(" ", "")
-        response = requests.get(
-            f"{api_url}{postcode_for_api}/validate",
-            headers={"Ocp-Apim-Subscription-Key": api_key},
-            timeout=5,
-        )
-        if response.status_code == 200:
-            data = response.json()
-            valid = data.get("valid", False)
-        else:
-            valid = False
-    except Exception:
-        # API error - don't show error to user, just no validation styling
-        return HttpResponse(
-            f'<label class="input input-bordered input-sm flex items-center gap-1.5">'
-            f'<span class="sr-only">Post code</span>'
-            f'<input type="text" name="post_code" value="{postcode_html}" '
-            f'class="grow min-w-0 bg-transparent outline-none border-0" '
-            f'placeholder="Post code" '
-            f'aria-label="Post code" '
-            f'hx-post="/surveys/validate/postcode/" '
-            f'hx-trigger="blur, keyup changed delay:500ms" '
-            f'hx-target="closest label" '
-            f'hx-swap="outerHTML" />'
-            f'<svg class="w-4 h-4 opacity-50 shrink-0" aria-hidden="true" xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24">'
-            f'<g stroke-linejoin="round" stroke-linecap="round" stroke-width="2.5" fill="none" stroke="currentColor">'
-            f'<path d="M2.586 17.414A2 2 0 0 0 2 18.828V21a1 1 0 0 0 1 1h3a1 1 0 0 0 1-1v-1a1 1 0 0 1 1-1h1a1 1 0 0 0 1-1v-1a1 1 0 0 1 1-1h.172a2 2 0 0 0 1.414-.586l.814-.814a6.5 6.5 0 1 0-4-4z"></path>'
-            f'<circle cx="16.5" cy="7.5" r=".5" fill="currentColor"></circle>'
-            f"</g></svg>"
-            f"</label>"
-        )
+        # Validate using RCPCH Postcodes API
+        try:
+            # URL encode the postcode (remove spaces for API call)
+            postcode_for_api = postcode.replace(" ", "")
+            response = requests.get(
+                f"{api_url}{postcode_for_api}/validate",
+                headers={"Ocp-Apim-Subscription-Key": api_key},
+                timeout=5,
+            )
+            if response.status_code == 200:
+                data = response.json()
+                valid = data.get("valid", False)
+            else:
+                valid = False
+        except Exception:
+            # API error - don't show error to user, just no validation styling
+            return HttpResponse(
+                f'<label class="input input-bordered input-sm flex items-center gap-1.5">'
+                f'<span class="sr-only">Post code</span>'
+                f'<input type="text" name="post_code" value="{postcode_html}" '
+                f'class="grow min-w-0 bg-transparent outline-none border-0" '
+                f'placeholder="Post code" '
+                f'aria-label="Post code" '
+                f'hx-post="/surveys/validate/postcode/" '
+                f'hx-trigger="blur, keyup changed delay:500ms" '
+                f'hx-target="closest label" '
+                f'hx-swap="outerHTML" />'
+                f'<svg class="w-4 h-4 opacity-50 shrink-0" aria-hidden="true" xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24">'
+                f'<g stroke-linejoin="round" stroke-linecap="round" stroke-width="2.5" fill="none" stroke="currentColor">'
+                f'<path d="M2.586 17.414A2 2 0 0 0 2 18.828V21a1 1 0 0 0 1 1h3a1 1 0 0 0 1-1v-1a1 1 0 0 1 1-1h1a1 1 0 0 0 1-1v-1a1 1 0 0 1 1-1h.172a2 2 0 0 0 1.414-.586l.814-.814a6.5 6.5 0 1 0-4-4z"></path>'
+                f'<circle cx="16.5" cy="7.5" r=".5" fill="currentColor"></circle>'
+                f"</g></svg>"
+                f"</label>"
+            )
 
     if valid:
         # Valid postcode - green border, checkmark
@@ -11,6 +11,7 @@ Note: Survey closure and deletion are handled by existing views in views.py
 """
 
 from datetime import timedelta
+import re
 
 from django.conf import settings
 from django.contrib import messages
@@ -18,7 +19,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.core.mail import send_mail
 from django.db import transaction
-from django.http import HttpRequest, HttpResponse
+from django.http import FileResponse, HttpRequest, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
 
@@ -30,15 +31,17 @@ from .permissions import (
     require_can_manage_legal_hold,
 )
 from .services import ExportService, RetentionService
+from .services.export_writers import available_export_formats
 from .views import get_survey_key_from_session
 
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
 # ============================================================================
 # Data Export
 # ============================================================================
 
 
 @login_required
-@transaction.atomic
 def survey_export_create(request: HttpRequest, slug: str) -> HttpResponse:
     """Create a new data export with secure download link."""
     survey = get_object_or_404(Survey, slug=slug)
@@ -46,6 +49,7 @@ def survey_export_create(request: HttpRequest, slug: str) -> HttpResponse:
 
     if request.method == "POST":
         password = request.POST.get("password", "").strip() or None
+        export_format = request.POST.get("export_format") or "csv"
         attestation_accepted = request.POST.get("attestation_accepted") in [
             "true",
             "True",
@@ -64,6 +68,7 @@ def survey_export_create(request: HttpRequest, slug: str) -> HttpResponse:
             context = {
                 "survey": survey,
                 "response_count": response_count,
+                "export_formats": available_export_formats(),
             }
             return render(
                 request, "surveys/data_governance/export_create.html", context
@@ -81,33 +86,58 @@ def survey_export_create(request: HttpRequest, slug: str) -> HttpResponse:
                 return redirect("survey_unlock", slug=slug)
 
         try:
-            export = ExportService.create_export(
-                survey, request.user, password, survey_key=survey_key
-            )
+            if survey_key:
+                # The survey key only lives in this session, so encrypted
+                # surveys cannot be handed to the export worker. Generated
+                # outside a transaction, so none is held open meanwhile.
+                export = ExportService.create_export(
+                    survey,
+                    request.user,
+                    password,
+                    survey_key=survey_key,
+                    export_format=export_format,
+                )
 
-            # Log export creation in audit log
-            AuditLog.log_data_governance(
-                actor=request.user,
-                action=AuditLog.Action.DATA_EXPORTED,
-                survey=survey,
-                message=f"Survey data export created: {export.response_count} responses, "
-                f"encrypted={'Yes' if export.is_encrypted else 'No'}",
-                request=request,
-                metadata={
-                    "export_id": str(export.id),
-                    "response_count": export.response_count,
-                    "is_encrypted": export.is_encrypted,
-                    "survey_encrypted": survey.requires_whole_response_encryption(),
-                },
-            )
+            with transaction.atomic():
+                if not survey_key:
+                    export = ExportService.queue_export(
+                        survey,
+                        request.user,
+                        password,
+                        export_format=export_format,
+                    )
+
+                # Log export creation in audit log
+                AuditLog.log_data_governance(
+                    actor=request.user,
+                    action=AuditLog.Action.DATA_EXPORTED,
+                    survey=survey,
+                    message=f"Survey data export created: {export.response_count} responses, "
+                    f"encrypted={'Yes' if export.is_encrypted else 'No'}",
+                    request=request,
+                    metadata={
+                        "export_id": str(export.id),
+                        "response_count": export.response_count,
+                        "export_format": export.export_format,
+                        "is_encrypted": export.is_encrypted,
+                        "survey_encrypted": survey.requires_whole_response_encryption(),
+                    },
+                )
 
             # Send email notifications to survey owner and org owner
             _send_export_creation_notifications(survey, request.user, export)
 
-            messages.success(
-                request,
-                f"Export created successfully. {export.response_count} responses exported.",
-            )
+            if export.is_ready:
+                messages.success(
+                    request,
+                    f"Export created successfully. {export.response_count} responses exported.",
+                )
+            else:
+                messages.success(
+                    request,
+                    f"Export queued. {export.response_count} responses will be exported; "
+                    "the download link appears here when the file is ready.",
+                )
 
             return redirect(
                 "surveys:survey_export_download", slug=slug, export_id=export.id
@@ -123,6 +153,7 @@ def survey_export_create(request: HttpRequest, slug: str) -> HttpResponse:
     context = {
         "survey": survey,
         "response_count": response_count,
+        "export_formats": available_export_formats(),
     }
 
     return render(request, "surveys/data_governance/export_create.html", context)
@@ -164,6 +195,12 @@ def survey_export_file(
         messages.error(request, "Invalid or expired download link.")
         return redirect("surveys:dashboard", slug=slug)
 
+    if not export.is_ready:
+        messages.info(request, "This export is not ready to download yet.")
+        return redirect(
+            "surveys:survey_export_download", slug=slug, export_id=export.id
+        )
+
     # Get survey key from session if survey is encrypted
     survey_key = None
     if survey.requires_whole_response_encryption():
@@ -175,13 +212,38 @@ def survey_export_file(
             )
             return redirect("survey_unlock", slug=slug)
 
-    # Generate CSV on-the-fly (more secure than object storage)
-    csv_data = ExportService._generate_csv(survey, survey_key=survey_key)
+    stored_file = ExportService.open_file(export)
+    if stored_file is not None:
+        response = _file_response(
+            request,
+            stored_file,
+            content_type=ExportService.content_type(export),
+            filename=f"survey_{slug}_export.{ExportService.file_extension(export)}",
+        )
+    else:
+        # Exports created before files were stored: stream a fresh CSV
+        response = StreamingHttpResponse(
+            ExportService.iter_csv_chunks(survey, survey_key=survey_key),
+            content_type="text/csv",
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="survey_{slug}_export.csv"'
+        )
+
+    # Resumed downloads fetch the rest of the file with a Range request; only
+    # a request for the start of the file counts as a new download
+    if response.status_code == 200 or _range_start(request) == 0:
+        _record_export_download(request, survey, export)
+
+    return response
 
-    # Record download
+
+def _record_export_download(
+    request: HttpRequest, survey: Survey, export: DataExport
+) -> None:
+    """Count the download, audit log it and notify the survey owners."""
     ExportService.record_download(export)
 
-    # Log download in audit log
     AuditLog.log_data_governance(
         actor=request.user,
         action=AuditLog.Action.DATA_EXPORTED,
@@ -200,13 +262,72 @@ def survey_export_file(
     # Send email notification about download
     _send_export_download_notifications(survey, request.user, export)
 
-    # Return CSV file
-    response = HttpResponse(csv_data, content_type="text/csv")
-    response["Content-Disposition"] = f'attachment; filename="survey_{slug}_export.csv"'
 
+def _range_start(request: HttpRequest) -> int | None:
+    """First byte requested by a single-range ``Range`` header, if any."""
+    match = RANGE_RE.match(request.headers.get("Range", ""))
+    if not match or not match.group(1):
+        return None
+    return int(match.group(1))
+
+
+def _file_response(
+    request: HttpRequest, fileobj, content_type: str, filename: str
+) -> HttpResponse:
+    """
+    Serve a stored file, honouring a single ``Range: bytes=`` request.
+
+    Multi-range and malformed headers are ignored and the whole file is
+    served, as RFC 9110 allows. Unsatisfiable ranges get a 416.
+    """
+    size = fileobj.size
+    match = RANGE_RE.match(request.headers.get("Range", ""))
+    if not match or not (match.group(1) or match.group(2)):
+        response = FileResponse(
+            fileobj, as_attachment=True, filename=filename, content_type=content_type
+        )
+        response["Accept-Ranges"] = "bytes"
+        return response
+
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start > end or start >= size:
+        fileobj.close()
+        response = HttpResponse(status=416)
+        response["Content-Range"] = f"bytes */{size}"
+        return response
+
+    fileobj.seek(start)
+    response = StreamingHttpResponse(
+        _iter_file_range(fileobj, end - start + 1),
+        status=206,
+        content_type=content_type,
+    )
+    response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response["Content-Length"] = str(end - start + 1)
+    response["Accept-Ranges"] = "bytes"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
     return response
 
 
+def _iter_file_range(fileobj, length: int, block_size: int = 64 * 1024):
+    try:
+        while length > 0:
+            data = fileobj.read(min(block_size, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+    finally:
+        fileobj.close()
+
+
 def _send_export_creation_notifications(
     survey: Survey, exporter: "User", export: DataExport
 ) -> None:
@@ -266,6 +387,73 @@ This is an automated notification for audit purposes.
                 logger.error(f"Failed to send export notification to org owner: {e}")
 
 
+def send_response_listing_notifications(
+    survey: Survey, lister: "User", response_count: int, streamed: bool
+) -> None:
+    """
+    Send email notifications when responses are listed through the API.
+
+    The API sends these the first time a user lists a survey's responses,
+    as export creation does for exports. Later listings by the same user,
+    such as incremental syncs, are only audit logged.
+    """
+    from django.conf import settings
+
+    subject = f"[CheckTick] Survey responses listed via API: {survey.name}"
+    message = f"""
+Survey responses have been read through the API for survey: {survey.name}
+
+Listing Details:
+- Listed by: {lister.get_full_name() or lister.username} ({lister.email})
+- Response count: {response_count}{' (stream)' if streamed else ' (first page)'}
+- Encrypted survey: {'Yes' if survey.requires_whole_response_encryption() else 'No'}
+- Listed at: {timezone.now().strftime('%Y-%m-%d %H:%M UTC')}
+
+This is the first time this user has listed the survey's responses. Later
+listings by the same user are recorded in the data governance audit log
+without further email.
+
+This is an automated notification for audit purposes.
+"""
+
+    # Email survey owner
+    if survey.owner and survey.owner.email:
+        try:
+            send_mail(
+                subject=subject,
+                message=message,
+                from_email=settings.DEFAULT_FROM_EMAIL,
+                recipient_list=[survey.owner.email],
+                fail_silently=False,
+            )
+        except Exception as e:
+            import logging
+
+            logger = logging.getLogger(__name__)
+            logger.error(f"Failed to send listing notification to survey owner: {e}")
+
+    # Email org owner if different from survey owner
+    if (
+        survey.organization
+        and survey.organization.owner
+        and survey.organization.owner.email
+    ):
+        if survey.organization.owner.email != survey.owner.email:
+            try:
+                send_mail(
+                    subject=subject,
+                    message=message,
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    recipient_list=[survey.organization.owner.email],
+                    fail_silently=False,
+                )
+            except Exception as e:
+                import logging
+
+                logger = logging.getLogger(__name__)
+                logger.error(f"Failed to send listing notification to org owner: {e}")
+
+
 def _send_export_download_notifications(
     survey: Survey, downloader: "User", export: DataExport
 ) -> None:
@@ -0,0 +1,3 @@
+# Keep uploads, compiled theme stylesheets and export files out of the
+# repository and start each test with an empty cache here too
+from checktick_app.conftest import _clear_cache, _export_root, _media_root  # noqa: F401
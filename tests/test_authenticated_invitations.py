@@ -5,9 +5,12 @@ Tests the new feature that allows inviting specific users to authenticated surve
 with different email templates for existing vs. new users.
 """
 
+from io import StringIO
 from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
 from django.urls import reverse
 import pytest
 
@@ -16,6 +19,7 @@ from checktick_app.surveys.models import (
     QuestionGroup,
     Survey,
     SurveyAccessToken,
+    Task,
 )
 
 User = get_user_model()
@@ -78,6 +82,23 @@ def authenticated_survey(owner, org):
     return s
 
 
+def run_invite_task(survey):
+    """Run the queued send_invites task the way a worker would."""
+    task = Task.objects.get(survey=survey, name="send_invites")
+    assert task.status == Task.Status.QUEUED
+
+    call_command("run_worker", "--once", stdout=StringIO())
+
+    task.refresh_from_db()
+    assert task.status == Task.Status.SUCCEEDED
+    return task
+
+
+def invite_subjects(email):
+    """Subjects of the emails sent to ``email``."""
+    return [message.subject for message in mail.outbox if email in message.to]
+
+
 # ============================================================================
 # Publishing with Authenticated Invitations
 # ============================================================================
@@ -87,33 +108,14 @@ def authenticated_survey(owner, org):
 class TestAuthenticatedInvitationPublishing:
     """Tests for publishing authenticated surveys with email invitations."""
 
-    @patch("threading.Thread")
-    @patch(
-        "checktick_app.core.email_utils.send_authenticated_survey_invite_existing_user"
-    )
-    @patch("checktick_app.core.email_utils.send_authenticated_survey_invite_new_user")
     def test_publish_authenticated_survey_with_existing_user(
         self,
-        mock_send_new_user,
-        mock_send_existing_user,
-        mock_thread,
         client,
         owner,
         existing_user,
         authenticated_survey,
     ):
         """Publishing with invite to existing user should send correct email."""
-
-        # Make threading synchronous by calling target directly
-        def run_sync(target=None, args=()):
-            if target:
-                target(*args)
-
-        mock_thread.return_value.start.side_effect = lambda: run_sync(
-            mock_thread.call_args.kwargs.get("target"),
-            mock_thread.call_args.kwargs.get("args", ()),
-        )
-        mock_send_existing_user.return_value = True
         client.force_login(owner)
 
         response = client.post(
@@ -129,6 +131,8 @@ class TestAuthenticatedInvitationPublishing:
         )
 
         assert response.status_code == 302
+        task = run_invite_task(authenticated_survey)
+        assert task.result["sent_count"] == 1
 
         # Should create token with for_authenticated=True
         token = SurveyAccessToken.objects.filter(
@@ -139,39 +143,21 @@ class TestAuthenticatedInvitationPublishing:
         assert f"Invited: {existing_user.email}" in token.note
 
         # Should send email to existing user, not new user email
-        mock_send_existing_user.assert_called_once()
-        mock_send_new_user.assert_not_called()
+        assert invite_subjects(existing_user.email) == [
+            f"You're invited to complete: {authenticated_survey.name}"
+        ]
 
         # Verify survey is published
         authenticated_survey.refresh_from_db()
         assert authenticated_survey.status == Survey.Status.PUBLISHED
 
-    @patch("threading.Thread")
-    @patch(
-        "checktick_app.core.email_utils.send_authenticated_survey_invite_existing_user"
-    )
-    @patch("checktick_app.core.email_utils.send_authenticated_survey_invite_new_user")
     def test_publish_authenticated_survey_with_new_user(
         self,
-        mock_send_new_user,
-        mock_send_existing_user,
-        mock_thread,
         client,
         owner,
         authenticated_survey,
     ):
         """Publishing with invite to new user should send signup email."""
-
-        # Make threading synchronous by calling target directly
-        def run_sync(target=None, args=()):
-            if target:
-                target(*args)
-
-        mock_thread.return_value.start.side_effect = lambda: run_sync(
-            mock_thread.call_args.kwargs.get("target"),
-            mock_thread.call_args.kwargs.get("args", ()),
-        )
-        mock_send_new_user.return_value = True
         client.force_login(owner)
 
         new_email = "newuser@example.com"
@@ -189,6 +175,7 @@ class TestAuthenticatedInvitationPublishing:
         )
 
         assert response.status_code == 302
+        run_invite_task(authenticated_survey)
 
         # Should create token with for_authenticated=True
         token = SurveyAccessToken.objects.filter(
@@ -199,37 +186,19 @@ class TestAuthenticatedInvitationPublishing:
         assert f"Invited: {new_email}" in token.note
 
         # Should send email to new user, not existing user email
-        mock_send_new_user.assert_called_once()
-        mock_send_existing_user.assert_not_called()
+        assert invite_subjects(new_email) == [
+            "You're invited to join CheckTick and complete: "
+            f"{authenticated_survey.name}"
+        ]
 
-    @patch("threading.Thread")
-    @patch(
-        "checktick_app.core.email_utils.send_authenticated_survey_invite_existing_user"
-    )
-    @patch("checktick_app.core.email_utils.send_authenticated_survey_invite_new_user")
     def test_publish_authenticated_survey_with_multiple_emails(
         self,
-        mock_send_new_user,
-        mock_send_existing_user,
-        mock_thread,
         client,
         owner,
         existing_user,
         authenticated_survey,
     ):
         """Publishing with multiple invites should handle mixed existing/new users."""
-
-        # Make threading synchronous by calling target directly
-        def run_sync(target=None, args=()):
-            if target:
-                target(*args)
-
-        mock_thread.return_value.start.side_effect = lambda: run_sync(
-            mock_thread.call_args.kwargs.get("target"),
-            mock_thread.call_args.kwargs.get("args", ()),
-        )
-        mock_send_existing_user.return_value = True
-        mock_send_new_user.return_value = True
         client.force_login(owner)
 
         new_email1 = "newuser1@example.com"
@@ -250,6 +219,8 @@ class TestAuthenticatedInvitationPublishing:
         )
 
         assert response.status_code == 302
+        task = run_invite_task(authenticated_survey)
+        assert task.result["sent_count"] == 3
 
         # Should create 3 tokens
         tokens = SurveyAccessToken.objects.filter(
@@ -259,57 +230,49 @@ class TestAuthenticatedInvitationPublishing:
         assert tokens.count() == 3
 
         # Should send 1 existing user email, 2 new user emails
-        assert mock_send_existing_user.call_count == 1
-        assert mock_send_new_user.call_count == 2
+        new_user_subject = (
+            "You're invited to join CheckTick and complete: "
+            f"{authenticated_survey.name}"
+        )
+        assert invite_subjects(existing_user.email) == [
+            f"You're invited to complete: {authenticated_survey.name}"
+        ]
+        assert invite_subjects(new_email1) == [new_user_subject]
+        assert invite_subjects(new_email2) == [new_user_subject]
 
-    @patch("threading.Thread")
     def test_publish_authenticated_survey_with_outlook_format(
         self,
-        mock_thread,
         client,
         owner,
         authenticated_survey,
     ):
         """Should parse Outlook contact format: Name <email@domain.com>."""
-
-        # Make threading synchronous by calling target directly
-        def run_sync(target=None, args=()):
-            if target:
-                target(*args)
-
-        mock_thread.return_value.start.side_effect = lambda: run_sync(
-            mock_thread.call_args.kwargs.get("target"),
-            mock_thread.call_args.kwargs.get("args", ()),
-        )
         client.force_login(owner)
 
-        with patch(
-            "checktick_app.core.email_utils.send_authenticated_survey_invite_new_user"
-        ) as mock:
-            mock.return_value = True
-
-            response = client.post(
-                reverse(
-                    "surveys:publish_settings",
-                    kwargs={"slug": authenticated_survey.slug},
-                ),
-                {
-                    "action": "publish",
-                    "visibility": "authenticated",
-                    "invite_emails": "John Smith <john@example.com>",
-                    "no_patient_data_ack": "on",
-                },
-            )
+        response = client.post(
+            reverse(
+                "surveys:publish_settings",
+                kwargs={"slug": authenticated_survey.slug},
+            ),
+            {
+                "action": "publish",
+                "visibility": "authenticated",
+                "invite_emails": "John Smith <john@example.com>",
+                "no_patient_data_ack": "on",
+            },
+        )
 
-            assert response.status_code == 302
+        assert response.status_code == 302
+        run_invite_task(authenticated_survey)
 
-            # Should extract email from Outlook format
-            token = SurveyAccessToken.objects.filter(
-                survey=authenticated_survey,
-                for_authenticated=True,
-            ).first()
-            assert token is not None
-            assert "Invited: john@example.com" in token.note
+        # Should extract email from Outlook format
+        token = SurveyAccessToken.objects.filter(
+            survey=authenticated_survey,
+            for_authenticated=True,
+        ).first()
+        assert token is not None
+        assert "Invited: john@example.com" in token.note
+        assert len(invite_subjects("john@example.com")) == 1
 
     def test_publish_authenticated_survey_with_allow_any_authenticated(
         self,
@@ -426,6 +389,8 @@ class TestAuthenticatedSurveyAccessControl:
             token="test-token",
             created_by=owner,
             note=f"Invited: {existing_user.email}",
+            invite_kind=SurveyAccessToken.InviteKind.AUTHENTICATED,
+            invited_email=existing_user.email,
             for_authenticated=True,
         )
 
@@ -486,6 +451,8 @@ class TestAuthenticatedInvitationManagement:
             token="auth-token",
             created_by=owner,
             note="Invited: user@example.com",
+            invite_kind=SurveyAccessToken.InviteKind.AUTHENTICATED,
+            invited_email="user@example.com",
             for_authenticated=True,
         )
 
@@ -516,6 +483,8 @@ class TestAuthenticatedInvitationManagement:
             token="auth-token",
             created_by=owner,
             note="Invited: auth@example.com",
+            invite_kind=SurveyAccessToken.InviteKind.AUTHENTICATED,
+            invited_email="auth@example.com",
             for_authenticated=True,
         )
 
@@ -525,6 +494,8 @@ class TestAuthenticatedInvitationManagement:
             token="anon-token",
             created_by=owner,
             note="Invited: anon@example.com",
+            invite_kind=SurveyAccessToken.InviteKind.EMAIL,
+            invited_email="anon@example.com",
             for_authenticated=False,
         )
 
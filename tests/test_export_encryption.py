@@ -8,6 +8,7 @@ These tests verify that:
 4. Error handling for missing keys is appropriate
 """
 
+import io
 import os
 
 from django.contrib.auth import get_user_model
@@ -16,7 +17,7 @@ import pytest
 
 from checktick_app.surveys.models import QuestionGroup, Survey, SurveyResponse
 from checktick_app.surveys.services import ExportService
-from checktick_app.surveys.utils import decrypt_sensitive
+from checktick_app.surveys.utils import decrypt_stream, derive_key
 
 User = get_user_model()
 
@@ -240,18 +241,21 @@ class TestExportServiceEncryption:
         password = "TestPassword123"
 
         # Encrypt CSV
-        encrypted_blob, key_id = ExportService._encrypt_csv(csv_data, password)
+        encrypted_blob = b"".join(
+            ExportService._encrypt_chunks(
+                iter([csv_data.encode("utf-8")]), derive_key(password.encode("utf-8"))
+            )
+        )
 
         assert len(encrypted_blob) > len(csv_data.encode("utf-8"))
-        assert key_id.startswith("export-")
+        assert b"Answer1" not in encrypted_blob
 
-        # Decrypt CSV (using decrypt_sensitive)
-
-        # Decrypt with same password (decrypt_sensitive handles KDF)
-        decrypted_dict = decrypt_sensitive(password.encode("utf-8"), encrypted_blob)
+        # Decrypt with same password (decrypt_stream handles KDF)
+        decrypted = b"".join(
+            decrypt_stream(password.encode("utf-8"), io.BytesIO(encrypted_blob))
+        )
 
-        assert "csv_content" in decrypted_dict
-        assert decrypted_dict["csv_content"] == csv_data
+        assert decrypted.decode("utf-8") == csv_data
 
     def test_plain_survey_export_without_key(self, plain_survey_with_responses, user):
         """Plain survey export should work without survey_key."""
@@ -62,12 +62,16 @@ class TestDashboardInviteStats:
             token="token1",
             created_by=user,
             note="Invited: user1@example.com",
+            invite_kind=SurveyAccessToken.InviteKind.EMAIL,
+            invited_email="user1@example.com",
         )
         SurveyAccessToken.objects.create(
             survey=survey,
             token="token2",
             created_by=user,
             note="Invited: user2@example.com",
+            invite_kind=SurveyAccessToken.InviteKind.EMAIL,
+            invited_email="user2@example.com",
         )
         # Non-invite token (shouldn't be counted)
         SurveyAccessToken.objects.create(
@@ -95,6 +99,8 @@ class TestDashboardInviteStats:
             token="token1",
             created_by=user,
             note="Invited: user1@example.com",
+            invite_kind=SurveyAccessToken.InviteKind.EMAIL,
+            invited_email="user1@example.com",
         )
 
         # Token with response (not pending)
@@ -103,6 +109,8 @@ class TestDashboardInviteStats:
             token="token2",
             created_by=user,
             note="Invited: user2@example.com",
+            invite_kind=SurveyAccessToken.InviteKind.EMAIL,
+            invited_email="user2@example.com",
         )
         SurveyResponse.objects.create(
             survey=survey,
@@ -129,6 +137,8 @@ class TestDashboardInviteStats:
             token="token1",
             created_by=user,
             note="Invited: user1@example.com",
+            invite_kind=SurveyAccessToken.InviteKind.EMAIL,
+            invited_email="user1@example.com",
         )
 
         response = client.get(
@@ -157,6 +167,8 @@ class TestPendingInvitesView:
             token="pending-token",
             created_by=user,
             note="Invited: pending@example.com",
+            invite_kind=SurveyAccessToken.InviteKind.EMAIL,
+            invited_email="pending@example.com",
         )
 
         # Used invite (has response)
@@ -165,6 +177,8 @@ class TestPendingInvitesView:
             token="used-token",
             created_by=user,
             note="Invited: used@example.com",
+            invite_kind=SurveyAccessToken.InviteKind.EMAIL,
+            invited_email="used@example.com",
         )
         SurveyResponse.objects.create(
             survey=survey,
@@ -195,6 +209,8 @@ class TestPendingInvitesView:
             token="token1",
             created_by=user,
             note="Invited: test@example.com",
+            invite_kind=SurveyAccessToken.InviteKind.EMAIL,
+            invited_email="test@example.com",
         )
 
         response = client.get(
@@ -237,6 +253,8 @@ class TestResendInvite:
             token="test-token",
             created_by=user,
             note="Invited: test@example.com",
+            invite_kind=SurveyAccessToken.InviteKind.EMAIL,
+            invited_email="test@example.com",
         )
 
         response = client.post(
@@ -260,6 +278,8 @@ class TestResendInvite:
             token="used-token",
             created_by=user,
             note="Invited: used@example.com",
+            invite_kind=SurveyAccessToken.InviteKind.EMAIL,
+            invited_email="used@example.com",
         )
         SurveyResponse.objects.create(
             survey=survey,
@@ -286,6 +306,8 @@ class TestResendInvite:
             token="test-token",
             created_by=survey.owner,
             note="Invited: test@example.com",
+            invite_kind=SurveyAccessToken.InviteKind.EMAIL,
+            invited_email="test@example.com",
         )
 
         response = client.post(
@@ -305,6 +327,8 @@ class TestResendInvite:
             token="test-token",
             created_by=user,
             note="Invited: test@example.com",
+            invite_kind=SurveyAccessToken.InviteKind.EMAIL,
+            invited_email="test@example.com",
         )
 
         response = client.post(
@@ -331,6 +355,8 @@ class TestResendInvite:
             token="test-token",
             created_by=user,
             note="Invited: not-an-email",
+            invite_kind=SurveyAccessToken.InviteKind.EMAIL,
+            invited_email="not-an-email",
         )
 
         response = client.post(
@@ -354,6 +380,8 @@ class TestResendInvite:
             token="test-token",
             created_by=user,
             note="Invited: test@example.com",
+            invite_kind=SurveyAccessToken.InviteKind.EMAIL,
+            invited_email="test@example.com",
         )
 
         response = client.get(
@@ -380,6 +408,8 @@ class TestSparklineInvitesSeries:
             token="token1",
             created_by=user,
             note="Invited: user1@example.com",
+            invite_kind=SurveyAccessToken.InviteKind.EMAIL,
+            invited_email="user1@example.com",
             created_at=timezone.now(),
         )
 
@@ -405,6 +435,8 @@ class TestSparklineInvitesSeries:
             token="token1",
             created_by=user,
             note="Invited: user1@example.com",
+            invite_kind=SurveyAccessToken.InviteKind.EMAIL,
+            invited_email="user1@example.com",
             created_at=timezone.now() - timezone.timedelta(days=1),
         )
 
@@ -437,6 +469,8 @@ class TestInvitesBadgeVisibility:
             token="token1",
             created_by=user,
             note="Invited: user1@example.com",
+            invite_kind=SurveyAccessToken.InviteKind.EMAIL,
+            invited_email="user1@example.com",
         )
 
         response = client.get(
@@ -463,6 +497,8 @@ class TestInvitesBadgeVisibility:
             token="token1",
             created_by=user,
             note="Invited: user1@example.com",
+            invite_kind=SurveyAccessToken.InviteKind.EMAIL,
+            invited_email="user1@example.com",
         )
 
         response = client.get(
@@ -490,6 +526,8 @@ class TestInvitesBadgeVisibility:
             token="token1",
             created_by=user,
             note="Invited: user1@example.com",
+            invite_kind=SurveyAccessToken.InviteKind.EMAIL,
+            invited_email="user1@example.com",
         )
 
         response = client.get(
@@ -517,6 +555,8 @@ class TestInvitesBadgeVisibility:
             token="token1",
             created_by=user,
             note="Invited: user1@example.com",
+            invite_kind=SurveyAccessToken.InviteKind.EMAIL,
+            invited_email="user1@example.com",
         )
 
         response = client.get(
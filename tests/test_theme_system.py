@@ -10,6 +10,8 @@ Tests cover:
 - Environment variable defaults
 """
 
+import re
+
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.test import Client, override_settings
@@ -29,6 +31,15 @@ from checktick_app.surveys.models import Survey
 TEST_PASSWORD = "test-pass"
 
 
+def page_with_theme_css(client, response) -> str:
+    """Page content followed by the theme stylesheet it links to, if any."""
+    content = response.content.decode()
+    link = re.search(r'<link rel="stylesheet" href="(/theme/[^"]+\.css)">', content)
+    if link:
+        content += client.get(link.group(1)).content.decode()
+    return content
+
+
 # =============================================================================
 # Theme Utility Function Tests
 # =============================================================================
@@ -217,7 +228,7 @@ def test_custom_theme_css_injection():
     client = Client()
     response = client.get("/home")
 
-    content = response.content.decode()
+    content = page_with_theme_css(client, response)
     # Custom CSS should be present in a style tag
     assert "color-scheme: light" in content or "--color-primary" in content
 
@@ -235,7 +246,7 @@ def test_theme_css_for_both_light_and_dark():
     client = Client()
     response = client.get("/home")
 
-    content = response.content.decode()
+    content = page_with_theme_css(client, response)
     # Should use logical theme name in data-theme
     assert 'data-theme="checktick-light"' in content
     # Should include preset names in meta tag
@@ -373,7 +384,7 @@ def test_sitebranding_overrides_environment():
     client = Client()
     response = client.get("/home")
 
-    content = response.content.decode()
+    content = page_with_theme_css(client, response)
     # Database values should win over environment variables
     assert 'data-theme="cupcake"' in content
     assert "cupcake,forest" in content
@@ -536,7 +547,7 @@ def test_empty_custom_css_fields():
     response = client.get("/home")
 
     assert response.status_code == 200
-    content = response.content.decode()
+    content = page_with_theme_css(client, response)
 
     # Should still have theme attribute
     assert 'data-theme="wireframe"' in content
@@ -680,7 +691,7 @@ def test_organization_theme_cascades_to_members():
     client.force_login(member)
 
     response = client.get("/home")
-    content = response.content.decode()
+    content = page_with_theme_css(client, response)
 
     # Member should see org theme (cupcake), not platform theme (wireframe)
     assert 'data-theme="cupcake"' in content
@@ -710,7 +721,7 @@ def test_platform_theme_used_when_no_org_theme():
     client.force_login(owner)
 
     response = client.get("/home")
-    content = response.content.decode()
+    content = page_with_theme_css(client, response)
 
     # Should use platform theme since org has no custom theme
     assert 'data-theme="corporate"' in content
@@ -836,7 +847,7 @@ def test_organization_custom_css_overrides():
     client.force_login(owner)
 
     response = client.get("/home")
-    content = response.content.decode()
+    content = page_with_theme_css(client, response)
 
     # Should include custom CSS from organization
     # (The CSS will be generated/normalized, so check for the general pattern)